@@ -3,11 +3,6 @@
 import os
 import aviary.api as av
 
-# # === Choose your output directory here ===
-output_dir = r"/Users/ciscoj/Desktop/School/Davis/Grad_school/Classes_Work/Aircraft_Design/mae298-Jackson2/Result_files"  # <-- change this
-os.makedirs(output_dir, exist_ok=True)
-os.chdir(output_dir)  # all Aviary output files will now be saved here
-
 # ===== Define mission phases
 mission_distance = 3000.0  # nmi
 
@@ -98,39 +93,46 @@ phase_info = {
 
 
 
-# ==== Build and run the problem ====
-# Load aircraft and options data from provided sources
-prob = av.AviaryProblem()
+# The phase_info above is also the base case of the carpet_sweep.py Mach/altitude sweep,
+# which imports it from here, so the run below only happens when this file is executed.
+if __name__ == '__main__':
+    # # === Choose your output directory here ===
+    output_dir = r"/Users/ciscoj/Desktop/School/Davis/Grad_school/Classes_Work/Aircraft_Design/mae298-Jackson2/Result_files"  # <-- change this
+    os.makedirs(output_dir, exist_ok=True)
+    os.chdir(output_dir)  # all Aviary output files will now be saved here
 
-prob.load_inputs(
-    'my_aviary/aviary/models/aircraft/advanced_single_aisle/advanced_single_aisle_FLOPS.csv', phase_info
-)
+    # ==== Build and run the problem ====
+    # Load aircraft and options data from provided sources
+    prob = av.AviaryProblem()
 
-prob.check_and_preprocess_inputs()
+    prob.load_inputs(
+        'my_aviary/aviary/models/aircraft/advanced_single_aisle/advanced_single_aisle_FLOPS.csv', phase_info
+    )
 
-prob.build_model()
+    prob.check_and_preprocess_inputs()
 
-# optimizer and iteration limit are optional provided here
-prob.add_driver('IPOPT', max_iter=120)
+    prob.build_model()
 
-prob.add_design_variables()
+    # optimizer and iteration limit are optional provided here
+    prob.add_driver('IPOPT', max_iter=120)
 
-prob.add_objective()
+    prob.add_design_variables()
 
-prob.setup()
+    prob.add_objective()
 
-prob.run_aviary_problem()
+    prob.setup()
 
-#Print out some variables for quick looking
-print("Mission optimization complete.")
-ASA_fuel_burn = prob.get_val(av.Mission.Summary.FUEL_BURNED, units='kg')[0]
-ASA_wing_aspect_ratio = prob.get_val(av.Aircraft.Wing.ASPECT_RATIO)[0]
-ASA_wing_time = prob.get_val(av.Mission.Summary.FINAL_TIME, units='min')[0]
-# ASA_mission_time = prob.get_val(av.Mission.Summary.MISSION_TIME, units='min')[0]
+    prob.run_aviary_problem()
 
-#printing them out
-print('Mission fuel burn, kg:', ASA_fuel_burn)
-print('Aspect ratio:', ASA_wing_aspect_ratio)
-print('Final time, min:', ASA_wing_time)
-# print('Mission time, min:', ASA_mission_time)
+    #Print out some variables for quick looking
+    print("Mission optimization complete.")
+    ASA_fuel_burn = prob.get_val(av.Mission.Summary.FUEL_BURNED, units='kg')[0]
+    ASA_wing_aspect_ratio = prob.get_val(av.Aircraft.Wing.ASPECT_RATIO)[0]
+    ASA_wing_time = prob.get_val(av.Mission.Summary.FINAL_TIME, units='min')[0]
+    # ASA_mission_time = prob.get_val(av.Mission.Summary.MISSION_TIME, units='min')[0]
 
+    #printing them out
+    print('Mission fuel burn, kg:', ASA_fuel_burn)
+    print('Aspect ratio:', ASA_wing_aspect_ratio)
+    print('Final time, min:', ASA_wing_time)
+    # print('Mission time, min:', ASA_mission_time)
@@ -0,0 +1,340 @@
+# Incremental reader of carpet sweep case recorder files
+"""
+Columnar table of the carpet sweep results, read from the case recorder files.
+
+plotter.py used to have the fuel burn, mission time, altitude and Mach number of every
+carpet case typed in by hand, with zeros for the missing points.  CarpetTable reads them
+from the problem_history.db case recorder files that Aviary writes into the output
+directory of every case, such as the case directories of carpet_sweep.py.
+
+Only the final problem case of each file is read, and only a few scalars are taken from
+it: the fuel burn, the mission time and the first point of the cruise Mach number and
+altitude timeseries.  They are extracted from the recorded outputs by SQLite, so the
+rest of the case, such as the timeseries of every phase, is never deserialized, and the
+driver iterations are never loaded.  A file is only read again when it has changed, and files without a final
+case yet (cases that are still running) are skipped until they have one, so update can
+be called repeatedly while a sweep runs.
+
+The recorder files do not tell whether the optimization converged: the success flag of
+every problem case is set, whatever the driver result.  The converged column is taken
+from the carpet_results.csv table that run_carpet_sweep writes from the driver result of
+every case as it finishes.  A case that is not in that table, such as a case run by
+hand, falls back to the success flag of its last driver case, which is cleared when the
+model evaluation failed, and counts as not converged if there is no driver case.
+
+Example
+-------
+    table = CarpetTable('carpet_output')
+    table.update()
+    mach, altitude, fuel_burn, mission_time = table.points('fuel_burn', 'mission_time')
+"""
+
+import csv
+import os
+import sqlite3
+
+import aviary.api as av
+import numpy as np
+import openmdao.api as om
+
+# columns of the table, in order
+COLUMNS = ('name', 'mach', 'altitude', 'fuel_burn', 'mission_time', 'converged', 'filename')
+
+# array types of the columns that are not float
+_DTYPES = {'name': object, 'converged': bool, 'filename': object}
+
+# case recorder file Aviary writes the final solution of a case to
+SOLUTION_FILE = 'problem_history.db'
+
+# result table of carpet_sweep.run_carpet_sweep in the sweep output directory
+RESULTS_FILE = 'carpet_results.csv'
+
+
+def _has_final_case(filename):
+    """Return True if a case recorder file already holds its final problem case."""
+    try:
+        connection = sqlite3.connect('file:{}?mode=ro'.format(filename), uri=True, timeout=1.0)
+        try:
+            row = connection.execute(
+                "SELECT 1 FROM problem_cases WHERE case_name = 'final' LIMIT 1"
+            ).fetchone()
+        finally:
+            connection.close()
+    except sqlite3.Error:
+        # not created yet, locked by the writer or not a case recorder file
+        return False
+    return row is not None
+
+
+def _read_converged(filename):
+    """Return the converged flag of every case of a carpet_results.csv table, by case name."""
+    try:
+        with open(filename, newline='') as f:
+            return {row['name']: row['converged'] == 'True' for row in csv.DictReader(f)}
+    except (OSError, KeyError, csv.Error):
+        # not written yet, or being rewritten by the sweep
+        return {}
+
+
+def _find(names, suffix):
+    """Return the first name ending with suffix, or None."""
+    for name in names:
+        if name.endswith(suffix):
+            return name
+    return None
+
+
+def _driver_success(filename):
+    """Return the success flag of the last driver case of a recorder file, or None."""
+    connection = sqlite3.connect('file:{}?mode=ro'.format(filename), uri=True, timeout=1.0)
+    try:
+        row = connection.execute(
+            'SELECT success FROM driver_iterations ORDER BY id DESC LIMIT 1'
+        ).fetchone()
+    except sqlite3.Error:
+        row = None
+    finally:
+        connection.close()
+    return None if row is None else bool(row[0])
+
+
+def read_case(filename, cruise_phase='cruise', converged=None):
+    """
+    Read the carpet values of one case from its case recorder file.
+
+    Only the metadata of the file and the requested values of the final problem case are
+    read; the case itself is not deserialized.
+
+    Parameters
+    ----------
+    filename : str
+        problem_history.db case recorder file with a final problem case
+    cruise_phase : str
+        name of the cruise phase the Mach number and altitude are taken from
+    converged : bool or None
+        whether the driver of the case converged, which the recorder file does not hold;
+        None uses the success flag of the last driver case
+
+    Returns
+    -------
+    dict
+        row with the COLUMNS of the table
+    """
+    # the reader loads the variable names and units, but no case
+    reader = om.CaseReader(filename)
+    abs2prom = reader.problem_metadata['abs2prom']['output']
+    prom2abs = {prom: name for name, prom in abs2prom.items()}
+
+    # (column, absolute name, units) of the values to read
+    fields = []
+    for column, name, units in (
+        ('mach', '{}.timeseries.mach'.format(cruise_phase), None),
+        ('altitude', '{}.timeseries.altitude'.format(cruise_phase), 'ft'),
+    ):
+        prom = _find(prom2abs, name)
+        if prom is not None:
+            fields.append((column, prom2abs[prom], units))
+    for column, name, units in (
+        ('fuel_burn', av.Mission.Summary.FUEL_BURNED, 'lbm'),
+        ('mission_time', av.Mission.Summary.FINAL_TIME, 'min'),
+    ):
+        if name in prom2abs:
+            fields.append((column, prom2abs[name], units))
+
+    # only the first entry of every value is extracted from the recorded outputs
+    values = ()
+    if fields:
+        connection = sqlite3.connect('file:{}?mode=ro'.format(filename), uri=True, timeout=1.0)
+        try:
+            values = connection.execute(
+                'SELECT {} FROM problem_cases WHERE case_name = ? ORDER BY id DESC LIMIT 1'.format(
+                    ', '.join('json_extract(outputs, ?)' for _ in fields)
+                ),
+                ['$."{}"[0]'.format(name) for _, name, _ in fields] + ['final'],
+            ).fetchone()
+        finally:
+            connection.close()
+
+    row = {
+        'name': os.path.basename(_case_directory(filename)),
+        'mach': np.nan,
+        'altitude': np.nan,
+        'fuel_burn': np.nan,
+        'mission_time': np.nan,
+        'converged': converged,
+        'filename': filename,
+    }
+    for (column, name, units), value in zip(fields, values or ()):
+        if value is None:
+            continue
+        if units is not None:
+            value = om.convert_units(value, reader._abs2meta[name]['units'], units)
+        row[column] = float(value)
+
+    if converged is None:
+        row['converged'] = bool(_driver_success(filename))
+    return row
+
+
+def _case_directory(filename):
+    """Return the case output directory holding a recorder file in its <name>_out folder."""
+    directory = os.path.dirname(os.path.abspath(filename))
+    if directory.endswith('_out'):
+        directory = os.path.dirname(directory)
+    return directory
+
+
+class CarpetTable(object):
+    """
+    Columnar table of carpet cases read incrementally from case recorder files.
+
+    Attributes
+    ----------
+    output_dir : str
+        sweep output directory searched for case recorder files
+    cruise_phase : str
+        name of the cruise phase the Mach number and altitude are taken from
+    """
+
+    def __init__(self, output_dir, cruise_phase='cruise'):
+        self.output_dir = output_dir
+        self.cruise_phase = cruise_phase
+        self._rows = {}
+        self._driver_success = {}
+        self._mtimes = {}
+        self._converged = {}
+        self._results_mtime = None
+        self._columns = None
+
+    def __len__(self):
+        return len(self._rows)
+
+    def update(self):
+        """
+        Read the case recorder files and result table that changed since the last update.
+
+        Returns
+        -------
+        int
+            number of cases added or updated
+        """
+        changed = 0
+
+        results_file = os.path.join(self.output_dir, RESULTS_FILE)
+        try:
+            results_mtime = os.path.getmtime(results_file)
+        except OSError:
+            results_mtime = None
+        if results_mtime != self._results_mtime:
+            self._converged = _read_converged(results_file)
+            self._results_mtime = results_mtime
+
+        for directory, _, filenames in os.walk(self.output_dir):
+            if SOLUTION_FILE not in filenames:
+                continue
+
+            filename = os.path.join(directory, SOLUTION_FILE)
+            try:
+                mtime = os.path.getmtime(filename)
+            except OSError:
+                continue
+            if self._mtimes.get(filename) == mtime or not _has_final_case(filename):
+                continue
+
+            try:
+                row = read_case(filename, self.cruise_phase)
+            except Exception as err:
+                # a file being written is read again on the next update
+                om.issue_warning('Could not read {}: {}'.format(filename, err))
+                continue
+
+            self._driver_success[filename] = row['converged']
+            row['converged'] = self._converged.get(row['name'], row['converged'])
+            self._rows[filename] = row
+            self._mtimes[filename] = mtime
+            changed += 1
+
+        # cases whose driver result has been added to, or changed in, the result table
+        for filename, row in self._rows.items():
+            converged = self._converged.get(row['name'], self._driver_success[filename])
+            if row['converged'] != converged:
+                row['converged'] = converged
+                changed += 1
+
+        if changed:
+            self._columns = None
+        return changed
+
+    @property
+    def columns(self):
+        """Return the table as a dictionary of arrays, one per column, sorted by altitude and Mach."""
+        if self._columns is None:
+            rows = sorted(
+                self._rows.values(), key=lambda row: (row['altitude'], row['mach'], row['name'])
+            )
+            self._columns = {
+                name: np.array([row[name] for row in rows], dtype=_DTYPES.get(name, float))
+                for name in COLUMNS
+            }
+        return self._columns
+
+    def points(self, *fields):
+        """
+        Return the Mach number, altitude and fields of the converged cases.
+
+        Cases where any of the fields is missing are left out.
+
+        Parameters
+        ----------
+        *fields : str
+            columns to return, such as 'fuel_burn' and 'mission_time'
+
+        Returns
+        -------
+        tuple of ndarray
+            Mach numbers, altitudes [ft] and the fields of the converged cases
+        """
+        columns = self.columns
+        valid = columns['converged'] & np.isfinite(columns['mach'])
+        valid &= np.isfinite(columns['altitude'])
+        for field in fields:
+            valid &= np.isfinite(columns[field])
+
+        return tuple(columns[name][valid] for name in ('mach', 'altitude') + fields)
+
+    def grid(self, field, mach_numbers=None, altitudes=None, decimals=3):
+        """
+        Return a field as nested lists indexed by altitude and Mach number, 0 where missing.
+
+        This is the layout of the hand-typed fuel_burn_data and mission_time_data lists
+        of plotter.py.
+
+        Parameters
+        ----------
+        field : str
+            column to arrange
+        mach_numbers : list of float or None
+            Mach numbers of the columns; None uses the Mach numbers of the cases
+        altitudes : list of float or None
+            altitudes of the rows [ft]; None uses the altitudes of the cases
+        decimals : int
+            decimals the recorded Mach numbers are rounded to before matching
+
+        Returns
+        -------
+        list of list
+            the field value for every altitude (rows) and Mach number (columns)
+        """
+        mach, altitude, value = self.points(field)
+        mach = np.round(mach, decimals)
+        altitude = np.round(altitude)
+
+        if mach_numbers is None:
+            mach_numbers = sorted(set(mach.tolist()))
+        if altitudes is None:
+            altitudes = sorted(set(altitude.tolist()))
+
+        values = dict(zip(zip(altitude.tolist(), mach.tolist()), value.tolist()))
+        return [
+            [values.get((round(a), round(m, decimals)), 0) for m in mach_numbers] for a in altitudes
+        ]
@@ -0,0 +1,198 @@
+# Interpolated carpet surfaces for the carpet plots
+"""
+Cubic carpet surface of several fields over Mach number and altitude.
+
+plotter.py interpolated the fuel burn and the mission time with two separate
+scipy.interpolate.griddata(..., method='cubic') calls, each of which triangulates the
+same points again.  CarpetSurface triangulates the points once and interpolates all
+fields with one Clough-Tocher interpolant, which gives the same values as griddata.
+
+carpet_surface returns a cached CarpetSurface for a data set, keyed on a hash of the
+data, and CarpetSurface.mesh caches the interpolated meshes by size, so redrawing the
+same carpet with a different style does not interpolate again.  Both caches keep the
+CACHE_SIZE most recently used entries.
+
+Example
+-------
+    surface = carpet_surface(mach_flat, alt_flat, fuel=fuel_flat, time=time_flat)
+    mach_grid, alt_grid, meshes = surface.mesh(100, 100)
+    fuel_mesh = meshes['fuel']
+"""
+
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+from scipy.interpolate import CloughTocher2DInterpolator
+from scipy.spatial import Delaunay
+
+# number of data sets kept by carpet_surface
+CACHE_SIZE = 8
+
+_surfaces = OrderedDict()
+
+
+def flatten_carpet(mach_data, altitude_data, **field_data):
+    """
+    Return flat arrays of the nonzero points of nested carpet lists.
+
+    The nested lists hold one row per altitude, as in plotter.py, and may have rows of
+    different lengths; zeros mark the missing points.
+
+    Parameters
+    ----------
+    mach_data : list of list
+        Mach number of every point
+    altitude_data : list of list
+        altitude of every point [ft]
+    **field_data : list of list
+        field values of every point, such as fuel burn and mission time
+
+    Returns
+    -------
+    mach : ndarray
+        Mach numbers of the points where the Mach number and every field are nonzero
+    altitude : ndarray
+        altitudes of those points [ft]
+    fields : dict
+        flat field values of those points, keyed by field name
+    """
+    rows = [mach_data, altitude_data] + list(field_data.values())
+
+    # every row is cut to the shortest of the lists it appears in
+    lengths = [min(len(data[i]) for data in rows) for i in range(len(mach_data))]
+    flat = [
+        np.concatenate([np.asarray(data[i][:n], dtype=float) for i, n in enumerate(lengths)])
+        for data in rows
+    ]
+
+    valid = flat[0] != 0.0
+    for values in flat[2:]:
+        valid &= values != 0.0
+
+    fields = {name: values[valid] for name, values in zip(field_data, flat[2:])}
+    return flat[0][valid], flat[1][valid], fields
+
+
+def _data_key(mach, altitude, fields):
+    """Return a hash of the carpet data."""
+    digest = hashlib.sha1()
+    for name, values in [('mach', mach), ('altitude', altitude)] + sorted(fields.items()):
+        digest.update(name.encode('utf-8'))
+        digest.update(np.ascontiguousarray(values, dtype=float).tobytes())
+    return digest.hexdigest()
+
+
+class CarpetSurface(object):
+    """
+    Clough-Tocher interpolant of several fields over one triangulation of the carpet points.
+
+    Attributes
+    ----------
+    mach : ndarray
+        Mach numbers of the data points
+    altitude : ndarray
+        altitudes of the data points [ft]
+    fields : tuple of str
+        names of the interpolated fields
+    """
+
+    def __init__(self, mach, altitude, **fields):
+        self.mach = np.asarray(mach, dtype=float).ravel()
+        self.altitude = np.asarray(altitude, dtype=float).ravel()
+        self.fields = tuple(fields)
+
+        values = np.column_stack(
+            [np.asarray(fields[name], dtype=float).ravel() for name in self.fields]
+        )
+        self._triangulation = Delaunay(np.column_stack((self.mach, self.altitude)))
+        self._interpolant = CloughTocher2DInterpolator(self._triangulation, values)
+        self._meshes = OrderedDict()
+
+    def __call__(self, mach, altitude):
+        """
+        Return every field at the given points.
+
+        Parameters
+        ----------
+        mach : array_like
+            Mach numbers of the points
+        altitude : array_like
+            altitudes of the points [ft], broadcast against mach
+
+        Returns
+        -------
+        dict
+            arrays of the shape of the broadcast points, keyed by field name; NaN outside
+            the convex hull of the data points
+        """
+        mach, altitude = np.broadcast_arrays(np.asarray(mach, dtype=float), altitude)
+        values = self._interpolant(np.column_stack((mach.ravel(), altitude.ravel())))
+        return {name: values[:, i].reshape(mach.shape) for i, name in enumerate(self.fields)}
+
+    def mesh(self, num_mach=100, num_altitude=100):
+        """
+        Return every field on an evenly spaced mesh over the range of the data points.
+
+        The result is cached by mesh size, for the CACHE_SIZE most recent sizes.
+
+        Parameters
+        ----------
+        num_mach : int
+            number of Mach numbers of the mesh
+        num_altitude : int
+            number of altitudes of the mesh
+
+        Returns
+        -------
+        mach_grid : ndarray
+            (num_mach,) Mach numbers of the mesh columns
+        alt_grid : ndarray
+            (num_altitude,) altitudes of the mesh rows [ft]
+        meshes : dict
+            (num_altitude, num_mach) arrays keyed by field name
+        """
+        key = (num_mach, num_altitude)
+        if key in self._meshes:
+            self._meshes.move_to_end(key)
+            return self._meshes[key]
+
+        mach_grid = np.linspace(self.mach.min(), self.mach.max(), num_mach)
+        alt_grid = np.linspace(self.altitude.min(), self.altitude.max(), num_altitude)
+        meshes = self(mach_grid[None, :], alt_grid[:, None])
+        self._meshes[key] = (mach_grid, alt_grid, meshes)
+        while len(self._meshes) > CACHE_SIZE:
+            self._meshes.popitem(last=False)
+
+        return self._meshes[key]
+
+
+def carpet_surface(mach, altitude, **fields):
+    """
+    Return the CarpetSurface of the data, reusing the surface built for identical data.
+
+    Parameters
+    ----------
+    mach : array_like
+        Mach numbers of the data points
+    altitude : array_like
+        altitudes of the data points [ft]
+    **fields : array_like
+        field values of the data points, such as fuel=..., time=...
+
+    Returns
+    -------
+    CarpetSurface
+        the surface of the data
+    """
+    key = _data_key(mach, altitude, fields)
+    if key in _surfaces:
+        _surfaces.move_to_end(key)
+        return _surfaces[key]
+
+    surface = CarpetSurface(mach, altitude, **fields)
+    _surfaces[key] = surface
+    while len(_surfaces) > CACHE_SIZE:
+        _surfaces.popitem(last=False)
+
+    return surface
@@ -0,0 +1,344 @@
+# Response surface surrogate of the cruise Mach/altitude carpet
+"""
+Polynomial response surface of the mission fuel burn and time over cruise Mach and altitude.
+
+Every point of the carpet is a full AviaryProblem solve.  CarpetSurrogate fits a smooth
+least-squares polynomial in Mach number and altitude to the converged cases of a
+carpet sweep instead, so that trade studies can query any Mach number and altitude
+inside the swept range without running Aviary.  Evaluation and the analytic partial
+derivatives with respect to Mach number and altitude are vectorized over any number of
+query points, and a fitted surrogate is saved to a small .npz file holding only its
+coefficients.  A polynomial fit is not to be trusted outside the data, so points
+outside the swept Mach number and altitude range evaluate to NaN unless extrapolation
+is asked for.
+
+The fit takes the results of carpet_sweep.run_carpet_sweep (or carpet_results.csv read
+back with carpet_sweep.read_results) or a carpet_ingest.CarpetTable, i.e. the fuel burn
+and mission time that ASA_Optimized.py prints, keyed by the cruise Mach and altitude.
+
+Example
+-------
+    from carpet_sweep import read_results
+    from carpet_surrogate import CarpetSurrogate
+
+    surrogate = CarpetSurrogate.from_results(read_results('carpet_output/carpet_results.csv'))
+    surrogate.save('carpet_surrogate.npz')
+
+    surrogate = CarpetSurrogate.load('carpet_surrogate.npz')
+    values = surrogate(mach, altitude)
+    fuel_burn = values['fuel_burn']
+    d_fuel_d_mach, d_fuel_d_altitude = surrogate.partials(mach, altitude)['fuel_burn']
+"""
+
+import os
+
+import numpy as np
+
+# fields fitted by from_results and from_table, with their units
+FIELDS = (('fuel_burn', 'lbm'), ('mission_time', 'min'))
+
+
+def _exponents(degree):
+    """Return the (Mach, altitude) exponents of the terms of a polynomial of total degree."""
+    return np.array(
+        [(i, n - i) for n in range(degree + 1) for i in range(n, -1, -1)], dtype=int
+    ).reshape(-1, 2)
+
+
+def _powers(x, degree):
+    """Return x**0 ... x**degree stacked along a new last axis."""
+    return x[..., None] ** np.arange(degree + 1)
+
+
+class CarpetSurrogate(object):
+    """
+    Least-squares polynomial surface of several fields over Mach number and altitude.
+
+    The polynomial is fitted in Mach number and altitude scaled to [-1, 1] over the
+    range of the data.
+
+    Attributes
+    ----------
+    fields : tuple of str
+        names of the fitted fields
+    units : tuple of str
+        units of the fitted fields
+    degree : int
+        total degree of the polynomial
+    center : ndarray
+        Mach number and altitude [ft] at the center of the data range
+    scale : ndarray
+        half range of the Mach number and altitude [ft] of the data
+    coefficients : ndarray
+        (num_terms, num_fields) polynomial coefficients
+    rms_error : ndarray
+        (num_fields,) root mean square residual of the fit at the data points
+    num_points : int
+        number of data points of the fit
+    """
+
+    def __init__(self, fields, units, degree, center, scale, coefficients, rms_error, num_points):
+        self.fields = tuple(fields)
+        self.units = tuple(units)
+        self.degree = int(degree)
+        self.center = np.asarray(center, dtype=float)
+        self.scale = np.asarray(scale, dtype=float)
+        self.coefficients = np.asarray(coefficients, dtype=float)
+        self.rms_error = np.asarray(rms_error, dtype=float)
+        self.num_points = int(num_points)
+        self._exponents = _exponents(self.degree)
+
+    @classmethod
+    def fit(cls, mach, altitude, degree=3, units=None, **fields):
+        """
+        Fit the surrogate to data points.
+
+        The degree is lowered until the polynomial has no more terms than there are
+        data points.
+
+        Parameters
+        ----------
+        mach : array_like
+            Mach numbers of the data points
+        altitude : array_like
+            altitudes of the data points [ft]
+        degree : int
+            highest total degree of the polynomial
+        units : dict or None
+            units of the fields, keyed by field name
+        **fields : array_like
+            field values of the data points, such as fuel_burn=..., mission_time=...
+
+        Returns
+        -------
+        CarpetSurrogate
+            the fitted surrogate
+        """
+        mach = np.asarray(mach, dtype=float).ravel()
+        altitude = np.asarray(altitude, dtype=float).ravel()
+        values = np.column_stack([np.asarray(fields[name], dtype=float).ravel() for name in fields])
+        units = units or {}
+
+        if mach.size < 3:
+            raise ValueError('At least 3 data points are needed, got {}'.format(mach.size))
+
+        while degree > 0 and (degree + 1) * (degree + 2) // 2 > mach.size:
+            degree -= 1
+
+        points = np.column_stack((mach, altitude))
+        lower = points.min(axis=0)
+        upper = points.max(axis=0)
+        center = 0.5 * (lower + upper)
+        scale = 0.5 * (upper - lower)
+        scale[scale == 0.0] = 1.0
+
+        surrogate = cls(
+            fields,
+            [units.get(name, '') for name in fields],
+            degree,
+            center,
+            scale,
+            np.zeros((len(_exponents(degree)), values.shape[1])),
+            np.zeros(values.shape[1]),
+            mach.size,
+        )
+        basis = surrogate._basis(mach, altitude)
+        surrogate.coefficients = np.linalg.lstsq(basis, values, rcond=None)[0]
+        surrogate.rms_error = np.sqrt(
+            np.mean((basis @ surrogate.coefficients - values) ** 2, axis=0)
+        )
+
+        return surrogate
+
+    @classmethod
+    def from_results(cls, results, degree=3, fields=FIELDS):
+        """
+        Fit the surrogate to the converged result rows of a carpet sweep.
+
+        Parameters
+        ----------
+        results : list of dict
+            result rows from carpet_sweep.run_carpet_sweep or carpet_sweep.read_results
+        degree : int
+            highest total degree of the polynomial
+        fields : sequence of (str, str)
+            columns to fit as (name, units)
+
+        Returns
+        -------
+        CarpetSurrogate
+            the fitted surrogate
+        """
+        names = [field[0] for field in fields]
+        rows = [
+            row
+            for row in results
+            if row['converged'] and all(row[name] is not None for name in names)
+        ]
+        return cls.fit(
+            [row['mach'] for row in rows],
+            [row['altitude'] for row in rows],
+            degree=degree,
+            units=dict(fields),
+            **{name: [row[name] for row in rows] for name in names},
+        )
+
+    @classmethod
+    def from_table(cls, table, degree=3, fields=FIELDS):
+        """
+        Fit the surrogate to the converged cases of a carpet_ingest.CarpetTable.
+
+        Parameters
+        ----------
+        table : CarpetTable
+            table of the carpet cases, already updated
+        degree : int
+            highest total degree of the polynomial
+        fields : sequence of (str, str)
+            columns to fit as (name, units)
+
+        Returns
+        -------
+        CarpetSurrogate
+            the fitted surrogate
+        """
+        names = [field[0] for field in fields]
+        columns = table.points(*names)
+        return cls.fit(
+            columns[0],
+            columns[1],
+            degree=degree,
+            units=dict(fields),
+            **dict(zip(names, columns[2:])),
+        )
+
+    def _scaled(self, mach, altitude):
+        """Return the broadcast Mach numbers and altitudes scaled to the data range."""
+        mach, altitude = np.broadcast_arrays(
+            np.asarray(mach, dtype=float), np.asarray(altitude, dtype=float)
+        )
+        return (mach - self.center[0]) / self.scale[0], (altitude - self.center[1]) / self.scale[1]
+
+    def _basis(self, mach, altitude):
+        """Return the (..., num_terms) polynomial terms at the points."""
+        x, y = self._scaled(mach, altitude)
+        i, j = self._exponents.T
+        return _powers(x, self.degree)[..., i] * _powers(y, self.degree)[..., j]
+
+    def __call__(self, mach, altitude, extrapolate=False):
+        """
+        Return every field at the given points.
+
+        Parameters
+        ----------
+        mach : array_like
+            Mach numbers of the points
+        altitude : array_like
+            altitudes of the points [ft], broadcast against mach
+        extrapolate : bool
+            if False, points outside the range of the data are NaN
+
+        Returns
+        -------
+        dict
+            arrays of the shape of the broadcast points, keyed by field name
+        """
+        values = self._basis(mach, altitude) @ self.coefficients
+        if not extrapolate:
+            values[~self.in_range(mach, altitude)] = np.nan
+        return {name: values[..., k] for k, name in enumerate(self.fields)}
+
+    def partials(self, mach, altitude, extrapolate=False):
+        """
+        Return the derivatives of every field with respect to Mach number and altitude.
+
+        Parameters
+        ----------
+        mach : array_like
+            Mach numbers of the points
+        altitude : array_like
+            altitudes of the points [ft], broadcast against mach
+        extrapolate : bool
+            if False, the derivatives at points outside the range of the data are NaN
+
+        Returns
+        -------
+        dict
+            (d field / d mach, d field / d altitude [1/ft]) array pairs of the shape of the
+            broadcast points, keyed by field name
+        """
+        x, y = self._scaled(mach, altitude)
+        i, j = self._exponents.T
+        x_powers = _powers(x, self.degree)
+        y_powers = _powers(y, self.degree)
+
+        # d(x**i)/dx = i * x**(i - 1); the i == 0 terms are zeroed by the factor i
+        d_basis_dx = i * x_powers[..., np.maximum(i - 1, 0)] * y_powers[..., j]
+        d_basis_dy = j * x_powers[..., i] * y_powers[..., np.maximum(j - 1, 0)]
+
+        d_mach = (d_basis_dx @ self.coefficients) / self.scale[0]
+        d_altitude = (d_basis_dy @ self.coefficients) / self.scale[1]
+        if not extrapolate:
+            outside = ~self.in_range(mach, altitude)
+            d_mach[outside] = np.nan
+            d_altitude[outside] = np.nan
+        return {name: (d_mach[..., k], d_altitude[..., k]) for k, name in enumerate(self.fields)}
+
+    def in_range(self, mach, altitude):
+        """Return True where points lie inside the Mach number and altitude range of the data."""
+        x, y = self._scaled(mach, altitude)
+
+        # the data points on the edges of the range scale to 1 up to round-off
+        return (np.abs(x) <= 1.0 + 1e-12) & (np.abs(y) <= 1.0 + 1e-12)
+
+    def save(self, filename):
+        """Save the surrogate coefficients to a .npz file, replacing it atomically."""
+        directory = os.path.dirname(filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        tmp_filename = filename + '.tmp'
+        with open(tmp_filename, 'wb') as f:
+            np.savez(
+                f,
+                fields=np.array(self.fields),
+                units=np.array(self.units),
+                degree=self.degree,
+                center=self.center,
+                scale=self.scale,
+                coefficients=self.coefficients,
+                rms_error=self.rms_error,
+                num_points=self.num_points,
+            )
+        os.replace(tmp_filename, filename)
+
+    @classmethod
+    def load(cls, filename):
+        """Load a surrogate saved with save."""
+        with np.load(filename) as data:
+            return cls(
+                data['fields'].tolist(),
+                data['units'].tolist(),
+                data['degree'],
+                data['center'],
+                data['scale'],
+                data['coefficients'],
+                data['rms_error'],
+                data['num_points'],
+            )
+
+
+if __name__ == '__main__':
+    import sys
+
+    from carpet_sweep import read_results
+
+    # python carpet_surrogate.py carpet_output/carpet_results.csv carpet_surrogate.npz
+    results_file, surrogate_file = sys.argv[1:3]
+    surrogate = CarpetSurrogate.from_results(read_results(results_file))
+    surrogate.save(surrogate_file)
+
+    for name, units, error in zip(surrogate.fields, surrogate.units, surrogate.rms_error):
+        print(
+            '{}: rms error {:.4g} {} over {} cases'.format(name, error, units, surrogate.num_points)
+        )
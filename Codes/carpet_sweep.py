@@ -0,0 +1,1011 @@
+# Sweep engine for the cruise Mach/altitude carpet plots
+"""
+Run a grid of cruise Mach numbers and altitudes through Aviary in a process pool.
+
+The carpet data in plotter.py used to be produced by editing the cruise phase of
+For_carpet_plots.py by hand and rerunning it once per grid point.  run_carpet_sweep takes
+the base phase_info, the aircraft csv and the Mach and altitude grid, writes one
+phase_info per grid point with cruise_phase_info, and runs every case in its own
+process and output directory.  The fuel burn and mission time of every case are
+collected into one result table, written to carpet_results.csv in the sweep output
+directory as the cases finish, and carpet_grid turns the table into the nested lists used by plotter.py.
+
+With continuation=True the cases are run along a nearest-neighbor path through the grid
+and each case is seeded with seed_from_solution from the converged trajectory of the
+nearest case that has already been solved.  Cases that fail are retried once from a
+different converged neighbor.
+
+With adaptive=True only part of the grid is run.  run_adaptive_carpet starts from the
+corners, edge midpoints and center, and adaptive_points picks each next batch where the
+cubic and linear interpolants of the fuel burn disagree most, weighted towards the
+lowest fuel burn, until the error estimate meets a tolerance.
+
+Example
+-------
+    from For_carpet_plots import phase_info
+    from carpet_sweep import carpet_grid, run_carpet_sweep
+
+    results = run_carpet_sweep(
+        phase_info,
+        'models/aircraft/advanced_single_aisle/advanced_single_aisle_FLOPS.csv',
+        mach_numbers=[0.76, 0.78, 0.80, 0.82],
+        altitudes=[36_000, 37_000, 38_000, 39_000, 40_000],
+        output_dir='carpet_output',
+    )
+    fuel_burn_data = carpet_grid(results, 'fuel_burn')
+"""
+
+import copy
+import csv
+import os
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+
+import aviary.api as av
+import numpy as np
+import openmdao.api as om
+from dymos.load_case import find_phases
+from scipy.interpolate import CloughTocher2DInterpolator, LinearNDInterpolator
+from scipy.spatial import QhullError
+
+# columns of the result table, in order
+RESULT_FIELDS = (
+    'name',
+    'mach',
+    'altitude',
+    'fuel_burn',
+    'mission_time',
+    'converged',
+    'iterations',
+    'wall_time',
+    'seeded_from',
+    'output_dir',
+    'solution_file',
+    'error',
+)
+
+
+def cruise_phase_info(base_phase_info, mach, altitude, cruise_phase='cruise'):
+    """
+    Return a copy of phase_info flying the cruise phase at the given Mach and altitude.
+
+    The cruise phase is set to a constant Mach number and altitude, the phase before it
+    ends and the phase after it starts at the cruise condition, and any bounds or initial
+    guesses of those phases are widened or moved to include the cruise condition.  All
+    altitude bounds and guesses in phase_info are assumed to be in feet.
+
+    Parameters
+    ----------
+    base_phase_info : dict
+        phase_info to start from; it is not modified
+    mach : float
+        cruise Mach number
+    altitude : float
+        cruise altitude [ft]
+    cruise_phase : str
+        name of the cruise phase in phase_info
+
+    Returns
+    -------
+    dict
+        the new phase_info
+    """
+    phase_info = copy.deepcopy(base_phase_info)
+
+    phases = [name for name in phase_info if name not in ('pre_mission', 'post_mission')]
+    index = phases.index(cruise_phase)
+
+    cruise = phase_info[cruise_phase]
+    for key, value, units in (('mach', mach, 'unitless'), ('altitude', altitude, 'ft')):
+        _set_option(cruise, key + '_initial', value, units)
+        _set_option(cruise, key + '_final', value, units)
+        _set_guess(cruise, key, [value, value], units)
+    _set_option(cruise, 'altitude_bounds', (altitude, altitude), 'ft')
+    _widen_bounds(cruise, 'mach_bounds', mach)
+
+    if index > 0:
+        climb = phase_info[phases[index - 1]]
+        _set_option(climb, 'mach_final', mach, 'unitless')
+        _set_option(climb, 'altitude_final', altitude, 'ft')
+        _set_guess(climb, 'mach', mach, 'unitless', end=-1)
+        _set_guess(climb, 'altitude', altitude, 'ft', end=-1)
+        _widen_bounds(climb, 'mach_bounds', mach)
+        _widen_bounds(climb, 'altitude_bounds', altitude)
+
+    if index < len(phases) - 1:
+        descent = phase_info[phases[index + 1]]
+        _set_option(descent, 'mach_initial', mach, 'unitless')
+        _set_option(descent, 'altitude_initial', altitude, 'ft')
+        _set_guess(descent, 'mach', mach, 'unitless', end=0)
+        _set_guess(descent, 'altitude', altitude, 'ft', end=0)
+        _widen_bounds(descent, 'mach_bounds', mach)
+        _widen_bounds(descent, 'altitude_bounds', altitude)
+
+    return phase_info
+
+
+def _set_option(phase, key, value, units):
+    """Set a user option of the phase."""
+    phase.setdefault('user_options', {})[key] = (value, units)
+
+
+def _set_guess(phase, key, value, units, end=None):
+    """Set an existing initial guess of the phase, or only its first or last value with end."""
+    guesses = phase.get('initial_guesses', {})
+    if key not in guesses:
+        return
+
+    if end is None:
+        guesses[key] = (value, units)
+    else:
+        values = list(guesses[key][0])
+        values[end] = value
+        guesses[key] = (values, guesses[key][1])
+
+
+def _widen_bounds(phase, key, value):
+    """Widen existing (lower, upper) bounds of the phase to include value."""
+    user_options = phase.get('user_options', {})
+    if key not in user_options:
+        return
+
+    (lower, upper), units = user_options[key]
+    user_options[key] = ((min(lower, value), max(upper, value)), units)
+
+
+def case_name(mach, altitude):
+    """Return the name and output directory name of a carpet case."""
+    return 'mach_{:.3f}_alt_{:.0f}'.format(mach, altitude)
+
+
+def carpet_cases(
+    base_phase_info,
+    aircraft_csv,
+    mach_numbers,
+    altitudes,
+    output_dir,
+    optimizer='IPOPT',
+    max_iter=120,
+    cruise_phase='cruise',
+):
+    """
+    Return the case dictionaries of a Mach/altitude carpet, one per grid point.
+
+    Parameters
+    ----------
+    base_phase_info : dict
+        phase_info that every case starts from
+    aircraft_csv : str
+        aircraft csv file, either a path or a path relative to the Aviary package
+    mach_numbers : list of float
+        cruise Mach numbers of the grid
+    altitudes : list of float
+        cruise altitudes of the grid [ft]
+    output_dir : str
+        directory holding one output directory per case
+    optimizer : str
+        Aviary driver name
+    max_iter : int
+        driver iteration limit
+    cruise_phase : str
+        name of the cruise phase in phase_info
+
+    Returns
+    -------
+    list of dict
+        the cases, ordered by altitude and then by Mach number
+    """
+    # paths relative to the current directory must survive the change into the case
+    # directory; anything else is left for Aviary to find in its package
+    if os.path.exists(aircraft_csv):
+        aircraft_csv = os.path.abspath(aircraft_csv)
+
+    cases = []
+    for altitude in altitudes:
+        for mach in mach_numbers:
+            name = case_name(mach, altitude)
+            cases.append(
+                {
+                    'name': name,
+                    'mach': mach,
+                    'altitude': altitude,
+                    'phase_info': cruise_phase_info(base_phase_info, mach, altitude, cruise_phase),
+                    'aircraft_csv': aircraft_csv,
+                    'output_dir': os.path.abspath(os.path.join(output_dir, name)),
+                    'optimizer': optimizer,
+                    'max_iter': max_iter,
+                }
+            )
+
+    return cases
+
+
+def build_problem(case):
+    """Load, build and set up the AviaryProblem of a case, the same way as ASA_Optimized.py."""
+    prob = av.AviaryProblem()
+    prob.load_inputs(case['aircraft_csv'], case['phase_info'])
+    prob.check_and_preprocess_inputs()
+    prob.build_model()
+    prob.add_driver(case['optimizer'], max_iter=case['max_iter'])
+    prob.add_design_variables()
+    prob.add_objective()
+    prob.setup()
+
+    return prob
+
+
+def seed_from_solution(prob, solution_file, phase_info):
+    """
+    Set the initial guess of every phase from the converged trajectory of another case.
+
+    The initial time, duration and states of every phase are interpolated from the final
+    case of the solution file onto the grid of this problem.  Mach and altitude are only
+    copied into phases that optimize them, so the fixed cruise condition of this case set
+    by cruise_phase_info is kept.
+
+    Parameters
+    ----------
+    prob : AviaryProblem
+        set up problem to seed
+    solution_file : str
+        problem_history.db solution file of a converged case with the same phases
+    phase_info : dict
+        phase_info of prob
+    """
+    case = om.CaseReader(solution_file).get_case('final')
+    previous = {
+        meta['prom_name']: (meta['val'], meta['units'])
+        for _, meta in case.list_outputs(out_stream=None, units=True, prom_name=True)
+    }
+
+    prob.final_setup()
+    names = [
+        meta['prom_name']
+        for _, meta in prob.model.list_inputs(out_stream=None, prom_name=True)
+        + prob.model.list_outputs(out_stream=None, prom_name=True)
+    ]
+
+    def find(names, suffix):
+        matches = [name for name in names if name.endswith(suffix)]
+        return matches[0] if matches else None
+
+    for phase in find_phases(prob.model).values():
+        phase_name = phase.name
+        if phase_name not in phase_info:
+            continue
+
+        time_path = find(
+            previous, '{}.timeseries.{}'.format(phase_name, phase.time_options['name'])
+        )
+        if time_path is None:
+            continue
+
+        time_val, time_units = previous[time_path]
+        time_val = time_val.ravel()
+        prob.set_val(find(names, '{}.t_initial'.format(phase_name)), time_val[0], units=time_units)
+        prob.set_val(
+            find(names, '{}.t_duration'.format(phase_name)),
+            time_val[-1] - time_val[0],
+            units=time_units,
+        )
+        unique_time, unique_idxs = np.unique(time_val, return_index=True)
+
+        user_options = phase_info[phase_name].get('user_options', {})
+        seeded = list(phase.state_options)
+        seeded += [
+            name
+            for name in phase.control_options
+            if user_options.get('{}_optimize'.format(name), False)
+        ]
+
+        for name in seeded:
+            kind = 'states' if name in phase.state_options else 'controls'
+            target = find(names, '{}.{}:{}'.format(phase_name, kind, name))
+            source = find(previous, '{}.timeseries.{}'.format(phase_name, name))
+            if target is None or source is None:
+                continue
+
+            val, units = previous[source]
+            prob.set_val(
+                target,
+                phase.interp(name=name, xs=unique_time, ys=val[unique_idxs], kind='slinear'),
+                units=units,
+            )
+
+
+def _solution_file(output_dir):
+    """Return the problem_history.db solution file written under output_dir, if any."""
+    for directory, _, filenames in os.walk(output_dir):
+        if 'problem_history.db' in filenames:
+            return os.path.join(directory, 'problem_history.db')
+    return ''
+
+
+def run_case(case):
+    """
+    Run one Aviary case in its own output directory and return its result row.
+
+    Any exception is caught and reported in the error column so that one failed case
+    does not stop the sweep.
+
+    Parameters
+    ----------
+    case : dict
+        case dictionary from carpet_cases; if it has a restart_file, the case is seeded
+        from that solution with seed_from_solution
+
+    Returns
+    -------
+    dict
+        result row with the RESULT_FIELDS columns; fuel burn is in lbm and mission time
+        in minutes
+    """
+    start_time = time.time()
+    result = {field: case.get(field) for field in RESULT_FIELDS}
+    result.update(
+        fuel_burn=None,
+        mission_time=None,
+        converged=False,
+        iterations=None,
+        seeded_from=case.get('seeded_from', ''),
+        solution_file='',
+        error='',
+    )
+
+    os.makedirs(case['output_dir'], exist_ok=True)
+    cwd = os.getcwd()
+    os.chdir(case['output_dir'])  # all Aviary output files of this case are saved here
+    try:
+        prob = build_problem(case)
+        if case.get('restart_file'):
+            seed_from_solution(prob, case['restart_file'], case['phase_info'])
+        prob.run_aviary_problem(make_plots=False)
+
+        result['converged'] = bool(prob.driver.result.success)
+        result['iterations'] = prob.driver.result.iter_count
+        result['solution_file'] = _solution_file(case['output_dir'])
+        result['fuel_burn'] = float(prob.get_val(av.Mission.Summary.FUEL_BURNED, units='lbm')[0])
+        result['mission_time'] = float(prob.get_val(av.Mission.Summary.FINAL_TIME, units='min')[0])
+    except Exception:
+        result['error'] = traceback.format_exc(limit=3)
+    finally:
+        os.chdir(cwd)
+
+    result['wall_time'] = time.time() - start_time
+    return result
+
+
+def run_cases(cases, max_workers=None, runner=run_case, callback=None):
+    """
+    Run cases in a process pool and return their results in the order of the cases.
+
+    Parameters
+    ----------
+    cases : list of dict
+        case dictionaries
+    max_workers : int or None
+        number of worker processes; None uses one per CPU and 1 runs the cases in this
+        process
+    runner : callable
+        module level function that runs one case and returns its result row
+    callback : callable or None
+        called with each result row as soon as its case finishes
+
+    Returns
+    -------
+    list of dict
+        result rows, in the same order as cases
+    """
+    results = [None] * len(cases)
+
+    if max_workers == 1:
+        for i, case in enumerate(cases):
+            results[i] = runner(case)
+            if callback is not None:
+                callback(results[i])
+        return results
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(runner, case): i for i, case in enumerate(cases)}
+        for future in as_completed(futures):
+            i = futures[future]
+            results[i] = future.result()
+            if callback is not None:
+                callback(results[i])
+
+    return results
+
+
+def _coordinates(cases):
+    """Return the (Mach, altitude) of every case, normalized by their range over the cases."""
+    coordinates = np.array([[case['mach'], case['altitude']] for case in cases], dtype=float)
+    scale = np.ptp(coordinates, axis=0)
+    scale[scale == 0.0] = 1.0
+    return coordinates / scale
+
+
+def continuation_order(cases):
+    """
+    Return the cases ordered along a nearest-neighbor path through the grid.
+
+    The path starts at the first case and always moves to the nearest case not yet
+    visited, with Mach number and altitude normalized by their range over the cases.
+
+    Parameters
+    ----------
+    cases : list of dict
+        case dictionaries with mach and altitude entries
+
+    Returns
+    -------
+    list of dict
+        the same cases in path order
+    """
+    coordinates = _coordinates(cases)
+
+    remaining = list(range(len(cases)))
+    order = [remaining.pop(0)] if remaining else []
+    while remaining:
+        distance = np.linalg.norm(coordinates[remaining] - coordinates[order[-1]], axis=1)
+        order.append(remaining.pop(int(np.argmin(distance))))
+
+    return [cases[i] for i in order]
+
+
+def run_continuation(cases, max_workers=None, runner=run_case, callback=None, retries=1):
+    """
+    Run cases along a continuation path, seeding each from its nearest solved neighbor.
+
+    Cases are taken in continuation_order.  Whenever a worker is free, the next case is
+    the pending case nearest to a converged case, and it is seeded with the solution
+    file of that converged case.  Until the first case converges, the workers start the
+    cases farthest from those already running, so that the seeds are spread over the
+    grid.  A case that fails is queued again, up to retries times, seeded from a
+    converged neighbor it has not been tried from.
+
+    Parameters
+    ----------
+    cases : list of dict
+        case dictionaries with mach and altitude entries
+    max_workers : int or None
+        number of worker processes; None uses one per CPU
+    runner : callable
+        module level function that runs one case and returns its result row
+    callback : callable or None
+        called with each result row as soon as its case finishes
+    retries : int
+        number of times a failed case is run again from another converged neighbor
+
+    Returns
+    -------
+    list of dict
+        final result rows, in the same order as cases
+    """
+    coordinates = _coordinates(cases)
+
+    index = {id(case): i for i, case in enumerate(cases)}
+    pending = [index[id(case)] for case in continuation_order(cases)]
+    attempts = {i: 0 for i in pending}
+    tried_seeds = {i: set() for i in pending}
+    converged = []
+    failed = []
+    results = [None] * len(cases)
+
+    def next_case(running):
+        # the pending case nearest to a converged case, seeded from that case
+        candidates = [
+            (np.linalg.norm(coordinates[i] - coordinates[j]), i, j)
+            for i in pending
+            for j in converged
+            if j not in tried_seeds[i]
+        ]
+        if candidates:
+            _, i, j = min(candidates)
+            return i, j
+
+        # otherwise start the case farthest from the running cases, unseeded
+        if running and not converged:
+            distance = [
+                min(np.linalg.norm(coordinates[i] - coordinates[k]) for k in running)
+                for i in pending
+            ]
+            return pending[int(np.argmax(distance))], None
+
+        return pending[0], None
+
+    workers = max_workers or os.cpu_count()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        running = {}
+        while pending or running:
+            while pending and len(running) < workers:
+                i, j = next_case(list(running.values()))
+                pending.remove(i)
+                attempts[i] += 1
+
+                case = dict(cases[i])
+                if j is not None:
+                    tried_seeds[i].add(j)
+                    case['restart_file'] = results[j]['solution_file']
+                    case['seeded_from'] = cases[j]['name']
+                running[executor.submit(runner, case)] = i
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                i = running.pop(future)
+                results[i] = future.result()
+                if callback is not None:
+                    callback(results[i])
+
+                if results[i]['converged'] and results[i]['solution_file']:
+                    converged.append(i)
+                elif attempts[i] <= retries:
+                    failed.append(i)
+
+            # failed cases wait until there is a converged neighbor they have not been tried from
+            for i in [i for i in failed if set(converged) - tried_seeds[i]]:
+                failed.remove(i)
+                pending.append(i)
+
+    return results
+
+
+def carpet_error_estimate(results, mach_numbers, altitudes, field='fuel_burn'):
+    """
+    Return the interpolated field and an estimate of its interpolation error at points.
+
+    The field of the converged results is interpolated with a cubic Clough-Tocher and a
+    linear interpolant in Mach number and altitude normalized by their range.  Their
+    difference is large where the field is curved or the samples are sparse, and is used
+    as the error estimate.  Points outside the convex hull of the results have a NaN
+    prediction and an infinite error.
+
+    Parameters
+    ----------
+    results : list of dict
+        result rows
+    mach_numbers : array_like
+        Mach numbers of the points
+    altitudes : array_like
+        altitudes of the points [ft]
+    field : str
+        result column to interpolate
+
+    Returns
+    -------
+    prediction : ndarray
+        cubic interpolant of the field at the points
+    error : ndarray
+        absolute difference of the cubic and linear interpolants at the points
+    """
+    rows = [row for row in results if row['converged'] and row[field] is not None]
+    points = np.column_stack((mach_numbers, altitudes)).astype(float)
+    samples = np.array([[row['mach'], row['altitude']] for row in rows], dtype=float)
+    values = np.array([row[field] for row in rows], dtype=float)
+
+    prediction = np.full(len(points), np.nan)
+    error = np.full(len(points), np.inf)
+    if len(rows) < 3:
+        return prediction, error
+
+    lower = samples.min(axis=0)
+    scale = np.ptp(samples, axis=0)
+    scale[scale == 0.0] = 1.0
+    samples = (samples - lower) / scale
+    points = (points - lower) / scale
+
+    try:
+        prediction = CloughTocher2DInterpolator(samples, values)(points)
+        linear = LinearNDInterpolator(samples, values)(points)
+    except QhullError:
+        # all samples on one line
+        return prediction, error
+
+    inside = np.isfinite(prediction)
+    error[inside] = np.abs(prediction[inside] - linear[inside])
+    return prediction, error
+
+
+def adaptive_points(
+    results,
+    candidates,
+    num_points,
+    optimum_band=0.01,
+    optimum_weight=2.0,
+    min_spacing=0.75,
+):
+    """
+    Return the next carpet points to run, where the fuel burn is least certain.
+
+    Every candidate is scored by the error estimate of carpet_error_estimate, relative to
+    the range of the fuel burn.  Candidates whose predicted fuel burn is within
+    optimum_band of the lowest fuel burn found so far have their score multiplied by
+    1 + optimum_weight, so the carpet is refined most around the optimum.  Candidates
+    outside the convex hull of the converged results are scored by their distance to
+    the nearest result, so unexplored regions are filled first.
+
+    Parameters
+    ----------
+    results : list of dict
+        result rows of the cases run so far, including cases that did not converge
+    candidates : array_like
+        (num_candidates, 2) Mach numbers and altitudes [ft] to choose from
+    num_points : int
+        number of points to return
+    optimum_band : float
+        fraction of the lowest fuel burn within which a point counts as near the optimum
+    optimum_weight : float
+        extra weight of points near the optimum
+    min_spacing : float
+        smallest distance between chosen points, in candidate grid spacings, so that a
+        batch is spread over the carpet
+
+    Returns
+    -------
+    points : ndarray
+        (num_chosen, 2) Mach numbers and altitudes to run next, best first
+    max_error : float
+        largest error estimate relative to the fuel burn range over the candidates not run
+        yet; infinite while some of them are outside the convex hull of the results
+    """
+    candidates = np.asarray(candidates, dtype=float)
+    scale = np.ptp(candidates, axis=0)
+    scale[scale == 0.0] = 1.0
+    normalized = candidates / scale
+
+    # candidates already run, converged or not, are never chosen again
+    tried = np.array([[row['mach'], row['altitude']] for row in results], dtype=float)
+    available = np.ones(len(candidates), dtype=bool)
+    if len(tried):
+        distance = np.linalg.norm(normalized[:, None, :] - tried[None, :, :] / scale, axis=2)
+        available = distance.min(axis=1) > 1e-9
+
+    converged = [row for row in results if row['converged'] and row['fuel_burn'] is not None]
+    prediction, error = carpet_error_estimate(converged, candidates[:, 0], candidates[:, 1])
+
+    if converged:
+        fuel_burn = np.array([row['fuel_burn'] for row in converged])
+        fuel_range = max(np.ptp(fuel_burn), 1e-12 * abs(fuel_burn).max(), 1e-12)
+        relative_error = error / fuel_range
+        score = relative_error.copy()
+
+        best = fuel_burn.min()
+        near_optimum = np.isfinite(prediction) & (prediction <= best * (1.0 + optimum_band))
+        score[near_optimum] *= 1.0 + optimum_weight
+
+        # outside the convex hull, explore away from the results already run
+        outside = ~np.isfinite(prediction)
+        if np.any(outside):
+            distance = np.linalg.norm(
+                normalized[outside][:, None, :] - tried[None, :, :] / scale, axis=2
+            )
+            score[outside] = distance.min(axis=1)
+    else:
+        relative_error = np.full(len(candidates), np.inf)
+        score = np.ones(len(candidates))
+
+    max_error = relative_error[available].max() if np.any(available) else 0.0
+
+    # smallest spacing of the candidate grid, for the spread of one batch
+    spacing = np.inf
+    for axis in range(2):
+        steps = np.diff(np.unique(normalized[:, axis]))
+        if steps.size:
+            spacing = min(spacing, steps.min())
+    if not np.isfinite(spacing):
+        spacing = 0.0
+
+    chosen = []
+    for i in np.argsort(-score, kind='stable'):
+        if len(chosen) == num_points:
+            break
+        if not available[i]:
+            continue
+        if any(
+            np.linalg.norm(normalized[i] - normalized[j]) < min_spacing * spacing for j in chosen
+        ):
+            continue
+        chosen.append(i)
+
+    return candidates[chosen], max_error
+
+
+def run_adaptive_carpet(
+    base_phase_info,
+    aircraft_csv,
+    mach_numbers,
+    altitudes,
+    output_dir,
+    tolerance=0.002,
+    max_cases=None,
+    batch_size=None,
+    max_workers=None,
+    optimizer='IPOPT',
+    max_iter=120,
+    cruise_phase='cruise',
+    runner=run_case,
+    callback=None,
+):
+    """
+    Run a Mach/altitude carpet adaptively, only at the points that improve it most.
+
+    The Mach numbers and altitudes define the candidate grid.  The sweep starts with
+    its corners, edge midpoints and center, then repeatedly runs the batch of points
+    chosen by adaptive_points until the largest relative error estimate of the points
+    not run yet is below tolerance, or max_cases have been run.  Every new case is seeded from its nearest
+    converged case with seed_from_solution.
+
+    Parameters
+    ----------
+    base_phase_info : dict
+        phase_info that every case starts from
+    aircraft_csv : str
+        aircraft csv file
+    mach_numbers : list of float
+        candidate cruise Mach numbers
+    altitudes : list of float
+        candidate cruise altitudes [ft]
+    output_dir : str
+        directory holding one output directory per case and carpet_results.csv
+    tolerance : float
+        largest error estimate, relative to the fuel burn range, at which the sweep stops
+    max_cases : int or None
+        largest number of cases to run; None uses a third of the candidate grid
+    batch_size : int or None
+        number of cases run at once; None uses max_workers, or 4
+    max_workers : int or None
+        number of worker processes; None uses one per CPU
+    optimizer : str
+        Aviary driver name
+    max_iter : int
+        driver iteration limit
+    cruise_phase : str
+        name of the cruise phase in phase_info
+    runner : callable
+        module level function that runs one case and returns its result row
+    callback : callable or None
+        called with each result row as soon as its case finishes
+
+    Returns
+    -------
+    list of dict
+        result rows of all cases run, in the order they were run
+    """
+    mach_numbers = sorted(mach_numbers)
+    altitudes = sorted(altitudes)
+    candidates = np.array([[mach, altitude] for altitude in altitudes for mach in mach_numbers])
+    if max_cases is None:
+        max_cases = max(int(np.ceil(len(candidates) / 3.0)), 9)
+    if batch_size is None:
+        batch_size = max_workers or 4
+
+    def index(values, fraction):
+        return values[int(round(fraction * (len(values) - 1)))]
+
+    # start with the corners, the edge midpoints and the center of the grid
+    points = []
+    for fa in (0.0, 0.5, 1.0):
+        for fm in (0.0, 0.5, 1.0):
+            point = (index(mach_numbers, fm), index(altitudes, fa))
+            if point not in points:
+                points.append(point)
+    points = np.array(points[:max_cases], dtype=float)
+
+    results = []
+    while len(points):
+        cases = []
+        for mach, altitude in points:
+            case = carpet_cases(
+                base_phase_info,
+                aircraft_csv,
+                [float(mach)],
+                [float(altitude)],
+                output_dir,
+                optimizer=optimizer,
+                max_iter=max_iter,
+                cruise_phase=cruise_phase,
+            )[0]
+
+            # seed from the nearest converged case
+            solved = [row for row in results if row['converged'] and row.get('solution_file')]
+            if solved:
+                coordinates = _coordinates(solved + [case])
+                distance = np.linalg.norm(coordinates[:-1] - coordinates[-1], axis=1)
+                seed = solved[int(np.argmin(distance))]
+                case['restart_file'] = seed['solution_file']
+                case['seeded_from'] = seed['name']
+            cases.append(case)
+
+        results += run_cases(cases, max_workers=max_workers, runner=runner, callback=callback)
+
+        remaining = max_cases - len(results)
+        if remaining <= 0:
+            break
+
+        points, max_error = adaptive_points(results, candidates, min(batch_size, remaining))
+        if max_error < tolerance:
+            break
+
+    return results
+
+
+def write_results(results, filename):
+    """Write result rows to a csv file with the RESULT_FIELDS columns."""
+    directory = os.path.dirname(filename)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    with open(filename, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def read_results(filename):
+    """Read result rows written by write_results, converting the numeric columns."""
+    with open(filename, newline='') as f:
+        rows = list(csv.DictReader(f))
+
+    for row in rows:
+        for field in ('mach', 'altitude', 'fuel_burn', 'mission_time', 'wall_time'):
+            row[field] = float(row[field]) if row[field] not in ('', None) else None
+        row['converged'] = row['converged'] == 'True'
+        row['iterations'] = int(row['iterations']) if row['iterations'] not in ('', None) else None
+
+    return rows
+
+
+def carpet_grid(results, field, mach_numbers=None, altitudes=None):
+    """
+    Return a field of the results as nested lists indexed by altitude and Mach number.
+
+    Cases that did not converge, or were not run, are filled with 0 as in plotter.py.
+
+    Parameters
+    ----------
+    results : list of dict
+        result rows
+    field : str
+        result column to arrange, such as 'fuel_burn' or 'mission_time'
+    mach_numbers : list of float or None
+        Mach numbers of the columns; None uses the sorted Mach numbers of the results
+    altitudes : list of float or None
+        altitudes of the rows [ft]; None uses the sorted altitudes of the results
+
+    Returns
+    -------
+    list of list
+        the field value for every altitude (rows) and Mach number (columns)
+    """
+    if mach_numbers is None:
+        mach_numbers = sorted({row['mach'] for row in results})
+    if altitudes is None:
+        altitudes = sorted({row['altitude'] for row in results})
+
+    values = {
+        (row['altitude'], row['mach']): row[field]
+        for row in results
+        if row['converged'] and row[field] is not None
+    }
+
+    return [[values.get((altitude, mach), 0) for mach in mach_numbers] for altitude in altitudes]
+
+
+def run_carpet_sweep(
+    base_phase_info,
+    aircraft_csv,
+    mach_numbers,
+    altitudes,
+    output_dir,
+    max_workers=None,
+    optimizer='IPOPT',
+    max_iter=120,
+    cruise_phase='cruise',
+    continuation=False,
+    adaptive=False,
+    runner=run_case,
+):
+    """
+    Run a Mach/altitude carpet in a process pool and write the result table.
+
+    Parameters
+    ----------
+    base_phase_info : dict
+        phase_info that every case starts from
+    aircraft_csv : str
+        aircraft csv file
+    mach_numbers : list of float
+        cruise Mach numbers of the grid
+    altitudes : list of float
+        cruise altitudes of the grid [ft]
+    output_dir : str
+        directory holding one output directory per case and carpet_results.csv
+    max_workers : int or None
+        number of worker processes; None uses one per CPU
+    optimizer : str
+        Aviary driver name
+    max_iter : int
+        driver iteration limit
+    cruise_phase : str
+        name of the cruise phase in phase_info
+    continuation : bool
+        if True, seed every case from its nearest converged neighbor with run_continuation
+    adaptive : bool
+        if True, only run the grid points chosen by run_adaptive_carpet
+    runner : callable
+        module level function that runs one case and returns its result row
+
+    Returns
+    -------
+    list of dict
+        result rows, ordered by altitude and then by Mach number
+    """
+    results_file = os.path.join(output_dir, 'carpet_results.csv')
+    finished = {}
+
+    def report(result):
+        status = 'converged' if result['converged'] else 'FAILED'
+        seed = ' from ' + result['seeded_from'] if result['seeded_from'] else ''
+        print(
+            'Carpet case {}{} {} in {:.1f} s'.format(
+                result['name'], seed, status, result['wall_time']
+            )
+        )
+
+        # keep the result table current, so that a CarpetTable can follow the sweep; a case
+        # that is retried keeps only the row of its last attempt
+        finished[result['name']] = result
+        write_results(list(finished.values()), results_file)
+
+    if adaptive:
+        results = run_adaptive_carpet(
+            base_phase_info,
+            aircraft_csv,
+            mach_numbers,
+            altitudes,
+            output_dir,
+            max_workers=max_workers,
+            optimizer=optimizer,
+            max_iter=max_iter,
+            cruise_phase=cruise_phase,
+            runner=runner,
+            callback=report,
+        )
+        results.sort(key=lambda row: (row['altitude'], row['mach']))
+    else:
+        cases = carpet_cases(
+            base_phase_info,
+            aircraft_csv,
+            mach_numbers,
+            altitudes,
+            output_dir,
+            optimizer=optimizer,
+            max_iter=max_iter,
+            cruise_phase=cruise_phase,
+        )
+        if continuation:
+            results = run_continuation(
+                cases, max_workers=max_workers, runner=runner, callback=report
+            )
+        else:
+            results = run_cases(cases, max_workers=max_workers, runner=runner, callback=report)
+
+    write_results(results, results_file)
+
+    return results
+
+
+if __name__ == '__main__':
+    from For_carpet_plots import phase_info
+
+    results = run_carpet_sweep(
+        phase_info,
+        'models/aircraft/advanced_single_aisle/advanced_single_aisle_FLOPS.csv',
+        mach_numbers=[0.76, 0.78, 0.80, 0.82],
+        altitudes=[36_000, 37_000, 38_000, 39_000, 40_000],
+        output_dir='carpet_output',
+        continuation=True,
+    )
+
+    print('fuel_burn_data =', carpet_grid(results, 'fuel_burn'))
+    print('mission_time_data =', carpet_grid(results, 'mission_time'))
@@ -1,9 +1,7 @@
 #For generating carpet plots and fuel burn plot with mission profile and mach 
-import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib as mpl
 import plotly.graph_objects as go
-from scipy.interpolate import griddata
+import time
+from carpet_surface import carpet_surface, flatten_carpet
 
 
 
@@ -57,153 +55,180 @@ optimized_fuel_burn = [19_565.58] #[19_834.82, 19_687.61] #in lbm
 
 #End of data for carpet plot
 
+#To read the carpet from the case recorder files of a carpet_sweep.py run instead of the
+#lists above, set sweep_dir to its output directory. With live = True the plot is
+#written to live_html again whenever a case finishes, and the page reloads itself.
+sweep_dir = None #'carpet_output'
+live = False
+live_html = 'carpet_live.html'
+refresh_seconds = 30
+
+#Number of Mach numbers and altitudes of the interpolated contour mesh
+mesh_size = 100
+
 # ==== Generate carpet plot from data ====
 
 # ===========================================
 # ------------------------------
+def carpet_figure(mach_flat, alt_flat, fuel_flat, time_flat):
+    """Return the carpet plot of fuel burn and mission time over Mach number and altitude."""
+    # Interpolate fuel burn and mission time on one triangulation; the surface and its
+    # meshes are cached, so redrawing the same data only rebuilds the figure
+    surface = carpet_surface(mach_flat, alt_flat, fuel=fuel_flat, time=time_flat)
+    mach_grid, alt_grid, meshes = surface.mesh(mesh_size, mesh_size)
+    fuel_mesh = meshes['fuel']
+    time_mesh = meshes['time']
+
+    # Create the figure
+    fig = go.Figure()
+
+    # Add contour plot for fuel burn
+    fig.add_trace(go.Contour(
+        x=mach_grid,
+        y=alt_grid,
+        z=fuel_mesh,
+        colorscale='Viridis',
+        contours=dict(
+            showlabels=True,
+            labelfont=dict(size=10, color='white')
+        ),
+        colorbar=dict(
+            title='Fuel Burn<br>(lbm)',
+            tickfont=dict(size=12)
+        ),
+        hovertemplate='<b>Mach:</b> %{x:.2f}<br>' +
+                      '<b>Altitude:</b> %{y:,.0f} ft<br>' +
+                      '<b>Fuel Burn:</b> %{z:,.2f} lbm<br>' +
+                      '<extra></extra>',
+        name='Fuel Burn'
+    ))
+
+    # Add contour lines for mission time
+    fig.add_trace(go.Contour(
+        x=mach_grid,
+        y=alt_grid,
+        z=time_mesh,
+        showscale=False,
+        contours=dict(
+            showlabels=True,
+            labelfont=dict(size=9, color='black'),
+            coloring='none'
+        ),
+        line=dict(
+            color='black',
+            width=2,
+            dash='dash'
+        ),
+        hovertemplate='<b>Mach:</b> %{x:.2f}<br>' +
+                      '<b>Altitude:</b> %{y:,.0f} ft<br>' +
+                      '<b>Mission Time:</b> %{z:.1f} min<br>' +
+                      '<extra></extra>',
+        name='Mission Time (min)'
+    ))
+
+    # Add scatter points for actual data
+    fig.add_trace(go.Scatter(
+        x=mach_flat,
+        y=alt_flat,
+        mode='markers',
+        marker=dict(
+            size=10,
+            color='white',
+            line=dict(color='black', width=2)
+        ),
+        name='Data Points',
+        hovertemplate='<b>Mach:</b> %{x:.2f}<br>' +
+                      '<b>Altitude:</b> %{y:,.0f} ft<br>' +
+                      '<extra></extra>'
+    ))
+
+    # Add optimized point
+    fig.add_trace(go.Scatter(
+        x=optimized_mach,
+        y=optimized_altitude,
+        mode='markers',
+        marker=dict(
+            size=15,
+            color='lightblue',
+            line=dict(color='darkblue', width=3),
+            symbol='star'
+        ),
+        name='Optimized Point',
+        hovertemplate='<b>Optimized Point</b><br>' +
+                      '<b>Mach:</b> %{x:.2f}<br>' +
+                      '<b>Altitude:</b> %{y:,.0f} ft<br>' +
+                      '<b>Mission Time:</b> ' + f'{optimized_misison_time[0]:.2f} min<br>' +
+                      '<b>Fuel Burn:</b> ' + f'{optimized_fuel_burn[0]:,.2f} lbm<br>' +
+                      '<extra></extra>'
+    ))
+
+
+
+    # Update layout
+    fig.update_layout(
+        title={
+            'text': 'Carpet Plot: Fuel Burn vs Mach Number and Altitude',
+            'font': {'size': 18, 'color': '#2c3e50'},
+            'x': 0.5,
+            'xanchor': 'center'
+        },
+        xaxis=dict(
+            title=dict(text='Mach Number', font=dict(size=14, color='#2c3e50')),
+            gridcolor='lightgray',
+            showgrid=True
+        ),
+        yaxis=dict(
+            title=dict(text='Altitude (ft)', font=dict(size=14, color='#2c3e50')),
+            gridcolor='lightgray',
+            showgrid=True,
+            separatethousands=True
+        ),
+        legend=dict(
+            x=1.2,
+            y=0.98,
+            font=dict(size=12),
+            bgcolor='rgba(255,255,255,0.8)',
+            bordercolor='gray',
+            borderwidth=1
+        ),
+        hovermode='closest',
+        plot_bgcolor='white',
+        width=1100,
+        height=700,
+        margin=dict(l=80, r=150, t=80, b=80)
+    )
+
+    return fig
+
+
 # Flatten and filter data for interpolation
-mach_flat = []
-alt_flat = []
-fuel_flat = []
-time_flat = []
-
-for i in range(len(fuel_burn_data)):
-    for j in range(len(fuel_burn_data[i])):
-        if fuel_burn_data[i][j] != 0 and mach_data[i][j] != 0:
-            mach_flat.append(mach_data[i][j])
-            alt_flat.append(altitude_data[i][j])
-            fuel_flat.append(fuel_burn_data[i][j])
-            time_flat.append(mission_time_data[i][j])
-
-# Create grid for interpolation
-mach_grid = np.linspace(min(mach_flat), max(mach_flat), 100)
-alt_grid = np.linspace(min(alt_flat), max(alt_flat), 100)
-mach_mesh, alt_mesh = np.meshgrid(mach_grid, alt_grid)
-
-# Interpolate fuel burn data
-fuel_mesh = griddata((mach_flat, alt_flat), fuel_flat, (mach_mesh, alt_mesh), method='cubic')
-
-# Interpolate mission time data
-time_mesh = griddata((mach_flat, alt_flat), time_flat, (mach_mesh, alt_mesh), method='cubic')
-
-# Create the figure
-fig = go.Figure()
-
-# Add contour plot for fuel burn
-fig.add_trace(go.Contour(
-    x=mach_grid,
-    y=alt_grid,
-    z=fuel_mesh,
-    colorscale='Viridis',
-    contours=dict(
-        showlabels=True,
-        labelfont=dict(size=10, color='white')
-    ),
-    colorbar=dict(
-        title='Fuel Burn<br>(lbm)',
-        tickfont=dict(size=12)
-    ),
-    hovertemplate='<b>Mach:</b> %{x:.2f}<br>' +
-                  '<b>Altitude:</b> %{y:,.0f} ft<br>' +
-                  '<b>Fuel Burn:</b> %{z:,.2f} lbm<br>' +
-                  '<extra></extra>',
-    name='Fuel Burn'
-))
-
-# Add contour lines for mission time
-fig.add_trace(go.Contour(
-    x=mach_grid,
-    y=alt_grid,
-    z=time_mesh,
-    showscale=False,
-    contours=dict(
-        showlabels=True,
-        labelfont=dict(size=9, color='black'),
-        coloring='none'
-    ),
-    line=dict(
-        color='black',
-        width=2,
-        dash='dash'
-    ),
-    hovertemplate='<b>Mach:</b> %{x:.2f}<br>' +
-                  '<b>Altitude:</b> %{y:,.0f} ft<br>' +
-                  '<b>Mission Time:</b> %{z:.1f} min<br>' +
-                  '<extra></extra>',
-    name='Mission Time (min)'
-))
-
-# Add scatter points for actual data
-fig.add_trace(go.Scatter(
-    x=mach_flat,
-    y=alt_flat,
-    mode='markers',
-    marker=dict(
-        size=10,
-        color='white',
-        line=dict(color='black', width=2)
-    ),
-    name='Data Points',
-    hovertemplate='<b>Mach:</b> %{x:.2f}<br>' +
-                  '<b>Altitude:</b> %{y:,.0f} ft<br>' +
-                  '<extra></extra>'
-))
-
-# Add optimized point
-fig.add_trace(go.Scatter(
-    x=optimized_mach,
-    y=optimized_altitude,
-    mode='markers',
-    marker=dict(
-        size=15,
-        color='lightblue',
-        line=dict(color='darkblue', width=3),
-        symbol='star'
-    ),
-    name='Optimized Point',
-    hovertemplate='<b>Optimized Point</b><br>' +
-                  '<b>Mach:</b> %{x:.2f}<br>' +
-                  '<b>Altitude:</b> %{y:,.0f} ft<br>' +
-                  '<b>Mission Time:</b> ' + f'{optimized_misison_time[0]:.2f} min<br>' +
-                  '<b>Fuel Burn:</b> ' + f'{optimized_fuel_burn[0]:,.2f} lbm<br>' +
-                  '<extra></extra>'
-))
-
-
-
-# Update layout
-fig.update_layout(
-    title={
-        'text': 'Carpet Plot: Fuel Burn vs Mach Number and Altitude',
-        'font': {'size': 18, 'color': '#2c3e50'},
-        'x': 0.5,
-        'xanchor': 'center'
-    },
-    xaxis=dict(
-        title=dict(text='Mach Number', font=dict(size=14, color='#2c3e50')),
-        gridcolor='lightgray',
-        showgrid=True
-    ),
-    yaxis=dict(
-        title=dict(text='Altitude (ft)', font=dict(size=14, color='#2c3e50')),
-        gridcolor='lightgray',
-        showgrid=True,
-        separatethousands=True
-    ),
-    legend=dict(
-        x=1.2,
-        y=0.98,
-        font=dict(size=12),
-        bgcolor='rgba(255,255,255,0.8)',
-        bordercolor='gray',
-        borderwidth=1
-    ),
-    hovermode='closest',
-    plot_bgcolor='white',
-    width=1100,
-    height=700,
-    margin=dict(l=80, r=150, t=80, b=80)
-)
-
-fig.show()
+if sweep_dir is None:
+    mach_flat, alt_flat, flat = flatten_carpet(mach_data, altitude_data,
+                                               fuel=fuel_burn_data, time=mission_time_data)
+    fuel_flat = flat['fuel']
+    time_flat = flat['time']
+else:
+    from carpet_ingest import CarpetTable
+
+    table = CarpetTable(sweep_dir)
+    table.update()
+    mach_flat, alt_flat, fuel_flat, time_flat = table.points('fuel_burn', 'mission_time')
+
+if sweep_dir is not None and live:
+    #Redraw whenever new cases have finished; cubic interpolation needs a few points first
+    while True:
+        if len(mach_flat) >= 4:
+            fig = carpet_figure(mach_flat, alt_flat, fuel_flat, time_flat)
+            refresh = '<meta http-equiv="refresh" content="{}">'.format(refresh_seconds)
+            html = fig.to_html(include_plotlyjs='cdn').replace('<head>', '<head>' + refresh, 1)
+            with open(live_html, 'w') as f:
+                f.write(html)
+            print('Carpet plot of {} cases written to {}'.format(len(mach_flat), live_html))
+
+        while not table.update():
+            time.sleep(refresh_seconds)
+        mach_flat, alt_flat, fuel_flat, time_flat = table.points('fuel_burn', 'mission_time')
+else:
+    fig = carpet_figure(mach_flat, alt_flat, fuel_flat, time_flat)
+    fig.show()
 # fig.write_html('../plots/carpet_plot_fuel_burn_mach_altitude.html')
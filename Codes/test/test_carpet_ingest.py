@@ -0,0 +1,142 @@
+import os
+import sys
+import unittest
+from unittest import mock
+
+import aviary.api as av
+import numpy as np
+import openmdao.api as om
+from openmdao.recorders.sqlite_reader import SqliteCaseReader
+from openmdao.utils.assert_utils import assert_near_equal
+from openmdao.utils.testing_utils import use_tempdirs
+
+# the Codes scripts import each other as top level modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from carpet_ingest import CarpetTable, read_case  # noqa: E402
+from carpet_sweep import case_name, write_results  # noqa: E402
+
+
+class _Evaluation(om.ExplicitComponent):
+    """Model evaluation that fails for a positive input."""
+
+    def setup(self):
+        self.add_input('x', val=0.0)
+        self.add_output('y', val=0.0)
+
+    def compute(self, inputs, outputs):
+        if inputs['x'] > 0.0:
+            raise om.AnalysisError('evaluation failed')
+        outputs['y'] = inputs['x']
+
+
+def _record_case(output_dir, mach, altitude, fuel_burn, driver_success=None):
+    """
+    Write the final problem case of a carpet case the way Aviary lays it out.
+
+    If driver_success is not None, one driver case is recorded first, whose model
+    evaluation fails if driver_success is False.
+    """
+    name = case_name(mach, altitude)
+    filename = os.path.join(output_dir, name, 'aviary_out', 'problem_history.db')
+    os.makedirs(os.path.dirname(filename))
+
+    prob = om.Problem()
+    timeseries = om.IndepVarComp()
+    timeseries.add_output('mach', val=[mach, mach])
+    timeseries.add_output('altitude', val=[0.3048 * altitude, 0.3048 * altitude], units='m')
+    timeseries.add_output('time', val=np.linspace(0.0, 300.0, 100), units='min')
+    prob.model.add_subsystem('traj', om.Group()).add_subsystem('cruise', om.Group())
+    prob.model.traj.cruise.add_subsystem('timeseries', timeseries)
+
+    summary = om.IndepVarComp()
+    summary.add_output(av.Mission.Summary.FUEL_BURNED, val=fuel_burn, units='lbm')
+    summary.add_output(av.Mission.Summary.FINAL_TIME, val=300.0, units='min')
+    prob.model.add_subsystem('summary', summary, promotes=['*'])
+
+    recorder = om.SqliteRecorder(filename)
+    prob.add_recorder(recorder)
+    if driver_success is not None:
+        prob.model.add_subsystem('evaluation', _Evaluation())
+        x = 0.0 if driver_success else 1.0
+        prob.driver = om.AnalysisDriver([{'evaluation.x': {'val': x}}])
+        prob.driver.add_response('evaluation.y')
+        prob.driver.add_recorder(recorder)
+
+    prob.setup()
+    if driver_success is None:
+        prob.run_model()
+    else:
+        prob.run_driver()
+    prob.record('final')
+    prob.cleanup()
+
+    return name, filename
+
+
+@use_tempdirs
+class Test_CarpetTable(unittest.TestCase):
+    """Test the carpet table read from the case recorder files."""
+
+    def test_failed_case(self):
+        converged_name, converged_file = _record_case('carpet_output', 0.78, 37000.0, 30000.0)
+        failed_name, failed_file = _record_case('carpet_output', 0.80, 37000.0, 31000.0)
+
+        # the recorder file does not hold the driver result
+        row = read_case(failed_file)
+        self.assertEqual(row['name'], failed_name)
+        assert_near_equal(row['fuel_burn'], 31000.0, 1e-10)
+        self.assertFalse(row['converged'])
+
+        # no case counts as converged before it is in the result table
+        table = CarpetTable('carpet_output')
+        self.assertEqual(table.update(), 2)
+        self.assertEqual(len(table.points('fuel_burn')[0]), 0)
+
+        results = [
+            {'name': converged_name, 'converged': True},
+            {'name': failed_name, 'converged': False},
+        ]
+        write_results(results, os.path.join('carpet_output', 'carpet_results.csv'))
+
+        self.assertEqual(table.update(), 1)
+        mach, altitude, fuel_burn = table.points('fuel_burn')
+        assert_near_equal(mach, [0.78], 1e-10)
+        assert_near_equal(altitude, [37000.0], 1e-10)
+        assert_near_equal(fuel_burn, [30000.0], 1e-10)
+        self.assertEqual(list(table.columns['converged']), [True, False])
+
+    def test_read_case(self):
+        _, filename = _record_case('carpet_output', 0.78, 37000.0, 30000.0)
+
+        # the values are read without deserializing the case
+        with mock.patch.object(SqliteCaseReader, 'get_case', side_effect=AssertionError):
+            row = read_case(filename)
+
+        assert_near_equal(row['mach'], 0.78, 1e-12)
+        assert_near_equal(row['altitude'], 37000.0, 1e-10)
+        assert_near_equal(row['fuel_burn'], 30000.0, 1e-12)
+        assert_near_equal(row['mission_time'], 300.0, 1e-12)
+        self.assertFalse(row['converged'])
+
+        # the converged flag is taken as given
+        self.assertTrue(read_case(filename, converged=True)['converged'])
+
+    def test_driver_success(self):
+        converged_name, _ = _record_case('carpet_output', 0.78, 37000.0, 30000.0, True)
+        failed_name, _ = _record_case('carpet_output', 0.80, 37000.0, 31000.0, False)
+        listed_name, _ = _record_case('carpet_output', 0.82, 37000.0, 32000.0, True)
+
+        # cases that are not in the result table take the flag of their last driver case
+        write_results(
+            [{'name': listed_name, 'converged': False}],
+            os.path.join('carpet_output', 'carpet_results.csv'),
+        )
+        table = CarpetTable('carpet_output')
+        self.assertEqual(table.update(), 3)
+        self.assertEqual(list(table.columns['name']), [converged_name, failed_name, listed_name])
+        self.assertEqual(list(table.columns['converged']), [True, False, False])
+
+
+if __name__ == '__main__':
+    unittest.main()
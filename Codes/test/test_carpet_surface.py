@@ -0,0 +1,127 @@
+import os
+import sys
+import unittest
+
+import numpy as np
+from openmdao.utils.assert_utils import assert_near_equal
+from scipy.interpolate import griddata
+
+# the Codes scripts import each other as top level modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import carpet_surface as carpet_surface_module  # noqa: E402
+from carpet_surface import (  # noqa: E402
+    CACHE_SIZE,
+    CarpetSurface,
+    carpet_surface,
+    flatten_carpet,
+)
+
+
+def _carpet_data(seed=0):
+    """Return scattered carpet points with a fuel burn and a mission time."""
+    rng = np.random.default_rng(seed)
+    mach = rng.uniform(0.70, 0.86, 40)
+    altitude = rng.uniform(31000.0, 45000.0, 40)
+    fuel = 30000.0 + 1e5 * (mach - 0.79) ** 2 + 1e-5 * (altitude - 38000.0) ** 2
+    time = 300.0 - 100.0 * mach + 1e-3 * altitude + 5.0 * np.sin(20.0 * mach)
+    return mach, altitude, fuel, time
+
+
+class Test_CarpetSurface(unittest.TestCase):
+    """Test the carpet surface against griddata and its caches."""
+
+    def setUp(self):
+        carpet_surface_module._surfaces.clear()
+
+    def test_griddata(self):
+        mach, altitude, fuel, time = _carpet_data()
+        surface = CarpetSurface(mach, altitude, fuel=fuel, time=time)
+
+        # on a mesh over the data, partly outside the convex hull
+        mach_grid, alt_grid = np.meshgrid(
+            np.linspace(0.70, 0.86, 30), np.linspace(31000.0, 45000.0, 25)
+        )
+        values = surface(mach_grid, alt_grid)
+
+        for name, data in (('fuel', fuel), ('time', time)):
+            expected = griddata((mach, altitude), data, (mach_grid, alt_grid), method='cubic')
+            inside = np.isfinite(expected)
+            self.assertTrue(np.any(inside) and not np.all(inside))
+            np.testing.assert_array_equal(np.isfinite(values[name]), inside)
+            assert_near_equal(values[name][inside], expected[inside], 1e-12)
+
+        # mesh covers the range of the data
+        mach_mesh, alt_mesh, meshes = surface.mesh(20, 15)
+        assert_near_equal(mach_mesh[[0, -1]], [mach.min(), mach.max()], 1e-15)
+        assert_near_equal(alt_mesh[[0, -1]], [altitude.min(), altitude.max()], 1e-15)
+        expected = griddata(
+            (mach, altitude), fuel, (mach_mesh[None, :], alt_mesh[:, None]), method='cubic'
+        )
+        self.assertEqual(meshes['fuel'].shape, (15, 20))
+        inside = np.isfinite(expected)
+        assert_near_equal(meshes['fuel'][inside], expected[inside], 1e-12)
+
+    def test_surface_cache(self):
+        mach, altitude, fuel, time = _carpet_data()
+
+        # identical data, also in new arrays, returns the same surface
+        surface = carpet_surface(mach, altitude, fuel=fuel, time=time)
+        self.assertIs(carpet_surface(mach.copy(), altitude, fuel=fuel.copy(), time=time), surface)
+
+        # changed data does not
+        changed = fuel.copy()
+        changed[3] += 1.0
+        self.assertIsNot(carpet_surface(mach, altitude, fuel=changed, time=time), surface)
+        self.assertIsNot(carpet_surface(mach, altitude, fuel=time, time=fuel), surface)
+
+        # a surface in use is kept while other data sets come and go
+        for seed in range(1, 2 * CACHE_SIZE):
+            carpet_surface(*_carpet_data(seed)[:2], fuel=_carpet_data(seed)[2])
+            self.assertIs(carpet_surface(mach, altitude, fuel=fuel, time=time), surface)
+        self.assertEqual(len(carpet_surface_module._surfaces), CACHE_SIZE)
+
+    def test_eviction(self):
+        mach, altitude, fuel, _ = _carpet_data()
+        surface = carpet_surface(mach, altitude, fuel=fuel)
+
+        for seed in range(1, CACHE_SIZE + 1):
+            carpet_surface(*_carpet_data(seed)[:2], fuel=_carpet_data(seed)[2])
+
+        self.assertEqual(len(carpet_surface_module._surfaces), CACHE_SIZE)
+        self.assertIsNot(carpet_surface(mach, altitude, fuel=fuel), surface)
+
+    def test_mesh_cache(self):
+        mach, altitude, fuel, time = _carpet_data()
+        surface = CarpetSurface(mach, altitude, fuel=fuel, time=time)
+
+        mesh = surface.mesh(20, 15)
+        self.assertIs(surface.mesh(20, 15), mesh)
+        self.assertEqual(surface.mesh(15, 20)[2]['fuel'].shape, (20, 15))
+
+        # a mesh in use is kept while other sizes come and go
+        for n in range(2 * CACHE_SIZE):
+            surface.mesh(5 + n, 5)
+            self.assertIs(surface.mesh(20, 15), mesh)
+
+        # the least recently used size is evicted past CACHE_SIZE
+        for n in range(CACHE_SIZE):
+            surface.mesh(40 + n, 5)
+        self.assertIsNot(surface.mesh(20, 15), mesh)
+        self.assertEqual(len(surface._meshes), CACHE_SIZE)
+
+    def test_flatten_carpet(self):
+        mach, altitude, fields = flatten_carpet(
+            [[0.76, 0.78, 0.80], [0.76, 0.78]],
+            [[36000, 36000, 36000], [37000, 37000]],
+            fuel=[[1.0, 0.0, 3.0], [4.0, 5.0, 6.0]],
+        )
+
+        # zeros and points past the shortest row are left out
+        assert_near_equal(mach, [0.76, 0.80, 0.76, 0.78], 1e-15)
+        assert_near_equal(altitude, [36000, 36000, 37000, 37000], 1e-15)
+        assert_near_equal(fields['fuel'], [1.0, 3.0, 4.0, 5.0], 1e-15)
+
+
+if __name__ == '__main__':
+    unittest.main()
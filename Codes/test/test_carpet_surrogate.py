@@ -0,0 +1,190 @@
+import os
+import sys
+import unittest
+
+import numpy as np
+from openmdao.utils.assert_utils import assert_near_equal
+from openmdao.utils.testing_utils import use_tempdirs
+
+# the Codes scripts import each other as top level modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from carpet_surrogate import CarpetSurrogate  # noqa: E402
+
+
+def _fuel_burn(mach, altitude):
+    """Cubic polynomial in Mach number and altitude."""
+    h = altitude / 1000.0
+    return 30000.0 + 2e4 * (mach - 0.79) ** 2 - 50.0 * mach * h + 0.2 * h**3 + 1e3 * mach**3
+
+
+def _d_fuel_burn(mach, altitude):
+    """Return the analytic derivatives of _fuel_burn with respect to Mach and altitude [1/ft]."""
+    h = altitude / 1000.0
+    d_mach = 4e4 * (mach - 0.79) - 50.0 * h + 3e3 * mach**2
+    d_altitude = (-50.0 * mach + 0.6 * h**2) / 1000.0
+    return d_mach, d_altitude
+
+
+def _mission_time(mach, altitude):
+    return 400.0 - 150.0 * mach + 1e-3 * altitude
+
+
+def _grid():
+    mach, altitude = np.meshgrid(np.linspace(0.70, 0.86, 7), np.linspace(31000.0, 45000.0, 6))
+    return mach.ravel(), altitude.ravel()
+
+
+def _surrogate():
+    mach, altitude = _grid()
+    return CarpetSurrogate.fit(
+        mach,
+        altitude,
+        degree=3,
+        units={'fuel_burn': 'lbm', 'mission_time': 'min'},
+        fuel_burn=_fuel_burn(mach, altitude),
+        mission_time=_mission_time(mach, altitude),
+    )
+
+
+def _query_points():
+    rng = np.random.default_rng(0)
+    return rng.uniform(0.70, 0.86, (4, 5)), rng.uniform(31000.0, 45000.0, (4, 5))
+
+
+class Test_CarpetSurrogate(unittest.TestCase):
+    """Test the fit, evaluation and partials of the carpet surrogate on a known polynomial."""
+
+    def test_fit(self):
+        surrogate = _surrogate()
+
+        self.assertEqual(surrogate.fields, ('fuel_burn', 'mission_time'))
+        self.assertEqual(surrogate.units, ('lbm', 'min'))
+        self.assertEqual(surrogate.degree, 3)
+        self.assertEqual(surrogate.num_points, 42)
+        assert_near_equal(surrogate.center, [0.78, 38000.0], 1e-12)
+        assert_near_equal(surrogate.scale, [0.08, 7000.0], 1e-12)
+
+        # a cubic is fitted exactly
+        self.assertLess(surrogate.rms_error[0], 1e-8)
+        self.assertLess(surrogate.rms_error[1], 1e-10)
+
+    def test_degree(self):
+        # six points hold a quadratic at most
+        mach, altitude = _grid()
+        surrogate = CarpetSurrogate.fit(mach[:6], altitude[:6], fuel_burn=mach[:6])
+        self.assertEqual(surrogate.degree, 2)
+
+        with self.assertRaises(ValueError):
+            CarpetSurrogate.fit(mach[:2], altitude[:2], fuel_burn=mach[:2])
+
+    def test_evaluate(self):
+        surrogate = _surrogate()
+        mach, altitude = _query_points()
+
+        values = surrogate(mach, altitude)
+        self.assertEqual(values['fuel_burn'].shape, (4, 5))
+        assert_near_equal(values['fuel_burn'], _fuel_burn(mach, altitude), 1e-10)
+        assert_near_equal(values['mission_time'], _mission_time(mach, altitude), 1e-10)
+
+        # scalars and broadcast points
+        assert_near_equal(surrogate(0.8, 40000.0)['fuel_burn'], _fuel_burn(0.8, 40000.0), 1e-10)
+        values = surrogate(mach[0], 40000.0)
+        assert_near_equal(values['fuel_burn'], _fuel_burn(mach[0], 40000.0), 1e-10)
+
+    def test_partials(self):
+        surrogate = _surrogate()
+        mach, altitude = _query_points()
+
+        d_mach, d_altitude = surrogate.partials(mach, altitude)['fuel_burn']
+        expected = _d_fuel_burn(mach, altitude)
+        assert_near_equal(d_mach, expected[0], 1e-8)
+        assert_near_equal(d_altitude, expected[1], 1e-8)
+
+        # against central differences of the surrogate
+        h_mach, h_altitude = 1e-6, 1e-2
+        for name in surrogate.fields:
+            d_mach, d_altitude = surrogate.partials(mach, altitude)[name]
+            fd_mach = (
+                surrogate(mach + h_mach, altitude)[name] - surrogate(mach - h_mach, altitude)[name]
+            ) / (2.0 * h_mach)
+            fd_altitude = (
+                surrogate(mach, altitude + h_altitude)[name]
+                - surrogate(mach, altitude - h_altitude)[name]
+            ) / (2.0 * h_altitude)
+            assert_near_equal(d_mach, fd_mach, 1e-6)
+            assert_near_equal(d_altitude, fd_altitude, 1e-6)
+
+    def test_range(self):
+        surrogate = _surrogate()
+        mach = np.array([0.70, 0.86, 0.78, 0.90, 0.78])
+        altitude = np.array([31000.0, 45000.0, 38000.0, 38000.0, 30000.0])
+
+        # the edges of the data range are inside
+        np.testing.assert_array_equal(
+            surrogate.in_range(mach, altitude), [True, True, True, False, False]
+        )
+
+        values = surrogate(mach, altitude)['fuel_burn']
+        d_mach, d_altitude = surrogate.partials(mach, altitude)['fuel_burn']
+        for value in (values, d_mach, d_altitude):
+            np.testing.assert_array_equal(np.isnan(value), [False, False, False, True, True])
+
+        # extrapolated on request
+        values = surrogate(mach, altitude, extrapolate=True)['fuel_burn']
+        assert_near_equal(values, _fuel_burn(mach, altitude), 1e-10)
+        d_mach, d_altitude = surrogate.partials(mach, altitude, extrapolate=True)['fuel_burn']
+        assert_near_equal(d_mach, _d_fuel_burn(mach, altitude)[0], 1e-8)
+
+    def test_from_results(self):
+        mach, altitude = _grid()
+        results = [
+            {
+                'mach': m,
+                'altitude': a,
+                'fuel_burn': _fuel_burn(m, a),
+                'mission_time': _mission_time(m, a),
+                'converged': True,
+            }
+            for m, a in zip(mach, altitude)
+        ]
+
+        # failed cases are left out of the fit
+        results[5].update(converged=False, fuel_burn=1e6)
+        results[6].update(fuel_burn=None)
+
+        surrogate = CarpetSurrogate.from_results(results)
+        self.assertEqual(surrogate.num_points, 40)
+        self.assertLess(surrogate.rms_error[0], 1e-8)
+
+
+@use_tempdirs
+class Test_CarpetSurrogateFile(unittest.TestCase):
+    """Test saving and loading the carpet surrogate."""
+
+    def test_round_trip(self):
+        surrogate = _surrogate()
+        surrogate.save(os.path.join('surrogates', 'carpet_surrogate.npz'))
+        self.assertEqual(os.listdir('surrogates'), ['carpet_surrogate.npz'])
+
+        loaded = CarpetSurrogate.load(os.path.join('surrogates', 'carpet_surrogate.npz'))
+
+        self.assertEqual(loaded.fields, surrogate.fields)
+        self.assertEqual(loaded.units, surrogate.units)
+        self.assertEqual(loaded.degree, surrogate.degree)
+        self.assertEqual(loaded.num_points, surrogate.num_points)
+        for name in ('center', 'scale', 'coefficients', 'rms_error'):
+            np.testing.assert_array_equal(getattr(loaded, name), getattr(surrogate, name))
+
+        mach, altitude = _query_points()
+        for name in surrogate.fields:
+            np.testing.assert_array_equal(
+                loaded(mach, altitude)[name], surrogate(mach, altitude)[name]
+            )
+            np.testing.assert_array_equal(
+                loaded.partials(mach, altitude)[name], surrogate.partials(mach, altitude)[name]
+            )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,439 @@
+import os
+import sys
+import unittest
+from unittest import mock
+
+import dymos as dm
+import numpy as np
+import openmdao.api as om
+from openmdao.utils.assert_utils import assert_near_equal
+from openmdao.utils.testing_utils import use_tempdirs
+
+# the Codes scripts import each other as top level modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import carpet_sweep  # noqa: E402
+from carpet_sweep import (  # noqa: E402
+    RESULT_FIELDS,
+    adaptive_points,
+    carpet_cases,
+    case_name,
+    continuation_order,
+    read_results,
+    run_adaptive_carpet,
+    run_carpet_sweep,
+    run_continuation,
+    seed_from_solution,
+)
+
+_MACH_NUMBERS = [0.76, 0.78, 0.80]
+_ALTITUDES = [36000.0, 37000.0, 38000.0]
+
+# case that fails on its first attempt
+_FAILING_CASE = case_name(0.78, 37000.0)
+
+
+def _stub_runner(case):
+    """Return the result row of a case without running Aviary."""
+    result = {field: case.get(field) for field in RESULT_FIELDS}
+
+    os.makedirs(case['output_dir'], exist_ok=True)
+    marker = os.path.join(case['output_dir'], 'attempted')
+    converged = case['name'] != _FAILING_CASE or os.path.exists(marker)
+    open(marker, 'w').close()
+
+    result.update(
+        fuel_burn=30000.0 + 1e5 * (case['mach'] - 0.79) ** 2 if converged else None,
+        mission_time=300.0 if converged else None,
+        converged=converged,
+        iterations=10,
+        wall_time=0.0,
+        seeded_from=case.get('seeded_from', ''),
+        restart_file=case.get('restart_file', ''),
+        solution_file=os.path.join(case['output_dir'], 'problem_history.db') if converged else '',
+        error='' if converged else 'did not converge',
+    )
+    return result
+
+
+def _bowl(mach, altitude):
+    """Return the cruise duration of a synthetic bowl with its minimum at Mach 0.79, 37000 ft."""
+    return 3600.0 + 1e5 * (mach - 0.79) ** 2 + 1e-3 * (altitude - 37000.0) ** 2
+
+
+class _CruiseODE(om.ExplicitComponent):
+    """Constant fuel flow and speed cruise."""
+
+    def initialize(self):
+        self.options.declare('num_nodes', types=int)
+
+    def setup(self):
+        nn = self.options['num_nodes']
+        self.add_input('mach', shape=nn)
+        self.add_output('mass_rate', val=-0.5 * np.ones(nn), units='kg/s')
+        self.add_output('distance_rate', val=230.0 * np.ones(nn), units='m/s')
+        self.declare_partials('*', '*', method='fd')
+
+    def compute(self, inputs, outputs):
+        outputs['mass_rate'] = -0.5
+        outputs['distance_rate'] = 300.0 * inputs['mach']
+
+
+def _cruise_problem(num_segments, solution_file=None):
+    """Return a set up trajectory with a cruise phase, recording to solution_file if given."""
+    prob = om.Problem()
+    traj = prob.model.add_subsystem('traj', dm.Trajectory())
+    phase = dm.Phase(ode_class=_CruiseODE, transcription=dm.Radau(num_segments=num_segments))
+    traj.add_phase('cruise', phase)
+    phase.set_time_options(fix_initial=True, units='s')
+    phase.add_state('mass', rate_source='mass_rate', units='kg', fix_initial=True)
+    phase.add_state('distance', rate_source='distance_rate', units='m', fix_initial=True)
+    phase.add_control('mach', opt=False)
+
+    if solution_file is not None:
+        prob.add_recorder(om.SqliteRecorder(solution_file))
+    prob.setup()
+    return prob
+
+
+def _bowl_runner(case):
+    """Seed a cruise phase from the restart file, then record the bowl trajectory of the case."""
+    result = {field: case.get(field) for field in RESULT_FIELDS}
+
+    os.makedirs(case['output_dir'], exist_ok=True)
+    solution_file = os.path.join(case['output_dir'], 'problem_history.db')
+    prob = _cruise_problem(4, solution_file)
+
+    seeded_duration = None
+    if case.get('restart_file'):
+        seed_from_solution(prob, case['restart_file'], {'cruise': {}})
+        seeded_duration = float(prob.get_val('traj.cruise.t_duration')[0])
+
+    # the converged trajectory of this case
+    duration = _bowl(case['mach'], case['altitude'])
+    phase = prob.model.traj.phases.cruise
+    prob.set_val('traj.cruise.t_initial', 100.0)
+    prob.set_val('traj.cruise.t_duration', duration)
+    prob.set_val(
+        'traj.cruise.states:mass', phase.interp('mass', [70000.0, 70000.0 - 0.5 * duration])
+    )
+    prob.set_val('traj.cruise.states:distance', phase.interp('distance', [0.0, 230.0 * duration]))
+    prob.set_val('traj.cruise.controls:mach', case['mach'])
+    prob.run_model()
+    prob.record('final')
+    prob.cleanup()
+
+    result.update(
+        fuel_burn=0.5 * duration,
+        mission_time=duration / 60.0,
+        converged=True,
+        iterations=10,
+        wall_time=0.0,
+        seeded_from=case.get('seeded_from', ''),
+        seeded_duration=seeded_duration,
+        solution_file=solution_file,
+        error='',
+    )
+    return result
+
+
+def _response_runner(case):
+    """Return the result row of a case whose fuel burn is the synthetic bowl."""
+    result = {field: case.get(field) for field in RESULT_FIELDS}
+    result.update(fuel_burn=_bowl(case['mach'], case['altitude']), converged=True, error='')
+    return result
+
+
+def _plane_runner(case):
+    """Return the result row of a case whose fuel burn is linear in Mach number and altitude."""
+    result = {field: case.get(field) for field in RESULT_FIELDS}
+    fuel_burn = 3600.0 + 1000.0 * case['mach'] + 0.01 * case['altitude']
+    result.update(fuel_burn=fuel_burn, converged=True, error='')
+    return result
+
+
+def _gaussian(mach, altitude, center):
+    return np.exp(-(((mach - center[0]) / 0.03) ** 2) - ((altitude - center[1]) / 2500.0) ** 2)
+
+
+def _cases():
+    return carpet_cases({'cruise': {}}, 'aircraft.csv', _MACH_NUMBERS, _ALTITUDES, 'carpet_output')
+
+
+def _grid_steps(row, other):
+    """Return the distance between two cases in grid spacings."""
+    return np.hypot(
+        (row['mach'] - other['mach']) / 0.02, (row['altitude'] - other['altitude']) / 1000.0
+    )
+
+
+@use_tempdirs
+class Test_CarpetContinuation(unittest.TestCase):
+    """Test the continuation order and seeding of the carpet sweep."""
+
+    def test_continuation_order(self):
+        order = [(case['mach'], case['altitude']) for case in continuation_order(_cases())]
+
+        # the path snakes through the grid, one grid spacing at a time
+        expected = [
+            (0.76, 36000.0),
+            (0.78, 36000.0),
+            (0.80, 36000.0),
+            (0.80, 37000.0),
+            (0.78, 37000.0),
+            (0.76, 37000.0),
+            (0.76, 38000.0),
+            (0.78, 38000.0),
+            (0.80, 38000.0),
+        ]
+        self.assertEqual(order, expected)
+
+    def test_seeding(self):
+        cases = _cases()
+        finished = []
+        results = run_continuation(
+            cases, max_workers=1, runner=_stub_runner, callback=finished.append
+        )
+
+        self.assertEqual([row['name'] for row in results], [case['name'] for case in cases])
+        self.assertTrue(all(row['converged'] for row in results))
+
+        # every case after the first is seeded from the solution of a converged neighbor
+        # one grid spacing away, which finished before it
+        self.assertEqual(finished[0]['seeded_from'], '')
+        for i, row in enumerate(finished[1:], 1):
+            seeds = [
+                seed
+                for seed in finished[:i]
+                if seed['name'] == row['seeded_from'] and seed['converged']
+            ]
+            self.assertEqual(len(seeds), 1)
+            self.assertEqual(row['restart_file'], seeds[0]['solution_file'])
+            self.assertAlmostEqual(_grid_steps(row, seeds[0]), 1.0)
+
+        # the failed case is retried from another converged neighbor
+        attempts = [row for row in finished if row['name'] == _FAILING_CASE]
+        self.assertEqual([row['converged'] for row in attempts], [False, True])
+        self.assertNotEqual(attempts[0]['seeded_from'], attempts[1]['seeded_from'])
+
+    def test_retried_case_rows(self):
+        with mock.patch.object(
+            carpet_sweep, 'write_results', wraps=carpet_sweep.write_results
+        ) as write_results:
+            run_carpet_sweep(
+                {'cruise': {}},
+                'aircraft.csv',
+                _MACH_NUMBERS,
+                _ALTITUDES,
+                'carpet_output',
+                max_workers=1,
+                continuation=True,
+                runner=_stub_runner,
+            )
+
+        # the result table never holds more than one row per case, the last attempt
+        for call in write_results.call_args_list:
+            names = [row['name'] for row in call.args[0]]
+            self.assertEqual(len(names), len(set(names)))
+
+        rows = read_results(os.path.join('carpet_output', 'carpet_results.csv'))
+        self.assertEqual(len(rows), 9)
+        self.assertTrue(all(row['converged'] for row in rows))
+
+
+@use_tempdirs
+class Test_SeedFromSolution(unittest.TestCase):
+    """Test the warm start of a case from the solution of another case."""
+
+    def test_seed_from_solution(self):
+        solution = _bowl_runner(_cases()[4])
+
+        # a finer grid is seeded by interpolating the recorded trajectory
+        prob = _cruise_problem(6)
+        prob.set_val('traj.cruise.controls:mach', 0.8)
+        seed_from_solution(prob, solution['solution_file'], {'cruise': {}})
+
+        duration = _bowl(0.78, 37000.0)
+        assert_near_equal(prob.get_val('traj.cruise.t_initial'), 100.0, 1e-12)
+        assert_near_equal(prob.get_val('traj.cruise.t_duration'), duration, 1e-12)
+
+        # the recorded states are linear in time, so the interpolation is exact
+        phase = prob.model.traj.phases.cruise
+        assert_near_equal(
+            prob.get_val('traj.cruise.states:mass'),
+            phase.interp('mass', [70000.0, 70000.0 - 0.5 * duration]),
+            1e-10,
+        )
+        assert_near_equal(
+            prob.get_val('traj.cruise.states:distance'),
+            phase.interp('distance', [0.0, 230.0 * duration]),
+            1e-10,
+        )
+
+        # the Mach number is not optimized, so the value of this case is kept
+        mach = prob.get_val('traj.cruise.controls:mach')
+        assert_near_equal(mach, 0.8 * np.ones_like(mach), 1e-12)
+
+    def test_nearest_neighbor_seed(self):
+        cases = carpet_cases(
+            {'cruise': {}}, 'aircraft.csv', [0.74, 0.78, 0.82], [36000.0, 38000.0], 'carpet_output'
+        )
+        finished = []
+        run_continuation(cases, max_workers=1, runner=_bowl_runner, callback=finished.append)
+
+        def distance(row, other):
+            # Mach number and altitude normalized by their range over the cases
+            return np.hypot(
+                (row['mach'] - other['mach']) / 0.08, (row['altitude'] - other['altitude']) / 2000.0
+            )
+
+        # every case starts from the trajectory of a case converged before it, and no
+        # converged case was nearer
+        self.assertIsNone(finished[0]['seeded_duration'])
+        for i, row in enumerate(finished[1:], 1):
+            seed = next(seed for seed in finished[:i] if seed['name'] == row['seeded_from'])
+            self.assertAlmostEqual(
+                distance(row, seed), min(distance(row, other) for other in finished[:i])
+            )
+            assert_near_equal(row['seeded_duration'], _bowl(seed['mach'], seed['altitude']), 1e-12)
+
+
+class Test_AdaptivePoints(unittest.TestCase):
+    """Test which carpet points adaptive_points refines, on synthetic responses."""
+
+    def setUp(self):
+        mach_numbers = np.linspace(0.70, 0.86, 9)
+        altitudes = np.linspace(31000.0, 45000.0, 9)
+        self.candidates = np.array([[mach, alt] for alt in altitudes for mach in mach_numbers])
+
+        # results on every other candidate
+        self.samples = [(mach, alt) for alt in altitudes[::2] for mach in mach_numbers[::2]]
+
+    def results(self, response, samples=None):
+        return [
+            {'mach': mach, 'altitude': alt, 'fuel_burn': response(mach, alt), 'converged': True}
+            for mach, alt in (samples or self.samples)
+        ]
+
+    def assert_near(self, points, center):
+        # within one spacing of the results
+        for mach, altitude in points:
+            self.assertLessEqual(abs(mach - center[0]), 0.04 + 1e-12)
+            self.assertLessEqual(abs(altitude - center[1]), 3500.0)
+
+    def test_plane(self):
+        points, max_error = adaptive_points(
+            self.results(lambda mach, alt: 30000.0 + 2e4 * mach + 0.1 * alt), self.candidates, 3
+        )
+
+        # a linear response is interpolated exactly
+        self.assertLess(max_error, 1e-6)
+        self.assertEqual(len(points), 3)
+
+    def test_bump(self):
+        center = (0.82, 42000.0)
+        points, max_error = adaptive_points(
+            self.results(
+                lambda mach, alt: (
+                    30000.0 + 2e4 * mach + 0.1 * alt + 500 * _gaussian(mach, alt, center)
+                )
+            ),
+            self.candidates,
+            3,
+        )
+
+        # the points are refined around the bump, spread over it, and not run before
+        self.assertGreater(max_error, 0.01)
+        self.assert_near(points, center)
+        for i, point in enumerate(points):
+            self.assertNotIn(tuple(point), self.samples)
+            for other in points[:i]:
+                self.assertGreater(np.linalg.norm((point - other) / [0.16, 14000.0]), 0.09)
+
+    def test_optimum(self):
+        dip = (0.74, 35000.0)
+        peak = (0.82, 41000.0)
+
+        # a dip and a peak of the same shape: the dip, near the optimum, is refined first
+        for sign in (1.0, -1.0):
+            points, _ = adaptive_points(
+                self.results(
+                    lambda mach, alt: (
+                        30000.0
+                        - sign * 300.0 * _gaussian(mach, alt, dip)
+                        + sign * 300.0 * _gaussian(mach, alt, peak)
+                    )
+                ),
+                self.candidates,
+                3,
+            )
+            self.assert_near(points, dip if sign > 0 else peak)
+
+    def test_unexplored(self):
+        samples = [(mach, alt) for mach, alt in self.samples if alt <= 38000.0]
+        points, max_error = adaptive_points(
+            self.results(lambda mach, alt: 30000.0 + 2e4 * mach + 0.1 * alt, samples),
+            self.candidates,
+            3,
+        )
+
+        # the candidates farthest from the results are run first
+        self.assertEqual(max_error, np.inf)
+        np.testing.assert_array_equal(points[:, 1], 45000.0)
+
+
+@use_tempdirs
+class Test_AdaptiveCarpet(unittest.TestCase):
+    """Test the adaptive carpet sweep on synthetic responses, without Aviary."""
+
+    def setUp(self):
+        self.mach_numbers = np.linspace(0.70, 0.86, 13)
+        self.altitudes = np.linspace(31000.0, 45000.0, 15)
+
+    def run_carpet(self, runner, **kwargs):
+        return run_adaptive_carpet(
+            {'cruise': {}},
+            'aircraft.csv',
+            self.mach_numbers,
+            self.altitudes,
+            'carpet_output',
+            batch_size=4,
+            max_workers=2,
+            runner=runner,
+            **kwargs,
+        )
+
+    def test_start_points(self):
+        results = self.run_carpet(_plane_runner)
+
+        # the corners, edge midpoints and center, after which a linear response is exact
+        expected = [
+            (mach, alt)
+            for alt in (31000.0, 38000.0, 45000.0)
+            for mach in (0.70, self.mach_numbers[6], 0.86)
+        ]
+        self.assertEqual(len(results), 9)
+        for row, (mach, alt) in zip(results, expected):
+            assert_near_equal([row['mach'], row['altitude']], [mach, alt], 1e-12)
+
+    def test_bowl(self):
+        results = self.run_carpet(_response_runner, max_cases=40)
+
+        # the sweep stops at max_cases, and no point is run twice
+        self.assertEqual(len(results), 40)
+        points = {(round(row['mach'], 6), row['altitude']) for row in results}
+        self.assertEqual(len(points), 40)
+
+        # the refined points are nearer the optimum than the candidate grid on average
+        def distance(mach, alt):
+            return np.hypot((mach - 0.79) / 0.16, (alt - 37000.0) / 14000.0)
+
+        refined = np.mean([distance(row['mach'], row['altitude']) for row in results[9:]])
+        grid = np.mean(
+            [distance(mach, alt) for mach in self.mach_numbers for alt in self.altitudes]
+        )
+        self.assertLess(refined, grid)
+
+
+if __name__ == '__main__':
+    unittest.main()
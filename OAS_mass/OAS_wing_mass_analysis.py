@@ -1,567 +1,1523 @@
-"""
-OpenMDAO component for aerostructural analysis using OpenAeroStruct.
-
-This analysis is based on the aircraft_for_bench_FwFm.csv input data representing a
-single-aisle commercial transport aircraft.  The user_mesh method is currently
-hard-coded with values taken from the aircraft_for_bench_FwFm data, but should be coded
-to use the Aircraft.Wing.* variables for a more general capability.
-
-The OAStructures class performs a structural analysis of the given wing
-by applying aeroelastic loads computed at the cruise condition and a
-2.5g maneuver at Mach 0.64 at sea level.  The optimization determines
-the optimum wing skin thickness, spar cap thickness, wing twist, wing t/c
-and maneuver angle of attack that satisfies strength constraints.
-
-The only Aviary input driving the design is fuel mass, but other variables
-may be included as well.
-
-OAStructures returns the optimized wing mass and the fuel mass burned.
-Currently, only the wing mass is used to override the Aviary variable
-Aircraft.Wing.MASS.
-
-"""
-
-import time
-import warnings
-
-import numpy as np
-import openmdao.api as om
-
-try:
-    import ambiance
-except ImportError:
-    raise ImportError(
-        "ambiance package not found. You can install it by running 'pip install ambiance'."
-    )
-
-try:
-    import openaerostruct
-except ImportError:
-    raise ImportError(
-        "openaerostruct package not found. You can install it by running 'pip install openaerostruct'."
-    )
-
-from ambiance import Atmosphere
-from openaerostruct.integration.aerostruct_groups import AerostructGeometry, AerostructPoint
-from openaerostruct.structures.wingbox_fuel_vol_delta import WingboxFuelVolDelta
-
-
-def user_mesh():
-    """Generate a user defined mesh which is model specific."""
-    # Planform specifications
-    half_span = 17.9573
-    kink_location = 4.9544
-
-    root_chord = 5.5668
-    kink_chord = 4.1302
-    tip_chord = 1.5084
-    inboard_LE_sweep = 25.0
-    outboard_LE_sweep = 25.0
-
-    # Mesh specifications
-    nx = 2
-    ny_outboard = 5
-    ny_inboard = 3
-
-    # Initialize the 3-D mesh object. Indexing: Chordwise, spanwise, then the 3-D coordinates.
-    # We use ny_inboard+ny_outboard-1 because the 2 segments share the nodes where they connect.
-    mesh = np.zeros((nx, ny_inboard + ny_outboard - 1, 3))
-
-    # The form of this 3-D array can be confusing initially.
-    # For each node, we are providing the x, y, and z coordinates.
-    # x is streamwise, y is spanwise, and z is up.
-    # For example, the node for the leading edge at the tip would be specified as mesh[0, 0, :] = np.array([x, y, z]).
-    # And the node at the trailing edge at the root would be mesh[nx-1, ny-1, :] = np.array([x, y, z]).
-    # We only provide the right half of the wing here because we use symmetry.
-    # Print elements of the mesh to better understand the form.
-
-    ####### THE Z-COORDINATES ######
-    # Assume no dihedral, so set the z-coordinate for all the points to 0.
-    mesh[:, :, 2] = 0.0
-
-    ####### THE Y-COORDINATES ######
-    # Using uniform spacing for the spanwise locations of all the nodes within each of the two trapezoidal segments:
-    # Outboard
-    mesh[:, :ny_outboard, 1] = np.linspace(half_span, kink_location, ny_outboard)
-    # Inboard
-    mesh[:, ny_outboard : ny_outboard + ny_inboard, 1] = np.linspace(kink_location, 0, ny_inboard)[
-        1:
-    ]
-
-    ###### THE X-COORDINATES ######
-    # Start with the leading edge and create some intermediate arrays that we will use
-    x_LE = np.zeros(ny_inboard + ny_outboard - 1)
-
-    array_for_inboard_leading_edge_x_coord = np.linspace(0, kink_location, ny_inboard) * np.tan(
-        inboard_LE_sweep / 180.0 * np.pi
-    )
-
-    array_for_outboard_leading_edge_x_coord = (
-        np.linspace(0, half_span - kink_location, ny_outboard)
-        * np.tan(outboard_LE_sweep / 180.0 * np.pi)
-        + np.ones(ny_outboard) * array_for_inboard_leading_edge_x_coord[-1]
-    )
-
-    x_LE[:ny_inboard] = array_for_inboard_leading_edge_x_coord
-    x_LE[ny_inboard : ny_inboard + ny_outboard] = array_for_outboard_leading_edge_x_coord[1:]
-
-    # Then the trailing edge
-    x_TE = np.zeros(ny_inboard + ny_outboard - 1)
-
-    array_for_inboard_trailing_edge_x_coord = np.linspace(
-        array_for_inboard_leading_edge_x_coord[0] + root_chord,
-        array_for_inboard_leading_edge_x_coord[-1] + kink_chord,
-        ny_inboard,
-    )
-
-    array_for_outboard_trailing_edge_x_coord = np.linspace(
-        array_for_outboard_leading_edge_x_coord[0] + kink_chord,
-        array_for_outboard_leading_edge_x_coord[-1] + tip_chord,
-        ny_outboard,
-    )
-
-    x_TE[:ny_inboard] = array_for_inboard_trailing_edge_x_coord
-    x_TE[ny_inboard : ny_inboard + ny_outboard] = array_for_outboard_trailing_edge_x_coord[1:]
-
-    for i in range(0, ny_inboard + ny_outboard - 1):
-        mesh[:, i, 0] = np.linspace(np.flip(x_LE)[i], np.flip(x_TE)[i], nx)
-
-    return mesh
-
-
-class OAStructures(om.ExplicitComponent):
-    """OAS structure component."""
-
-    def initialize(self):
-        self.options.declare('symmetry', default=True, desc='wing symmetry (True or False)')
-        self.options.declare('chord_cos_spacing', default=0, desc='chordwise cosine spacing')
-        self.options.declare('span_cos_spacing', default=0, desc='spanwise cosine spacing')
-        self.options.declare(
-            'num_box_cp', default=0, desc='number of chordwise CPs on the structural box'
-        )
-        self.options.declare('num_twist_cp', default=0, desc='number of twist CPs')
-        self.options.declare(
-            'S_ref_type', default='wetted', desc='type of computed wing area (wetted or projected)'
-        )
-        self.options.declare(
-            'fem_model_type', default='wingbox', desc='type of FEM model (wingbox or tube)'
-        )
-        self.options.declare('with_viscous', default=True, desc='viscous drag selection')
-        self.options.declare('with_wave', default=True, desc='wave drag selection')
-        self.options.declare('k_lam', default=0.05, desc='fraction of chord with laminar flow')
-        self.options.declare(
-            'c_max_t', default=0.38, desc='chordwise location of maximum thickness'
-        )
-        self.options.declare('E', default=73.1e9, desc='Youngs Modulus for AL 7073 [Pa]')
-        self.options.declare(
-            'G', default=(73.1e9 / 2 / 1.33), desc='Shear Modulus for AL 7073 [Pa]'
-        )
-        self.options.declare(
-            'yield', default=(420.0e6 / 1.5), desc='Allowable yield stress for AL 7073 [Pa]'
-        )
-        self.options.declare('mrho', default=2.78e3, desc='Material density for AL 7073 [kg/m^3]')
-        self.options.declare(
-            'strength_factor_for_upper_skin',
-            default=1.0,
-            desc='the yield stress is multiplied by this factor for the upper skin',
-        )
-        self.options.declare(
-            'wing_weight_ratio',
-            default=1.00,
-            desc='Ratio of the total wing weight (including non-structural components) to the wing structural weight.',
-        )
-        self.options.declare(
-            'exact_failure_constraint', default=False, desc='if false, use KS function'
-        )
-        self.options.declare(
-            'struct_weight_relief',
-            default=True,
-            desc='if true, use structural weight as inertia relief loads',
-        )
-        self.options.declare(
-            'distributed_fuel_weight',
-            default=True,
-            desc='Set True to distribute the fuel weight across the entire wing.',
-        )
-        self.options.declare('n_point_masses', default=0, desc='number of point masses')
-        self.options.declare(
-            'fuel_density',
-            default=803.0,
-            desc='fuel density (only needed if the fuel-in-wing volume constraint is used) [kg/m^3]',
-        )
-
-    def setup(self):
-        self.add_input('box_upper_x', units='unitless', shape=(self.options['num_box_cp'],))
-        self.add_input('box_lower_x', units='unitless', shape=(self.options['num_box_cp'],))
-        self.add_input('box_upper_y', units='unitless', shape=(self.options['num_box_cp'],))
-        self.add_input('box_lower_y', units='unitless', shape=(self.options['num_box_cp'],))
-        self.add_input('twist_cp', units='deg', shape=(self.options['num_twist_cp'],))
-        self.add_input('spar_thickness_cp', units='m', shape=(self.options['num_twist_cp'],))
-        self.add_input('skin_thickness_cp', units='m', shape=(self.options['num_twist_cp'],))
-        self.add_input('t_over_c_cp', units='unitless', shape=(self.options['num_twist_cp'],))
-        self.add_input('airfoil_t_over_c', units='unitless')
-        self.add_input('fuel', val=0.0, units='kg')
-        self.add_input('fuel_reserve', val=0.0, units='kg')
-        self.add_input('CL0', val=0.0, units='unitless')
-        self.add_input('CD0', val=0.0, units='unitless')
-        self.add_input('cruise_Mach', val=0.0, units='unitless')
-        self.add_input('cruise_altitude', val=0.0, units='m')
-        self.add_input('cruise_range', val=0.0, units='m')
-        self.add_input('cruise_SFC', val=0.0, units='1/s')
-        self.add_input('engine_mass', val=0.0, units='kg')
-        self.add_input('engine_location', val=np.array([0.0, 0.0, 0.0]), units='m')
-
-        self.add_output('wing_mass', units='kg')
-        self.add_output('fuel_burn', units='kg')
-
-        self.declare_partials(of=['*'], wrt=['fuel'], method='fd')
-
-        self.previous_DV_values = {}
-
-    def compute(self, inputs, outputs):
-        start_time = time.time()
-
-        # perform the wing structural optimization and return the wing mass
-
-        mesh = user_mesh()
-
-        # surface options dictionary
-        # fmt: off
-        surf_dict = {
-            # surface name
-            'name': 'meshwing',
-
-            # wing symmetry
-            'symmetry': self.options['symmetry'],
-
-            # wing mesh
-            'mesh': mesh,
-            
-            # wing definition
-            'S_ref_type': self.options['S_ref_type'],
-            'fem_model_type': self.options['fem_model_type'],
-
-            # wing thickness data
-            'data_x_upper': inputs['box_upper_x'],
-            'data_x_lower': inputs['box_lower_x'],
-            'data_y_upper': inputs['box_upper_y'],
-            'data_y_lower': inputs['box_lower_y'],
-
-            # wing sizing parameters
-            'twist_cp': inputs['twist_cp'],
-            'spar_thickness_cp': inputs['spar_thickness_cp'],
-            'skin_thickness_cp': inputs['skin_thickness_cp'],
-            't_over_c_cp': inputs['t_over_c_cp'],
-            'original_wingbox_airfoil_t_over_c': inputs['airfoil_t_over_c'],
-
-            # Aerodynamic deltas.
-            # These CL0 and CD0 values are added to the CL and CD
-            # obtained from aerodynamic analysis of the surface to get
-            # the total CL and CD.
-            # These CL0 and CD0 values do not vary wrt alpha.
-            # They can be used to account for things that are not included, such as contributions from the fuselage, camber, etc.
-            'CL0': inputs['CL0'][0],
-            'CD0': inputs['CD0'][0],
-            'with_viscous': self.options['with_viscous'],
-            'with_wave': self.options['with_wave'],
-
-            # Airfoil properties for viscous drag calculation
-            'k_lam': self.options['k_lam'],
-
-            # flow, used for viscous drag
-            'c_max_t': self.options['c_max_t'],
-            
-            # Structural values
-            'E': self.options['E'],
-            'G': self.options['G'],
-            'yield': self.options['yield'],
-            'mrho': self.options['mrho'],
-            'strength_factor_for_upper_skin': self.options['strength_factor_for_upper_skin'],
-            'wing_weight_ratio': self.options['wing_weight_ratio'],
-            'exact_failure_constraint': self.options['exact_failure_constraint'],
-            
-            # structural weight factors
-            'struct_weight_relief': self.options['struct_weight_relief'],
-            'distributed_fuel_weight': self.options['distributed_fuel_weight'],
-            
-            # point masses
-            'n_point_masses': self.options['n_point_masses'],
-            
-            # fuel factors
-            'fuel_density': self.options['fuel_density'],
-            'Wf_reserve': inputs['fuel_reserve'][0],
-        }
-        # fmt: on
-
-        # define the surfaces
-        surfaces = [surf_dict]
-
-        # Create the problem and assign the model group
-        prob = om.Problem()
-
-        fuel = inputs['fuel'][0]
-
-        mach = np.array([inputs['cruise_Mach'][0], 0.64])
-        altitude = np.array([inputs['cruise_altitude'][0], 0.0])
-        cruise_range = inputs['cruise_range'][0]
-
-        atmos = Atmosphere(altitude)
-
-        speed_of_sound = atmos.speed_of_sound
-        rho = atmos.density
-        dynamic_viscosity = atmos.dynamic_viscosity
-
-        velocity = np.array([mach[0] * speed_of_sound[0], mach[1] * speed_of_sound[1]])
-
-        # set values on the subproblem based on what's passed in from Aviary
-        # Add problem information as an independent variables component
-        indep_var_comp = om.IndepVarComp()
-        indep_var_comp.add_output(
-            'Mach_number', val=mach, desc='Mach number for cruise and for maneuver'
-        )
-        indep_var_comp.add_output(
-            'v', val=velocity, units='m/s', desc='velocity for cruise and for maneuver'
-        )
-        indep_var_comp.add_output(
-            're',
-            val=np.array(
-                [
-                    rho[0] * velocity[0] * 1.0 / (dynamic_viscosity[0]),
-                    rho[1] * velocity[1] * 1.0 / (dynamic_viscosity[1]),
-                ]
-            ),
-            desc='Reynolds number per unit length for cruise and for maneuver',
-            units='1/m',
-        )
-        indep_var_comp.add_output(
-            'rho', val=rho, units='kg/m**3', desc='atmostheric density for cruise and for maneuver'
-        )
-        indep_var_comp.add_output(
-            'speed_of_sound',
-            val=speed_of_sound,
-            units='m/s',
-            desc='speed of sound for cruise and for maneuver',
-        )
-        indep_var_comp.add_output(
-            'CT', val=0.53 / 3600, units='1/s', desc='cruise thrust specific fuel consumption'
-        )
-        indep_var_comp.add_output('R', val=cruise_range, units='m', desc='cruise range')
-        indep_var_comp.add_output(
-            'W0_without_point_masses', val=40.0e3 + fuel + surf_dict['Wf_reserve'], units='kg'
-        )
-        indep_var_comp.add_output(
-            'load_factor', val=np.array([1.0, 2.5]), desc='load factor for cruise and for maneuver'
-        )
-        indep_var_comp.add_output('alpha', val=0.0, units='deg')
-        indep_var_comp.add_output('alpha_maneuver', val=0.0, units='deg')
-        indep_var_comp.add_output('empty_cg', val=np.zeros((3)), units='m')
-        indep_var_comp.add_output('fuel_mass', val=fuel, units='kg')
-
-        # add the problem variables subsystem
-        prob.model.add_subsystem('prob_vars', indep_var_comp, promotes=['*'])
-
-        # point masses
-        point_masses = inputs['engine_mass']
-        point_mass_locations = inputs['engine_location']
-
-        indep_var_comp.add_output('point_masses', val=point_masses, units='kg')
-        indep_var_comp.add_output('point_mass_locations', val=point_mass_locations, units='m')
-
-        # add an ExecComp subsystem to compute the actual W0 to be used within OAS based on the sum of the point mass and other W0 weight
-        prob.model.add_subsystem(
-            'W0_comp',
-            om.ExecComp('W0 = W0_without_point_masses + 2 * sum(point_masses)', units='kg'),
-            promotes=['*'],
-        )
-
-        # Loop over each surface in the surfaces list
-        for surface in surfaces:
-            # Get the surface name and create a group to contain components only for this surface
-            name = surface['name']
-
-            aerostruct_group = AerostructGeometry(surface=surface)
-
-            # Add groups to the problem with the name of the surface.
-            prob.model.add_subsystem(name, aerostruct_group)
-
-        # Loop through and add the specified number of aerostruct points
-        for i in range(2):
-            point_name = 'AS_point_{}'.format(i)
-
-            # Create the aerostruct point group and add it to the model
-            AS_point = AerostructPoint(surfaces=surfaces, internally_connect_fuelburn=False)
-            prob.model.add_subsystem(point_name, AS_point)
-
-            # Connect flow properties to the analysis point
-            prob.model.connect('v', point_name + '.v', src_indices=[i])
-            prob.model.connect('Mach_number', point_name + '.Mach_number', src_indices=[i])
-            prob.model.connect('re', point_name + '.re', src_indices=[i])
-            prob.model.connect('rho', point_name + '.rho', src_indices=[i])
-            prob.model.connect('CT', point_name + '.CT')
-            prob.model.connect('R', point_name + '.R')
-            prob.model.connect('W0', point_name + '.W0')
-            prob.model.connect('speed_of_sound', point_name + '.speed_of_sound', src_indices=[i])
-            prob.model.connect('empty_cg', point_name + '.empty_cg')
-            prob.model.connect('load_factor', point_name + '.load_factor', src_indices=[i])
-            prob.model.connect('fuel_mass', point_name + '.total_perf.L_equals_W.fuelburn')
-            prob.model.connect('fuel_mass', point_name + '.total_perf.CG.fuelburn')
-
-            for surface in surfaces:
-                name = surface['name']
-
-                if surf_dict['distributed_fuel_weight']:
-                    prob.model.connect(
-                        'load_factor', point_name + '.coupled.load_factor', src_indices=[i]
-                    )
-
-                com_name = point_name + '.' + name + '_perf.'
-                prob.model.connect(
-                    name + '.local_stiff_transformed',
-                    point_name + '.coupled.' + name + '.local_stiff_transformed',
-                )
-
-                prob.model.connect(name + '.nodes', point_name + '.coupled.' + name + '.nodes')
-
-                # Connect aerodyamic mesh to coupled group mesh
-                prob.model.connect(name + '.mesh', point_name + '.coupled.' + name + '.mesh')
-
-                if surf_dict['struct_weight_relief']:
-                    prob.model.connect(
-                        name + '.element_mass', point_name + '.coupled.' + name + '.element_mass'
-                    )
-
-                # Connect performance calculation variables
-                prob.model.connect(name + '.nodes', com_name + 'nodes')
-                prob.model.connect(
-                    name + '.cg_location', point_name + '.' + 'total_perf.' + name + '_cg_location'
-                )
-                prob.model.connect(
-                    name + '.structural_mass',
-                    point_name + '.' + 'total_perf.' + name + '_structural_mass',
-                )
-
-                # Connect wingbox properties to von Mises stress calcs
-                prob.model.connect(name + '.Qz', com_name + 'Qz')
-                prob.model.connect(name + '.J', com_name + 'J')
-                prob.model.connect(name + '.A_enc', com_name + 'A_enc')
-                prob.model.connect(name + '.htop', com_name + 'htop')
-                prob.model.connect(name + '.hbottom', com_name + 'hbottom')
-                prob.model.connect(name + '.hfront', com_name + 'hfront')
-                prob.model.connect(name + '.hrear', com_name + 'hrear')
-
-                prob.model.connect(name + '.spar_thickness', com_name + 'spar_thickness')
-                prob.model.connect(name + '.t_over_c', com_name + 't_over_c')
-
-                coupled_name = point_name + '.coupled.' + name
-                prob.model.connect('point_masses', coupled_name + '.point_masses')
-                prob.model.connect('point_mass_locations', coupled_name + '.point_mass_locations')
-
-        # use only the first surface for constraints
-        surface = surfaces[0]
-        name = surface['name']
-
-        prob.model.connect('alpha', 'AS_point_0' + '.alpha')
-        prob.model.connect('alpha_maneuver', 'AS_point_1' + '.alpha')
-
-        # Here we add the fuel volume constraint component to the model
-        prob.model.add_subsystem('fuel_vol_delta', WingboxFuelVolDelta(surface=surfaces[0]))
-        prob.model.connect(name + '.struct_setup.fuel_vols', 'fuel_vol_delta.fuel_vols')
-        prob.model.connect('AS_point_0.fuelburn', 'fuel_vol_delta.fuelburn')
-
-        if surf_dict['distributed_fuel_weight']:
-            prob.model.connect(
-                name + '.struct_setup.fuel_vols',
-                'AS_point_0.coupled.' + name + '.struct_states.fuel_vols',
-            )
-            prob.model.connect(
-                'fuel_mass', 'AS_point_0.coupled.' + name + '.struct_states.fuel_mass'
-            )
-
-            prob.model.connect(
-                name + '.struct_setup.fuel_vols',
-                'AS_point_1.coupled.' + name + '.struct_states.fuel_vols',
-            )
-            prob.model.connect(
-                'fuel_mass', 'AS_point_1.coupled.' + name + '.struct_states.fuel_mass'
-            )
-
-        # add an ExecComp to compute the fuel difference
-        comp = om.ExecComp('fuel_diff = (fuel_mass - fuelburn) / fuelburn', units='kg')
-
-        # add a fuel difference subsystem
-        prob.model.add_subsystem(
-            'fuel_diff', comp, promotes_inputs=['fuel_mass'], promotes_outputs=['fuel_diff']
-        )
-        prob.model.connect('AS_point_0.fuelburn', 'fuel_diff.fuelburn')
-
-        # add an objective function
-        prob.model.add_objective('AS_point_0.fuelburn', scaler=1e-5)
-
-        # add design variables
-        prob.model.add_design_var(name + '.twist_cp', lower=-15.0, upper=15.0, scaler=0.1)
-        prob.model.add_design_var(name + '.spar_thickness_cp', lower=0.003, upper=0.1, scaler=1e2)
-        prob.model.add_design_var(name + '.skin_thickness_cp', lower=0.003, upper=0.1, scaler=1e2)
-        prob.model.add_design_var(
-            name + '.geometry.t_over_c_cp', lower=0.07, upper=0.2, scaler=10.0
-        )
-        prob.model.add_design_var('alpha_maneuver', lower=-15.0, upper=15)
-
-        # add problem constraints
-        prob.model.add_constraint('AS_point_0.CL', equals=0.5)
-        prob.model.add_constraint('AS_point_1.L_equals_W', equals=0.0)
-        prob.model.add_constraint('AS_point_1.' + name + '_perf.failure', upper=0.0)
-
-        prob.model.add_constraint('fuel_vol_delta.fuel_vol_delta', lower=0.0)
-
-        prob.model.add_design_var('fuel_mass', lower=0.0, upper=2e5, scaler=1e-5)
-        prob.model.add_constraint('fuel_diff', equals=0.0)
-
-        # set up the optimization
-        prob.driver = om.ScipyOptimizeDriver()
-        prob.driver.options['optimizer'] = 'SLSQP'
-        prob.driver.options['tol'] = 1e-8
-        # Set up the problem
-        with warnings.catch_warnings():
-            warnings.filterwarnings('ignore', category=om.PromotionWarning)
-            prob.setup()
-
-        # change linear solver for aerostructural coupled adjoint
-        prob.model.AS_point_0.coupled.linear_solver = om.LinearBlockGS(
-            iprint=0, maxiter=30, use_aitken=True
-        )
-        prob.model.AS_point_1.coupled.linear_solver = om.LinearBlockGS(
-            iprint=0, maxiter=30, use_aitken=True
-        )
-        prob.model.AS_point_0.coupled.nonlinear_solver.options['iprint'] = 0
-        prob.model.AS_point_1.coupled.nonlinear_solver.options['iprint'] = 0
-
-        # Loop through self.previous_DV_values and set each prob value
-        for key, value in self.previous_DV_values.items():
-            prob[key] = value
-
-        # run the problem
-        prob.run_driver()
-
-        self.previous_DV_values[name + '.twist_cp'] = prob[name + '.twist_cp']
-        self.previous_DV_values[name + '.spar_thickness_cp'] = prob[name + '.spar_thickness_cp']
-        self.previous_DV_values[name + '.skin_thickness_cp'] = prob[name + '.skin_thickness_cp']
-        self.previous_DV_values[name + '.geometry.t_over_c_cp'] = prob[
-            name + '.geometry.t_over_c_cp'
-        ]
-        self.previous_DV_values['alpha_maneuver'] = prob['alpha_maneuver']
-
-        # output wing weight and fuel burn
-        outputs['wing_mass'] = prob[name + '.structural_mass'][0]
-        outputs['fuel_burn'] = prob['AS_point_0.fuelburn'][0]
-
-        # calculate execution time
-        delta_time = time.time() - start_time
-        tm_hrs, remainder = divmod(delta_time, 3600)
-        tm_min, remainder = divmod(remainder, 60)
-        tm_sec = int(remainder)
-        tm_msec = (remainder - tm_sec) * 1000
-        print(
-            'Structures OAS Compute End --- execution time {:02}:{:02}:{:02}.{:03}'.format(
-                int(tm_hrs), int(tm_min), int(tm_sec), int(tm_msec)
-            )
-        )
+"""
+OpenMDAO component for aerostructural analysis using OpenAeroStruct.
+
+This analysis is based on the aircraft_for_bench_FwFm.csv input data representing a
+single-aisle commercial transport aircraft.  The wing mesh is generated by user_mesh from
+the wing span, area, taper ratio and sweep inputs, which OASWingMassBuilder connects to
+the Aircraft.Wing.* variables, along with the kink location and kink chord ratio inputs
+and the mesh resolution options.  Like Aircraft.Wing.SWEEP, the sweep input is the sweep
+of the quarter-chord line, and the kink location is a fraction of the half span so that
+it moves with the span.  Their default values reproduce the planform of the
+aircraft_for_bench_FwFm data.
+
+The OAStructures class performs a structural analysis of the given wing
+by applying aeroelastic loads computed at the cruise condition and at each
+of the structural load cases.  By default there is a single load case, a
+2.5g maneuver at Mach 0.64 at sea level; the load_cases option takes any
+list of (Mach, altitude, load factor) cases, such as gust, negative-g or
+roll cases.  The optimization determines the optimum wing skin thickness,
+spar cap thickness, wing twist, wing t/c and the angle of attack of each
+load case that satisfies strength constraints.
+
+The inner problem is a multi-point problem with one AerostructPoint per case.  The
+points share the geometry and structural setup, but the coupled aerostructural solve is
+not vectorized across the cases, so every case adds one coupled solve.
+
+The only Aviary input driving the design is fuel mass, but other variables
+may be included as well.
+
+OAStructures returns the optimized wing mass and the fuel mass burned.
+Currently, only the wing mass is used to override the Aviary variable
+Aircraft.Wing.MASS.
+
+By default the inner OAS problem is rebuilt on every call.  Setting the reuse_problem
+option builds and sets up the inner problem once per component instance and only
+updates the fuel mass and flight conditions on subsequent calls.
+
+Setting the warm_start_file option saves each converged inner design vector to disk and
+starts every inner optimization from the nearest stored solution in fuel mass or
+planform, so restarted and parallel sweep jobs do not begin from the cold defaults.  The
+store keeps the newest warm_start_size design vectors.
+
+Setting the cache_size option puts a least-recently-used response cache in front of
+the inner optimization.  Calls whose inputs match an earlier call, with the fuel mass
+rounded to cache_fuel_tolerance, return the stored wing mass and fuel burn directly.
+Every solved point is stored, together with its partials with respect to fuel when
+those were computed; a call that needs the partials only hits an entry that holds them.
+Setting the cache_file option persists the cache between runs.
+
+By default the partials of wing_mass and fuel_burn with respect to fuel are finite
+differenced, which reruns the inner optimization.  Setting the partials_method option
+to 'post_optimality' computes them from the converged inner problem instead: the fuel
+burn sensitivity is the partial of the Lagrangian with the multipliers estimated from
+the KKT conditions, and the wing mass sensitivity follows from the active constraints
+when they fully determine the design.  When these are unavailable, or when
+partials_method is 'response_surface', the partials are the slopes of a local response
+surface fitted to earlier converged points near the current fuel mass.  The partials
+with respect to the wing span, area, taper ratio and sweep are always central
+differences, since a planform change rebuilds the inner problem, with a step relative to
+the planform set by the planform_fd_step option.
+
+Setting the parallel_points option places the cruise and load case points in a
+ParallelGroup that runs on the component's communicator, so under MPI each point is
+solved on its own processes.  Without MPI the points run one after the other.
+
+Every call records a metrics dictionary with the build, setup and solve times, the
+driver iterations and model and derivative evaluations of the inner optimization, the
+nonlinear and linear solve times and coupled solver iterations of each point, and the
+response cache hits.  The metrics attribute of the component keeps the latest
+metrics_size records, and setting the metrics_file option also appends each record to a
+JSON lines file.  Setting the verbose option prints the times of each call and the mesh
+level it was solved on.
+
+Setting the mesh_levels option solves a list of mesh resolutions from coarse to fine.
+Each level starts from the design converged on the previous one, and the refinement
+stops once the wing mass changes by less than mesh_tolerance between levels.  Later
+calls solve only the level the refinement stopped at, until an input that is baked into
+the surface definition changes.
+
+"""
+
+import collections
+import functools
+import json
+import os
+import time
+import warnings
+
+import numpy as np
+import openmdao.api as om
+
+try:
+    import ambiance
+except ImportError:
+    raise ImportError(
+        "ambiance package not found. You can install it by running 'pip install ambiance'."
+    )
+
+try:
+    import openaerostruct
+except ImportError:
+    raise ImportError(
+        "openaerostruct package not found. You can install it by running 'pip install openaerostruct'."
+    )
+
+from ambiance import Atmosphere
+from openaerostruct.integration.aerostruct_groups import AerostructGeometry, AerostructPoint
+from openaerostruct.structures.wingbox_fuel_vol_delta import WingboxFuelVolDelta
+
+from aviary.examples.external_subsystems.OAS_mass.OAS_wing_mass_response_cache import (
+    ResponseCache,
+)
+from aviary.examples.external_subsystems.OAS_mass.OAS_wing_mass_warm_start import (
+    WarmStartStore,
+    hash_key,
+)
+
+# OAStructures inputs that are baked into the OAS surface definition; a change in any of
+# them requires the inner problem to be rebuilt
+_SURFACE_INPUTS = (
+    'box_upper_x',
+    'box_lower_x',
+    'box_upper_y',
+    'box_lower_y',
+    'airfoil_t_over_c',
+    'wing_span',
+    'wing_area',
+    'wing_taper_ratio',
+    'wing_sweep',
+    'wing_kink_eta',
+    'wing_kink_chord_ratio',
+    'fuel_reserve',
+    'CL0',
+    'CD0',
+)
+
+# OAStructures inputs that OASWingMassBuilder connects to the Aviary wing planform variables
+_PLANFORM_INPUTS = ('wing_span', 'wing_area', 'wing_taper_ratio', 'wing_sweep')
+
+# maximum number of converged points kept per input set for the local response surface
+_RESPONSE_HISTORY_SIZE = 50
+
+# response cache values holding the partials with respect to fuel
+_CACHED_PARTIALS = ('d_wing_mass_d_fuel', 'd_fuel_burn_d_fuel')
+
+# OAStructures options that control how the inner problem is run but not its solution
+_RUN_OPTIONS = (
+    'reuse_problem',
+    'warm_start_file',
+    'warm_start_size',
+    'cache_size',
+    'cache_fuel_tolerance',
+    'cache_file',
+    'parallel_points',
+    'metrics_file',
+    'metrics_size',
+    'verbose',
+    'planform_fd_step',
+)
+
+
+def user_mesh(
+    span=35.9146,
+    area=121.360969,
+    taper_ratio=0.27096357,
+    sweep=22.28416,
+    kink_eta=0.27589894,
+    kink_chord_ratio=0.74193432,
+    nx=2,
+    ny_inboard=3,
+    ny_outboard=5,
+):
+    """
+    Generate a cranked wing mesh from the planform parameters.
+
+    The wing is made of an inboard and an outboard trapezoidal panel that share a
+    constant leading-edge sweep and meet at the kink.  The sweep follows the Aviary
+    definition of Aircraft.Wing.SWEEP, the sweep of the quarter-chord line from the root
+    to the tip, and is converted to the leading-edge sweep of the mesh.  The kink is placed
+    at a fraction of the half span, so it moves with the span.  The default values are
+    taken from the aircraft_for_bench_FwFm data.  Meshes are cached by their parameters,
+    so repeated calls with the same planform are cheap.
+
+    Parameters
+    ----------
+    span : float
+        wing span, tip to tip [m]
+    area : float
+        wing planform area, both sides [m**2]
+    taper_ratio : float
+        ratio of the tip chord to the root chord
+    sweep : float
+        sweep of the quarter-chord line from the root to the tip [deg]
+    kink_eta : float
+        spanwise location of the kink as a fraction of the half span, between zero and one
+    kink_chord_ratio : float or None
+        ratio of the kink chord to the root chord; None places the kink chord on the
+        straight line between the root and tip chords
+    nx : int
+        number of chordwise nodes
+    ny_inboard : int
+        number of spanwise nodes on the inboard panel, including the kink
+    ny_outboard : int
+        number of spanwise nodes on the outboard panel, including the kink
+
+    Returns
+    -------
+    ndarray
+        the (nx, ny_inboard + ny_outboard - 1, 3) mesh of the right half of the wing
+    """
+    if not 0.0 < kink_eta < 1.0:
+        raise ValueError(
+            'The kink location must be between the root and the tip, got kink_eta={}.'.format(
+                kink_eta
+            )
+        )
+
+    return _cached_mesh(
+        float(span),
+        float(area),
+        float(taper_ratio),
+        float(sweep),
+        float(kink_eta),
+        None if kink_chord_ratio is None else float(kink_chord_ratio),
+        int(nx),
+        int(ny_inboard),
+        int(ny_outboard),
+    ).copy()
+
+
+@functools.lru_cache(maxsize=64)
+def _cached_mesh(
+    span, area, taper_ratio, sweep, kink_eta, kink_chord_ratio, nx, ny_inboard, ny_outboard
+):
+    half_span = 0.5 * span
+    kink_location = kink_eta * half_span
+
+    if kink_chord_ratio is None:
+        kink_chord_ratio = 1.0 + (taper_ratio - 1.0) * kink_location / half_span
+
+    # root chord from the area of the two trapezoidal panels on one side
+    root_chord = (0.5 * area) / (
+        0.5 * (1.0 + kink_chord_ratio) * kink_location
+        + 0.5 * (kink_chord_ratio + taper_ratio) * (half_span - kink_location)
+    )
+
+    # The mesh is indexed chordwise, spanwise, then by the 3-D coordinates, where x is
+    # streamwise, y is spanwise, and z is up.  The spanwise nodes run from the tip to the
+    # root; the node for the leading edge at the tip is mesh[0, 0, :] and the node at the
+    # trailing edge at the root is mesh[nx-1, ny-1, :].  We only provide the right half of
+    # the wing here because we use symmetry.
+    # We use ny_inboard+ny_outboard-1 because the 2 segments share the nodes where they
+    # connect.
+    mesh = np.zeros((nx, ny_inboard + ny_outboard - 1, 3))
+
+    # Using uniform spacing for the spanwise locations of all the nodes within each of
+    # the two trapezoidal segments.
+    y = np.concatenate(
+        (
+            np.linspace(half_span, kink_location, ny_outboard),
+            np.linspace(kink_location, 0.0, ny_inboard)[1:],
+        )
+    )
+
+    # the chord varies linearly within each panel
+    chord = root_chord * np.interp(
+        y, [0.0, kink_location, half_span], [1.0, kink_chord_ratio, taper_ratio]
+    )
+
+    # the leading-edge sweep that puts the quarter-chord points of the root and the tip on a
+    # line with the given sweep
+    tan_LE_sweep = np.tan(np.radians(sweep)) + 0.25 * root_chord * (1.0 - taper_ratio) / half_span
+    x_LE = y * tan_LE_sweep
+
+    # uniform chordwise spacing between the leading and trailing edges
+    mesh[:, :, 0] = x_LE + np.linspace(0.0, 1.0, nx)[:, np.newaxis] * chord
+    mesh[:, :, 1] = y
+
+    # Assume no dihedral, so the z-coordinate for all the points is 0.
+
+    mesh.flags.writeable = False
+
+    return mesh
+
+
+class OAStructures(om.ExplicitComponent):
+    """OAS structure component."""
+
+    def initialize(self):
+        self.options.declare('symmetry', default=True, desc='wing symmetry (True or False)')
+        self.options.declare('chord_cos_spacing', default=0, desc='chordwise cosine spacing')
+        self.options.declare('span_cos_spacing', default=0, desc='spanwise cosine spacing')
+        self.options.declare(
+            'num_box_cp', default=0, desc='number of chordwise CPs on the structural box'
+        )
+        self.options.declare('num_twist_cp', default=0, desc='number of twist CPs')
+        self.options.declare('nx', default=2, types=int, desc='number of chordwise mesh nodes')
+        self.options.declare(
+            'ny_inboard',
+            default=3,
+            types=int,
+            desc='number of spanwise mesh nodes on the inboard panel, including the kink',
+        )
+        self.options.declare(
+            'ny_outboard',
+            default=5,
+            types=int,
+            desc='number of spanwise mesh nodes on the outboard panel, including the kink',
+        )
+        self.options.declare(
+            'S_ref_type', default='wetted', desc='type of computed wing area (wetted or projected)'
+        )
+        self.options.declare(
+            'fem_model_type', default='wingbox', desc='type of FEM model (wingbox or tube)'
+        )
+        self.options.declare('with_viscous', default=True, desc='viscous drag selection')
+        self.options.declare('with_wave', default=True, desc='wave drag selection')
+        self.options.declare('k_lam', default=0.05, desc='fraction of chord with laminar flow')
+        self.options.declare(
+            'c_max_t', default=0.38, desc='chordwise location of maximum thickness'
+        )
+        self.options.declare('E', default=73.1e9, desc='Youngs Modulus for AL 7073 [Pa]')
+        self.options.declare(
+            'G', default=(73.1e9 / 2 / 1.33), desc='Shear Modulus for AL 7073 [Pa]'
+        )
+        self.options.declare(
+            'yield', default=(420.0e6 / 1.5), desc='Allowable yield stress for AL 7073 [Pa]'
+        )
+        self.options.declare('mrho', default=2.78e3, desc='Material density for AL 7073 [kg/m^3]')
+        self.options.declare(
+            'strength_factor_for_upper_skin',
+            default=1.0,
+            desc='the yield stress is multiplied by this factor for the upper skin',
+        )
+        self.options.declare(
+            'wing_weight_ratio',
+            default=1.00,
+            desc='Ratio of the total wing weight (including non-structural components) to the wing structural weight.',
+        )
+        self.options.declare(
+            'exact_failure_constraint', default=False, desc='if false, use KS function'
+        )
+        self.options.declare(
+            'struct_weight_relief',
+            default=True,
+            desc='if true, use structural weight as inertia relief loads',
+        )
+        self.options.declare(
+            'distributed_fuel_weight',
+            default=True,
+            desc='Set True to distribute the fuel weight across the entire wing.',
+        )
+        self.options.declare('n_point_masses', default=0, desc='number of point masses')
+        self.options.declare(
+            'fuel_density',
+            default=803.0,
+            desc='fuel density (only needed if the fuel-in-wing volume constraint is used) [kg/m^3]',
+        )
+        self.options.declare(
+            'reuse_problem',
+            default=False,
+            types=bool,
+            desc='if true, build and set up the inner OAS problem once and only update the fuel '
+            'mass and flight conditions on subsequent calls',
+        )
+        self.options.declare(
+            'warm_start_file',
+            default=None,
+            types=str,
+            allow_none=True,
+            desc='JSON lines file used to store converged inner design vectors and warm start '
+            'new inner optimizations from the nearest stored solution',
+        )
+        self.options.declare(
+            'warm_start_size',
+            default=10000,
+            types=int,
+            lower=1,
+            allow_none=True,
+            desc='number of newest design vectors the warm-start store keeps, None keeps all',
+        )
+        self.options.declare(
+            'cache_size',
+            default=0,
+            types=int,
+            lower=0,
+            desc='maximum number of entries in the response cache, 0 disables the cache',
+        )
+        self.options.declare(
+            'cache_fuel_tolerance',
+            default=1e-8,
+            lower=0.0,
+            desc='fuel mass is rounded to a multiple of this value to form the response cache '
+            'key; keep it below any finite difference step taken on fuel [kg]',
+        )
+        self.options.declare(
+            'partials_method',
+            default='fd',
+            values=['fd', 'post_optimality', 'response_surface'],
+            desc='method used for the partials of wing_mass and fuel_burn with respect to fuel; '
+            'the planform partials are always finite differenced',
+        )
+        self.options.declare(
+            'planform_fd_step',
+            default=1e-2,
+            lower=0.0,
+            desc='relative step of the central difference partials with respect to the wing span, '
+            'area, taper ratio and sweep',
+        )
+        self.options.declare(
+            'response_surface_step',
+            default=1e-3,
+            lower=0.0,
+            desc='relative fuel mass step of the extra inner solve made when too few earlier '
+            'points are available to fit the local response surface',
+        )
+        self.options.declare(
+            'response_surface_window',
+            default=0.05,
+            lower=0.0,
+            desc='relative fuel mass window of the earlier points used to fit the local '
+            'response surface',
+        )
+        self.options.declare(
+            'cache_file',
+            default=None,
+            types=str,
+            allow_none=True,
+            desc='JSON file used to persist the response cache between runs',
+        )
+        self.options.declare(
+            'parallel_points',
+            default=False,
+            types=bool,
+            desc='if true, solve the cruise and load case points in a ParallelGroup on the '
+            'component communicator',
+        )
+        self.options.declare(
+            'load_cases',
+            default=[(0.64, 0.0, 2.5)],
+            types=list,
+            desc='list of (Mach, altitude [m], load factor) structural load cases sized in '
+            'addition to the cruise point, each solved as its own aerostructural point',
+        )
+        self.options.declare(
+            'mesh_levels',
+            default=None,
+            types=list,
+            allow_none=True,
+            desc='list of (nx, ny_inboard, ny_outboard) mesh resolutions solved from coarse to '
+            'fine, each warm started from the previous one; None solves the nx, ny_inboard '
+            'and ny_outboard mesh only',
+        )
+        self.options.declare(
+            'metrics_file',
+            default=None,
+            types=str,
+            allow_none=True,
+            desc='JSON lines file that a metrics record is appended to after every call',
+        )
+        self.options.declare(
+            'metrics_size',
+            default=100,
+            types=int,
+            lower=1,
+            desc='number of the latest metrics records kept in the metrics attribute',
+        )
+        self.options.declare(
+            'verbose',
+            default=False,
+            types=bool,
+            desc='if true, print the setup, solve and point times and the mesh level of each call',
+        )
+        self.options.declare(
+            'mesh_tolerance',
+            default=1e-3,
+            lower=0.0,
+            desc='relative change in wing mass between successive mesh levels below which the '
+            'refinement stops',
+        )
+
+    def setup(self):
+        self.add_input('box_upper_x', units='unitless', shape=(self.options['num_box_cp'],))
+        self.add_input('box_lower_x', units='unitless', shape=(self.options['num_box_cp'],))
+        self.add_input('box_upper_y', units='unitless', shape=(self.options['num_box_cp'],))
+        self.add_input('box_lower_y', units='unitless', shape=(self.options['num_box_cp'],))
+        self.add_input('twist_cp', units='deg', shape=(self.options['num_twist_cp'],))
+        self.add_input('spar_thickness_cp', units='m', shape=(self.options['num_twist_cp'],))
+        self.add_input('skin_thickness_cp', units='m', shape=(self.options['num_twist_cp'],))
+        self.add_input('t_over_c_cp', units='unitless', shape=(self.options['num_twist_cp'],))
+        self.add_input('airfoil_t_over_c', units='unitless')
+        self.add_input('wing_span', val=35.9146, units='m')
+        self.add_input('wing_area', val=121.360969, units='m**2')
+        self.add_input('wing_taper_ratio', val=0.27096357, units='unitless')
+        self.add_input(
+            'wing_sweep', val=22.28416, units='deg', desc='quarter-chord sweep, root to tip'
+        )
+        self.add_input(
+            'wing_kink_eta',
+            val=0.27589894,
+            units='unitless',
+            desc='spanwise location of the kink as a fraction of the half span',
+        )
+        self.add_input('wing_kink_chord_ratio', val=0.74193432, units='unitless')
+        self.add_input('fuel', val=0.0, units='kg')
+        self.add_input('fuel_reserve', val=0.0, units='kg')
+        self.add_input('CL0', val=0.0, units='unitless')
+        self.add_input('CD0', val=0.0, units='unitless')
+        self.add_input('cruise_Mach', val=0.0, units='unitless')
+        self.add_input('cruise_altitude', val=0.0, units='m')
+        self.add_input('cruise_range', val=0.0, units='m')
+        self.add_input('cruise_SFC', val=0.0, units='1/s')
+        self.add_input('engine_mass', val=0.0, units='kg')
+        self.add_input('engine_location', val=np.array([0.0, 0.0, 0.0]), units='m')
+
+        self.add_output('wing_mass', units='kg')
+        self.add_output('fuel_burn', units='kg')
+
+        self._declare_partials()
+
+        if not self.options['load_cases']:
+            raise ValueError('OAStructures requires at least one structural load case.')
+
+        self.previous_DV_values = {}
+
+        # metrics recorded for the latest calls, oldest first
+        self.metrics = collections.deque(maxlen=self.options['metrics_size'])
+
+        # inner problems kept for reuse, keyed on the mesh resolution
+        self._probs = {}
+        self._prob = None
+        self._prob_signature = None
+
+        # mesh resolution the refinement stopped at for the current surface definition
+        self._mesh_size = None
+
+        # converged points used by the local response surface, keyed on the non-fuel inputs
+        self._response_history = {}
+        self._partials = {}
+
+        warm_start_file = self.options['warm_start_file']
+        self._warm_start = None
+        if warm_start_file:
+            self._warm_start = WarmStartStore(warm_start_file, self.options['warm_start_size'])
+
+        cache_size = self.options['cache_size']
+        if cache_size > 0:
+            self._cache = ResponseCache(cache_size, self.options['cache_file'])
+        else:
+            self._cache = None
+
+    def _declare_partials(self):
+        """Declare the partials of wing_mass and fuel_burn."""
+        if self.options['partials_method'] == 'fd':
+            self.declare_partials(of=['*'], wrt=['fuel'], method='fd')
+        else:
+            self.declare_partials(of=['wing_mass', 'fuel_burn'], wrt=['fuel'])
+
+        # the inner optimization only converges to a tolerance, so the planform steps are
+        # relative to the planform rather than the OpenMDAO default of 1e-6, and central
+        # differences keep the truncation error of the larger steps down
+        self.declare_partials(
+            of=['wing_mass', 'fuel_burn'],
+            wrt=list(_PLANFORM_INPUTS),
+            method='fd',
+            form='central',
+            step=self.options['planform_fd_step'],
+            step_calc='rel_avg',
+        )
+
+    def compute(self, inputs, outputs):
+        start_time = time.time()
+        metrics = {
+            'fuel': float(inputs['fuel'][0]),
+            'cache_hit': False,
+            'build_time': 0.0,
+            'setup_time': 0.0,
+            'solve_time': 0.0,
+            'sensitivity_time': 0.0,
+            'sensitivity_solves': 0,
+            'mesh_levels': 0,
+            'mesh_size': None,
+            'driver_iterations': 0,
+            'model_evaluations': 0,
+            'model_time': 0.0,
+            'derivative_evaluations': 0,
+            'derivative_time': 0.0,
+            'points': {},
+        }
+
+        # return the stored outputs if this point has been evaluated before, with the fuel
+        # partials if those are needed
+        if self._cache is not None:
+            cache_key = self._cache_key(inputs)
+            if self._fuel_sensitivities():
+                cached_outputs = self._cache.get(cache_key, _CACHED_PARTIALS)
+            else:
+                cached_outputs = self._cache.get(cache_key)
+            if cached_outputs is not None:
+                outputs['wing_mass'] = cached_outputs['wing_mass']
+                outputs['fuel_burn'] = cached_outputs['fuel_burn']
+                if self._fuel_sensitivities():
+                    self._partials = {
+                        'wing_mass': cached_outputs['d_wing_mass_d_fuel'],
+                        'fuel_burn': cached_outputs['d_fuel_burn_d_fuel'],
+                    }
+                metrics['cache_hit'] = True
+                self._record_metrics(metrics, start_time)
+                self._print_metrics(metrics)
+                return
+
+        # perform the wing structural optimization and return the wing mass
+        name = 'meshwing'
+        fuel = inputs['fuel'][0]
+
+        # start from the nearest stored solution, if any
+        if self._warm_start is not None:
+            planform = self._planform(inputs)
+            options_key = self._options_key()
+            key = hash_key(options_key, planform)
+            stored_DV_values = self._warm_start.nearest(key, options_key, fuel, planform)
+            if stored_DV_values is not None:
+                self.previous_DV_values.update(stored_DV_values)
+
+        # discard the reused inner problems when an input that is baked into the surface
+        # definition has changed
+        signature = self._problem_signature(inputs)
+        if signature != self._prob_signature:
+            self._probs = {}
+            self._prob_signature = signature
+            self._mesh_size = None
+
+        # solve the mesh levels from coarse to fine, stopping once the wing mass has converged,
+        # or only the level that the refinement stopped at on an earlier call
+        if self._mesh_size is None:
+            mesh_levels = self._mesh_levels()
+        else:
+            mesh_levels = [self._mesh_size]
+
+        wing_mass = None
+
+        for level, mesh_size in enumerate(mesh_levels):
+            prob = self._probs.get(mesh_size)
+            if prob is None:
+                build_start_time = time.time()
+                prob = self._build_problem(inputs, mesh_size)
+                metrics['build_time'] += time.time() - build_start_time
+                if self.options['reuse_problem']:
+                    self._probs[mesh_size] = prob
+
+            # push the fuel mass and flight conditions into the inner problem
+            setup_start_time = time.time()
+            self._set_problem_inputs(prob, inputs)
+
+            # Loop through self.previous_DV_values and set each prob value.  The control
+            # points are defined along the normalized span, so the values converged on a
+            # coarser mesh carry over directly.
+            for key, value in self.previous_DV_values.items():
+                prob[key] = value
+            metrics['setup_time'] += time.time() - setup_start_time
+
+            # run the problem
+            _reset_point_metrics(prob)
+
+            solve_start_time = time.time()
+            prob.run_driver()
+            metrics['solve_time'] += time.time() - solve_start_time
+            _add_solve_metrics(metrics, prob)
+
+            self.previous_DV_values[name + '.twist_cp'] = prob[name + '.twist_cp']
+            self.previous_DV_values[name + '.spar_thickness_cp'] = prob[name + '.spar_thickness_cp']
+            self.previous_DV_values[name + '.skin_thickness_cp'] = prob[name + '.skin_thickness_cp']
+            self.previous_DV_values[name + '.geometry.t_over_c_cp'] = prob[
+                name + '.geometry.t_over_c_cp'
+            ]
+            self.previous_DV_values['alpha_maneuver'] = prob['alpha_maneuver']
+
+            previous_wing_mass = wing_mass
+            wing_mass = prob[name + '.structural_mass'][0]
+            if previous_wing_mass is not None:
+                change = abs(wing_mass - previous_wing_mass) / abs(previous_wing_mass)
+                if change <= self.options['mesh_tolerance']:
+                    break
+
+        self._prob = prob
+        self._mesh_size = mesh_size
+        metrics['mesh_levels'] = level + 1
+        metrics['mesh_size'] = list(mesh_size)
+
+        if self._warm_start is not None:
+            self._warm_start.add(key, options_key, fuel, planform, self.previous_DV_values)
+
+        # output wing weight and fuel burn
+        outputs['wing_mass'] = prob[name + '.structural_mass'][0]
+        outputs['fuel_burn'] = prob['AS_point_0.fuelburn'][0]
+
+        if self._fuel_sensitivities():
+            sensitivity_start_time = time.time()
+            self._partials = self._compute_sensitivities(prob, inputs, outputs, metrics)
+            metrics['sensitivity_time'] = time.time() - sensitivity_start_time
+
+        # the points of the finite difference planform partials have no fuel partials to store
+        if self._cache is not None:
+            cached_outputs = {'wing_mass': outputs['wing_mass'], 'fuel_burn': outputs['fuel_burn']}
+            if self._fuel_sensitivities():
+                cached_outputs['d_wing_mass_d_fuel'] = self._partials['wing_mass']
+                cached_outputs['d_fuel_burn_d_fuel'] = self._partials['fuel_burn']
+            self._cache.put(cache_key, cached_outputs)
+
+        # calculate execution time
+        self._record_metrics(metrics, start_time)
+        self._print_metrics(metrics)
+
+    def _print_metrics(self, metrics):
+        """Print the execution time of this call, broken down when the verbose option is set."""
+        print(
+            'Structures OAS Compute End --- execution time {}'.format(
+                _format_time(metrics['total_time'])
+            )
+        )
+        if not self.options['verbose']:
+            return
+
+        if metrics['cache_hit']:
+            print(
+                'Structures OAS cache hit --- {} hits, {} misses'.format(
+                    self._cache.hits, self._cache.misses
+                )
+            )
+            return
+
+        print(
+            'Structures OAS times --- setup {}, solve {}, sensitivities {}'.format(
+                _format_time(metrics['build_time'] + metrics['setup_time']),
+                _format_time(metrics['solve_time']),
+                _format_time(metrics['sensitivity_time']),
+            )
+        )
+        print(
+            'Structures OAS point times --- {}'.format(
+                ', '.join(
+                    '{} {} ({} iterations), linear {} ({} iterations)'.format(
+                        point_name,
+                        _format_time(point_metrics['solve_time']),
+                        point_metrics['nonlinear_iterations'],
+                        _format_time(point_metrics['linear_solve_time']),
+                        point_metrics['linear_iterations'],
+                    )
+                    for point_name, point_metrics in metrics['points'].items()
+                )
+            )
+        )
+        if self.options['mesh_levels']:
+            print(
+                'Structures OAS mesh refinement stopped at level {} of {}, mesh {}'.format(
+                    self._mesh_levels().index(self._mesh_size) + 1,
+                    len(self.options['mesh_levels']),
+                    self._mesh_size,
+                )
+            )
+
+    def _record_metrics(self, metrics, start_time):
+        """Complete the metrics of this call, keep them and append them to the metrics file."""
+        metrics['total_time'] = time.time() - start_time
+        if self._cache is not None:
+            metrics['cache_hits'] = self._cache.hits
+            metrics['cache_misses'] = self._cache.misses
+
+        self.metrics.append(metrics)
+
+        metrics_file = self.options['metrics_file']
+        if metrics_file:
+            directory = os.path.dirname(metrics_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            with open(metrics_file, 'a') as f:
+                f.write(json.dumps(metrics) + '\n')
+
+    def compute_partials(self, inputs, partials):
+        if self.options['partials_method'] == 'fd':
+            return
+
+        partials['wing_mass', 'fuel'] = self._partials['wing_mass']
+        partials['fuel_burn', 'fuel'] = self._partials['fuel_burn']
+
+    def _fuel_sensitivities(self):
+        """
+        Return True if compute also evaluates the partials with respect to fuel.
+
+        The points run for the finite difference planform partials are skipped, so that the
+        partials of the unperturbed point are the ones passed to compute_partials.
+        """
+        return self.options['partials_method'] != 'fd' and not self.under_approx
+
+    def _compute_sensitivities(self, prob, inputs, outputs, metrics):
+        """
+        Return the derivatives of wing_mass and fuel_burn with respect to fuel.
+
+        The inner solve that the response surface may need is added to the solve metrics,
+        with its time counted in the sensitivity time.
+        """
+        name = 'meshwing'
+        fuel = inputs['fuel'][0]
+
+        history = self._response_history.setdefault(self._inputs_key(inputs), [])
+        history.append((fuel, outputs['wing_mass'][0], outputs['fuel_burn'][0]))
+        del history[:-_RESPONSE_HISTORY_SIZE]
+
+        sensitivities = {}
+
+        # W0_without_point_masses is the only inner problem parameter that depends on fuel,
+        # with a derivative of one
+        if self.options['partials_method'] == 'post_optimality':
+            sensitivities = _post_optimality_sensitivities(
+                prob, 'W0_without_point_masses', name + '.structural_mass'
+            )
+            sensitivities = {
+                'fuel_burn': sensitivities['objective'],
+                'wing_mass': sensitivities[name + '.structural_mass'],
+            }
+
+        if not sensitivities or None in sensitivities.values():
+            slopes = _response_surface_slopes(
+                history, fuel, self.options['response_surface_window']
+            )
+
+            if slopes is None:
+                # one extra inner solve at a nearby fuel mass, warm started from this solution
+                solution = {key: np.copy(value) for key, value in self.previous_DV_values.items()}
+                for key in ('fuel_mass', 'W0_without_point_masses'):
+                    solution[key] = np.copy(prob[key])
+
+                step = self.options['response_surface_step'] * max(abs(fuel), 1.0)
+                prob['W0_without_point_masses'] = solution['W0_without_point_masses'] + step
+                _reset_point_metrics(prob)
+                prob.run_driver()
+                _add_solve_metrics(metrics, prob)
+                metrics['sensitivity_solves'] += 1
+                history.append(
+                    (
+                        fuel + step,
+                        prob[name + '.structural_mass'][0],
+                        prob['AS_point_0.fuelburn'][0],
+                    )
+                )
+
+                # put the inner problem back at this solution, so that the next call is warm
+                # started from it rather than from the perturbed optimum
+                for key, value in solution.items():
+                    prob[key] = value
+                self.previous_DV_values = {key: solution[key] for key in self.previous_DV_values}
+                prob.run_model()
+                slopes = _response_surface_slopes(
+                    history, fuel, self.options['response_surface_window']
+                )
+
+            for output, slope in zip(('wing_mass', 'fuel_burn'), slopes):
+                if sensitivities.get(output) is None:
+                    sensitivities[output] = slope
+
+        return sensitivities
+
+    def _problem_signature(self, inputs):
+        """Return a hashable key of the inputs that define the OAS surface."""
+        return np.concatenate(
+            [np.atleast_1d(inputs[key]).ravel() for key in _SURFACE_INPUTS]
+        ).tobytes()
+
+    def _planform(self, inputs):
+        """Return a vector describing the planform and surface definition."""
+        return np.concatenate([np.atleast_1d(inputs[key]).ravel() for key in _SURFACE_INPUTS])
+
+    def _mesh_levels(self):
+        """Return the (nx, ny_inboard, ny_outboard) mesh resolutions to solve, coarse to fine."""
+        if self.options['mesh_levels']:
+            return [tuple(mesh_size) for mesh_size in self.options['mesh_levels']]
+
+        return [(self.options['nx'], self.options['ny_inboard'], self.options['ny_outboard'])]
+
+    def _mesh(self, inputs, mesh_size):
+        """Return the wing mesh for the planform inputs at the given mesh resolution."""
+        nx, ny_inboard, ny_outboard = mesh_size
+        return user_mesh(
+            span=inputs['wing_span'][0],
+            area=inputs['wing_area'][0],
+            taper_ratio=inputs['wing_taper_ratio'][0],
+            sweep=inputs['wing_sweep'][0],
+            kink_eta=inputs['wing_kink_eta'][0],
+            kink_chord_ratio=inputs['wing_kink_chord_ratio'][0],
+            nx=nx,
+            ny_inboard=ny_inboard,
+            ny_outboard=ny_outboard,
+        )
+
+    def _options_key(self):
+        """Return a hash of the options that affect the inner problem solution."""
+        return hash_key(
+            {name: self.options[name] for name in self.options if name not in _RUN_OPTIONS}
+        )
+
+    def _inputs_key(self, inputs):
+        """Return a hash of the options and every input except fuel."""
+        return hash_key(
+            self._options_key(),
+            *[inputs[name] for name in sorted(inputs.keys()) if name != 'fuel'],
+        )
+
+    def _cache_key(self, inputs):
+        """Return the response cache key for the given inputs, with the fuel mass rounded."""
+        fuel_tolerance = self.options['cache_fuel_tolerance']
+        fuel = inputs['fuel'][0]
+        if fuel_tolerance > 0.0:
+            fuel = np.round(fuel / fuel_tolerance) * fuel_tolerance
+
+        return hash_key(self._inputs_key(inputs), fuel)
+
+    def _flight_conditions(self, inputs):
+        """Return the inner problem independent variable values for the given inputs."""
+        fuel = inputs['fuel'][0]
+
+        # the cruise point followed by the structural load cases
+        load_cases = np.array(self.options['load_cases'], dtype=float).reshape(-1, 3)
+        mach = np.concatenate(([inputs['cruise_Mach'][0]], load_cases[:, 0]))
+        altitude = np.concatenate(([inputs['cruise_altitude'][0]], load_cases[:, 1]))
+        load_factor = np.concatenate(([1.0], load_cases[:, 2]))
+
+        atmos = Atmosphere(altitude)
+
+        speed_of_sound = atmos.speed_of_sound
+        rho = atmos.density
+        dynamic_viscosity = atmos.dynamic_viscosity
+
+        velocity = mach * speed_of_sound
+
+        return {
+            'Mach_number': mach,
+            'v': velocity,
+            're': rho * velocity / dynamic_viscosity,
+            'rho': rho,
+            'speed_of_sound': speed_of_sound,
+            'load_factor': load_factor,
+            'R': inputs['cruise_range'][0],
+            'W0_without_point_masses': 40.0e3 + fuel + inputs['fuel_reserve'][0],
+            'fuel_mass': fuel,
+            'point_masses': inputs['engine_mass'],
+            'point_mass_locations': inputs['engine_location'],
+        }
+
+    def _set_problem_inputs(self, prob, inputs):
+        """Push the fuel mass and flight conditions from Aviary into the inner problem."""
+        for key, value in self._flight_conditions(inputs).items():
+            prob[key] = value
+
+    def _build_problem(self, inputs, mesh_size):
+        """Build and set up the inner OAS optimization problem on the given mesh resolution."""
+        mesh = self._mesh(inputs, mesh_size)
+
+        # surface options dictionary
+        # fmt: off
+        surf_dict = {
+            # surface name
+            'name': 'meshwing',
+
+            # wing symmetry
+            'symmetry': self.options['symmetry'],
+
+            # wing mesh
+            'mesh': mesh,
+            
+            # wing definition
+            'S_ref_type': self.options['S_ref_type'],
+            'fem_model_type': self.options['fem_model_type'],
+
+            # wing thickness data
+            'data_x_upper': inputs['box_upper_x'],
+            'data_x_lower': inputs['box_lower_x'],
+            'data_y_upper': inputs['box_upper_y'],
+            'data_y_lower': inputs['box_lower_y'],
+
+            # wing sizing parameters
+            'twist_cp': inputs['twist_cp'],
+            'spar_thickness_cp': inputs['spar_thickness_cp'],
+            'skin_thickness_cp': inputs['skin_thickness_cp'],
+            't_over_c_cp': inputs['t_over_c_cp'],
+            'original_wingbox_airfoil_t_over_c': inputs['airfoil_t_over_c'],
+
+            # Aerodynamic deltas.
+            # These CL0 and CD0 values are added to the CL and CD
+            # obtained from aerodynamic analysis of the surface to get
+            # the total CL and CD.
+            # These CL0 and CD0 values do not vary wrt alpha.
+            # They can be used to account for things that are not included, such as contributions from the fuselage, camber, etc.
+            'CL0': inputs['CL0'][0],
+            'CD0': inputs['CD0'][0],
+            'with_viscous': self.options['with_viscous'],
+            'with_wave': self.options['with_wave'],
+
+            # Airfoil properties for viscous drag calculation
+            'k_lam': self.options['k_lam'],
+
+            # flow, used for viscous drag
+            'c_max_t': self.options['c_max_t'],
+            
+            # Structural values
+            'E': self.options['E'],
+            'G': self.options['G'],
+            'yield': self.options['yield'],
+            'mrho': self.options['mrho'],
+            'strength_factor_for_upper_skin': self.options['strength_factor_for_upper_skin'],
+            'wing_weight_ratio': self.options['wing_weight_ratio'],
+            'exact_failure_constraint': self.options['exact_failure_constraint'],
+            
+            # structural weight factors
+            'struct_weight_relief': self.options['struct_weight_relief'],
+            'distributed_fuel_weight': self.options['distributed_fuel_weight'],
+            
+            # point masses
+            'n_point_masses': self.options['n_point_masses'],
+            
+            # fuel factors
+            'fuel_density': self.options['fuel_density'],
+            'Wf_reserve': inputs['fuel_reserve'][0],
+        }
+        # fmt: on
+
+        # define the surfaces
+        surfaces = [surf_dict]
+
+        # Create the problem and assign the model group.  Parallel points share the
+        # communicator of this component so that they are distributed under MPI.
+        if self.options['parallel_points']:
+            prob = om.Problem(comm=self.comm)
+        else:
+            prob = om.Problem()
+
+        conditions = self._flight_conditions(inputs)
+        num_points = conditions['load_factor'].size
+
+        # set values on the subproblem based on what's passed in from Aviary
+        # Add problem information as an independent variables component
+        indep_var_comp = om.IndepVarComp()
+        indep_var_comp.add_output(
+            'Mach_number',
+            val=conditions['Mach_number'],
+            desc='Mach number for cruise and for each load case',
+        )
+        indep_var_comp.add_output(
+            'v', val=conditions['v'], units='m/s', desc='velocity for cruise and for each load case'
+        )
+        indep_var_comp.add_output(
+            're',
+            val=conditions['re'],
+            desc='Reynolds number per unit length for cruise and for each load case',
+            units='1/m',
+        )
+        indep_var_comp.add_output(
+            'rho',
+            val=conditions['rho'],
+            units='kg/m**3',
+            desc='atmostheric density for cruise and for each load case',
+        )
+        indep_var_comp.add_output(
+            'speed_of_sound',
+            val=conditions['speed_of_sound'],
+            units='m/s',
+            desc='speed of sound for cruise and for each load case',
+        )
+        indep_var_comp.add_output(
+            'CT', val=0.53 / 3600, units='1/s', desc='cruise thrust specific fuel consumption'
+        )
+        indep_var_comp.add_output('R', val=conditions['R'], units='m', desc='cruise range')
+        indep_var_comp.add_output(
+            'W0_without_point_masses', val=conditions['W0_without_point_masses'], units='kg'
+        )
+        indep_var_comp.add_output(
+            'load_factor',
+            val=conditions['load_factor'],
+            desc='load factor for cruise and for each load case',
+        )
+        indep_var_comp.add_output('alpha', val=0.0, units='deg')
+        indep_var_comp.add_output(
+            'alpha_maneuver',
+            val=np.zeros(num_points - 1),
+            units='deg',
+            desc='angle of attack for each load case',
+        )
+        indep_var_comp.add_output('empty_cg', val=np.zeros((3)), units='m')
+        indep_var_comp.add_output('fuel_mass', val=conditions['fuel_mass'], units='kg')
+
+        # add the problem variables subsystem
+        prob.model.add_subsystem('prob_vars', indep_var_comp, promotes=['*'])
+
+        # point masses
+        indep_var_comp.add_output('point_masses', val=conditions['point_masses'], units='kg')
+        indep_var_comp.add_output(
+            'point_mass_locations', val=conditions['point_mass_locations'], units='m'
+        )
+
+        # add an ExecComp subsystem to compute the actual W0 to be used within OAS based on the sum of the point mass and other W0 weight
+        prob.model.add_subsystem(
+            'W0_comp',
+            om.ExecComp('W0 = W0_without_point_masses + 2 * sum(point_masses)', units='kg'),
+            promotes=['*'],
+        )
+
+        # Loop over each surface in the surfaces list
+        for surface in surfaces:
+            # Get the surface name and create a group to contain components only for this surface
+            name = surface['name']
+
+            aerostruct_group = AerostructGeometry(surface=surface)
+
+            # Add groups to the problem with the name of the surface.
+            prob.model.add_subsystem(name, aerostruct_group)
+
+        # The points are independent given the geometry.  Promoting everything from the
+        # ParallelGroup keeps their names the same as in the serial model.
+        if self.options['parallel_points']:
+            points = prob.model.add_subsystem('points', om.ParallelGroup(), promotes=['*'])
+        else:
+            points = prob.model
+
+        # Loop through and add the specified number of aerostruct points
+        for i in range(num_points):
+            point_name = 'AS_point_{}'.format(i)
+
+            # Create the aerostruct point group and add it to the model
+            AS_point = _TimedAerostructPoint(surfaces=surfaces, internally_connect_fuelburn=False)
+            points.add_subsystem(point_name, AS_point)
+
+            # Connect flow properties to the analysis point
+            prob.model.connect('v', point_name + '.v', src_indices=[i])
+            prob.model.connect('Mach_number', point_name + '.Mach_number', src_indices=[i])
+            prob.model.connect('re', point_name + '.re', src_indices=[i])
+            prob.model.connect('rho', point_name + '.rho', src_indices=[i])
+            prob.model.connect('CT', point_name + '.CT')
+            prob.model.connect('R', point_name + '.R')
+            prob.model.connect('W0', point_name + '.W0')
+            prob.model.connect('speed_of_sound', point_name + '.speed_of_sound', src_indices=[i])
+            prob.model.connect('empty_cg', point_name + '.empty_cg')
+            prob.model.connect('load_factor', point_name + '.load_factor', src_indices=[i])
+            prob.model.connect('fuel_mass', point_name + '.total_perf.L_equals_W.fuelburn')
+            prob.model.connect('fuel_mass', point_name + '.total_perf.CG.fuelburn')
+
+            for surface in surfaces:
+                name = surface['name']
+
+                if surf_dict['distributed_fuel_weight']:
+                    prob.model.connect(
+                        'load_factor', point_name + '.coupled.load_factor', src_indices=[i]
+                    )
+
+                com_name = point_name + '.' + name + '_perf.'
+                prob.model.connect(
+                    name + '.local_stiff_transformed',
+                    point_name + '.coupled.' + name + '.local_stiff_transformed',
+                )
+
+                prob.model.connect(name + '.nodes', point_name + '.coupled.' + name + '.nodes')
+
+                # Connect aerodyamic mesh to coupled group mesh
+                prob.model.connect(name + '.mesh', point_name + '.coupled.' + name + '.mesh')
+
+                if surf_dict['struct_weight_relief']:
+                    prob.model.connect(
+                        name + '.element_mass', point_name + '.coupled.' + name + '.element_mass'
+                    )
+
+                # Connect performance calculation variables
+                prob.model.connect(name + '.nodes', com_name + 'nodes')
+                prob.model.connect(
+                    name + '.cg_location', point_name + '.' + 'total_perf.' + name + '_cg_location'
+                )
+                prob.model.connect(
+                    name + '.structural_mass',
+                    point_name + '.' + 'total_perf.' + name + '_structural_mass',
+                )
+
+                # Connect wingbox properties to von Mises stress calcs
+                prob.model.connect(name + '.Qz', com_name + 'Qz')
+                prob.model.connect(name + '.J', com_name + 'J')
+                prob.model.connect(name + '.A_enc', com_name + 'A_enc')
+                prob.model.connect(name + '.htop', com_name + 'htop')
+                prob.model.connect(name + '.hbottom', com_name + 'hbottom')
+                prob.model.connect(name + '.hfront', com_name + 'hfront')
+                prob.model.connect(name + '.hrear', com_name + 'hrear')
+
+                prob.model.connect(name + '.spar_thickness', com_name + 'spar_thickness')
+                prob.model.connect(name + '.t_over_c', com_name + 't_over_c')
+
+                coupled_name = point_name + '.coupled.' + name
+                prob.model.connect('point_masses', coupled_name + '.point_masses')
+                prob.model.connect('point_mass_locations', coupled_name + '.point_mass_locations')
+
+        # use only the first surface for constraints
+        surface = surfaces[0]
+        name = surface['name']
+
+        prob.model.connect('alpha', 'AS_point_0' + '.alpha')
+        for i in range(1, num_points):
+            prob.model.connect('alpha_maneuver', 'AS_point_{}.alpha'.format(i), src_indices=[i - 1])
+
+        # Here we add the fuel volume constraint component to the model
+        prob.model.add_subsystem('fuel_vol_delta', WingboxFuelVolDelta(surface=surfaces[0]))
+        prob.model.connect(name + '.struct_setup.fuel_vols', 'fuel_vol_delta.fuel_vols')
+        prob.model.connect('AS_point_0.fuelburn', 'fuel_vol_delta.fuelburn')
+
+        if surf_dict['distributed_fuel_weight']:
+            for i in range(num_points):
+                struct_states = 'AS_point_{}.coupled.'.format(i) + name + '.struct_states'
+                prob.model.connect(name + '.struct_setup.fuel_vols', struct_states + '.fuel_vols')
+                prob.model.connect('fuel_mass', struct_states + '.fuel_mass')
+
+        # add an ExecComp to compute the fuel difference
+        comp = om.ExecComp('fuel_diff = (fuel_mass - fuelburn) / fuelburn', units='kg')
+
+        # add a fuel difference subsystem
+        prob.model.add_subsystem(
+            'fuel_diff', comp, promotes_inputs=['fuel_mass'], promotes_outputs=['fuel_diff']
+        )
+        prob.model.connect('AS_point_0.fuelburn', 'fuel_diff.fuelburn')
+
+        # add an objective function
+        prob.model.add_objective('AS_point_0.fuelburn', scaler=1e-5)
+
+        # add design variables
+        prob.model.add_design_var(name + '.twist_cp', lower=-15.0, upper=15.0, scaler=0.1)
+        prob.model.add_design_var(name + '.spar_thickness_cp', lower=0.003, upper=0.1, scaler=1e2)
+        prob.model.add_design_var(name + '.skin_thickness_cp', lower=0.003, upper=0.1, scaler=1e2)
+        prob.model.add_design_var(
+            name + '.geometry.t_over_c_cp', lower=0.07, upper=0.2, scaler=10.0
+        )
+        prob.model.add_design_var('alpha_maneuver', lower=-15.0, upper=15)
+
+        # add problem constraints
+        prob.model.add_constraint('AS_point_0.CL', equals=0.5)
+        for i in range(1, num_points):
+            point_name = 'AS_point_{}'.format(i)
+            prob.model.add_constraint(point_name + '.L_equals_W', equals=0.0)
+            prob.model.add_constraint(point_name + '.' + name + '_perf.failure', upper=0.0)
+
+        prob.model.add_constraint('fuel_vol_delta.fuel_vol_delta', lower=0.0)
+
+        prob.model.add_design_var('fuel_mass', lower=0.0, upper=2e5, scaler=1e-5)
+        prob.model.add_constraint('fuel_diff', equals=0.0)
+
+        # set up the optimization
+        prob.driver = om.ScipyOptimizeDriver()
+        prob.driver.options['optimizer'] = 'SLSQP'
+        prob.driver.options['tol'] = 1e-8
+        # Set up the problem
+        with warnings.catch_warnings():
+            warnings.filterwarnings('ignore', category=om.PromotionWarning)
+            prob.setup()
+
+        # change linear solver for aerostructural coupled adjoint; under MPI only the
+        # points on this process are set up
+        for AS_point in points.system_iter(recurse=False, typ=AerostructPoint):
+            AS_point.coupled.linear_solver = om.LinearBlockGS(iprint=0, maxiter=30, use_aitken=True)
+            AS_point.coupled.nonlinear_solver.options['iprint'] = 0
+
+        prob.final_setup()
+
+        return prob
+
+
+class _TimedAerostructPoint(AerostructPoint):
+    """
+    AerostructPoint that accumulates the time and coupled iterations of its own solves.
+
+    The solve time is measured around every nonlinear solve of the point, and the
+    iterations are those of the coupled nonlinear solver in each solve, so the metrics of
+    a point do not depend on the systems solved before or after it.  The Gauss-Seidel pass
+    that starts each coupled solve is not counted as an iteration.
+
+    The linear solves of the point for the derivatives of the driver are timed the same
+    way, with the iterations of the coupled linear solver.
+
+    Attributes
+    ----------
+    solve_metrics : dict
+        nonlinear and linear solve times and coupled solver iterations since the last reset
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.solve_metrics = {}
+        self.reset_solve_metrics()
+
+    def reset_solve_metrics(self):
+        """Set the accumulated solve time and iterations to zero."""
+        self.solve_metrics = {
+            'solve_time': 0.0,
+            'nonlinear_iterations': 0,
+            'linear_solve_time': 0.0,
+            'linear_iterations': 0,
+        }
+
+    def _solve_nonlinear(self):
+        start_time = time.perf_counter()
+        super()._solve_nonlinear()
+        self.solve_metrics['solve_time'] += time.perf_counter() - start_time
+        self.solve_metrics['nonlinear_iterations'] += self.coupled.nonlinear_solver._iter_count
+
+    def _solve_linear(self, *args, **kwargs):
+        start_time = time.perf_counter()
+        super()._solve_linear(*args, **kwargs)
+        self.solve_metrics['linear_solve_time'] += time.perf_counter() - start_time
+        self.solve_metrics['linear_iterations'] += self.coupled.linear_solver._iter_count
+
+
+def _reset_point_metrics(prob):
+    """Set the accumulated metrics of the aerostructural points of prob on this process to zero."""
+    for point in prob.model.system_iter(typ=_TimedAerostructPoint):
+        point.reset_solve_metrics()
+
+
+def _add_solve_metrics(metrics, prob):
+    """Add the driver and per point metrics of the last run of prob to metrics."""
+    result = prob.driver.result
+    metrics['driver_iterations'] += result.iter_count
+    metrics['model_evaluations'] += result.model_evals
+    metrics['model_time'] += result.model_time
+    metrics['derivative_evaluations'] += result.deriv_evals
+    metrics['derivative_time'] += result.deriv_time
+
+    points = {
+        point.name: dict(point.solve_metrics)
+        for point in prob.model.system_iter(typ=_TimedAerostructPoint)
+    }
+
+    # under MPI each process only holds the metrics of its own points
+    if prob.comm.size > 1:
+        for proc_points in prob.comm.allgather(points):
+            points.update(proc_points)
+
+    for point_name in sorted(points):
+        point_metrics = metrics['points'].setdefault(point_name, {})
+        for key, value in points[point_name].items():
+            point_metrics[key] = point_metrics.get(key, 0) + value
+
+
+def _format_time(delta_time):
+    """Format an elapsed time in seconds as hh:mm:ss.mmm."""
+    tm_hrs, remainder = divmod(delta_time, 3600)
+    tm_min, remainder = divmod(remainder, 60)
+    tm_sec = int(remainder)
+    tm_msec = (remainder - tm_sec) * 1000
+    return '{:02}:{:02}:{:02}.{:03}'.format(int(tm_hrs), int(tm_min), int(tm_sec), int(tm_msec))
+
+
+def _post_optimality_sensitivities(prob, param, output, active_tol=1e-6, kkt_tol=1e-3):
+    """
+    Return first-order post-optimality sensitivities of a converged optimization.
+
+    The Lagrange multipliers of the active constraints and design variable bounds are
+    estimated from the KKT stationarity condition.  The sensitivity of the optimal
+    objective is then the partial of the Lagrangian with respect to the parameter.  The
+    sensitivity of another output additionally needs the change in the optimal design,
+    which is only available without second derivatives when the active constraints fully
+    determine the design.  Both assume the active set does not change.
+
+    The KKT system is formed with the driver scaling applied, where the optimizer
+    converged it; the objective and constraint gradients can be nearly parallel without
+    it.
+
+    Parameters
+    ----------
+    prob : openmdao.api.Problem
+        the optimization problem, after run_driver
+    param : str
+        promoted name of the independent variable to differentiate with respect to
+    output : str
+        promoted name of an output other than the objective to differentiate
+    active_tol : float
+        relative tolerance used to decide whether a constraint or bound is active
+    kkt_tol : float
+        largest KKT stationarity residual, relative to the objective gradient, accepted
+
+    Returns
+    -------
+    dict
+        derivatives of the 'objective' and of output with respect to param; a value is
+        None when it is not available
+    """
+    model = prob.model
+    driver = prob.driver
+
+    design_vars = model.get_design_vars()
+    constraints = model.get_constraints()
+    objective = next(iter(model.get_objectives()))
+
+    dv_names = list(design_vars)
+    totals = prob.compute_totals(
+        of=[objective, output] + list(constraints),
+        wrt=dv_names + [param],
+        return_format='dict',
+        driver_scaling=False,
+    )
+
+    dv_values = driver.get_design_var_values(driver_scaling=False)
+    dv_sizes = [np.atleast_1d(dv_values[name]).size for name in dv_names]
+
+    def scaler(meta, size=1):
+        return np.broadcast_to(1.0 if meta['scaler'] is None else meta['scaler'], size)
+
+    dv_scaler = np.concatenate(
+        [scaler(design_vars[name], size) for name, size in zip(dv_names, dv_sizes)]
+    )
+    objective_scaler = scaler(model.get_objectives()[objective])[0]
+
+    def jac(of, wrt, of_scaler=1.0):
+        # derivatives of the scaled output with respect to the scaled design variables
+        J = np.hstack([np.atleast_2d(totals[of][name]) for name in wrt])
+        J = J * np.atleast_1d(of_scaler)[:, np.newaxis]
+        if wrt is dv_names:
+            J = J / dv_scaler
+        return J
+
+    sensitivities = {'objective': None, output: None}
+
+    # gradients and constraint Jacobians of the active set, with respect to the design
+    # variables and to the parameter
+    active_jac = []
+    active_param_jac = []
+
+    constraint_values = driver.get_constraint_values(driver_scaling=False)
+    for name, meta in constraints.items():
+        values = np.atleast_1d(constraint_values[name]).ravel()
+        if meta['equals'] is not None:
+            active = np.ones(values.size, dtype=bool)
+        else:
+            active = np.zeros(values.size, dtype=bool)
+            for bound in (meta['lower'], meta['upper']):
+                if bound is not None and np.all(np.abs(bound) < 1e20):
+                    active |= np.abs(values - bound) <= active_tol * np.maximum(1.0, np.abs(bound))
+
+        con_scaler = scaler(meta, values.size)
+        active_jac.append(jac(name, dv_names, con_scaler)[active])
+        active_param_jac.append(jac(name, [param], con_scaler)[active].ravel())
+
+    x = np.concatenate([np.atleast_1d(dv_values[name]).ravel() for name in dv_names])
+    num_dvs = x.size
+
+    bound_active = np.zeros(num_dvs, dtype=bool)
+    for key in ('lower', 'upper'):
+        bound = np.concatenate(
+            [
+                np.broadcast_to(design_vars[name][key], size)
+                for name, size in zip(dv_names, dv_sizes)
+            ]
+        )
+        bound_active |= np.abs(x - bound) <= active_tol * np.maximum(1.0, np.abs(bound))
+
+    active_jac.append(np.eye(num_dvs)[bound_active])
+    active_param_jac.append(np.zeros(np.count_nonzero(bound_active)))
+
+    active_jac = np.vstack(active_jac)
+    active_param_jac = np.concatenate(active_param_jac)
+
+    # Lagrange multipliers from the stationarity condition grad(f) + J^T lambda = 0
+    grad_objective = jac(objective, dv_names, objective_scaler).ravel()
+    multipliers = np.linalg.lstsq(active_jac.T, -grad_objective, rcond=None)[0]
+    residual = grad_objective + active_jac.T @ multipliers
+    if np.linalg.norm(residual) > kkt_tol * max(np.linalg.norm(grad_objective), 1e-30):
+        return sensitivities
+
+    sensitivities['objective'] = (
+        jac(objective, [param], objective_scaler).ravel()[0] + multipliers @ active_param_jac
+    ) / objective_scaler
+
+    # the active constraints fix the design when they form a nonsingular square system
+    if active_jac.shape[0] == num_dvs and np.linalg.matrix_rank(active_jac) == num_dvs:
+        d_x = -np.linalg.solve(active_jac, active_param_jac)
+        sensitivities[output] = (
+            jac(output, [param]).ravel()[0] + jac(output, dv_names).ravel() @ d_x
+        )
+
+    return sensitivities
+
+
+def _response_surface_slopes(history, fuel, window):
+    """
+    Return the slopes of wing mass and fuel burn at fuel from nearby converged points.
+
+    A quadratic is fitted through three or more points within the relative window, and a
+    line through two.
+
+    Parameters
+    ----------
+    history : list of tuple
+        converged (fuel, wing_mass, fuel_burn) points
+    fuel : float
+        fuel mass at which the slopes are evaluated [kg]
+    window : float
+        relative fuel mass window of the points used in the fit
+
+    Returns
+    -------
+    tuple or None
+        slopes of wing mass and fuel burn with respect to fuel, or None if fewer than two
+        distinct points are in the window
+    """
+    points = np.array(history)
+    delta = points[:, 0] - fuel
+    points = points[np.abs(delta) <= window * max(abs(fuel), 1.0)]
+
+    # keep the most recent point at each fuel mass, nearest points first
+    fuels, index = np.unique(points[::-1, 0], return_index=True)
+    points = points[::-1][index]
+    points = points[np.argsort(np.abs(points[:, 0] - fuel))][:5]
+
+    if points.shape[0] < 2:
+        return None
+
+    # fit in a normalized fuel coordinate for conditioning
+    scale = np.max(np.abs(points[:, 0] - fuel))
+    t = (points[:, 0] - fuel) / scale
+    order = 2 if points.shape[0] >= 3 else 1
+    basis = np.vander(t, order + 1, increasing=True)
+    coefficients = np.linalg.lstsq(basis, points[:, 1:], rcond=None)[0]
+
+    return tuple(coefficients[1] / scale)
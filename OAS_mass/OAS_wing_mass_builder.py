@@ -2,6 +2,9 @@ import openmdao.api as om
 
 import aviary.api as av
 from aviary.examples.external_subsystems.OAS_mass.OAS_wing_mass_analysis import OAStructures
+from aviary.examples.external_subsystems.OAS_mass.OAS_wing_mass_surrogate import (
+    OASWingMassSurrogate,
+)
 
 
 class OASWingMassBuilder(av.SubsystemBuilderBase):
@@ -14,17 +17,21 @@ class OASWingMassBuilder(av.SubsystemBuilderBase):
     ----------
     name : str ('wing_mass')
         object label
+    surrogate_file : str or None
+        .npz file of a trained wing mass surrogate; if given, the surrogate replaces the
+        full OAS analysis inside its trust region
 
     Methods
     -------
-    __init__(self, name='wing_mass'):
+    __init__(self, name='wing_mass', surrogate_file=None):
         Initializes the OASWingmassBuilder object with a given name.
     build_pre_mission(self) -> openmdao.core.System:
         Build an OpenMDAO system for the pre-mission computations of the subsystem.
     """
 
-    def __init__(self, name='wing_mass'):
+    def __init__(self, name='wing_mass', surrogate_file=None):
         super().__init__(name)
+        self.surrogate_file = surrogate_file
 
     def build_pre_mission(self, aviary_inputs):
         """
@@ -37,19 +44,30 @@ class OASWingMassBuilder(av.SubsystemBuilderBase):
             the pre-mission part of the Aviary problem. This
             includes sizing, design, and other non-mission parameters.
         """
+        options = {
+            'symmetry': True,
+            'wing_weight_ratio': 1.0,
+            'S_ref_type': 'projected',
+            'n_point_masses': 1,
+            'num_twist_cp': 4,
+            'num_box_cp': 51,
+        }
+
+        if self.surrogate_file is None:
+            aerostructures = OAStructures(**options)
+        else:
+            aerostructures = OASWingMassSurrogate(surrogate_file=self.surrogate_file, **options)
+
         wing_group = om.Group()
         wing_group.add_subsystem(
             'aerostructures',
-            OAStructures(
-                symmetry=True,
-                wing_weight_ratio=1.0,
-                S_ref_type='projected',
-                n_point_masses=1,
-                num_twist_cp=4,
-                num_box_cp=51,
-            ),
+            aerostructures,
             promotes_inputs=[
                 ('fuel', av.Mission.Design.FUEL_MASS),
+                ('wing_span', av.Aircraft.Wing.SPAN),
+                ('wing_area', av.Aircraft.Wing.AREA),
+                ('wing_taper_ratio', av.Aircraft.Wing.TAPER_RATIO),
+                ('wing_sweep', av.Aircraft.Wing.SWEEP),
             ],
             promotes_outputs=[('wing_mass', av.Aircraft.Wing.MASS)],
         )
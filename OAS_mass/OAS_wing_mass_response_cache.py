@@ -0,0 +1,148 @@
+"""
+Memoizing response cache for the OAStructures inner optimization.
+
+The outer Aviary optimizer often evaluates OAStructures again at fuel masses that are
+identical or nearly identical to earlier ones, and each evaluation reruns the whole
+aerostructural optimization.  ResponseCache is a least-recently-used cache of the
+component outputs that OAStructures checks before running the inner problem.
+
+The cache holds at most max_size entries and counts its hits and misses.  When a
+filename is given the entries are loaded from that file on creation and written back to
+it after every new entry, so the cache persists between runs.  Every write merges in the
+entries that other processes have written to the file since, and goes through a
+temporary file of its own, so several processes may share one cache file.
+"""
+
+import json
+import os
+import tempfile
+from collections import OrderedDict
+
+import numpy as np
+
+
+class ResponseCache(object):
+    """
+    Least-recently-used cache of OAStructures outputs.
+
+    Attributes
+    ----------
+    max_size : int
+        maximum number of entries held by the cache
+    filename : str or None
+        JSON file used to persist the cache between runs
+    hits : int
+        number of lookups that found a stored entry
+    misses : int
+        number of lookups that did not find a stored entry
+    """
+
+    def __init__(self, max_size=128, filename=None):
+        self.max_size = max_size
+        self.filename = filename
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+        if filename is not None and os.path.exists(filename):
+            self.load()
+
+    def get(self, key, names=()):
+        """
+        Return the outputs stored for the given key.
+
+        Parameters
+        ----------
+        key : str
+            cache key of the inputs
+        names : iterable of str
+            values the entry must hold to count as a hit
+
+        Returns
+        -------
+        dict or None
+            output values keyed by output name, or None on a miss
+        """
+        if key not in self._entries or any(name not in self._entries[key] for name in names):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return {name: np.array(value) for name, value in self._entries[key].items()}
+
+    def put(self, key, values):
+        """
+        Store the outputs for the given key, evicting the least recently used entry if full.
+
+        The values are merged into any entry already stored for the key.
+
+        Parameters
+        ----------
+        key : str
+            cache key of the inputs
+        values : dict
+            output values keyed by output name
+        """
+        entry = self._entries.setdefault(key, {})
+        entry.update(
+            {name: np.asarray(value, dtype=float).tolist() for name, value in values.items()}
+        )
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+        if self.filename is not None:
+            self.save()
+
+    def clear(self):
+        """Remove every entry and reset the hit and miss counters."""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def load(self):
+        """Load the entries stored in the cache file, most recently used last."""
+        self._entries = OrderedDict(self._read())
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def save(self):
+        """Merge the entries stored in the cache file into this cache and write it back."""
+        directory = os.path.dirname(self.filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # entries written by other processes since the last load are older than the ones
+        # held here
+        entries = OrderedDict(
+            (key, values) for key, values in self._read() if key not in self._entries
+        )
+        entries.update(self._entries)
+        while len(entries) > self.max_size:
+            entries.popitem(last=False)
+        self._entries = entries
+
+        # write to a temporary file of this process first, so that an interrupted run cannot
+        # corrupt the cache and concurrent writers do not clobber each other's file
+        with tempfile.NamedTemporaryFile(
+            'w', dir=directory or '.', prefix=os.path.basename(self.filename), delete=False
+        ) as f:
+            json.dump(list(self._entries.items()), f)
+        os.replace(f.name, self.filename)
+
+    def _read(self):
+        """Return the (key, values) pairs stored in the cache file, most recently used last."""
+        if not os.path.exists(self.filename):
+            return []
+
+        with open(self.filename, 'r') as f:
+            return json.load(f)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
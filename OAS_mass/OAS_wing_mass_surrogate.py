@@ -0,0 +1,381 @@
+"""
+Surrogate model replacement for the OAStructures wing mass analysis.
+
+Every OAStructures evaluation runs a full aerostructural optimization, which is too
+expensive for large Aviary sweeps.  WingMassSurrogate is a cubic radial basis function
+response surface with a linear tail that maps the fuel mass and the wing span, area,
+taper ratio and sweep to the wing mass and fuel burn computed by OAStructures.  It
+provides analytic derivatives, takes new training points incrementally and is saved to
+a compact .npz file.
+
+OASWingMassSurrogate is a drop-in replacement for OAStructures that evaluates the
+surrogate inside its trust region: the bounding box of the training points, within
+trust_radius of the nearest training point in coordinates normalized by the training
+range.  Outside the trust region, or until the surrogate has enough training points, it
+runs the full OAStructures optimization, adds the result to the surrogate and saves it.
+The partials at such a point are the OAStructures ones rather than the surrogate
+gradient, which is only trusted where the surrogate values are.  The partials with
+respect to fuel come from the converged inner problem, so partials_method defaults to
+'post_optimality' and cannot be 'fd'.  The planform partials are central differences
+whose perturbed solves are also added to the surrogate as training points.
+
+The surrogate is trained offline by running OASWingMassSurrogate with an empty
+surrogate file over a set of sampled inputs.  The inputs that are not surrogate inputs,
+such as the airfoil and the flight conditions, are assumed to be the same as in the
+training runs.
+"""
+
+import os
+
+import numpy as np
+
+from aviary.examples.external_subsystems.OAS_mass.OAS_wing_mass_analysis import (
+    _PLANFORM_INPUTS,
+    _RUN_OPTIONS,
+    OAStructures,
+)
+from aviary.examples.external_subsystems.OAS_mass.OAS_wing_mass_warm_start import hash_key
+
+# OAStructures inputs and outputs modeled by the surrogate
+_SURROGATE_INPUTS = ('fuel',) + _PLANFORM_INPUTS
+_SURROGATE_OUTPUTS = ('wing_mass', 'fuel_burn')
+
+# OASWingMassSurrogate options that control the surrogate but not the OAS solution
+_SURROGATE_OPTIONS = ('surrogate_file', 'trust_radius', 'min_training_points')
+
+
+class WingMassSurrogate(object):
+    """
+    Cubic radial basis function response surface with a linear tail.
+
+    Attributes
+    ----------
+    filename : str or None
+        .npz file the training points are saved to and loaded from
+    min_points : int or None
+        number of training points needed before the surrogate is fitted; None uses the
+        number of inputs plus two
+    """
+
+    def __init__(self, filename=None, min_points=None):
+        self.filename = filename
+        self.min_points = min_points
+        self._x = None
+        self._y = None
+        self._weights = None
+
+        if filename is not None and os.path.exists(filename):
+            self.load()
+
+    @property
+    def num_points(self):
+        """Return the number of training points."""
+        return 0 if self._x is None else self._x.shape[0]
+
+    @property
+    def fitted(self):
+        """Return True if the surrogate has enough training points to be evaluated."""
+        return self._weights is not None
+
+    def add_points(self, x, y):
+        """
+        Add training points and refit the surrogate.
+
+        Parameters
+        ----------
+        x : array_like
+            (num_points, num_inputs) or (num_inputs,) input values
+        y : array_like
+            (num_points, num_outputs) or (num_outputs,) output values
+        """
+        x = np.atleast_2d(np.asarray(x, dtype=float))
+        y = np.asarray(y, dtype=float).reshape(x.shape[0], -1)
+
+        if self._x is None:
+            self._x = x
+            self._y = y
+        else:
+            self._x = np.vstack((self._x, x))
+            self._y = np.vstack((self._y, y))
+
+        self._fit()
+
+    def predict(self, x):
+        """
+        Return the surrogate outputs at a point.
+
+        Parameters
+        ----------
+        x : array_like
+            (num_inputs,) input values
+
+        Returns
+        -------
+        ndarray
+            (num_outputs,) output values
+        """
+        z = self._normalize(x)
+        r = np.linalg.norm(z - self._z, axis=1)
+        return r**3 @ self._weights + self._coefficients[0] + z @ self._coefficients[1:]
+
+    def gradient(self, x):
+        """
+        Return the derivatives of the surrogate outputs with respect to the inputs.
+
+        Parameters
+        ----------
+        x : array_like
+            (num_inputs,) input values
+
+        Returns
+        -------
+        ndarray
+            (num_outputs, num_inputs) derivatives
+        """
+        z = self._normalize(x)
+        delta = z - self._z
+        r = np.linalg.norm(delta, axis=1)
+
+        # d(r**3)/dz = 3 r (z - z_i)
+        dz = self._weights.T @ (3.0 * r[:, None] * delta) + self._coefficients[1:].T
+        return dz / self._scale
+
+    def trusted(self, x, radius):
+        """
+        Return True if the point lies in the trust region of the surrogate.
+
+        Parameters
+        ----------
+        x : array_like
+            (num_inputs,) input values
+        radius : float
+            largest normalized distance to the nearest training point
+
+        Returns
+        -------
+        bool
+            True if the surrogate is fitted, the point is inside the bounding box of the
+            training points and within radius of the nearest one
+        """
+        if not self.fitted:
+            return False
+
+        x = np.asarray(x, dtype=float)
+        upper = self._lower + self._range
+        tolerance = 1e-10 * np.maximum(np.abs(self._lower), 1.0)
+        if np.any(x < self._lower - tolerance) or np.any(x > upper + tolerance):
+            return False
+
+        distance = np.linalg.norm(self._normalize(x) - self._z, axis=1)
+        return distance.min() <= radius
+
+    def save(self, filename=None):
+        """Write the training points to the .npz file."""
+        filename = filename or self.filename
+
+        directory = os.path.dirname(filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # write to a temporary file first so an interrupted run cannot corrupt the surrogate
+        tmp_filename = filename + '.tmp'
+        with open(tmp_filename, 'wb') as f:
+            np.savez_compressed(f, x=self._x, y=self._y)
+        os.replace(tmp_filename, filename)
+
+    def load(self, filename=None):
+        """Read the training points from the .npz file and fit the surrogate."""
+        with np.load(filename or self.filename) as data:
+            self._x = data['x']
+            self._y = data['y']
+
+        self._fit()
+
+    def _normalize(self, x):
+        return (np.asarray(x, dtype=float) - self._lower) / self._scale
+
+    def _fit(self):
+        """Solve for the radial basis function weights and the linear tail coefficients."""
+        num_points, num_inputs = self._x.shape
+        min_points = self.min_points or num_inputs + 2
+        if num_points < min_points:
+            self._weights = None
+            return
+
+        self._lower = self._x.min(axis=0)
+        self._range = self._x.max(axis=0) - self._lower
+        self._scale = np.where(self._range > 0.0, self._range, 1.0)
+        self._z = self._normalize(self._x)
+
+        phi = np.linalg.norm(self._z[:, None, :] - self._z[None, :, :], axis=2) ** 3
+        tail = np.hstack((np.ones((num_points, 1)), self._z))
+
+        # inputs that are constant over the training points make the system singular, so
+        # use the least-squares solution
+        A = np.block([[phi, tail], [tail.T, np.zeros((num_inputs + 1, num_inputs + 1))]])
+        b = np.vstack((self._y, np.zeros((num_inputs + 1, self._y.shape[1]))))
+        solution = np.linalg.lstsq(A, b, rcond=None)[0]
+
+        self._weights = solution[:num_points]
+        self._coefficients = solution[num_points:]
+
+
+class OASWingMassSurrogate(OAStructures):
+    """
+    OAStructures that evaluates a trained wing mass surrogate inside its trust region.
+
+    Points outside the trust region are solved with the full OAStructures optimization and
+    added to the surrogate, which is saved after every new point.  Inside the trust region
+    the partials of wing_mass and fuel_burn with respect to the surrogate inputs are the
+    analytic derivatives of the surrogate.  At a point solved with OAStructures they are
+    the OAStructures partials: the fuel partials of the converged inner problem, and
+    central differences for the planform partials whose perturbed solves are added to the
+    surrogate.
+    """
+
+    def initialize(self):
+        super().initialize()
+        self.options.declare(
+            'partials_method',
+            default='post_optimality',
+            values=['post_optimality', 'response_surface'],
+            desc='method used for the partials of wing_mass and fuel_burn with respect to fuel '
+            'at the points solved with OAStructures',
+        )
+        self.options.declare(
+            'surrogate_file',
+            types=str,
+            desc='.npz file the surrogate training points are loaded from and saved to',
+        )
+        self.options.declare(
+            'trust_radius',
+            default=0.25,
+            lower=0.0,
+            desc='largest distance to the nearest training point, normalized by the training '
+            'range, at which the surrogate is evaluated instead of OAS',
+        )
+        self.options.declare(
+            'min_training_points',
+            default=None,
+            types=int,
+            allow_none=True,
+            desc='number of training points needed before the surrogate is used; None uses '
+            'the number of surrogate inputs plus two',
+        )
+
+    def setup(self):
+        super().setup()
+
+        self._surrogate = WingMassSurrogate(
+            self.options['surrogate_file'], self.options['min_training_points']
+        )
+        self.surrogate_evaluations = 0
+        self.fallback_evaluations = 0
+
+        # outputs of the last compute if it ran OAStructures, None if it used the surrogate
+        self._fallback_outputs = None
+        self._finite_differencing = False
+
+    def _declare_partials(self):
+        self.declare_partials(of=list(_SURROGATE_OUTPUTS), wrt=list(_SURROGATE_INPUTS))
+
+    def compute(self, inputs, outputs):
+        x = self._surrogate_inputs(inputs)
+
+        if self._surrogate.trusted(x, self.options['trust_radius']):
+            y = self._surrogate.predict(x)
+            for i, name in enumerate(_SURROGATE_OUTPUTS):
+                outputs[name] = y[i]
+
+            self.surrogate_evaluations += 1
+            print(
+                'Structures OAS Compute End --- surrogate ({} surrogate, {} OAS evaluations)'.format(
+                    self.surrogate_evaluations, self.fallback_evaluations
+                )
+            )
+            self._fallback_outputs = None
+            return
+
+        # outside the trust region, solve the full problem and train on the result
+        super().compute(inputs, outputs)
+        self._fallback_outputs = _output_values(outputs)
+
+        self._surrogate.add_points(x, self._fallback_outputs)
+        self._surrogate.save()
+        self.fallback_evaluations += 1
+
+    def compute_partials(self, inputs, partials):
+        if self._fallback_outputs is None:
+            jac = self._surrogate.gradient(self._surrogate_inputs(inputs))
+            for i, of in enumerate(_SURROGATE_OUTPUTS):
+                for j, wrt in enumerate(_SURROGATE_INPUTS):
+                    partials[of, wrt] = jac[i, j]
+            return
+
+        # The point was solved with OAStructures, which may also have been outside the
+        # range the surrogate was fitted to, so the OAStructures partials are used.  The
+        # planform partials that OAStructures leaves to OpenMDAO finite differencing are
+        # differenced here, since this component declares all of its partials, and the
+        # perturbed solves are kept as training points.
+        super().compute_partials(inputs, partials)
+
+        self._finite_differencing = True
+        try:
+            for wrt in _PLANFORM_INPUTS:
+                derivatives = self._finite_difference(inputs, wrt)
+                for i, of in enumerate(_SURROGATE_OUTPUTS):
+                    partials[of, wrt] = derivatives[i]
+        finally:
+            self._finite_differencing = False
+
+        self._surrogate.save()
+
+    def _fuel_sensitivities(self):
+        # the finite difference points must not replace the fuel partials of the solved point
+        return super()._fuel_sensitivities() and not self._finite_differencing
+
+    def _finite_difference(self, inputs, wrt):
+        """
+        Return the OAStructures central difference derivatives of the outputs with respect to wrt.
+
+        The step is the one OAStructures declares for the planform inputs, relative to the
+        input.
+        """
+        step = self.options['planform_fd_step']
+        step *= abs(inputs[wrt][0]) or 1.0
+        forward = self._perturbed_outputs(inputs, wrt, step)
+        backward = self._perturbed_outputs(inputs, wrt, -step)
+        return (forward - backward) / (2.0 * step)
+
+    def _perturbed_outputs(self, inputs, wrt, step):
+        """Return the OAStructures outputs with the input wrt perturbed by step and train on them."""
+        perturbed_inputs = {name: inputs[name].copy() for name in inputs.keys()}
+        perturbed_inputs[wrt] += step
+
+        outputs = {}
+        super().compute(perturbed_inputs, outputs)
+        y = _output_values(outputs)
+
+        self._surrogate.add_points(self._surrogate_inputs(perturbed_inputs), y)
+        self.fallback_evaluations += 1
+        return y
+
+    def _surrogate_inputs(self, inputs):
+        """Return the surrogate input vector for the given component inputs."""
+        return np.array([inputs[name][0] for name in _SURROGATE_INPUTS])
+
+    def _options_key(self):
+        # the surrogate options do not change the OAS solution, so warm starts are shared
+        # with OAStructures
+        return hash_key(
+            {
+                name: self.options[name]
+                for name in self.options
+                if name not in _RUN_OPTIONS + _SURROGATE_OPTIONS
+            }
+        )
+
+
+def _output_values(outputs):
+    """Return the surrogate output vector for the given component outputs."""
+    return np.array([np.ravel(outputs[name])[0] for name in _SURROGATE_OUTPUTS])
@@ -0,0 +1,229 @@
+"""
+On-disk warm-start store for the OAStructures inner optimization.
+
+OAStructures keeps the last converged inner design vector (twist_cp, spar and skin
+thickness, t_over_c_cp and alpha_maneuver) in memory, so every new process starts the
+inner SLSQP optimization from the cold defaults.  WarmStartStore saves the converged
+design vectors to a JSON lines file so that restarted or parallel sweep jobs can start
+from the nearest stored solution instead.
+
+Each record is tagged with a key built from a hash of the planform and the component
+options, the fuel mass and the planform vector itself.  A lookup returns the record
+with the same key that is nearest in fuel mass.  When no record has the same key, the
+record with the same options that is nearest in planform geometry is used instead.
+
+Records are appended one line at a time, so several processes may share one file.  The
+records read so far are kept in memory, indexed by key and by options, and only the lines
+appended since the last lookup are read.  Once the store holds twice max_records records,
+the oldest are dropped down to the newest max_records, in memory and in the file.
+"""
+
+import bisect
+import hashlib
+import json
+import os
+
+import numpy as np
+
+
+def hash_key(*parts):
+    """
+    Return a stable hex digest of the given parts.
+
+    Parameters
+    ----------
+    *parts : dict, array_like, str or float
+        Values to hash.  Dictionaries are hashed with sorted keys and arrays by value.
+
+    Returns
+    -------
+    str
+        The SHA-1 hex digest of the parts.
+    """
+    digest = hashlib.sha1()
+    for part in parts:
+        if isinstance(part, dict):
+            text = json.dumps(part, sort_keys=True, default=repr)
+        elif isinstance(part, str):
+            text = part
+        else:
+            text = repr(np.round(np.asarray(part, dtype=float).ravel(), 12).tolist())
+        digest.update(text.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class WarmStartStore(object):
+    """
+    JSON lines store of converged OAStructures inner design vectors.
+
+    Attributes
+    ----------
+    filename : str
+        path of the JSON lines file holding the records
+    max_records : int or None
+        number of newest records kept when the store is trimmed; None keeps every record
+    """
+
+    def __init__(self, filename, max_records=10000):
+        self.filename = filename
+        self.max_records = max_records
+        self._records = []
+        self._offset = 0
+        self._lines = 0
+        self._file_id = None
+        self._index()
+
+    def add(self, key, options_key, fuel, planform, design_vars):
+        """
+        Append a converged design vector to the store.
+
+        Parameters
+        ----------
+        key : str
+            hash of the planform and options the design vector was converged for
+        options_key : str
+            hash of the options alone, used for the nearest-geometry fallback
+        fuel : float
+            fuel mass the design vector was converged for [kg]
+        planform : array_like
+            planform vector the design vector was converged for
+        design_vars : dict
+            inner design variable values keyed by their promoted names
+        """
+        record = {
+            'key': key,
+            'options_key': options_key,
+            'fuel': float(fuel),
+            'planform': np.asarray(planform, dtype=float).ravel().tolist(),
+            'design_vars': {
+                name: np.asarray(value, dtype=float).ravel().tolist()
+                for name, value in design_vars.items()
+            },
+        }
+
+        directory = os.path.dirname(self.filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with open(self.filename, 'a') as f:
+            f.write(json.dumps(record) + '\n')
+
+        self._load()
+        if self.max_records is not None and self._lines >= 2 * self.max_records:
+            self._compact()
+
+    def nearest(self, key, options_key, fuel, planform):
+        """
+        Return the stored design vector nearest to the given fuel mass and planform.
+
+        Parameters
+        ----------
+        key : str
+            hash of the planform and options
+        options_key : str
+            hash of the options alone
+        fuel : float
+            fuel mass to find a starting point for [kg]
+        planform : array_like
+            planform vector to find a starting point for
+
+        Returns
+        -------
+        dict or None
+            design variable values keyed by their promoted names, or None if no
+            compatible record is stored
+        """
+        self._load()
+
+        if key in self._by_key:
+            fuels, records = self._by_key[key]
+            i = bisect.bisect_left(fuels, fuel)
+            candidates = range(max(i - 1, 0), min(i + 1, len(fuels)))
+            best = records[min(candidates, key=lambda j: abs(fuels[j] - fuel))]
+        else:
+            planform = np.asarray(planform, dtype=float).ravel()
+            records = [
+                record
+                for record in self._by_options.get(options_key, [])
+                if len(record['planform']) == planform.size
+            ]
+            if not records:
+                return None
+
+            # relative distance in planform, then fuel mass to break ties
+            scale = np.maximum(np.abs(planform), 1e-12)
+            planforms = np.array([record['planform'] for record in records])
+            distance = np.linalg.norm((planforms - planform) / scale, axis=1)
+            fuel_distance = np.abs(np.array([record['fuel'] for record in records]) - fuel)
+            best = records[np.lexsort((fuel_distance, distance))[0]]
+
+        return {name: np.array(value) for name, value in best['design_vars'].items()}
+
+    def __len__(self):
+        self._load()
+        return len(self._records)
+
+    def _load(self):
+        """Read any records appended to the file since the last load."""
+        if not os.path.exists(self.filename):
+            return
+
+        # another process compacted the file, so read it again from the start
+        stat = os.stat(self.filename)
+        file_id = (stat.st_dev, stat.st_ino)
+        if file_id != self._file_id or stat.st_size < self._offset:
+            self._file_id = file_id
+            self._records = []
+            self._offset = 0
+            self._lines = 0
+            self._index()
+
+        with open(self.filename, 'r') as f:
+            f.seek(self._offset)
+            for line in iter(f.readline, ''):
+                # a partially written line from another process is read again next time
+                if not line.endswith('\n'):
+                    break
+                self._offset = f.tell()
+                if line.strip():
+                    record = json.loads(line)
+                    self._records.append(record)
+                    self._index_record(record)
+                    self._lines += 1
+
+        # drop the oldest records in batches, so that the index is rebuilt only now and then
+        if self.max_records is not None and len(self._records) >= 2 * self.max_records:
+            del self._records[: -self.max_records]
+            self._index()
+
+    def _index(self):
+        """Index every record in memory by key and by options."""
+        self._by_key = {}
+        self._by_options = {}
+        for record in self._records:
+            self._index_record(record)
+
+    def _index_record(self, record):
+        """Add a record to the key index, sorted by fuel mass, and to the options index."""
+        fuels, records = self._by_key.setdefault(record['key'], ([], []))
+        i = bisect.bisect_right(fuels, record['fuel'])
+        fuels.insert(i, record['fuel'])
+        records.insert(i, record)
+        self._by_options.setdefault(record['options_key'], []).append(record)
+
+    def _compact(self):
+        """Rewrite the file with the records kept in memory only."""
+        # Write to a temporary file first so that a killed job keeps the old file.  A record
+        # appended by another process while the file is rewritten is lost, which only costs
+        # that process a warm start.
+        tmp_filename = '{}.{}.tmp'.format(self.filename, os.getpid())
+        with open(tmp_filename, 'w') as f:
+            for record in self._records:
+                f.write(json.dumps(record) + '\n')
+        os.replace(tmp_filename, self.filename)
+
+        stat = os.stat(self.filename)
+        self._file_id = (stat.st_dev, stat.st_ino)
+        self._offset = stat.st_size
+        self._lines = len(self._records)
@@ -1,97 +1,480 @@
-import unittest
-
-import numpy as np
-import openmdao.api as om
-from openmdao.utils.testing_utils import use_tempdirs
-
-from aviary.examples.external_subsystems.OAS_mass.OAS_wing_mass_analysis import OAStructures
-
-
-class Test_OAStructures(unittest.TestCase):
-    """Test OAS wing mass component."""
-
-    @use_tempdirs
-    def test_OAS_wing_mass_analysis(self):
-        # run program
-        prob = om.Problem()
-
-        # mesh example
-        prob.model.add_subsystem(
-            'OAS',
-            OAStructures(
-                symmetry=True,
-                wing_weight_ratio=1.0,
-                S_ref_type='projected',
-                n_point_masses=1,
-                num_twist_cp=4,
-                num_box_cp=51,
-            ),
-        )
-
-        prob.setup()
-
-        # test data taken from the OpenAeroStruct example aeroelastic wingbox example
-        # and the aircraft_for_bench_FwFm.csv benchmark data file.  All length units are in meters
-        # and all mass units are in kilograms for this test data.
-        # fmt: off
-        prob['OAS.box_upper_x'] = np.array(
-            [
-                0.1, 0.11, 0.12, 0.13, 0.14, 0.15, 0.16, 0.17, 0.18, 0.19, 0.2, 0.21, 0.22, 0.23,
-                0.24, 0.25, 0.26, 0.27, 0.28, 0.29, 0.3, 0.31, 0.32, 0.33, 0.34, 0.35, 0.36, 0.37,
-                0.38, 0.39, 0.4, 0.41, 0.42, 0.43, 0.44, 0.45, 0.46, 0.47, 0.48, 0.49, 0.5, 0.51,
-                0.52, 0.53, 0.54, 0.55, 0.56, 0.57, 0.58, 0.59, 0.6,
-            ]
-        )
-        prob['OAS.box_lower_x'] = np.array(
-            [
-                0.1, 0.11, 0.12, 0.13, 0.14, 0.15, 0.16, 0.17, 0.18, 0.19, 0.2, 0.21, 0.22, 0.23,
-                0.24, 0.25, 0.26, 0.27, 0.28, 0.29, 0.3, 0.31, 0.32, 0.33, 0.34, 0.35, 0.36, 0.37,
-                0.38, 0.39, 0.4, 0.41, 0.42, 0.43, 0.44, 0.45, 0.46, 0.47, 0.48, 0.49, 0.5, 0.51,
-                0.52, 0.53, 0.54, 0.55, 0.56, 0.57, 0.58, 0.59, 0.6,
-            ]
-        )
-        prob['OAS.box_upper_y'] = np.array(
-            [
-                0.0447, 0.046, 0.0472, 0.0484, 0.0495, 0.0505, 0.0514, 0.0523, 0.0531, 0.0538,
-                0.0545, 0.0551, 0.0557, 0.0563, 0.0568, 0.0573, 0.0577, 0.0581, 0.0585, 0.0588,
-                0.0591, 0.0593, 0.0595, 0.0597, 0.0599, 0.06, 0.0601, 0.0602, 0.0602, 0.0602,
-                0.0602, 0.0602, 0.0601, 0.06, 0.0599, 0.0598, 0.0596, 0.0594, 0.0592, 0.0589,
-                0.0586, 0.0583, 0.058, 0.0576, 0.0572, 0.0568, 0.0563, 0.0558, 0.0553, 0.0547,
-                0.0541,
-            ]
-        )
-        prob['OAS.box_lower_y'] = np.array(
-            [
-                -0.0447, -0.046, -0.0473, -0.0485, -0.0496, -0.0506, -0.0515, -0.0524, -0.0532,
-                -0.054, -0.0547, -0.0554, -0.056, -0.0565, -0.057, -0.0575, -0.0579, -0.0583,
-                -0.0586, -0.0589, -0.0592, -0.0594, -0.0595, -0.0596, -0.0597, -0.0598, -0.0598,
-                -0.0598, -0.0598, -0.0597, -0.0596, -0.0594, -0.0592, -0.0589, -0.0586, -0.0582,
-                -0.0578, -0.0573, -0.0567, -0.0561, -0.0554, -0.0546, -0.0538, -0.0529, -0.0519,
-                -0.0509, -0.0497, -0.0485, -0.0472, -0.0458, -0.0444,
-            ]
-        )
-        # fmt: on
-
-        prob['OAS.twist_cp'] = np.array([-6.0, -6.0, -4.0, 0.0])
-        prob['OAS.spar_thickness_cp'] = np.array([0.004, 0.005, 0.008, 0.01])
-        prob['OAS.skin_thickness_cp'] = np.array([0.005, 0.01, 0.015, 0.025])
-        prob['OAS.t_over_c_cp'] = np.array([0.08, 0.08, 0.10, 0.08])
-        prob['OAS.airfoil_t_over_c'] = 0.13
-        prob['OAS.fuel'] = 18163.652864
-        prob['OAS.fuel_reserve'] = 1360.77711
-        prob['OAS.CD0'] = 0.0078
-        prob['OAS.cruise_Mach'] = 0.785
-        prob['OAS.cruise_altitude'] = 11303.682962301647
-        prob['OAS.cruise_range'] = 6482000.0
-        prob['OAS.cruise_SFC'] = 0.53 / 3600
-        prob['OAS.engine_mass'] = 3356.583538
-        prob['OAS.engine_location'] = np.array([4.825, -1.0, 0.0])
-
-        prob.run_model()
-
-        print('wing mass = ', prob.model.get_val('OAS.wing_mass', units='lbm'))
-        print('fuel burn = ', prob.model.get_val('OAS.fuel_burn', units='lbm'))
-
-
-if __name__ == '__main__':
-    unittest.main()
+import json
+import time
+import unittest
+from unittest import mock
+
+import numpy as np
+import openmdao.api as om
+from openmdao.utils.assert_utils import assert_check_totals, assert_near_equal
+from openmdao.utils.testing_utils import use_tempdirs
+
+from aviary.examples.external_subsystems.OAS_mass.OAS_wing_mass_analysis import (
+    OAStructures,
+    _post_optimality_sensitivities,
+    _reset_point_metrics,
+    _response_surface_slopes,
+    user_mesh,
+)
+
+
+def _build_problem(**kwargs):
+    """Return the OAS wing mass test problem with the benchmark inputs set."""
+    prob = om.Problem()
+
+    # mesh example
+    prob.model.add_subsystem(
+        'OAS',
+        OAStructures(
+            symmetry=True,
+            wing_weight_ratio=1.0,
+            S_ref_type='projected',
+            n_point_masses=1,
+            num_twist_cp=4,
+            num_box_cp=51,
+            **kwargs,
+        ),
+    )
+
+    prob.setup()
+
+    # test data taken from the OpenAeroStruct example aeroelastic wingbox example
+    # and the aircraft_for_bench_FwFm.csv benchmark data file.  All length units are in meters
+    # and all mass units are in kilograms for this test data.
+    # fmt: off
+    prob['OAS.box_upper_x'] = np.array(
+        [
+            0.1, 0.11, 0.12, 0.13, 0.14, 0.15, 0.16, 0.17, 0.18, 0.19, 0.2, 0.21, 0.22, 0.23,
+            0.24, 0.25, 0.26, 0.27, 0.28, 0.29, 0.3, 0.31, 0.32, 0.33, 0.34, 0.35, 0.36, 0.37,
+            0.38, 0.39, 0.4, 0.41, 0.42, 0.43, 0.44, 0.45, 0.46, 0.47, 0.48, 0.49, 0.5, 0.51,
+            0.52, 0.53, 0.54, 0.55, 0.56, 0.57, 0.58, 0.59, 0.6,
+        ]
+    )
+    prob['OAS.box_lower_x'] = np.array(
+        [
+            0.1, 0.11, 0.12, 0.13, 0.14, 0.15, 0.16, 0.17, 0.18, 0.19, 0.2, 0.21, 0.22, 0.23,
+            0.24, 0.25, 0.26, 0.27, 0.28, 0.29, 0.3, 0.31, 0.32, 0.33, 0.34, 0.35, 0.36, 0.37,
+            0.38, 0.39, 0.4, 0.41, 0.42, 0.43, 0.44, 0.45, 0.46, 0.47, 0.48, 0.49, 0.5, 0.51,
+            0.52, 0.53, 0.54, 0.55, 0.56, 0.57, 0.58, 0.59, 0.6,
+        ]
+    )
+    prob['OAS.box_upper_y'] = np.array(
+        [
+            0.0447, 0.046, 0.0472, 0.0484, 0.0495, 0.0505, 0.0514, 0.0523, 0.0531, 0.0538,
+            0.0545, 0.0551, 0.0557, 0.0563, 0.0568, 0.0573, 0.0577, 0.0581, 0.0585, 0.0588,
+            0.0591, 0.0593, 0.0595, 0.0597, 0.0599, 0.06, 0.0601, 0.0602, 0.0602, 0.0602,
+            0.0602, 0.0602, 0.0601, 0.06, 0.0599, 0.0598, 0.0596, 0.0594, 0.0592, 0.0589,
+            0.0586, 0.0583, 0.058, 0.0576, 0.0572, 0.0568, 0.0563, 0.0558, 0.0553, 0.0547,
+            0.0541,
+        ]
+    )
+    prob['OAS.box_lower_y'] = np.array(
+        [
+            -0.0447, -0.046, -0.0473, -0.0485, -0.0496, -0.0506, -0.0515, -0.0524, -0.0532,
+            -0.054, -0.0547, -0.0554, -0.056, -0.0565, -0.057, -0.0575, -0.0579, -0.0583,
+            -0.0586, -0.0589, -0.0592, -0.0594, -0.0595, -0.0596, -0.0597, -0.0598, -0.0598,
+            -0.0598, -0.0598, -0.0597, -0.0596, -0.0594, -0.0592, -0.0589, -0.0586, -0.0582,
+            -0.0578, -0.0573, -0.0567, -0.0561, -0.0554, -0.0546, -0.0538, -0.0529, -0.0519,
+            -0.0509, -0.0497, -0.0485, -0.0472, -0.0458, -0.0444,
+        ]
+    )
+    # fmt: on
+
+    prob['OAS.twist_cp'] = np.array([-6.0, -6.0, -4.0, 0.0])
+    prob['OAS.spar_thickness_cp'] = np.array([0.004, 0.005, 0.008, 0.01])
+    prob['OAS.skin_thickness_cp'] = np.array([0.005, 0.01, 0.015, 0.025])
+    prob['OAS.t_over_c_cp'] = np.array([0.08, 0.08, 0.10, 0.08])
+    prob['OAS.airfoil_t_over_c'] = 0.13
+    prob['OAS.fuel'] = 18163.652864
+    prob['OAS.fuel_reserve'] = 1360.77711
+    prob['OAS.CD0'] = 0.0078
+    prob['OAS.cruise_Mach'] = 0.785
+    prob['OAS.cruise_altitude'] = 11303.682962301647
+    prob['OAS.cruise_range'] = 6482000.0
+    prob['OAS.cruise_SFC'] = 0.53 / 3600
+    prob['OAS.engine_mass'] = 3356.583538
+    prob['OAS.engine_location'] = np.array([4.825, -1.0, 0.0])
+
+    return prob
+
+
+@use_tempdirs
+class Test_OAStructures(unittest.TestCase):
+    """Test OAS wing mass component."""
+
+    @use_tempdirs
+    def test_OAS_wing_mass_analysis(self):
+        # run program
+        prob = _build_problem()
+
+        prob.run_model()
+
+        print('wing mass = ', prob.model.get_val('OAS.wing_mass', units='lbm'))
+        print('fuel burn = ', prob.model.get_val('OAS.fuel_burn', units='lbm'))
+
+    @use_tempdirs
+    def test_OAS_wing_mass_analysis_reuse_problem(self):
+        prob = _build_problem(reuse_problem=True)
+        comp = prob.model.OAS
+
+        prob.run_model()
+        inner_prob = comp._prob
+        self.assertIsNotNone(inner_prob)
+
+        # a new fuel mass is pushed into the existing inner problem
+        prob['OAS.fuel'] = 18500.0
+        prob.run_model()
+        self.assertIs(comp._prob, inner_prob)
+        assert_near_equal(
+            inner_prob['W0_without_point_masses'], 40.0e3 + 18500.0 + 1360.77711, 1e-10
+        )
+
+        # a change to the surface definition forces a rebuild
+        prob['OAS.airfoil_t_over_c'] = 0.12
+        prob.run_model()
+        self.assertIsNot(comp._prob, inner_prob)
+
+    @use_tempdirs
+    def test_OAS_wing_mass_analysis_mesh_levels(self):
+        mesh_levels = [(2, 2, 3), (2, 3, 5), (3, 5, 9)]
+        prob = _build_problem(reuse_problem=True, mesh_levels=mesh_levels, mesh_tolerance=0.5)
+        comp = prob.model.OAS
+
+        prob.run_model()
+
+        # the wing mass changes by less than 50% from the first to the second level, so the
+        # finest level is never solved
+        self.assertEqual(set(comp._probs), set(mesh_levels[:2]))
+        self.assertIs(comp._prob, comp._probs[mesh_levels[1]])
+        assert_near_equal(prob.get_val('OAS.wing_mass', units='lbm'), 15163.45, 1e-3)
+        self.assertEqual(comp.metrics[-1]['mesh_levels'], 2)
+
+        # a new fuel mass only solves the level the refinement stopped at
+        prob['OAS.fuel'] = 18500.0
+        prob.run_model()
+        self.assertEqual(comp.metrics[-1]['mesh_levels'], 1)
+        self.assertEqual(comp.metrics[-1]['mesh_size'], list(mesh_levels[1]))
+
+        # a change to the surface definition runs the refinement again
+        prob['OAS.airfoil_t_over_c'] = 0.12
+        prob.run_model()
+        self.assertEqual(comp.metrics[-1]['mesh_levels'], 2)
+
+    @use_tempdirs
+    def test_OAS_wing_mass_analysis_parallel_points(self):
+        prob = _build_problem(reuse_problem=True, parallel_points=True)
+        comp = prob.model.OAS
+
+        prob.run_model()
+
+        # the points keep their names inside the ParallelGroup
+        self.assertIsInstance(comp._prob.model.points, om.ParallelGroup)
+        assert_near_equal(prob.get_val('OAS.wing_mass', units='lbm'), 15163.45, 1e-4)
+        assert_near_equal(prob.get_val('OAS.fuel_burn', units='lbm'), 32188.92, 1e-4)
+
+    @use_tempdirs
+    def test_OAS_wing_mass_analysis_metrics(self):
+        prob = _build_problem(
+            cache_size=4, metrics_file='metrics.jsonl', metrics_size=2, verbose=True
+        )
+        comp = prob.model.OAS
+
+        prob.run_model()
+        prob.run_model()
+
+        with open('metrics.jsonl') as f:
+            records = [json.loads(line) for line in f]
+
+        self.assertEqual(records, json.loads(json.dumps(list(comp.metrics))))
+        self.assertEqual([record['cache_hit'] for record in records], [False, True])
+
+        metrics = records[0]
+        self.assertGreater(metrics['driver_iterations'], 0)
+        self.assertGreater(metrics['derivative_evaluations'], 0)
+        self.assertEqual(metrics['mesh_size'], [2, 3, 5])
+        self.assertEqual(set(metrics['points']), {'AS_point_0', 'AS_point_1'})
+        for point_metrics in metrics['points'].values():
+            self.assertGreater(point_metrics['nonlinear_iterations'], 0)
+            self.assertGreater(point_metrics['solve_time'], 0.0)
+            self.assertGreater(point_metrics['linear_iterations'], 0)
+            self.assertGreater(point_metrics['linear_solve_time'], 0.0)
+
+        # the linear solves of the points are part of the driver derivative time
+        self.assertLess(
+            sum(point_metrics['linear_solve_time'] for point_metrics in metrics['points'].values()),
+            metrics['derivative_time'],
+        )
+        self.assertEqual(records[1]['cache_hits'], 1)
+
+        # only the latest metrics_size records are kept
+        prob.run_model()
+        self.assertEqual(len(comp.metrics), 2)
+        self.assertEqual(comp.metrics[-1]['cache_hits'], 2)
+
+    def test_OAS_wing_mass_analysis_load_cases(self):
+        load_cases = [(0.64, 0.0, 2.5), (0.5, 0.0, -1.0), (0.7, 3000.0, 2.0)]
+        prob = _build_problem(load_cases=load_cases)
+        prob.final_setup()
+        comp = prob.model.OAS
+
+        inner_prob = comp._build_problem(comp._inputs, comp._mesh_levels()[0])
+
+        # the cruise point comes first, followed by one point per load case
+        assert_near_equal(inner_prob['load_factor'], [1.0, 2.5, -1.0, 2.0])
+        assert_near_equal(inner_prob['Mach_number'], [0.785, 0.64, 0.5, 0.7])
+        self.assertEqual(inner_prob['alpha_maneuver'].shape, (3,))
+
+        constraints = inner_prob.model.get_constraints()
+        for i in range(1, 4):
+            self.assertIn('AS_point_{}.L_equals_W'.format(i), constraints)
+            self.assertIn('AS_point_{}.meshwing_perf.failure'.format(i), constraints)
+
+    def test_OAS_wing_mass_analysis_load_case_points(self):
+        load_cases = [(0.64, 0.0, 2.5), (0.5, 0.0, -1.0), (0.7, 3000.0, 2.0)]
+        alpha = [4.0, -3.0, 2.0]
+
+        def run_inner_problem(load_cases, alpha):
+            prob = _build_problem(load_cases=load_cases)
+            prob.final_setup()
+            comp = prob.model.OAS
+            inner_prob = comp._build_problem(comp._inputs, comp._mesh_levels()[0])
+            comp._set_problem_inputs(inner_prob, comp._inputs)
+            inner_prob['alpha_maneuver'] = alpha
+            inner_prob.run_model()
+            return inner_prob
+
+        names = ['L_equals_W', 'meshwing_perf.failure', 'meshwing_perf.vonmises', 'CL']
+
+        # each load case point of the multi-point problem matches a problem with that case only
+        inner_prob = run_inner_problem(load_cases, alpha)
+        for i, load_case in enumerate(load_cases):
+            single_prob = run_inner_problem([load_case], alpha[i])
+            assert_near_equal(
+                single_prob['meshwing.structural_mass'], inner_prob['meshwing.structural_mass']
+            )
+            assert_near_equal(single_prob['AS_point_0.fuelburn'], inner_prob['AS_point_0.fuelburn'])
+            for name in names:
+                assert_near_equal(
+                    single_prob['AS_point_1.' + name],
+                    inner_prob['AS_point_{}.{}'.format(i + 1, name)],
+                    1e-10,
+                )
+
+    @use_tempdirs
+    def test_OAS_wing_mass_analysis_load_case_sizing(self):
+        load_cases = [(0.64, 0.0, 2.5), (0.5, 0.0, -1.0)]
+
+        wing_masses = []
+        for cases in [load_cases] + [[load_case] for load_case in load_cases]:
+            prob = _build_problem(load_cases=cases)
+            prob.run_model()
+            wing_masses.append(prob.get_val('OAS.wing_mass')[0])
+
+        # the wing sized for all the cases together is at least as heavy as the wing sized
+        # for any one of them
+        self.assertGreaterEqual(wing_masses[0], max(wing_masses[1:]) * (1.0 - 1e-4))
+
+    def test_OAS_wing_mass_analysis_point_metrics(self):
+        prob = _build_problem()
+        prob.final_setup()
+        comp = prob.model.OAS
+
+        inner_prob = comp._build_problem(comp._inputs, comp._mesh_levels()[0])
+        comp._set_problem_inputs(inner_prob, comp._inputs)
+        inner_prob.run_model()
+        points = [inner_prob.model.AS_point_0, inner_prob.model.AS_point_1]
+
+        _reset_point_metrics(inner_prob)
+        inner_prob.run_model()
+        solve_times = [point.solve_metrics['solve_time'] for point in points]
+
+        # make the coupled solve of the load case point take a known extra time
+        coupled = points[1].coupled
+        solve_nonlinear = coupled._solve_nonlinear
+
+        def slow_solve_nonlinear():
+            time.sleep(0.5)
+            solve_nonlinear()
+
+        _reset_point_metrics(inner_prob)
+        with mock.patch.object(coupled, '_solve_nonlinear', slow_solve_nonlinear):
+            inner_prob.run_model()
+
+        # the extra time is only counted in the point it was spent in
+        self.assertAlmostEqual(points[0].solve_metrics['solve_time'], solve_times[0], delta=0.1)
+        self.assertAlmostEqual(
+            points[1].solve_metrics['solve_time'], solve_times[1] + 0.5, delta=0.1
+        )
+        for point in points:
+            self.assertEqual(
+                point.solve_metrics['nonlinear_iterations'],
+                point.coupled.nonlinear_solver._iter_count,
+            )
+
+
+class Test_user_mesh(unittest.TestCase):
+    """Test the parametric wing mesh."""
+
+    def test_default_planform(self):
+        mesh = user_mesh()
+
+        self.assertEqual(mesh.shape, (2, 7, 3))
+
+        # tip leading edge, kink and root trailing edge of the aircraft_for_bench_FwFm wing,
+        # which has a leading-edge sweep of 25 deg
+        assert_near_equal(mesh[0, 0, :2], [17.9573 * np.tan(np.radians(25.0)), 17.9573], 1e-7)
+        assert_near_equal(mesh[0, 4, 1], 4.9544, 1e-7)
+        assert_near_equal(mesh[1, -1, :2], [5.5668, 0.0], 1e-5)
+
+    def test_planform_parameters(self):
+        span = 40.0
+        area = 130.0
+        taper_ratio = 0.3
+
+        planform = dict(
+            span=span,
+            area=area,
+            taper_ratio=taper_ratio,
+            sweep=30.0,
+            kink_eta=0.3,
+            kink_chord_ratio=None,
+            nx=3,
+            ny_inboard=4,
+            ny_outboard=9,
+        )
+        mesh = user_mesh(**planform)
+
+        self.assertEqual(mesh.shape, (3, 12, 3))
+
+        # a straight trapezoidal wing recovers the area and taper ratio
+        chord = mesh[-1, :, 0] - mesh[0, :, 0]
+        y = mesh[0, :, 1]
+        assert_near_equal(np.sum((chord[1:] + chord[:-1]) * (y[:-1] - y[1:])), area, 1e-10)
+        assert_near_equal(chord[0] / chord[-1], taper_ratio, 1e-10)
+
+        # the sweep is the sweep of the quarter-chord line from the root to the tip
+        x_quarter_chord = mesh[0, :, 0] + 0.25 * chord
+        assert_near_equal(
+            (x_quarter_chord[0] - x_quarter_chord[-1]) / (y[0] - y[-1]),
+            np.tan(np.radians(30.0)),
+            1e-10,
+        )
+
+        # the kink stays at the same fraction of the half span
+        assert_near_equal(y[8], 0.3 * 0.5 * span, 1e-10)
+        wider = user_mesh(**dict(planform, span=44.0))
+        assert_near_equal(wider[0, 8, 1], 0.3 * 22.0, 1e-10)
+
+        # cached meshes are returned as independent copies
+        mesh[:] = 0.0
+        self.assertGreater(np.max(user_mesh(**planform)), 0.0)
+
+    def test_kink_location(self):
+        for kink_eta in (0.0, 1.0, 1.2):
+            with self.assertRaises(ValueError):
+                user_mesh(kink_eta=kink_eta)
+
+
+class Test_OAStructuresSensitivities(unittest.TestCase):
+    """Test the sensitivities used for the OAS wing mass partials."""
+
+    @use_tempdirs
+    def test_post_optimality_sensitivities(self):
+        # minimize (x - 3)^2 + y^2 subject to x + y = p and y >= 1, so that
+        # y = 1, x = p - 1 and the optimal objective is (p - 4)^2 + 1
+        prob = om.Problem()
+        prob.model.add_subsystem('p', om.IndepVarComp('p', 2.0), promotes=['*'])
+        prob.model.add_subsystem(
+            'comp',
+            om.ExecComp(['f = (x - 3.0)**2 + y**2', 'g = x + y - p', 'm = 2.0 * x']),
+            promotes=['*'],
+        )
+        prob.model.add_design_var('x', lower=-10.0, upper=10.0, scaler=0.5)
+        prob.model.add_design_var('y', lower=1.0, upper=10.0)
+        prob.model.add_constraint('g', equals=0.0, scaler=10.0)
+        prob.model.add_objective('f', scaler=2.0)
+
+        prob.driver = om.ScipyOptimizeDriver(optimizer='SLSQP', tol=1e-10, disp=False)
+        prob.setup()
+        prob.run_driver()
+
+        sensitivities = _post_optimality_sensitivities(prob, 'p', 'm')
+
+        assert_near_equal(sensitivities['objective'], 2.0 * (2.0 - 4.0), 1e-6)
+        assert_near_equal(sensitivities['m'], 2.0, 1e-6)
+
+    def test_response_surface_slopes(self):
+        history = [(fuel, 2.0 * fuel + 1.0, 0.5 * fuel**2) for fuel in (9.0, 10.0, 10.5)]
+
+        self.assertIsNone(_response_surface_slopes(history[1:2], 10.0, 0.1))
+
+        wing_mass_slope, fuel_burn_slope = _response_surface_slopes(history, 10.0, 0.1)
+        assert_near_equal(wing_mass_slope, 2.0, 1e-10)
+        assert_near_equal(fuel_burn_slope, 10.0, 1e-10)
+
+        # points outside the window are ignored, leaving a linear fit
+        wing_mass_slope, fuel_burn_slope = _response_surface_slopes(history, 10.0, 0.06)
+        assert_near_equal(wing_mass_slope, 2.0, 1e-10)
+        assert_near_equal(fuel_burn_slope, 10.25, 1e-10)
+
+    def _check_fuel_partials(self, prob):
+        # check_partials would run an inner optimization for every box coordinate, so the
+        # partials are checked through the totals with respect to fuel only.  The inner
+        # optimization converges to a tolerance, so only a loose match with fd is expected.
+        data = prob.check_totals(
+            of=['OAS.wing_mass', 'OAS.fuel_burn'],
+            wrt=['OAS.fuel'],
+            method='fd',
+            step=20.0,
+            form='central',
+            out_stream=None,
+        )
+        assert_check_totals(data, atol=5e-3, rtol=1e-2)
+
+    @use_tempdirs
+    def test_post_optimality_partials(self):
+        prob = _build_problem(reuse_problem=True, partials_method='post_optimality')
+        prob.run_model()
+        self._check_fuel_partials(prob)
+
+    @use_tempdirs
+    def test_response_surface_partials(self):
+        prob = _build_problem(reuse_problem=True, partials_method='response_surface')
+        prob.run_model()
+        comp = prob.model.OAS
+
+        # the first point has no neighbours, so the slopes take an extra inner solve, after
+        # which the inner problem is back at the solution for the component inputs
+        self.assertEqual(comp.metrics[-1]['sensitivity_solves'], 1)
+        inner_prob = comp._prob
+        assert_near_equal(
+            inner_prob['W0_without_point_masses'], 40.0e3 + 18163.652864 + 1360.77711, 1e-10
+        )
+        assert_near_equal(
+            inner_prob['meshwing.structural_mass'], prob.get_val('OAS.wing_mass'), 1e-10
+        )
+        for key, value in comp.previous_DV_values.items():
+            assert_near_equal(inner_prob[key], value, 1e-10)
+
+        self._check_fuel_partials(prob)
+
+    @use_tempdirs
+    def test_planform_partials(self):
+        prob = _build_problem(reuse_problem=True, partials_method='post_optimality')
+        prob.run_model()
+
+        # the planform partials are central differences with a relative step of 1e-2, so
+        # they are checked against central differences with twice that step
+        data = prob.check_totals(
+            of=['OAS.wing_mass', 'OAS.fuel_burn'],
+            wrt=['OAS.wing_span', 'OAS.wing_area', 'OAS.wing_taper_ratio', 'OAS.wing_sweep'],
+            method='fd',
+            step=2e-2,
+            form='central',
+            step_calc='rel_avg',
+            out_stream=None,
+        )
+        assert_check_totals(data, atol=1.0, rtol=5e-2)
+
+
+if __name__ == '__main__':
+    unittest.main()
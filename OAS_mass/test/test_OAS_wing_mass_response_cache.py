@@ -0,0 +1,77 @@
+import os
+import unittest
+
+from openmdao.utils.assert_utils import assert_near_equal
+from openmdao.utils.testing_utils import use_tempdirs
+
+from aviary.examples.external_subsystems.OAS_mass.OAS_wing_mass_response_cache import (
+    ResponseCache,
+)
+
+
+@use_tempdirs
+class Test_ResponseCache(unittest.TestCase):
+    """Test the LRU response cache for the OAS wing mass component."""
+
+    def test_lru(self):
+        cache = ResponseCache(max_size=2)
+
+        self.assertIsNone(cache.get('a'))
+        cache.put('a', {'wing_mass': 1.0, 'fuel_burn': 10.0})
+        cache.put('b', {'wing_mass': 2.0, 'fuel_burn': 20.0})
+
+        assert_near_equal(cache.get('a')['wing_mass'], 1.0)
+
+        # 'b' is now the least recently used entry and is evicted
+        cache.put('c', {'wing_mass': 3.0, 'fuel_burn': 30.0})
+        self.assertEqual(len(cache), 2)
+        self.assertIn('a', cache)
+        self.assertNotIn('b', cache)
+
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cache.misses, 1)
+
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.hits, 0)
+
+    def test_persistence(self):
+        cache = ResponseCache(max_size=4, filename='OAS_cache.json')
+        cache.put('a', {'wing_mass': 1.0, 'fuel_burn': 10.0})
+        cache.put('b', {'wing_mass': 2.0, 'fuel_burn': 20.0})
+
+        cache = ResponseCache(max_size=1, filename='OAS_cache.json')
+        self.assertEqual(len(cache), 1)
+        assert_near_equal(cache.get('b')['fuel_burn'], 20.0)
+
+    def test_partial_entries(self):
+        cache = ResponseCache(max_size=2)
+        cache.put('a', {'wing_mass': 1.0, 'fuel_burn': 10.0})
+
+        # an entry without the requested values is a miss until they are stored
+        self.assertIsNone(cache.get('a', ('d_wing_mass_d_fuel',)))
+        cache.put('a', {'d_wing_mass_d_fuel': 0.5})
+        entry = cache.get('a', ('d_wing_mass_d_fuel',))
+        assert_near_equal(entry['wing_mass'], 1.0)
+        assert_near_equal(entry['d_wing_mass_d_fuel'], 0.5)
+
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cache.misses, 1)
+
+    def test_shared_file(self):
+        # two processes sharing a cache file both keep their entries
+        first = ResponseCache(max_size=4, filename='OAS_cache.json')
+        second = ResponseCache(max_size=4, filename='OAS_cache.json')
+        first.put('a', {'wing_mass': 1.0, 'fuel_burn': 10.0})
+        second.put('b', {'wing_mass': 2.0, 'fuel_burn': 20.0})
+        first.put('c', {'wing_mass': 3.0, 'fuel_burn': 30.0})
+
+        cache = ResponseCache(max_size=4, filename='OAS_cache.json')
+        self.assertEqual(len(cache), 3)
+        for key in ('a', 'b', 'c'):
+            self.assertIn(key, cache)
+        self.assertEqual([name for name in os.listdir('.') if name != 'OAS_cache.json'], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
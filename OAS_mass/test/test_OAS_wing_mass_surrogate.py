@@ -0,0 +1,226 @@
+import os
+import unittest
+
+import numpy as np
+import openmdao.api as om
+from openmdao.utils.assert_utils import assert_check_partials, assert_near_equal
+from openmdao.utils.testing_utils import use_tempdirs
+
+from aviary.examples.external_subsystems.OAS_mass.OAS_wing_mass_analysis import OAStructures
+from aviary.examples.external_subsystems.OAS_mass.OAS_wing_mass_surrogate import (
+    OASWingMassSurrogate,
+    WingMassSurrogate,
+)
+
+# fuel, wing_span, wing_area, wing_taper_ratio, wing_sweep
+_LOWER = np.array([15000.0, 32.0, 110.0, 0.2, 20.0])
+_UPPER = np.array([21000.0, 40.0, 130.0, 0.35, 30.0])
+
+
+def _training_data(num_points, seed=0):
+    """Return sampled inputs and a smooth stand-in for the wing mass and fuel burn."""
+    x = _LOWER + (_UPPER - _LOWER) * np.random.default_rng(seed).random((num_points, 5))
+    y = np.column_stack(
+        (
+            5000.0 + 0.05 * x[:, 0] + 2.0 * x[:, 1] ** 2 + 10.0 * x[:, 2] * x[:, 3],
+            12000.0 + 0.25 * x[:, 0] - 20.0 * x[:, 1] + 40.0 * np.cos(np.radians(x[:, 4])),
+        )
+    )
+    return x, y
+
+
+def _build_problem(comp):
+    """Return a problem around comp with a coarse wingbox and the benchmark flight conditions."""
+    prob = om.Problem()
+    prob.model.add_subsystem('OAS', comp)
+    prob.setup()
+
+    prob['OAS.box_upper_x'] = [0.1, 0.6]
+    prob['OAS.box_lower_x'] = [0.1, 0.6]
+    prob['OAS.box_upper_y'] = [0.055, 0.055]
+    prob['OAS.box_lower_y'] = [-0.055, -0.055]
+    num_cp = comp.options['num_twist_cp']
+    prob['OAS.twist_cp'] = np.linspace(-6.0, 0.0, num_cp)
+    prob['OAS.spar_thickness_cp'] = np.linspace(0.004, 0.01, num_cp)
+    prob['OAS.skin_thickness_cp'] = np.linspace(0.005, 0.025, num_cp)
+    prob['OAS.t_over_c_cp'] = np.full(num_cp, 0.08)
+    prob['OAS.airfoil_t_over_c'] = 0.13
+    prob['OAS.fuel'] = 22000.0
+    prob['OAS.fuel_reserve'] = 1360.77711
+    prob['OAS.CD0'] = 0.0078
+    prob['OAS.cruise_Mach'] = 0.785
+    prob['OAS.cruise_altitude'] = 11303.682962301647
+    prob['OAS.cruise_range'] = 6482000.0
+    prob['OAS.cruise_SFC'] = 0.53 / 3600
+    prob['OAS.engine_mass'] = 3356.583538
+    prob['OAS.engine_location'] = np.array([4.825, -1.0, 0.0])
+
+    return prob
+
+
+@use_tempdirs
+class Test_WingMassSurrogate(unittest.TestCase):
+    """Test the radial basis function wing mass surrogate."""
+
+    def test_interpolation(self):
+        x, y = _training_data(60)
+        surrogate = WingMassSurrogate()
+        surrogate.add_points(x, y)
+
+        self.assertTrue(surrogate.fitted)
+        for i in range(0, 60, 7):
+            assert_near_equal(surrogate.predict(x[i]), y[i], 1e-8)
+
+        # the linear tail recovers the trend away from the training points
+        x_test, y_test = _training_data(5, seed=1)
+        for i in range(5):
+            assert_near_equal(surrogate.predict(x_test[i]), y_test[i], 1e-2)
+
+    def test_gradient(self):
+        x, y = _training_data(40)
+        surrogate = WingMassSurrogate()
+        surrogate.add_points(x, y)
+
+        point = 0.5 * (_LOWER + _UPPER)
+        jac = surrogate.gradient(point)
+        self.assertEqual(jac.shape, (2, 5))
+
+        for j in range(5):
+            step = 1e-6 * (_UPPER[j] - _LOWER[j])
+            delta = np.zeros(5)
+            delta[j] = step
+            fd = (surrogate.predict(point + delta) - surrogate.predict(point - delta)) / (2 * step)
+            assert_near_equal(jac[:, j], fd, 1e-6)
+
+    def test_trust_region(self):
+        x, y = _training_data(7)
+        surrogate = WingMassSurrogate()
+
+        # a surrogate needs the number of inputs plus two points before it is fitted
+        surrogate.add_points(x[:6], y[:6])
+        self.assertFalse(surrogate.fitted)
+        self.assertFalse(surrogate.trusted(x[0], 1.0))
+
+        surrogate.add_points(x[6], y[6])
+        self.assertTrue(surrogate.fitted)
+        self.assertEqual(surrogate.num_points, 7)
+
+        self.assertTrue(surrogate.trusted(x[0], 0.0))
+        self.assertFalse(surrogate.trusted(_LOWER - 1.0, 10.0))
+
+    def test_persistence(self):
+        x, y = _training_data(20)
+        surrogate = WingMassSurrogate('surrogate/wing_mass.npz')
+        surrogate.add_points(x, y)
+        surrogate.save()
+
+        loaded = WingMassSurrogate('surrogate/wing_mass.npz')
+        self.assertEqual(loaded.num_points, 20)
+        assert_near_equal(loaded.predict(x[3]), y[3], 1e-8)
+
+
+@use_tempdirs
+class Test_OASWingMassSurrogate(unittest.TestCase):
+    """Test the surrogate replacement for the OAS wing mass component."""
+
+    def test_surrogate_evaluation(self):
+        x, y = _training_data(60)
+        surrogate = WingMassSurrogate('wing_mass.npz')
+        surrogate.add_points(x, y)
+        surrogate.save()
+
+        prob = om.Problem()
+        prob.model.add_subsystem(
+            'OAS',
+            OASWingMassSurrogate(
+                surrogate_file='wing_mass.npz', trust_radius=1.0, num_box_cp=2, num_twist_cp=2
+            ),
+        )
+        prob.setup(force_alloc_complex=True)
+
+        point = 0.5 * (_LOWER + _UPPER)
+        for name, value in zip(
+            ('fuel', 'wing_span', 'wing_area', 'wing_taper_ratio', 'wing_sweep'), point
+        ):
+            prob.set_val('OAS.' + name, value)
+
+        # inside the trust region the inner OAS problem is never built
+        prob.run_model()
+        comp = prob.model.OAS
+        self.assertIsNone(comp._prob)
+        self.assertEqual(comp.surrogate_evaluations, 1)
+        assert_near_equal(prob.get_val('OAS.wing_mass'), surrogate.predict(point)[0], 1e-12)
+        assert_near_equal(prob.get_val('OAS.fuel_burn'), surrogate.predict(point)[1], 1e-12)
+
+        partials = prob.check_partials(method='fd', form='central', out_stream=None)
+        assert_check_partials(partials, atol=1e-3, rtol=1e-5)
+
+        self.assertTrue(os.path.exists('wing_mass.npz'))
+
+    def test_fallback_partials(self):
+        x, y = _training_data(60)
+        surrogate = WingMassSurrogate('wing_mass.npz')
+        surrogate.add_points(x, y)
+        surrogate.save()
+
+        options = dict(
+            symmetry=True,
+            wing_weight_ratio=1.0,
+            S_ref_type='projected',
+            n_point_masses=1,
+            num_twist_cp=2,
+            num_box_cp=2,
+            reuse_problem=True,
+        )
+        of = ['OAS.wing_mass', 'OAS.fuel_burn']
+        wrt = ['OAS.fuel', 'OAS.wing_span']
+
+        # the fuel mass is above the training range, so the point is solved with OAS
+        prob = _build_problem(OASWingMassSurrogate(surrogate_file='wing_mass.npz', **options))
+        prob.run_model()
+        comp = prob.model.OAS
+        self.assertEqual(comp.fallback_evaluations, 1)
+        totals = prob.compute_totals(of=of, wrt=wrt)
+
+        # the fuel partials need no extra solves, and the two solves of each planform central
+        # difference are added to the surrogate
+        self.assertEqual(comp.fallback_evaluations, 9)
+        self.assertEqual(WingMassSurrogate('wing_mass.npz').num_points, 69)
+
+        # the fuel partials are the post-optimality partials of OAStructures
+        reference_prob = _build_problem(OAStructures(partials_method='post_optimality', **options))
+        reference_prob.run_model()
+        assert_near_equal(prob.get_val('OAS.wing_mass'), reference_prob.get_val('OAS.wing_mass'))
+        reference_totals = reference_prob.compute_totals(of=of, wrt=['OAS.fuel'])
+        for key, value in reference_totals.items():
+            assert_near_equal(totals[key], value, 1e-10)
+
+        # The inner optimization converges to a tolerance, so only a loose match with fd is
+        # expected.  The wing mass hardly depends on fuel and its finite difference is
+        # dominated by that tolerance, so it is not checked.
+        data = reference_prob.check_totals(
+            of=of,
+            wrt=['OAS.fuel'],
+            method='fd',
+            form='central',
+            step=20.0,
+            out_stream=None,
+        )
+        key = ('OAS.fuel_burn', 'OAS.fuel')
+        assert_near_equal(totals[key], data[key]['J_fd'], 1e-3)
+
+        data = reference_prob.check_totals(
+            of=of,
+            wrt=['OAS.wing_span'],
+            method='fd',
+            form='central',
+            step=2e-2,
+            step_calc='rel_avg',
+            out_stream=None,
+        )
+        for key in data:
+            np.testing.assert_allclose(totals[key], data[key]['J_fd'], rtol=5e-2, atol=1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import os
+import unittest
+
+import numpy as np
+from openmdao.utils.assert_utils import assert_near_equal
+from openmdao.utils.testing_utils import use_tempdirs
+
+from aviary.examples.external_subsystems.OAS_mass.OAS_wing_mass_warm_start import (
+    WarmStartStore,
+    hash_key,
+)
+
+
+@use_tempdirs
+class Test_WarmStartStore(unittest.TestCase):
+    """Test the on-disk warm-start store for OAS design vectors."""
+
+    def test_hash_key(self):
+        options = {'num_twist_cp': 4, 'symmetry': True}
+
+        self.assertEqual(hash_key(options, np.ones(3)), hash_key(dict(options), np.ones(3)))
+        self.assertNotEqual(hash_key(options, np.ones(3)), hash_key(options, np.zeros(3)))
+        self.assertNotEqual(
+            hash_key(options, np.ones(3)), hash_key({'num_twist_cp': 5, 'symmetry': True})
+        )
+
+    def test_nearest(self):
+        store = WarmStartStore(os.path.join('warm_start', 'OAS_DVs.jsonl'))
+        planform = np.array([17.9573, 4.9544, 5.5668])
+
+        self.assertIsNone(store.nearest('a', 'opts', 18000.0, planform))
+
+        store.add('a', 'opts', 15000.0, planform, {'alpha_maneuver': 1.0})
+        store.add('a', 'opts', 20000.0, planform, {'alpha_maneuver': 2.0})
+        store.add('b', 'opts', 18000.0, 1.1 * planform, {'alpha_maneuver': 3.0})
+        store.add('c', 'opts', 18000.0, 2.0 * planform, {'alpha_maneuver': 4.0})
+
+        # same planform and options: nearest in fuel mass
+        DVs = store.nearest('a', 'opts', 19000.0, planform)
+        assert_near_equal(DVs['alpha_maneuver'], [2.0])
+
+        # unknown planform: nearest in geometry with the same options
+        DVs = store.nearest('d', 'opts', 19000.0, 1.2 * planform)
+        assert_near_equal(DVs['alpha_maneuver'], [3.0])
+
+        # different options are never used
+        self.assertIsNone(store.nearest('d', 'other_opts', 19000.0, planform))
+
+        # a second store on the same file, e.g. from a restarted job, sees every record
+        self.assertEqual(len(WarmStartStore(store.filename)), 4)
+
+    def test_max_records(self):
+        store = WarmStartStore('OAS_DVs.jsonl', max_records=3)
+        reader = WarmStartStore('OAS_DVs.jsonl', max_records=3)
+        planform = np.array([17.9573, 4.9544, 5.5668])
+
+        for i in range(5):
+            store.add('a', 'opts', 15000.0 + 1000.0 * i, planform, {'alpha_maneuver': i})
+        self.assertEqual(len(reader), 5)
+
+        # the sixth record trims the store to the newest three and compacts the file
+        store.add('a', 'opts', 20000.0, planform, {'alpha_maneuver': 5.0})
+        self.assertEqual(len(store), 3)
+        with open('OAS_DVs.jsonl') as f:
+            self.assertEqual(len(f.readlines()), 3)
+
+        # the oldest records are gone, and a store that had read the old file reads it again
+        DVs = reader.nearest('a', 'opts', 15000.0, planform)
+        assert_near_equal(DVs['alpha_maneuver'], [3.0])
+        self.assertEqual(len(reader), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,10 @@
 #File for testing phases and 2DOF
+import argparse
 import os
 #Cloned aviary repo location
 #from aviary.models.missions.height_energy_default import phase_info
 import aviary.api as av
+from driver_checkpoint import CheckpointRecorder, load_checkpoint
 
 
 # # === Choose your output directory here ===
@@ -120,6 +122,23 @@ optimizer = 'IPOPT'  #'SLSQP'
 make_plots = True
 max_iter = 100
 
+# Checkpoint the design vector after every driver evaluation so a preempted job can
+# resume from the last checkpoint instead of from the initial guesses.  The driver
+# records every model evaluation, IPOPT line-search points included, so
+# checkpoint_every counts evaluations rather than IPOPT iterations.
+checkpoint_file = os.path.join(output_dir, 'checkpoint.npz')
+checkpoint_every = 1
+
+parser = argparse.ArgumentParser(
+    description='Optimize the wing aspect ratio, sweep and fuselage length with the mission.'
+)
+parser.add_argument(
+    '--resume',
+    action='store_true',
+    help='start from the checkpoint of an earlier run in output_dir',
+)
+resume = parser.parse_args().resume
+
 prob = av.AviaryProblem()
 
 # Load aircraft and options data from user
@@ -159,4 +178,21 @@ prob.add_objective('fuel_burned')
 
 prob.setup()
 
-prob.run_aviary_problem(make_plots=make_plots)
\ No newline at end of file
+checkpoint_iteration = 0
+if resume and os.path.exists(checkpoint_file):
+    checkpoint_iteration = load_checkpoint(prob, checkpoint_file)
+    print(
+        'Resuming from checkpoint {} written after {} driver evaluations'.format(
+            checkpoint_file, checkpoint_iteration
+        )
+    )
+
+checkpoint = CheckpointRecorder(checkpoint_file, every=checkpoint_every, iteration=checkpoint_iteration)
+prob.driver.add_recorder(checkpoint)
+
+try:
+    prob.run_aviary_problem(make_plots=make_plots)
+except BaseException:
+    # keep the last evaluated point of a run that fails or is interrupted
+    checkpoint.save()
+    raise
\ No newline at end of file
@@ -3,6 +3,7 @@
 #Cloned aviary repo location
 #from aviary.models.missions.height_energy_default import phase_info
 import aviary.api as av
+from run_cache import run_mission
 import os
 
 # # === Choose your output directory here ===
@@ -98,35 +99,25 @@ phase_info = {
 }
 
 # ==== Build and run the problem ====
-# Load aircraft and options data from provided sources
-prob = av.AviaryProblem()
-
-prob.load_inputs(
-    'aviary/models/aircraft/advanced_single_aisle/advanced_single_aisle_FLOPS.csv', phase_info
+# Load aircraft and options data from provided sources. Identical reruns (same csv,
+# phase_info, optimizer settings and design variables) are read back from run_cache
+# instead of building the model again
+summary = run_mission(
+    'aviary/models/aircraft/advanced_single_aisle/advanced_single_aisle_FLOPS.csv',
+    phase_info,
+    # optimizer and iteration limit are optional provided here
+    optimizer='IPOPT',
+    max_iter=100,
+    cache_dir='run_cache',
 )
 
-prob.check_and_preprocess_inputs()
-
-prob.build_model()
-
-# optimizer and iteration limit are optional provided here
-prob.add_driver('IPOPT', max_iter=100)
-
-prob.add_design_variables()
-
-prob.add_objective()
-
-prob.setup()
-
-prob.run_aviary_problem()
-
 #Print out some variables for quick looking
 print("Mission optimization complete.")
-ASA_fuel_burn = prob.get_val(av.Mission.Summary.FUEL_BURNED, units='kg')[0]
-ASA_wing_aspect_ratio = prob.get_val(av.Aircraft.Wing.ASPECT_RATIO)[0]
-# ASA_mission_time = prob.get_val(av.Mission.Summary.MISSION_TIME, units='min')[0]
+ASA_fuel_burn = summary['outputs'][av.Mission.Summary.FUEL_BURNED]
+ASA_wing_aspect_ratio = summary['outputs'][av.Aircraft.Wing.ASPECT_RATIO]
+ASA_mission_time = summary['outputs'][av.Mission.Summary.FINAL_TIME]
 
 #printing them out
 print('Mission fuel burn, kg:', ASA_fuel_burn)
 print('Aspect ratio:', ASA_wing_aspect_ratio)
-# print('Mission time, min:', ASA_mission_time)
\ No newline at end of file
+print('Mission time, min:', ASA_mission_time)
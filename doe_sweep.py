@@ -0,0 +1,404 @@
+# Design of experiments over wing aspect ratio, sweep and fuselage length
+"""
+Parallel design of experiments for the SA_coupled_run_AR_sweep_FL.py design space.
+
+SA_coupled_run_AR_sweep_FL.py finds one optimum of the fuel burn over the wing aspect
+ratio, wing sweep and fuselage length.  This module maps the whole design space instead:
+doe_samples draws a Latin hypercube, full factorial or Sobol sample of those variables,
+every sample is a fixed-geometry mission optimization run by run_doe_case, and run_doe
+runs the cases in a pool of worker processes.  Each result is written to one SQLite
+case database as soon as its case finishes, so a partial run can be read at any time
+and a restarted run skips the cases that already converged.  Cases are named by a hash
+of their variable values, so several designs can share one database: a point that two
+designs have in common is run once, and no design overwrites the rows of another.
+
+    python doe_sweep.py lhs --samples 256 --workers 64 --db doe_cases.db
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import math
+import os
+import sqlite3
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import aviary.api as av
+import numpy as np
+from scipy.stats import qmc
+
+# DOE variables as (name, lower, upper, units)
+DOE_VARIABLES = (
+    (av.Aircraft.Wing.ASPECT_RATIO, 10.0, 25.0, 'unitless'),
+    (av.Aircraft.Wing.SWEEP, 10.0, 35.0, 'deg'),
+    (av.Aircraft.Fuselage.LENGTH, 120.0, 150.0, 'ft'),
+)
+
+DOE_METHODS = ('lhs', 'full_factorial', 'sobol')
+
+
+def doe_samples(method, variables=DOE_VARIABLES, num_samples=64, levels=5, seed=0):
+    """
+    Return a design of experiments over the variables.
+
+    Parameters
+    ----------
+    method : str
+        'lhs' for a Latin hypercube, 'full_factorial' for a grid or 'sobol' for a
+        scrambled Sobol sequence
+    variables : sequence of (str, float, float, str)
+        variables as (name, lower, upper, units)
+    num_samples : int
+        number of samples for 'lhs' and 'sobol'; 'sobol' rounds it up to a power of two
+    levels : int or sequence of int
+        number of levels of every variable for 'full_factorial'
+    seed : int or None
+        random seed of 'lhs' and 'sobol'
+
+    Returns
+    -------
+    ndarray
+        (num_samples, num_variables) variable values
+    """
+    lower = np.array([variable[1] for variable in variables], dtype=float)
+    upper = np.array([variable[2] for variable in variables], dtype=float)
+    dimension = len(variables)
+
+    if method == 'lhs':
+        unit = qmc.LatinHypercube(d=dimension, seed=seed).random(num_samples)
+    elif method == 'sobol':
+        m = max(int(math.ceil(math.log2(num_samples))), 0)
+        unit = qmc.Sobol(d=dimension, scramble=True, seed=seed).random_base2(m)
+    elif method == 'full_factorial':
+        levels = np.broadcast_to(levels, (dimension,))
+        axes = [np.linspace(0.0, 1.0, n) if n > 1 else np.array([0.5]) for n in levels]
+        unit = np.array(list(itertools.product(*axes)))
+    else:
+        raise ValueError('Unknown DOE method {}, expected one of {}'.format(method, DOE_METHODS))
+
+    return qmc.scale(unit, lower, upper)
+
+
+def case_name(values):
+    """
+    Return the name of the DOE case with the given variable values.
+
+    The name is a hash of the values, so the same point gets the same name in every
+    design and different points get different names.
+
+    Parameters
+    ----------
+    values : dict
+        variable values keyed by variable name
+
+    Returns
+    -------
+    str
+        case name
+    """
+    text = json.dumps({name: float(value) for name, value in values.items()}, sort_keys=True)
+    return 'doe_' + hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+
+
+def doe_cases(
+    aircraft_csv,
+    phase_info,
+    samples,
+    output_dir,
+    variables=DOE_VARIABLES,
+    optimizer='IPOPT',
+    max_iter=100,
+):
+    """
+    Return one case dictionary per sample.
+
+    Parameters
+    ----------
+    aircraft_csv : str
+        aircraft csv file
+    phase_info : dict
+        mission phase_info of every case
+    samples : array_like
+        (num_samples, num_variables) variable values from doe_samples
+    output_dir : str
+        directory holding one output directory per case
+    variables : sequence of (str, float, float, str)
+        variables of the samples as (name, lower, upper, units)
+    optimizer : str
+        Aviary driver name
+    max_iter : int
+        driver iteration limit
+
+    Returns
+    -------
+    list of dict
+        cases with name, values, units, phase_info, aircraft_csv, output_dir, optimizer
+        and max_iter entries
+    """
+    if os.path.exists(aircraft_csv):
+        aircraft_csv = os.path.abspath(aircraft_csv)
+
+    cases = []
+    for sample in np.atleast_2d(samples):
+        values = {variable[0]: float(value) for variable, value in zip(variables, sample)}
+        name = case_name(values)
+        cases.append(
+            {
+                'name': name,
+                'values': values,
+                'units': {variable[0]: variable[3] for variable in variables},
+                'phase_info': phase_info,
+                'aircraft_csv': aircraft_csv,
+                'output_dir': os.path.abspath(os.path.join(output_dir, name)),
+                'optimizer': optimizer,
+                'max_iter': max_iter,
+            }
+        )
+    return cases
+
+
+def run_doe_case(case):
+    """
+    Run the mission optimization of one DOE case with its geometry fixed.
+
+    Any exception is caught and reported in the error column so that one failed case
+    does not stop the DOE.
+
+    Parameters
+    ----------
+    case : dict
+        case dictionary from doe_cases
+
+    Returns
+    -------
+    dict
+        result row with the name, values, fuel_burn [lbm], converged, iterations,
+        wall_time, output_dir and error
+    """
+    start_time = time.time()
+    result = {
+        'name': case['name'],
+        'values': case['values'],
+        'fuel_burn': None,
+        'converged': False,
+        'iterations': None,
+        'output_dir': case['output_dir'],
+        'error': '',
+    }
+
+    cwd = os.getcwd()
+    try:
+        os.makedirs(case['output_dir'], exist_ok=True)
+        os.chdir(case['output_dir'])
+
+        prob = av.AviaryProblem()
+        prob.load_inputs(case['aircraft_csv'], case['phase_info'])
+        for name, value in case['values'].items():
+            prob.aviary_inputs.set_val(name, value, units=case['units'][name])
+        prob.check_and_preprocess_inputs()
+        prob.build_model()
+        prob.add_driver(case['optimizer'], max_iter=case['max_iter'])
+        prob.add_design_variables()
+        prob.add_objective()
+        prob.setup()
+        prob.run_aviary_problem(make_plots=False)
+
+        result['fuel_burn'] = float(prob.get_val(av.Mission.Summary.FUEL_BURNED, units='lbm')[0])
+        result['converged'] = bool(prob.driver.result.success)
+        result['iterations'] = prob.driver.result.iter_count
+    except Exception:
+        result['error'] = traceback.format_exc(limit=3)
+    finally:
+        os.chdir(cwd)
+
+    result['wall_time'] = time.time() - start_time
+    return result
+
+
+class DOEDatabase(object):
+    """
+    SQLite database with one row per finished DOE case.
+
+    Every case is committed as soon as it is added, so the database can be read while
+    the DOE is running and a restarted DOE can skip the cases it already holds.
+
+    Attributes
+    ----------
+    filename : str
+        SQLite database file
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+
+        directory = os.path.dirname(filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._connection = sqlite3.connect(filename, timeout=60.0)
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS cases ('
+            'name TEXT PRIMARY KEY, inputs TEXT, fuel_burn REAL, converged INTEGER, '
+            'iterations INTEGER, wall_time REAL, output_dir TEXT, error TEXT)'
+        )
+        self._connection.commit()
+
+    def add(self, result):
+        """Store the result row of a finished case, replacing any earlier row of that case."""
+        self._connection.execute(
+            'INSERT OR REPLACE INTO cases VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (
+                result['name'],
+                json.dumps(result['values'], sort_keys=True),
+                result['fuel_burn'],
+                int(result['converged']),
+                result['iterations'],
+                result['wall_time'],
+                result['output_dir'],
+                result['error'],
+            ),
+        )
+        self._connection.commit()
+
+    def inputs(self, converged_only=False):
+        """
+        Return the variable values of the cases in the database, keyed by case name.
+
+        Parameters
+        ----------
+        converged_only : bool
+            if True, only the cases whose optimization converged are returned
+
+        Returns
+        -------
+        dict
+            for every case, its variable values keyed by variable name
+        """
+        query = 'SELECT name, inputs FROM cases'
+        if converged_only:
+            query += ' WHERE converged = 1'
+        rows = self._connection.execute(query)
+        return {name: json.loads(inputs) for name, inputs in rows}
+
+    def results(self):
+        """Return the result rows of all cases in the database, ordered by name."""
+        rows = self._connection.execute(
+            'SELECT name, inputs, fuel_burn, converged, iterations, wall_time, output_dir, '
+            'error FROM cases ORDER BY name'
+        ).fetchall()
+
+        return [
+            {
+                'name': name,
+                'values': json.loads(inputs),
+                'fuel_burn': fuel_burn,
+                'converged': bool(converged),
+                'iterations': iterations,
+                'wall_time': wall_time,
+                'output_dir': output_dir,
+                'error': error,
+            }
+            for name, inputs, fuel_burn, converged, iterations, wall_time, output_dir, error in rows
+        ]
+
+    def close(self):
+        """Close the database connection."""
+        self._connection.close()
+
+
+def run_doe(cases, db_filename, max_workers=None, runner=run_doe_case, callback=None):
+    """
+    Run DOE cases in a process pool, writing each result to the database as it finishes.
+
+    Cases that already converged with the same variable values are not run again, so an
+    interrupted DOE can be restarted with the same command.  Failed cases are run again,
+    and their rows are replaced.
+
+    Parameters
+    ----------
+    cases : list of dict
+        case dictionaries from doe_cases
+    db_filename : str
+        SQLite case database
+    max_workers : int or None
+        number of worker processes; None uses one per CPU
+    runner : callable
+        module level function that runs one case and returns its result row
+    callback : callable or None
+        called with each result row as soon as its case finishes
+
+    Returns
+    -------
+    DOEDatabase
+        the case database
+    """
+    db = DOEDatabase(db_filename)
+    done = db.inputs(converged_only=True)
+
+    # a point can appear twice, in a design that repeats samples
+    pending = {}
+    for case in cases:
+        if done.get(case['name']) != case['values']:
+            pending.setdefault(case['name'], case)
+    cases = list(pending.values())
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(runner, case) for case in cases]
+        for future in as_completed(futures):
+            result = future.result()
+            db.add(result)
+            if callback is not None:
+                callback(result)
+
+    return db
+
+
+def main(argv=None):
+    from study_runner import load_phase_info
+
+    parser = argparse.ArgumentParser(
+        description='Run a fuel burn DOE over wing aspect ratio, sweep and fuselage length.'
+    )
+    parser.add_argument('method', choices=DOE_METHODS, help='DOE method')
+    parser.add_argument('--samples', type=int, default=64, help='number of lhs/sobol samples')
+    parser.add_argument('--levels', type=int, default=5, help='full factorial levels')
+    parser.add_argument('--seed', type=int, default=0, help='random seed of lhs/sobol')
+    parser.add_argument('--workers', type=int, default=None, help='number of worker processes')
+    parser.add_argument('--db', default='doe_cases.db', help='SQLite case database')
+    parser.add_argument('--output-dir', default='doe_output', help='case output directory')
+    parser.add_argument(
+        '--phase-info',
+        default=os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), 'SA_coupled_run_AR_sweep_FL.py'
+        ),
+        help='Python file the phase_info is read from',
+    )
+    parser.add_argument(
+        '--aircraft-csv',
+        default='aviary/models/aircraft/advanced_single_aisle_new/advanced_single_aisle_FLOPS.csv',
+        help='aircraft csv file',
+    )
+    parser.add_argument('--max-iter', type=int, default=100, help='driver iteration limit')
+    args = parser.parse_args(argv)
+
+    samples = doe_samples(args.method, num_samples=args.samples, levels=args.levels, seed=args.seed)
+    cases = doe_cases(
+        args.aircraft_csv,
+        load_phase_info(args.phase_info),
+        samples,
+        args.output_dir,
+        max_iter=args.max_iter,
+    )
+
+    def report(result):
+        status = 'converged' if result['converged'] else 'FAILED'
+        print('DOE case {} {} in {:.1f} s'.format(result['name'], status, result['wall_time']))
+
+    return run_doe(cases, args.db, max_workers=args.workers, callback=report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,215 @@
+# Checkpoint and resume for long Aviary driver runs
+"""
+Periodic checkpoints of the design vector of a running optimization.
+
+SA_coupled_run_AR_sweep_FL.py runs IPOPT for up to 100 iterations with the wing aspect
+ratio, sweep and fuselage length added to the Aviary design variables, and a preempted
+job has to start over.  CheckpointRecorder is an OpenMDAO case recorder that, after
+every driver evaluation by default, writes the full value of every design variable
+source (the trajectory times, states and controls as well as the aircraft design
+variables) to a compact .npz file.  The design vector is small next to an Aviary model
+evaluation, so writing it every time costs little, and a job that is killed loses at
+most the evaluation it was in.  load_checkpoint sets those values back into a new problem after
+setup, so run_aviary_problem starts the optimizer from the last checkpoint instead of
+from the initial guesses.
+
+The driver records a case for every model evaluation, not only for every optimizer
+iteration.  With IPOPT that includes the line-search trial points, so the count of
+evaluations between checkpoints is not a count of IPOPT iterations, and a checkpoint can
+hold a trial point that IPOPT went on to reject.  Such a point is still close to the
+iterate of the run, which is all a restart needs.
+
+Only the design vector is restored.  The optimizer's internal state (IPOPT multipliers
+and barrier parameter) is not available through the driver, so the resumed run starts a
+new IPOPT solve from the checkpointed point.
+
+Example
+-------
+    prob.setup()
+
+    iteration = 0
+    if resume and os.path.exists('checkpoint.npz'):
+        iteration = load_checkpoint(prob, 'checkpoint.npz')
+    recorder = CheckpointRecorder('checkpoint.npz', iteration=iteration)
+    prob.driver.add_recorder(recorder)
+
+    try:
+        prob.run_aviary_problem()
+    except BaseException:
+        recorder.save()
+        raise
+"""
+
+import os
+
+import numpy as np
+import openmdao.api as om
+from openmdao.recorders.case_recorder import CaseRecorder
+
+# key of the driver iteration count in the checkpoint file
+_ITERATION_KEY = '__iteration__'
+
+
+def _design_var_sources(prob):
+    """Return the source of every design variable of prob, keyed by design variable name."""
+    return {name: meta['source'] for name, meta in prob.model.get_design_vars().items()}
+
+
+def save_checkpoint(prob, filename, iteration=0):
+    """
+    Write the full value of the source of every design variable of prob to a .npz file.
+
+    The values are stored by design variable name, so a checkpoint can be loaded into
+    a new problem even if the automatic source names differ.
+
+    Parameters
+    ----------
+    prob : Problem
+        problem to checkpoint
+    filename : str
+        .npz checkpoint file
+    iteration : int
+        number of driver evaluations before the values were taken
+    """
+    _write_checkpoint(filename, _design_var_values(prob), iteration)
+
+
+def _design_var_values(prob):
+    """Return a copy of the value of the source of every design variable of prob."""
+    return {
+        name: np.array(prob.get_val(source, get_remote=True))
+        for name, source in _design_var_sources(prob).items()
+    }
+
+
+def _write_checkpoint(filename, values, iteration):
+    """Write design variable values and the iteration count to a .npz file."""
+    values = dict(values)
+    values[_ITERATION_KEY] = np.array(iteration)
+
+    directory = os.path.dirname(filename)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    # write to a temporary file first so a job killed while writing keeps the last checkpoint
+    with open(filename + '.tmp', 'wb') as f:
+        np.savez_compressed(f, **values)
+    os.replace(filename + '.tmp', filename)
+
+
+def load_checkpoint(prob, filename):
+    """
+    Set the design variable values of a set up problem from a checkpoint file.
+
+    Values in the checkpoint that are not design variables of prob, or have a different
+    size, are skipped with a warning.
+
+    Parameters
+    ----------
+    prob : Problem
+        problem after setup
+    filename : str
+        .npz checkpoint file written by save_checkpoint or CheckpointRecorder
+
+    Returns
+    -------
+    int
+        number of driver evaluations before the checkpoint was written
+    """
+    prob.final_setup()
+    sources = _design_var_sources(prob)
+
+    with np.load(filename) as data:
+        iteration = int(data[_ITERATION_KEY])
+        for name in data.files:
+            if name == _ITERATION_KEY:
+                continue
+
+            value = data[name]
+            current = prob.get_val(sources[name], get_remote=True) if name in sources else None
+            if current is None or current.size != value.size:
+                om.issue_warning(
+                    'Checkpoint value {} does not match a design variable and was not '
+                    'loaded.'.format(name)
+                )
+                continue
+
+            prob.set_val(sources[name], value.reshape(current.shape))
+
+    return iteration
+
+
+class CheckpointRecorder(CaseRecorder):
+    """
+    Case recorder that writes a design vector checkpoint every few driver evaluations.
+
+    Attributes
+    ----------
+    filename : str
+        .npz checkpoint file
+    every : int
+        number of recorded driver evaluations between checkpoints, line-search points
+        included; with more than one, a job that is killed loses up to every - 1
+        evaluations, unless save is called on the way out
+    iteration : int
+        driver evaluations done before this run, such as the count returned by
+        load_checkpoint when resuming
+    """
+
+    def __init__(self, filename, every=1, iteration=0):
+        super().__init__(record_viewer_data=False)
+        self.filename = filename
+        self.every = every
+        self.iteration = iteration
+        self._problem = None
+        self._values = None
+        self._iteration = iteration
+        self._saved = iteration
+
+    def startup(self, recording_requester, comm=None):
+        super().startup(recording_requester, comm)
+        self._problem = recording_requester._problem()
+        self._iteration = self.iteration
+        self._saved = self.iteration
+
+    def record_iteration_driver(self, recording_requester, data, metadata):
+        self._iteration += 1
+        self._values = _design_var_values(self._problem)
+        if self._iteration % self.every == 0:
+            self.save()
+
+    def save(self):
+        """
+        Write a checkpoint of the last recorded point, if it has not been written yet.
+
+        Call it when the run stops with an exception, so that a run checkpointing every
+        few evaluations keeps the last point the driver evaluated.
+        """
+        if self._values is not None and self._saved != self._iteration:
+            _write_checkpoint(self.filename, self._values, self._iteration)
+            self._saved = self._iteration
+
+    def record_iteration_system(self, recording_requester, data, metadata):
+        pass
+
+    def record_iteration_solver(self, recording_requester, data, metadata):
+        pass
+
+    def record_iteration_problem(self, recording_requester, data, metadata):
+        pass
+
+    def record_derivatives_driver(self, recording_requester, data, metadata):
+        pass
+
+    def record_metadata_system(self, system, run_number=None):
+        pass
+
+    def record_metadata_solver(self, solver, run_number=None):
+        pass
+
+    def record_viewer_data(self, model_viewer_data):
+        pass
+
+    def shutdown(self):
+        # the final point is always checkpointed
+        self.save()
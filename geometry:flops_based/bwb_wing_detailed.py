@@ -1,6 +1,10 @@
 import numpy as np
 import openmdao.api as om
 
+from aviary.subsystems.geometry.flops_based.utils import (
+    calc_station_integral,
+    d_calc_station_integral,
+)
 from aviary.variable_info.enums import Verbosity
 from aviary.variable_info.functions import add_aviary_input, add_aviary_option, add_aviary_output
 from aviary.variable_info.variables import Aircraft, Settings
@@ -353,41 +357,26 @@ class BWBWingPrelim(om.ExplicitComponent):
         add_aviary_output(self, Aircraft.Wing.ASPECT_RATIO, units='unitless')
         add_aviary_output(self, Aircraft.Wing.LOAD_FRACTION, units='unitless')
 
-        self.declare_partials('*', '*', method='fd', form='forward')
+    def setup_partials(self):
+        self.declare_partials(
+            [Aircraft.Wing.AREA, Aircraft.Wing.ASPECT_RATIO],
+            [Aircraft.Wing.SPAN, 'BWB_INPUT_STATION_DIST', 'BWB_CHORD_PER_SEMISPAN_DIST'],
+        )
+        self.declare_partials(Aircraft.Wing.ASPECT_RATIO, Aircraft.Wing.GLOVE_AND_BAT)
+        self.declare_partials(
+            Aircraft.Wing.LOAD_FRACTION, [Aircraft.Fuselage.MAX_WIDTH, Aircraft.Wing.SPAN]
+        )
 
     def compute(self, inputs, outputs):
         input_station_dist = inputs['BWB_INPUT_STATION_DIST']
-        num_stations = len(inputs['BWB_INPUT_STATION_DIST'])
+        bwb_chord_per_semispan_dist = inputs['BWB_CHORD_PER_SEMISPAN_DIST']
 
         glove_and_bat = inputs[Aircraft.Wing.GLOVE_AND_BAT]
         width = inputs[Aircraft.Fuselage.MAX_WIDTH]
-        span = inputs[Aircraft.Wing.SPAN][0]
-
-        ssm = 0.0
-        bwb_chord_per_semispan_dist = inputs['BWB_CHORD_PER_SEMISPAN_DIST']
+        span = inputs[Aircraft.Wing.SPAN]
 
         # Calculate Wing Area and Aspect Ratio for modified planform
-        if bwb_chord_per_semispan_dist[0] <= 5.0:
-            C1 = bwb_chord_per_semispan_dist[0] * span / 2.0
-        else:
-            C1 = bwb_chord_per_semispan_dist[0]
-        if input_station_dist[0] <= 1.1:
-            Y1 = input_station_dist[0] * span / 2.0
-        else:
-            Y1 = input_station_dist[0]
-        for n in range(1, num_stations):
-            if bwb_chord_per_semispan_dist[n] <= 5.0:
-                C2 = bwb_chord_per_semispan_dist[n] * span / 2.0
-            else:
-                C2 = bwb_chord_per_semispan_dist[n]
-            if input_station_dist[n] <= 1.1:
-                Y2 = input_station_dist[n] * span / 2.0
-            else:
-                Y2 = input_station_dist[n]
-            axp = (Y2 - Y1) * (C1 + C2)
-            C1 = C2
-            Y1 = Y2
-            ssm = ssm + axp
+        ssm = calc_station_integral(input_station_dist, bwb_chord_per_semispan_dist, span)
         ar = span**2 / (ssm - glove_and_bat)
         # Calculated wing area for aerodynamics
         outputs[Aircraft.Wing.AREA] = ssm
@@ -396,3 +385,32 @@ class BWBWingPrelim(om.ExplicitComponent):
         # Estimate the percent load carried by the outboard wing
         pct_load = (1.0 - width / span) ** 2
         outputs[Aircraft.Wing.LOAD_FRACTION] = pct_load
+
+    def compute_partials(self, inputs, J):
+        input_station_dist = inputs['BWB_INPUT_STATION_DIST']
+        bwb_chord_per_semispan_dist = inputs['BWB_CHORD_PER_SEMISPAN_DIST']
+
+        glove_and_bat = inputs[Aircraft.Wing.GLOVE_AND_BAT]
+        width = inputs[Aircraft.Fuselage.MAX_WIDTH]
+        span = inputs[Aircraft.Wing.SPAN]
+
+        ssm = calc_station_integral(input_station_dist, bwb_chord_per_semispan_dist, span)
+        d_station, d_chord, d_span, _ = d_calc_station_integral(
+            input_station_dist, bwb_chord_per_semispan_dist, span
+        )
+
+        J[Aircraft.Wing.AREA, Aircraft.Wing.SPAN] = d_span
+        J[Aircraft.Wing.AREA, 'BWB_INPUT_STATION_DIST'] = d_station
+        J[Aircraft.Wing.AREA, 'BWB_CHORD_PER_SEMISPAN_DIST'] = d_chord
+
+        area = ssm - glove_and_bat
+        dar_darea = -(span**2) / area**2
+
+        J[Aircraft.Wing.ASPECT_RATIO, Aircraft.Wing.SPAN] = 2.0 * span / area + dar_darea * d_span
+        J[Aircraft.Wing.ASPECT_RATIO, 'BWB_INPUT_STATION_DIST'] = dar_darea * d_station
+        J[Aircraft.Wing.ASPECT_RATIO, 'BWB_CHORD_PER_SEMISPAN_DIST'] = dar_darea * d_chord
+        J[Aircraft.Wing.ASPECT_RATIO, Aircraft.Wing.GLOVE_AND_BAT] = -dar_darea
+
+        ratio = 1.0 - width / span
+        J[Aircraft.Wing.LOAD_FRACTION, Aircraft.Fuselage.MAX_WIDTH] = -2.0 * ratio / span
+        J[Aircraft.Wing.LOAD_FRACTION, Aircraft.Wing.SPAN] = 2.0 * ratio * width / span**2
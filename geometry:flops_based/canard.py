@@ -1,11 +1,16 @@
+import numpy as np
 import openmdao.api as om
 
 from aviary.subsystems.geometry.flops_based.utils import (
+    add_design_input,
+    add_design_output,
     calc_lifting_surface_scaler,
+    declare_num_designs,
+    design_partials,
+    design_shape,
     thickness_to_chord_scaler,
 )
 from aviary.utils.aviary_values import AviaryValues
-from aviary.variable_info.functions import add_aviary_input, add_aviary_output
 from aviary.variable_info.variables import Aircraft
 
 
@@ -18,15 +23,20 @@ class Canard(om.ExplicitComponent):
             types=AviaryValues,
             desc='collection of Aircraft/Mission specific options',
         )
+        declare_num_designs(self)
 
     def setup(self):
-        add_aviary_input(self, Aircraft.Canard.AREA, units='ft**2')
-        add_aviary_input(self, Aircraft.Canard.THICKNESS_TO_CHORD, units='unitless')
-        add_aviary_input(self, Aircraft.Canard.WETTED_AREA_SCALER, units='unitless')
+        shape = design_shape(self.options['num_designs'])
 
-        add_aviary_output(self, Aircraft.Canard.WETTED_AREA, units='ft**2')
+        add_design_input(self, Aircraft.Canard.AREA, shape=shape, units='ft**2')
+        add_design_input(self, Aircraft.Canard.THICKNESS_TO_CHORD, shape=shape, units='unitless')
+        add_design_input(self, Aircraft.Canard.WETTED_AREA_SCALER, shape=shape, units='unitless')
+
+        add_design_output(self, Aircraft.Canard.WETTED_AREA, shape=shape, units='ft**2')
 
     def setup_partials(self):
+        rows, cols = design_partials(self.options['num_designs'])
+
         self.declare_partials(
             Aircraft.Canard.WETTED_AREA,
             [
@@ -34,15 +44,15 @@ class Canard(om.ExplicitComponent):
                 Aircraft.Canard.THICKNESS_TO_CHORD,
                 Aircraft.Canard.WETTED_AREA_SCALER,
             ],
+            rows=rows,
+            cols=cols,
         )
 
     def compute(self, inputs, outputs, discrete_inputs=None, discrete_outputs=None):
         area = inputs[Aircraft.Canard.AREA]
 
-        if area <= 0.0:
-            outputs[Aircraft.Canard.WETTED_AREA] = 0.0
-
-            return
+        # designs without a canard have no wetted area
+        has_canard = area.real > 0.0
 
         thickness_to_chord = inputs[Aircraft.Canard.THICKNESS_TO_CHORD]
         XMULTC = calc_lifting_surface_scaler(thickness_to_chord)
@@ -50,14 +60,16 @@ class Canard(om.ExplicitComponent):
 
         wetted_area = scaler * XMULTC * area
 
-        outputs[Aircraft.Canard.WETTED_AREA] = wetted_area
+        outputs[Aircraft.Canard.WETTED_AREA] = np.where(has_canard, wetted_area, 0.0)
 
     def compute_partials(self, inputs, J, discrete_inputs=None):
         area = inputs[Aircraft.Canard.AREA]
+        has_canard = area.real > 0.0
 
         thickness_to_chord = inputs[Aircraft.Canard.THICKNESS_TO_CHORD]
         XMULTC = calc_lifting_surface_scaler(thickness_to_chord)
-        scaler = inputs[Aircraft.Canard.WETTED_AREA_SCALER]
+        scaler = inputs[Aircraft.Canard.WETTED_AREA_SCALER] * has_canard
+        area = area * has_canard
 
         J[Aircraft.Canard.WETTED_AREA, Aircraft.Canard.AREA] = scaler * XMULTC
 
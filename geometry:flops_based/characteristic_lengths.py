@@ -1,8 +1,14 @@
 import numpy as np
 import openmdao.api as om
 
-from aviary.subsystems.geometry.flops_based.utils import Names
-from aviary.utils.aviary_values import AviaryValues
+from aviary.subsystems.geometry.flops_based.utils import (
+    Names,
+    add_design_input,
+    add_design_output,
+    declare_num_designs,
+    design_partials,
+    design_shape,
+)
 from aviary.variable_info.functions import add_aviary_input, add_aviary_option, add_aviary_output
 from aviary.variable_info.variables import Aircraft
 
@@ -14,20 +20,25 @@ class WingCharacteristicLength(om.ExplicitComponent):
 
     def initialize(self):
         add_aviary_option(self, Aircraft.Wing.SPAN_EFFICIENCY_REDUCTION)
+        declare_num_designs(self)
 
     def setup(self):
-        self.add_input(Names.CROOT, 0.0, units='unitless')
+        shape = design_shape(self.options['num_designs'])
 
-        add_aviary_input(self, Aircraft.Wing.AREA, units='ft**2')
-        add_aviary_input(self, Aircraft.Wing.ASPECT_RATIO, units='unitless')
-        add_aviary_input(self, Aircraft.Wing.GLOVE_AND_BAT, units='ft**2')
-        add_aviary_input(self, Aircraft.Wing.TAPER_RATIO, units='unitless')
-        add_aviary_input(self, Aircraft.Wing.THICKNESS_TO_CHORD, units='unitless')
+        self.add_input(Names.CROOT, 0.0, shape=shape, units='unitless')
 
-        add_aviary_output(self, Aircraft.Wing.CHARACTERISTIC_LENGTH, units='ft')
-        add_aviary_output(self, Aircraft.Wing.FINENESS, units='unitless')
+        add_design_input(self, Aircraft.Wing.AREA, shape=shape, units='ft**2')
+        add_design_input(self, Aircraft.Wing.ASPECT_RATIO, shape=shape, units='unitless')
+        add_design_input(self, Aircraft.Wing.GLOVE_AND_BAT, shape=shape, units='ft**2')
+        add_design_input(self, Aircraft.Wing.TAPER_RATIO, shape=shape, units='unitless')
+        add_design_input(self, Aircraft.Wing.THICKNESS_TO_CHORD, shape=shape, units='unitless')
+
+        add_design_output(self, Aircraft.Wing.CHARACTERISTIC_LENGTH, shape=shape, units='ft')
+        add_design_output(self, Aircraft.Wing.FINENESS, shape=shape, units='unitless')
 
     def setup_partials(self):
+        rows, cols = design_partials(self.options['num_designs'])
+
         wrt = [
             Aircraft.Wing.AREA,
             Aircraft.Wing.ASPECT_RATIO,
@@ -40,9 +51,15 @@ class WingCharacteristicLength(om.ExplicitComponent):
                 Aircraft.Wing.TAPER_RATIO,
             ]
 
-        self.declare_partials(Aircraft.Wing.CHARACTERISTIC_LENGTH, wrt)
+        self.declare_partials(Aircraft.Wing.CHARACTERISTIC_LENGTH, wrt, rows=rows, cols=cols)
 
-        self.declare_partials(Aircraft.Wing.FINENESS, Aircraft.Wing.THICKNESS_TO_CHORD, val=1.0)
+        self.declare_partials(
+            Aircraft.Wing.FINENESS,
+            Aircraft.Wing.THICKNESS_TO_CHORD,
+            val=1.0,
+            rows=rows,
+            cols=cols,
+        )
 
     def compute(self, inputs, outputs, discrete_inputs=None, discrete_outputs=None):
         area = inputs[Aircraft.Wing.AREA]
@@ -140,127 +157,112 @@ class BWBWingCharacteristicLength(om.ExplicitComponent):
         J[Aircraft.Wing.CHARACTERISTIC_LENGTH, Aircraft.Wing.AREA] = 1.0 / wing_span
 
 
+# lifting surfaces of OtherCharacteristicLengths, computed in one pass
+_LIFTING_SURFACES = (Aircraft.HorizontalTail, Aircraft.VerticalTail, Aircraft.Canard)
+
+
 class OtherCharacteristicLengths(om.ExplicitComponent):
     """
     Calculate the characteristic length and fineness ratio of the
     canard, fuselage, horizontal tail, nacelle, and vertical tail.
+
+    The lifting surfaces (tails and canard) and the bodies (fuselage and nacelles) are
+    each computed in one vectorized pass over the stacked components.
     """
 
     def initialize(self):
         add_aviary_option(self, Aircraft.Engine.NUM_ENGINES)
+        declare_num_designs(self)
 
     def setup(self):
         num_engine_type = len(self.options[Aircraft.Engine.NUM_ENGINES])
+        num_designs = self.options['num_designs']
+        shape = design_shape(num_designs)
+        engine_shape = design_shape(num_designs, num_engine_type)
 
-        self.add_input(Names.CROOT, 0.0, units='unitless')
+        self.add_input(Names.CROOT, 0.0, shape=shape, units='unitless')
 
-        add_aviary_input(self, Aircraft.Canard.AREA, units='ft**2')
-        add_aviary_input(self, Aircraft.Canard.ASPECT_RATIO, units='unitless')
+        add_design_input(self, Aircraft.Canard.AREA, shape=shape, units='ft**2')
+        add_design_input(self, Aircraft.Canard.ASPECT_RATIO, shape=shape, units='unitless')
         # add_aviary_input(self, Aircraft.Canard.LAMINAR_FLOW_LOWER, 0.0)
         # add_aviary_input(self, Aircraft.Canard.LAMINAR_FLOW_UPPER, 0.0)
-        add_aviary_input(self, Aircraft.Canard.THICKNESS_TO_CHORD, units='unitless')
+        add_design_input(self, Aircraft.Canard.THICKNESS_TO_CHORD, shape=shape, units='unitless')
 
-        add_aviary_input(self, Aircraft.Fuselage.AVG_DIAMETER, units='ft')
+        add_design_input(self, Aircraft.Fuselage.AVG_DIAMETER, shape=shape, units='ft')
         # add_aviary_input(self, Aircraft.Fuselage.LAMINAR_FLOW_LOWER, 0.0)
         # add_aviary_input(self, Aircraft.Fuselage.LAMINAR_FLOW_UPPER, 0.0)
-        add_aviary_input(self, Aircraft.Fuselage.LENGTH, units='ft')
+        add_design_input(self, Aircraft.Fuselage.LENGTH, shape=shape, units='ft')
 
-        add_aviary_input(self, Aircraft.HorizontalTail.AREA, units='ft**2')
-        add_aviary_input(self, Aircraft.HorizontalTail.ASPECT_RATIO, units='unitless')
+        add_design_input(self, Aircraft.HorizontalTail.AREA, shape=shape, units='ft**2')
+        add_design_input(self, Aircraft.HorizontalTail.ASPECT_RATIO, shape=shape, units='unitless')
         # add_aviary_input(self, Aircraft.HorizontalTail.LAMINAR_FLOW_LOWER, 0.0)
         # add_aviary_input(self, Aircraft.HorizontalTail.LAMINAR_FLOW_UPPER, 0.0)
-        add_aviary_input(self, Aircraft.HorizontalTail.THICKNESS_TO_CHORD, units='unitless')
+        add_design_input(
+            self, Aircraft.HorizontalTail.THICKNESS_TO_CHORD, shape=shape, units='unitless'
+        )
 
-        add_aviary_input(self, Aircraft.Nacelle.AVG_DIAMETER, shape=num_engine_type, units='ft')
-        add_aviary_input(self, Aircraft.Nacelle.AVG_LENGTH, shape=num_engine_type, units='ft')
+        add_design_input(self, Aircraft.Nacelle.AVG_DIAMETER, shape=engine_shape, units='ft')
+        add_design_input(self, Aircraft.Nacelle.AVG_LENGTH, shape=engine_shape, units='ft')
         # add_aviary_input(self, Aircraft.Nacelle.LAMINAR_FLOW_LOWER, 0.0)
         # add_aviary_input(self, Aircraft.Nacelle.LAMINAR_FLOW_UPPER, 0.0)
 
-        add_aviary_input(self, Aircraft.VerticalTail.AREA, units='ft**2')
-        add_aviary_input(self, Aircraft.VerticalTail.ASPECT_RATIO, units='unitless')
+        add_design_input(self, Aircraft.VerticalTail.AREA, shape=shape, units='ft**2')
+        add_design_input(self, Aircraft.VerticalTail.ASPECT_RATIO, shape=shape, units='unitless')
         # add_aviary_input(self, Aircraft.VerticalTail.LAMINAR_FLOW_LOWER, 0.0)
         # add_aviary_input(self, Aircraft.VerticalTail.LAMINAR_FLOW_UPPER, 0.0)
-        add_aviary_input(self, Aircraft.VerticalTail.THICKNESS_TO_CHORD, units='unitless')
-
-        add_aviary_output(self, Aircraft.Canard.CHARACTERISTIC_LENGTH, units='ft')
-        add_aviary_output(self, Aircraft.Canard.FINENESS, units='unitless')
-
-        add_aviary_output(self, Aircraft.Fuselage.CHARACTERISTIC_LENGTH, units='ft')
-        add_aviary_output(self, Aircraft.Fuselage.FINENESS, units='unitless')
-
-        add_aviary_output(self, Aircraft.HorizontalTail.CHARACTERISTIC_LENGTH, units='ft')
-        add_aviary_output(self, Aircraft.HorizontalTail.FINENESS, units='unitless')
-
-        add_aviary_output(
-            self, Aircraft.Nacelle.CHARACTERISTIC_LENGTH, shape=num_engine_type, units='ft'
+        add_design_input(
+            self, Aircraft.VerticalTail.THICKNESS_TO_CHORD, shape=shape, units='unitless'
         )
-        add_aviary_output(self, Aircraft.Nacelle.FINENESS, shape=num_engine_type, units='unitless')
-
-        add_aviary_output(self, Aircraft.VerticalTail.CHARACTERISTIC_LENGTH, units='ft')
-        add_aviary_output(self, Aircraft.VerticalTail.FINENESS, units='unitless')
-
-    def setup_partials(self):
-        self._setup_partials_horizontal_tail()
-        self._setup_partials_vertical_tail()
-        self._setup_partials_fuselage()
-        self._setup_partials_nacelles()
-        self._setup_partials_canard()
-
-    def compute(self, inputs, outputs, discrete_inputs=None, discrete_outputs=None):
-        self._compute_horizontal_tail(inputs, outputs, discrete_inputs, discrete_outputs)
-
-        self._compute_vertical_tail(inputs, outputs, discrete_inputs, discrete_outputs)
-
-        self._compute_fuselage(inputs, outputs, discrete_inputs, discrete_outputs)
-
-        self._compute_nacelles(inputs, outputs, discrete_inputs, discrete_outputs)
 
-        # self._compute_additional_fuselages(
-        #     inputs, outputs, discrete_inputs, discrete_outputs
-        # )
+        add_design_output(self, Aircraft.Canard.CHARACTERISTIC_LENGTH, shape=shape, units='ft')
+        add_design_output(self, Aircraft.Canard.FINENESS, shape=shape, units='unitless')
 
-        # self._compute_additional_vertical_tails(
-        #     inputs, outputs, discrete_inputs, discrete_outputs
-        # )
+        add_design_output(self, Aircraft.Fuselage.CHARACTERISTIC_LENGTH, shape=shape, units='ft')
+        add_design_output(self, Aircraft.Fuselage.FINENESS, shape=shape, units='unitless')
 
-        self._compute_canard(inputs, outputs, discrete_inputs, discrete_outputs)
-
-    def compute_partials(self, inputs, J, discrete_inputs=None):
-        self._compute_partials_horizontal_tail(inputs, J, discrete_inputs)
-        self._compute_partials_vertical_tail(inputs, J, discrete_inputs)
-        self._compute_partials_fuselage(inputs, J, discrete_inputs)
-        self._compute_partials_nacelles(inputs, J, discrete_inputs)
-        self._compute_partials_canard(inputs, J, discrete_inputs)
-
-    def _setup_partials_horizontal_tail(self):
-        self.declare_partials(
-            Aircraft.HorizontalTail.CHARACTERISTIC_LENGTH,
-            [
-                Aircraft.HorizontalTail.AREA,
-                Aircraft.HorizontalTail.ASPECT_RATIO,
-            ],
+        add_design_output(
+            self, Aircraft.HorizontalTail.CHARACTERISTIC_LENGTH, shape=shape, units='ft'
         )
+        add_design_output(self, Aircraft.HorizontalTail.FINENESS, shape=shape, units='unitless')
 
-        self.declare_partials(
-            Aircraft.HorizontalTail.FINENESS, Aircraft.HorizontalTail.THICKNESS_TO_CHORD, val=1.0
+        add_design_output(
+            self, Aircraft.Nacelle.CHARACTERISTIC_LENGTH, shape=engine_shape, units='ft'
         )
+        add_design_output(self, Aircraft.Nacelle.FINENESS, shape=engine_shape, units='unitless')
 
-    def _setup_partials_vertical_tail(self):
-        self.declare_partials(
-            Aircraft.VerticalTail.CHARACTERISTIC_LENGTH,
-            [
-                Aircraft.VerticalTail.AREA,
-                Aircraft.VerticalTail.ASPECT_RATIO,
-            ],
+        add_design_output(
+            self, Aircraft.VerticalTail.CHARACTERISTIC_LENGTH, shape=shape, units='ft'
         )
+        add_design_output(self, Aircraft.VerticalTail.FINENESS, shape=shape, units='unitless')
 
-        self.declare_partials(
-            Aircraft.VerticalTail.FINENESS, Aircraft.VerticalTail.THICKNESS_TO_CHORD, val=1.0
-        )
+    def setup_partials(self):
+        num_designs = self.options['num_designs']
+        rows, cols = design_partials(num_designs)
+
+        for surface in _LIFTING_SURFACES:
+            self.declare_partials(
+                surface.CHARACTERISTIC_LENGTH,
+                [
+                    surface.AREA,
+                    surface.ASPECT_RATIO,
+                ],
+                rows=rows,
+                cols=cols,
+            )
+
+            self.declare_partials(
+                surface.FINENESS,
+                surface.THICKNESS_TO_CHORD,
+                rows=rows,
+                cols=cols,
+            )
 
-    def _setup_partials_fuselage(self):
         self.declare_partials(
-            Aircraft.Fuselage.CHARACTERISTIC_LENGTH, Aircraft.Fuselage.LENGTH, val=1.0
+            Aircraft.Fuselage.CHARACTERISTIC_LENGTH,
+            Aircraft.Fuselage.LENGTH,
+            val=1.0,
+            rows=rows,
+            cols=cols,
         )
 
         self.declare_partials(
@@ -269,18 +271,19 @@ class OtherCharacteristicLengths(om.ExplicitComponent):
                 Aircraft.Fuselage.AVG_DIAMETER,
                 Aircraft.Fuselage.LENGTH,
             ],
+            rows=rows,
+            cols=cols,
         )
 
-    def _setup_partials_nacelles(self):
         # derivatives w.r.t vectorized engine inputs have known sparsity pattern
         num_engine_type = len(self.options[Aircraft.Engine.NUM_ENGINES])
-        shape = np.arange(num_engine_type)
+        rows, cols = design_partials(num_designs, num_engine_type, num_engine_type)
 
         self.declare_partials(
             Aircraft.Nacelle.CHARACTERISTIC_LENGTH,
             Aircraft.Nacelle.AVG_LENGTH,
-            rows=shape,
-            cols=shape,
+            rows=rows,
+            cols=cols,
             val=1.0,
         )
 
@@ -290,260 +293,247 @@ class OtherCharacteristicLengths(om.ExplicitComponent):
                 Aircraft.Nacelle.AVG_DIAMETER,
                 Aircraft.Nacelle.AVG_LENGTH,
             ],
-            rows=shape,
-            cols=shape,
+            rows=rows,
+            cols=cols,
             val=1.0,
         )
 
-    def _setup_partials_canard(self):
-        self.declare_partials(
-            Aircraft.Canard.CHARACTERISTIC_LENGTH,
-            [
-                Aircraft.Canard.AREA,
-                Aircraft.Canard.ASPECT_RATIO,
-            ],
-        )
-
-        self.declare_partials(
-            Aircraft.Canard.FINENESS,
-            Aircraft.Canard.THICKNESS_TO_CHORD,
-        )
+    def compute(self, inputs, outputs, discrete_inputs=None, discrete_outputs=None):
+        area, aspect_ratio, thickness_to_chord, present = self._lifting_surfaces(inputs)
 
-    def _compute_horizontal_tail(
-        self, inputs, outputs, discrete_inputs=None, discrete_outputs=None
-    ):
-        aspect_ratio = inputs[Aircraft.HorizontalTail.ASPECT_RATIO]
+        lengths = _surface_length(area, aspect_ratio)
+        fineness = np.where(present, thickness_to_chord, 0.0)
 
-        length = 0.0
+        for surface, length, ratio in zip(_LIFTING_SURFACES, lengths, fineness):
+            outputs[surface.CHARACTERISTIC_LENGTH] = length
+            outputs[surface.FINENESS] = ratio
 
-        if 0.0 < aspect_ratio:
-            area = inputs[Aircraft.HorizontalTail.AREA]
+        length, diameter, present, calc = self._bodies(inputs)
 
-            length = (area / aspect_ratio) ** 0.5
+        char_len = np.where(present, length, 0.0)
+        fineness = np.where(calc, length / np.where(calc, diameter, 1.0), 1.0 * present)
 
-        outputs[Aircraft.HorizontalTail.CHARACTERISTIC_LENGTH] = length
+        outputs[Aircraft.Fuselage.CHARACTERISTIC_LENGTH] = char_len[..., 0]
+        outputs[Aircraft.Fuselage.FINENESS] = fineness[..., 0]
 
-        thickness_to_chord = inputs[Aircraft.HorizontalTail.THICKNESS_TO_CHORD]
+        outputs[Aircraft.Nacelle.CHARACTERISTIC_LENGTH] = char_len[..., 1:]
+        outputs[Aircraft.Nacelle.FINENESS] = fineness[..., 1:]
 
-        outputs[Aircraft.HorizontalTail.FINENESS] = thickness_to_chord
+    def compute_partials(self, inputs, J, discrete_inputs=None):
+        area, aspect_ratio, _, present = self._lifting_surfaces(inputs)
 
-    def _compute_vertical_tail(self, inputs, outputs, discrete_inputs=None, discrete_outputs=None):
-        aspect_ratio = inputs[Aircraft.VerticalTail.ASPECT_RATIO]
+        d_area, d_aspect_ratio = _d_surface_length(area, aspect_ratio)
 
-        length = 0.0
+        for surface, da, dr, surface_present in zip(
+            _LIFTING_SURFACES, d_area, d_aspect_ratio, present
+        ):
+            J[surface.CHARACTERISTIC_LENGTH, surface.AREA] = da
+            J[surface.CHARACTERISTIC_LENGTH, surface.ASPECT_RATIO] = dr
+            J[surface.FINENESS, surface.THICKNESS_TO_CHORD] = 1.0 * surface_present
 
-        if 0.0 < aspect_ratio:
-            area = inputs[Aircraft.VerticalTail.AREA]
+        length, diameter, present, calc = self._bodies(inputs)
+        diameter = np.where(calc, diameter, 1.0)
 
-            length = (area / aspect_ratio) ** 0.5
+        deriv_char_len = np.broadcast_to(1.0 * present, length.shape)
+        deriv_fine_len = calc / diameter
+        deriv_fine_diam = -length * calc / diameter**2.0
 
-        outputs[Aircraft.VerticalTail.CHARACTERISTIC_LENGTH] = length
+        J[Aircraft.Fuselage.FINENESS, Aircraft.Fuselage.LENGTH] = deriv_fine_len[..., 0]
 
-        thickness_to_chord = inputs[Aircraft.VerticalTail.THICKNESS_TO_CHORD]
+        J[Aircraft.Fuselage.FINENESS, Aircraft.Fuselage.AVG_DIAMETER] = deriv_fine_diam[..., 0]
 
-        outputs[Aircraft.VerticalTail.FINENESS] = thickness_to_chord
+        J[Aircraft.Nacelle.CHARACTERISTIC_LENGTH, Aircraft.Nacelle.AVG_LENGTH] = deriv_char_len[
+            ..., 1:
+        ].ravel()
 
-    def _compute_fuselage(self, inputs, outputs, discrete_inputs=None, discrete_outputs=None):
-        length = inputs[Aircraft.Fuselage.LENGTH]
+        J[Aircraft.Nacelle.FINENESS, Aircraft.Nacelle.AVG_LENGTH] = deriv_fine_len[..., 1:].ravel()
 
-        outputs[Aircraft.Fuselage.CHARACTERISTIC_LENGTH] = length
+        J[Aircraft.Nacelle.FINENESS, Aircraft.Nacelle.AVG_DIAMETER] = deriv_fine_diam[
+            ..., 1:
+        ].ravel()
 
-        avg_diam = inputs[Aircraft.Fuselage.AVG_DIAMETER]
+    def _lifting_surfaces(self, inputs):
+        """
+        Return the area, aspect ratio and thickness to chord ratio of the lifting surfaces
+        stacked along a new first axis, and where each surface is present.
+        """
+        area = np.stack([inputs[surface.AREA] for surface in _LIFTING_SURFACES])
+        aspect_ratio = np.stack([inputs[surface.ASPECT_RATIO] for surface in _LIFTING_SURFACES])
+        thickness_to_chord = np.stack(
+            [inputs[surface.THICKNESS_TO_CHORD] for surface in _LIFTING_SURFACES]
+        )
 
-        fineness = length / avg_diam
+        # designs without a canard keep zero length and fineness
+        is_tail = np.array([surface is not Aircraft.Canard for surface in _LIFTING_SURFACES])
+        present = is_tail[:, np.newaxis] | (area.real > 0.0)
 
-        outputs[Aircraft.Fuselage.FINENESS] = fineness
+        return area, aspect_ratio, thickness_to_chord, present
 
-    def _compute_nacelles(self, inputs, outputs, discrete_inputs=None, discrete_outputs=None):
+    def _bodies(self, inputs):
+        """
+        Return the length and diameter of the fuselage followed by the nacelles of every
+        engine type along the last axis, where each body is present, and where its
+        fineness ratio is its length over its diameter.
+        """
         # TODO do all engines support nacelles? If not, is this deliberate, or
         # just an artifact of the implementation?
         num_eng = self.options[Aircraft.Engine.NUM_ENGINES]
 
-        avg_diam = inputs[Aircraft.Nacelle.AVG_DIAMETER]
-        avg_length = inputs[Aircraft.Nacelle.AVG_LENGTH]
+        nacelle_length = inputs[Aircraft.Nacelle.AVG_LENGTH]
+        fuselage_shape = nacelle_length.shape[:-1] + (1,)
 
-        char_len = np.zeros(len(num_eng), dtype=avg_diam.dtype)
-        fineness = np.zeros(len(num_eng), dtype=avg_diam.dtype)
-
-        num_idx = np.where(num_eng >= 1)
-        char_len[num_idx] = avg_length[num_idx]
-        fineness[num_idx] = 1.0
-
-        calc_idx = np.intersect1d(np.where(avg_diam[num_idx] > 0), num_idx)
-
-        fineness[calc_idx] = avg_length[calc_idx] / avg_diam[calc_idx]
-
-        outputs[Aircraft.Nacelle.CHARACTERISTIC_LENGTH] = char_len
-        outputs[Aircraft.Nacelle.FINENESS] = fineness
-
-    # NOTE this code is currently unused!!
-    def _compute_additional_fuselages(
-        self, inputs, outputs, discrete_inputs=None, discrete_outputs=None
-    ):
-        num_fuselages = inputs[Aircraft.Fuselage.NUM_FUSELAGES]
-
-        if num_fuselages < 2:
-            return
-
-        num_extra = num_fuselages - 1
-
-        idx = self._num_components
-        self._num_components += num_extra
-
-        lengths = outputs[Aircraft.Design.CHARACTERISTIC_LENGTHS]
-
-        fineness = outputs[Aircraft.Design.FINENESS]
-
-        laminar_flow_lower = outputs[Aircraft.Design.LAMINAR_FLOW_LOWER]
-        laminar_flow_upper = outputs[Aircraft.Design.LAMINAR_FLOW_UPPER]
-
-        for _ in range(num_extra):
-            lengths[idx] = lengths[3]
-
-            fineness[idx] = fineness[3]
-
-            laminar_flow_lower[idx] = laminar_flow_lower[3]
-            laminar_flow_upper[idx] = laminar_flow_upper[3]
-
-            idx += 1
-
-    # NOTE this code is currently unused!!
-    def _compute_additional_vertical_tails(
-        self, inputs, outputs, discrete_inputs=None, discrete_outputs=None
-    ):
-        aviary_options: AviaryValues = self.options['aviary_options']
-        num_tails = aviary_options.get_val(Aircraft.VerticalTail.NUM_TAILS)
-
-        if num_tails < 2:
-            return
-
-        num_extra = num_tails - 1
-
-        idx = self._num_components
-        self._num_components += num_extra
-
-        lengths = outputs[Aircraft.Design.CHARACTERISTIC_LENGTHS]
-
-        fineness = outputs[Aircraft.Design.FINENESS]
-
-        laminar_flow_lower = outputs[Aircraft.Design.LAMINAR_FLOW_LOWER]
-        laminar_flow_upper = outputs[Aircraft.Design.LAMINAR_FLOW_UPPER]
-
-        for _ in range(num_extra):
-            lengths[idx] = lengths[2]
-
-            fineness[idx] = fineness[2]
-
-            laminar_flow_lower[idx] = laminar_flow_lower[2]
-            laminar_flow_upper[idx] = laminar_flow_upper[2]
-
-            idx += 1
-
-    def _compute_canard(self, inputs, outputs, discrete_inputs=None, discrete_outputs=None):
-        area = inputs[Aircraft.Canard.AREA]
-
-        if area <= 0.0:
-            return
-
-        thickness_to_chord = inputs[Aircraft.Canard.THICKNESS_TO_CHORD]
-        aspect_ratio = inputs[Aircraft.Canard.ASPECT_RATIO]
-
-        length = 0.0
-
-        if 0.0 < aspect_ratio:
-            length = (area / aspect_ratio) ** 0.5
-
-        outputs[Aircraft.Canard.CHARACTERISTIC_LENGTH] = length
-
-        outputs[Aircraft.Canard.FINENESS] = thickness_to_chord
-
-    def _compute_partials_horizontal_tail(self, inputs, J, discrete_inputs=None):
-        aspect_ratio = inputs[Aircraft.HorizontalTail.ASPECT_RATIO]
-
-        da = dr = 0.0
-
-        if 0.0 < aspect_ratio:
-            area = inputs[Aircraft.HorizontalTail.AREA]
-
-            f = 0.5 * (area / aspect_ratio) ** -0.5
-            da = f / aspect_ratio
-            dr = -f * area / aspect_ratio**2.0
-
-        J[Aircraft.HorizontalTail.CHARACTERISTIC_LENGTH, Aircraft.HorizontalTail.AREA] = da
-
-        J[Aircraft.HorizontalTail.CHARACTERISTIC_LENGTH, Aircraft.HorizontalTail.ASPECT_RATIO] = dr
+        length = np.concatenate(
+            (np.reshape(inputs[Aircraft.Fuselage.LENGTH], fuselage_shape), nacelle_length),
+            axis=-1,
+        )
+        diameter = np.concatenate(
+            (
+                np.reshape(inputs[Aircraft.Fuselage.AVG_DIAMETER], fuselage_shape),
+                inputs[Aircraft.Nacelle.AVG_DIAMETER],
+            ),
+            axis=-1,
+        )
 
-    def _compute_partials_vertical_tail(self, inputs, J, discrete_inputs=None):
-        aspect_ratio = inputs[Aircraft.VerticalTail.ASPECT_RATIO]
+        # the masks broadcast over the bodies, the last axis of batched inputs; nacelles
+        # without a diameter have a fineness of one
+        is_fuselage = np.arange(length.shape[-1]) == 0
+        present = np.concatenate(([True], np.asarray(num_eng) >= 1))
+        calc = present & (is_fuselage | (diameter.real > 0.0))
 
-        da = dr = 0.0
+        return length, diameter, present, calc
 
-        if 0.0 < aspect_ratio:
-            area = inputs[Aircraft.VerticalTail.AREA]
 
-            f = 0.5 * (area / aspect_ratio) ** -0.5
-            da = f / aspect_ratio
-            dr = -f * area / aspect_ratio**2.0
+# per component attributes of ComponentTable and the table variable of each
+_TABLE_ATTRIBUTES = (
+    ('WETTED_AREA', Aircraft.Design.WETTED_AREAS, 'ft**2'),
+    ('CHARACTERISTIC_LENGTH', Aircraft.Design.CHARACTERISTIC_LENGTHS, 'ft'),
+    ('FINENESS', Aircraft.Design.FINENESS, 'unitless'),
+    ('LAMINAR_FLOW_UPPER', Aircraft.Design.LAMINAR_FLOW_UPPER, 'unitless'),
+    ('LAMINAR_FLOW_LOWER', Aircraft.Design.LAMINAR_FLOW_LOWER, 'unitless'),
+)
 
-        J[Aircraft.VerticalTail.CHARACTERISTIC_LENGTH, Aircraft.VerticalTail.AREA] = da
 
-        J[Aircraft.VerticalTail.CHARACTERISTIC_LENGTH, Aircraft.VerticalTail.ASPECT_RATIO] = dr
+class ComponentTable(om.ExplicitComponent):
+    """
+    Assemble the wetted area, characteristic length, fineness ratio and laminar flow of
+    every component into one array per attribute.
+
+    Components are ordered wing, horizontal tails, vertical tails, fuselages, nacelles and
+    canards. All tails, fuselages and canards of a kind share the values of that kind, and
+    all nacelles of an engine type share the values of that engine type, so the table is
+    one gather per attribute for any number of components.
+
+    A canard is only present when Aircraft.Canard.AREA is positive, which the static table
+    layout cannot follow, so the table keeps num_canards canard entries, one by default.
+    Without canard area, the canard wetted area, length and fineness are zero, and so are
+    its entries.
+    """
 
-    def _compute_partials_fuselage(self, inputs, J, discrete_inputs=None):
-        length = inputs[Aircraft.Fuselage.LENGTH]
-        avg_diam = inputs[Aircraft.Fuselage.AVG_DIAMETER]
+    def initialize(self):
+        add_aviary_option(self, Aircraft.Engine.NUM_ENGINES)
+        add_aviary_option(self, Aircraft.Fuselage.NUM_FUSELAGES)
+        add_aviary_option(self, Aircraft.HorizontalTail.NUM_TAILS)
+        add_aviary_option(self, Aircraft.VerticalTail.NUM_TAILS)
+        self.options.declare(
+            'num_canards', types=int, default=1, lower=0, desc='number of canards in the table'
+        )
+        declare_num_designs(self)
+
+    def _kinds(self):
+        """
+        Return the kinds of components, the number of values of each kind per design, and
+        the number of components of each value.
+        """
+        num_engines = np.asarray(self.options[Aircraft.Engine.NUM_ENGINES], dtype=int)
+
+        return [
+            (Aircraft.Wing, 1, [1]),
+            (Aircraft.HorizontalTail, 1, [self.options[Aircraft.HorizontalTail.NUM_TAILS]]),
+            (Aircraft.VerticalTail, 1, [self.options[Aircraft.VerticalTail.NUM_TAILS]]),
+            (Aircraft.Fuselage, 1, [self.options[Aircraft.Fuselage.NUM_FUSELAGES]]),
+            (Aircraft.Nacelle, len(num_engines), list(num_engines)),
+            (Aircraft.Canard, 1, [self.options['num_canards']]),
+        ]
 
-        J[Aircraft.Fuselage.FINENESS, Aircraft.Fuselage.LENGTH] = 1.0 / avg_diam
+    def setup(self):
+        num_designs = self.options['num_designs']
+        kinds = self._kinds()
 
-        J[Aircraft.Fuselage.FINENESS, Aircraft.Fuselage.AVG_DIAMETER] = -length / avg_diam**2.0
+        for kind, size, _ in kinds:
+            if kind is Aircraft.Nacelle:
+                shape = design_shape(num_designs, size)
+            else:
+                shape = design_shape(num_designs)
 
-    def _compute_partials_nacelles(self, inputs, J, discrete_inputs=None):
-        num_eng = self.options[Aircraft.Engine.NUM_ENGINES]
+            for attribute, _, units in _TABLE_ATTRIBUTES:
+                add_design_input(self, getattr(kind, attribute), shape=shape, units=units)
 
-        avg_diam = inputs[Aircraft.Nacelle.AVG_DIAMETER]
-        avg_length = inputs[Aircraft.Nacelle.AVG_LENGTH]
+        # the value of each component, indexing the values of all kinds in order
+        counts = np.concatenate([counts for _, _, counts in kinds]).astype(int)
+        self._source = np.repeat(np.arange(len(counts)), counts)
 
-        avg_diam = inputs[Aircraft.Nacelle.AVG_DIAMETER]
-        avg_length = inputs[Aircraft.Nacelle.AVG_LENGTH]
+        shape = design_shape(num_designs, len(self._source))
 
-        deriv_char_len = np.zeros(len(num_eng), dtype=avg_diam.dtype)
-        deriv_fine_len = np.zeros(len(num_eng), dtype=avg_diam.dtype)
-        deriv_fine_diam = np.zeros(len(num_eng), dtype=avg_diam.dtype)
+        for _, table_name, units in _TABLE_ATTRIBUTES:
+            add_design_output(self, table_name, shape=shape, units=units)
 
-        calc_idx = np.where(num_eng >= 1)
-        deriv_char_len[calc_idx] = 1.0
-        deriv_fine_len[calc_idx] = 1.0 / avg_diam[calc_idx]
-        deriv_fine_diam[calc_idx] = -avg_length[calc_idx] / avg_diam[calc_idx] ** 2.0
+    def setup_partials(self):
+        num_designs = self.options['num_designs']
+        source = self._source
+        num_components = len(source)
+        designs = np.arange(num_designs)[:, np.newaxis]
 
-        J[Aircraft.Nacelle.CHARACTERISTIC_LENGTH, Aircraft.Nacelle.AVG_LENGTH] = deriv_char_len
+        start = 0
+        for kind, size, _ in self._kinds():
+            components = np.flatnonzero((start <= source) & (source < start + size))
 
-        J[Aircraft.Nacelle.FINENESS, Aircraft.Nacelle.AVG_LENGTH] = deriv_fine_len
+            if len(components):
+                rows = (designs * num_components + components).ravel()
+                cols = (designs * size + source[components] - start).ravel()
 
-        J[Aircraft.Nacelle.FINENESS, Aircraft.Nacelle.AVG_DIAMETER] = deriv_fine_diam
+                for attribute, table_name, _ in _TABLE_ATTRIBUTES:
+                    self.declare_partials(
+                        table_name, getattr(kind, attribute), rows=rows, cols=cols, val=1.0
+                    )
 
-    def _compute_partials_canard(self, inputs, J, discrete_inputs=None):
-        area = inputs[Aircraft.Canard.AREA]
+            start += size
 
-        if area <= 0.0:
-            J[Aircraft.Canard.CHARACTERISTIC_LENGTH, Aircraft.Canard.AREA] = J[
-                Aircraft.Canard.CHARACTERISTIC_LENGTH, Aircraft.Canard.ASPECT_RATIO
-            ] = J[Aircraft.Canard.FINENESS, Aircraft.Canard.THICKNESS_TO_CHORD] = 0.0
+    def compute(self, inputs, outputs, discrete_inputs=None, discrete_outputs=None):
+        num_designs = self.options['num_designs']
+        batch = () if num_designs == 1 else (num_designs,)
+        kinds = self._kinds()
+
+        for attribute, table_name, _ in _TABLE_ATTRIBUTES:
+            values = np.concatenate(
+                [
+                    np.reshape(inputs[getattr(kind, attribute)], batch + (size,))
+                    for kind, size, _ in kinds
+                ],
+                axis=-1,
+            )
 
-            return
+            outputs[table_name] = values[..., self._source]
 
-        aspect_ratio = inputs[Aircraft.Canard.ASPECT_RATIO]
 
-        da = dr = 0.0
+def _surface_length(area, aspect_ratio):
+    """
+    Return the characteristic length (area / aspect_ratio)**0.5 of lifting surfaces,
+    zero where the aspect ratio or the area is not positive.
+    """
+    positive = (aspect_ratio.real > 0.0) & (area.real > 0.0)
+    ratio = np.where(positive, area, 1.0) / np.where(positive, aspect_ratio, 1.0)
 
-        if 0.0 < aspect_ratio:
-            area = inputs[Aircraft.Canard.AREA]
+    return np.where(positive, ratio**0.5, 0.0)
 
-            f = 0.5 * (area / aspect_ratio) ** -0.5
-            da = f / aspect_ratio
-            dr = -f * area / aspect_ratio**2.0
 
-        J[Aircraft.Canard.CHARACTERISTIC_LENGTH, Aircraft.Canard.AREA] = da
+def _d_surface_length(area, aspect_ratio):
+    """Return the partials of _surface_length with respect to area and aspect ratio."""
+    positive = (aspect_ratio.real > 0.0) & (area.real > 0.0)
+    area = np.where(positive, area, 1.0)
+    aspect_ratio = np.where(positive, aspect_ratio, 1.0)
 
-        J[Aircraft.Canard.CHARACTERISTIC_LENGTH, Aircraft.Canard.ASPECT_RATIO] = dr
+    f = 0.5 * (area / aspect_ratio) ** -0.5
+    da = f / aspect_ratio
+    dr = -f * area / aspect_ratio**2.0
 
-        J[Aircraft.Canard.FINENESS, Aircraft.Canard.THICKNESS_TO_CHORD] = 1.0
+    return np.where(positive, da, 0.0), np.where(positive, dr, 0.0)
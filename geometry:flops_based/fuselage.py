@@ -1,8 +1,17 @@
 """Contains any preliminary calculations on the fuselage."""
 
+import functools
+
 import numpy as np
 import openmdao.api as om
 
+from aviary.subsystems.geometry.flops_based.utils import (
+    add_design_input,
+    add_design_output,
+    declare_num_designs,
+    design_partials,
+    design_shape,
+)
 from aviary.utils.functions import smooth_int_tanh, d_smooth_int_tanh
 from aviary.variable_info.enums import Verbosity
 from aviary.variable_info.functions import add_aviary_input, add_aviary_option, add_aviary_output
@@ -18,24 +27,33 @@ class FuselagePrelim(om.ExplicitComponent):
 
     def initialize(self):
         add_aviary_option(self, Settings.VERBOSITY)
+        declare_num_designs(self)
 
     def setup(self):
-        add_aviary_input(self, Aircraft.Fuselage.LENGTH, units='ft')
-        add_aviary_input(self, Aircraft.Fuselage.MAX_HEIGHT, units='ft')
-        add_aviary_input(self, Aircraft.Fuselage.MAX_WIDTH, units='ft')
+        shape = design_shape(self.options['num_designs'])
 
-        add_aviary_output(self, Aircraft.Fuselage.AVG_DIAMETER, units='ft')
-        add_aviary_output(self, Aircraft.Fuselage.PLANFORM_AREA, units='ft**2')
+        add_design_input(self, Aircraft.Fuselage.LENGTH, shape=shape, units='ft')
+        add_design_input(self, Aircraft.Fuselage.MAX_HEIGHT, shape=shape, units='ft')
+        add_design_input(self, Aircraft.Fuselage.MAX_WIDTH, shape=shape, units='ft')
+
+        add_design_output(self, Aircraft.Fuselage.AVG_DIAMETER, shape=shape, units='ft')
+        add_design_output(self, Aircraft.Fuselage.PLANFORM_AREA, shape=shape, units='ft**2')
 
     def setup_partials(self):
+        rows, cols = design_partials(self.options['num_designs'])
+
         self.declare_partials(
             of=[Aircraft.Fuselage.AVG_DIAMETER],
             wrt=[Aircraft.Fuselage.MAX_HEIGHT, Aircraft.Fuselage.MAX_WIDTH],
+            rows=rows,
+            cols=cols,
             val=0.5,
         )
         self.declare_partials(
             of=[Aircraft.Fuselage.PLANFORM_AREA],
             wrt=[Aircraft.Fuselage.LENGTH, Aircraft.Fuselage.MAX_WIDTH],
+            rows=rows,
+            cols=cols,
         )
 
     def compute(self, inputs, outputs):
@@ -43,7 +61,7 @@ class FuselagePrelim(om.ExplicitComponent):
         max_height = inputs[Aircraft.Fuselage.MAX_HEIGHT]
         max_width = inputs[Aircraft.Fuselage.MAX_WIDTH]
         length = inputs[Aircraft.Fuselage.LENGTH]
-        if length <= 0.0:
+        if np.any(length.real <= 0.0):
             if verbosity > Verbosity.BRIEF:
                 print('Aircraft.Fuselage.LENGTH must be positive.')
 
@@ -143,18 +161,27 @@ class SimpleCabinLayout(om.ExplicitComponent):
 
     def initialize(self):
         add_aviary_option(self, Settings.VERBOSITY)
+        declare_num_designs(self)
 
     def setup(self):
-        add_aviary_input(self, Aircraft.Fuselage.LENGTH, units='ft')
-        add_aviary_input(self, Aircraft.Fuselage.MAX_HEIGHT, units='ft')
-        add_aviary_input(self, Aircraft.Fuselage.MAX_WIDTH, units='ft')
+        shape = design_shape(self.options['num_designs'])
 
-        add_aviary_output(self, Aircraft.Fuselage.PASSENGER_COMPARTMENT_LENGTH, units='ft')
+        add_design_input(self, Aircraft.Fuselage.LENGTH, shape=shape, units='ft')
+        add_design_input(self, Aircraft.Fuselage.MAX_HEIGHT, shape=shape, units='ft')
+        add_design_input(self, Aircraft.Fuselage.MAX_WIDTH, shape=shape, units='ft')
+
+        add_design_output(
+            self, Aircraft.Fuselage.PASSENGER_COMPARTMENT_LENGTH, shape=shape, units='ft'
+        )
 
     def setup_partials(self):
+        rows, cols = design_partials(self.options['num_designs'])
+
         self.declare_partials(
             of=[Aircraft.Fuselage.PASSENGER_COMPARTMENT_LENGTH],
             wrt=[Aircraft.Fuselage.LENGTH],
+            rows=rows,
+            cols=cols,
         )
 
     def compute(self, inputs, outputs):
@@ -163,17 +190,17 @@ class SimpleCabinLayout(om.ExplicitComponent):
         length = inputs[Aircraft.Fuselage.LENGTH]
         max_height = inputs[Aircraft.Fuselage.MAX_HEIGHT]
         max_width = inputs[Aircraft.Fuselage.MAX_WIDTH]
-        if length <= 0.0:
+        if np.any(length.real <= 0.0):
             if verbosity > Verbosity.BRIEF:
                 print('Aircraft.Fuselage.LENGTH must be positive to use simple cabin layout.')
-        if max_height <= 0.0 or max_width <= 0.0:
+        if np.any(max_height.real <= 0.0) or np.any(max_width.real <= 0.0):
             if verbosity > Verbosity.BRIEF:
                 print(
                     'Aircraft.Fuselage.MAX_HEIGHT & Aircraft.Fuselage.MAX_WIDTH must be positive.'
                 )
 
         pax_compart_length = 0.6085 * length * (np.arctan(length / 59.0)) ** 1.1
-        if pax_compart_length > 190.0:
+        if np.any(pax_compart_length.real > 190.0):
             if verbosity > Verbosity.BRIEF:
                 print(
                     'Passenger compartiment lenght is longer than recommended maximum length. '
@@ -216,193 +243,228 @@ class DetailedCabinLayout(om.ExplicitComponent):
 
     def compute(self, inputs, outputs):
         verbosity = self.options[Settings.VERBOSITY]
-        num_first_class_pax = self.options[Aircraft.CrewPayload.Design.NUM_FIRST_CLASS]
-        num_tourist_class_pax = self.options[Aircraft.CrewPayload.Design.NUM_TOURIST_CLASS]
-        fuselage_multiplier = 1.0
         num_fuselage = self.options[Aircraft.Fuselage.NUM_FUSELAGES]
         if num_fuselage > 1:
             if verbosity > Verbosity.BRIEF:
                 print('Multiple fuselage configuration is not implemented yet.')
 
-        num_seat_abreast_first = self.options[Aircraft.CrewPayload.Design.NUM_SEATS_ABREAST_FIRST]
-        num_seat_abreast_tourist = self.options[
-            Aircraft.CrewPayload.Design.NUM_SEATS_ABREAST_TOURIST
-        ]
-        # The 200 was derived from B757 - the largest single aisle western desig.
-        if num_tourist_class_pax > 200:
-            if num_seat_abreast_tourist <= 0:
-                num_seat_abreast_tourist = 8
-            if num_seat_abreast_first > 0 and num_seat_abreast_first <= 0:
-                num_seat_abreast_first = num_seat_abreast_tourist - 2
-
-        if num_seat_abreast_first <= 0 and num_first_class_pax > 0:
-            num_seat_abreast_first = 4
-        if num_seat_abreast_tourist <= 0 and num_tourist_class_pax > 0:
-            num_seat_abreast_tourist = 6
-
-        # Though these are not user definable, the values here are typical for most transport
-        aisle_width_first_class = 20.0  # inch
-        aisle_width_tourist_class = 18.0  # inch
-
-        # If there are less than 60 passengers on board, then the aisle should be slightly narrow.
-        # Also, if the number of passengers abreast was not specified, then set it to 5 as 6 is too much
-        # for a typical short range transport.
-        if num_tourist_class_pax < 60:
-            if num_seat_abreast_tourist <= 0:
-                num_seat_abreast_tourist = 5
-            aisle_width_tourist_class = 15.0
-
-        if num_seat_abreast_tourist > 6:
-            num_aisles = 2
-        else:
-            num_aisles = 1
-
-        # Even though the widebody gives you more room, the aisles in it are a little narrower.
-        # That is what is set here. It is assumed that if the number of abreast is greater than
-        # 4 or 6 as shown below that we are working with a widebody aircraft.
-        if num_seat_abreast_first > 4:
-            aisle_width_first_class = 18.0
-        if num_seat_abreast_tourist > 6:
-            aisle_width_tourist_class = 15.0
-
-        seat_pitch_first = self.options[Aircraft.CrewPayload.Design.SEAT_PITCH_FIRST][0]
-        if seat_pitch_first <= 0 and num_first_class_pax > 0:
-            seat_pitch_first = 38.0  # inch
-        seat_pitch_tourist = self.options[Aircraft.CrewPayload.Design.SEAT_PITCH_TOURIST][0]
-        if seat_pitch_tourist <= 0 and num_tourist_class_pax > 0:
-            seat_pitch_tourist = 34.0  # inch
-
-        # set maximum number of galleys based on statistics (this block is not from FLOPS)
-        num_pax = num_first_class_pax + num_tourist_class_pax
-        if num_pax < 80:
-            max_galleys = 1
-            max_lav = 1
-            max_closets = 1
-        elif num_pax < 150:
-            max_galleys = 2
-            max_lav = 2
-            max_closets = 2
-        elif num_pax < 250:
-            max_galleys = 3
-            max_lav = 4
-            max_closets = 3
-        elif num_pax < 320:
-            max_galleys = 4
-            max_lav = 6
-            max_closets = 4
-        elif num_pax < 350:
-            max_galleys = 5
-            max_lav = 8
-            max_closets = 5
-        elif num_pax < 410:
-            max_galleys = 6
-            max_lav = 12
-            max_closets = 6
-        elif num_pax < 450:
-            max_galleys = 7
-            max_lav = 13
-            max_closets = 7
-        elif num_pax < 500:
-            max_galleys = 8
-            max_lav = 14
-            max_closets = 8
-        elif num_pax < 550:
-            max_galleys = 9
-            max_lav = 15
-            max_closets = 9
-        elif num_pax < 600:
-            max_galleys = 10
-            max_lav = 16
-            max_closets = 10
-        else:
-            max_galleys = 10
-            max_lav = 16
-            max_closets = 10
-        # The above settings are necessary because FLOPS didn't cover all the scenarios.
-        # They will be over written if FLOPS covered a particular scenario as we see below.
-
-        # Set constraints on the maximum number of galleys and other items so that we don't have
-        # a flying kitchen or closet or whatever.
-        # Note: Some of these may need relaxing for larger aircraft.
-        if num_first_class_pax == 0:
-            design_range = inputs[Mission.Design.RANGE]
-            if design_range < 1250.0:
-                max_lav = 2
-            else:
-                max_lav = 3
-            if num_tourist_class_pax < 180:
-                fuselage_multiplier = 0.91
-            max_galleys = 2
-            max_closets = 2
-
-        if num_first_class_pax == 0 and num_tourist_class_pax < 110:
-            max_lav = 1
-            max_galleys = 1
-            max_closets = 1
-
-        if num_tourist_class_pax > 320:
-            max_lav = 4
-            max_galleys = 4
-            max_closets = 4
-        elif num_tourist_class_pax > 600:
-            max_lav = 8
-            max_galleys = 8
-            max_closets = 8
-
-        if num_first_class_pax > 0 and num_seat_abreast_tourist < 8:
-            fuselage_multiplier = 0.95
-
-        # Calculate the number of galleys, lavatories and closets
-        num_galleys = int(1 + ((num_first_class_pax + num_tourist_class_pax) / 100))
-        if num_galleys > max_galleys:
-            num_galleys = max_galleys
-        num_lavas = int(1 + (num_tourist_class_pax / 60)) + int(1 + (num_first_class_pax / 100))
-        if num_lavas > max_lav:
-            num_lavas = max_lav
-        num_closets = int(1 + (num_first_class_pax / 30)) + int(1 + (num_tourist_class_pax / 60))
-        if num_closets > max_closets:
-            num_closets = max_closets
-
-        # Calculate the passenger compartment length
-
-        num_engines = self.options[Aircraft.Engine.NUM_ENGINES][0]
-        eng_flag = num_engines - 2 * int(num_engines / 2)  # a center mounted engine if 1.
-        first_class_len = num_first_class_pax * seat_pitch_first / num_seat_abreast_first
-        tourist_class_len = num_tourist_class_pax * seat_pitch_tourist / num_seat_abreast_tourist
-        pax_compart_length = (
-            first_class_len
-            + (num_galleys + num_lavas) * 36.0
-            + tourist_class_len
-            + num_closets * 12.0
-        ) / 12.0
-
-        # Correct for doors that may be in the way
-        num_doors = 1 + int((pax_compart_length / 50.0) * num_seat_abreast_tourist / 6.0)
-
-        # Final passenger compartment length
-        pax_compart_length = (pax_compart_length + num_doors * 2.96) * fuselage_multiplier
-        fuselage_length = pax_compart_length + 25.0 * eng_flag + 40.0
+        # the layout only depends on the discrete cabin configuration
+        cabin_config = _detailed_cabin_config(self.options, inputs[Mission.Design.RANGE][0])
+        pax_compart_length, fuselage_length, width_fuselage = _detailed_cabin_layout(cabin_config)
+
         outputs[Aircraft.Fuselage.PASSENGER_COMPARTMENT_LENGTH] = pax_compart_length
         outputs[Aircraft.Fuselage.LENGTH] = fuselage_length
-
-        # Calculate the number of rows of each class of passenger (not needed)
-        if num_first_class_pax > 0:
-            num_rows_first = int(np.ceil(num_first_class_pax / num_seat_abreast_first))
-        if num_tourist_class_pax > 0:
-            num_rows_tourist = int(np.ceil(num_tourist_class_pax / num_seat_abreast_tourist))
-
-        # Calculate the fuselage width of the passenger seats
-        width_first_class = (
-            num_aisles * aisle_width_first_class + num_seat_abreast_first * 20.0
-        ) / 12.0
-        width_tourist_class = (
-            num_aisles * aisle_width_tourist_class + num_seat_abreast_tourist * 25.0
-        ) / 12.0
-        width_fuselage = np.maximum(width_first_class, width_tourist_class) * 1.06
         outputs[Aircraft.Fuselage.MAX_WIDTH] = width_fuselage
         outputs[Aircraft.Fuselage.MAX_HEIGHT] = width_fuselage + 0.9
 
 
+def _detailed_cabin_config(options, design_range):
+    """
+    Return the discrete cabin configuration of DetailedCabinLayout, the key of its layout
+    table.
+    """
+    num_first_class_pax = int(options[Aircraft.CrewPayload.Design.NUM_FIRST_CLASS])
+
+    return (
+        num_first_class_pax,
+        int(options[Aircraft.CrewPayload.Design.NUM_TOURIST_CLASS]),
+        int(options[Aircraft.CrewPayload.Design.NUM_SEATS_ABREAST_FIRST]),
+        int(options[Aircraft.CrewPayload.Design.NUM_SEATS_ABREAST_TOURIST]),
+        float(options[Aircraft.CrewPayload.Design.SEAT_PITCH_FIRST][0]),
+        float(options[Aircraft.CrewPayload.Design.SEAT_PITCH_TOURIST][0]),
+        int(options[Aircraft.Engine.NUM_ENGINES][0]),
+        # the design range only sets the number of lavatories without a first class
+        bool(num_first_class_pax == 0 and design_range.real < 1250.0),
+    )
+
+
+@functools.lru_cache(maxsize=256)
+def _detailed_cabin_layout(cabin_config):
+    """
+    Return the passenger compartment length, fuselage length and maximum width in ft of a
+    cabin configuration from _detailed_cabin_config.
+
+    The results are cached, so that a fixed or swept set of cabin configurations is only
+    laid out once.
+    """
+    (
+        num_first_class_pax,
+        num_tourist_class_pax,
+        num_seat_abreast_first,
+        num_seat_abreast_tourist,
+        seat_pitch_first,
+        seat_pitch_tourist,
+        num_engines,
+        short_range,
+    ) = cabin_config
+    fuselage_multiplier = 1.0
+
+    # The 200 was derived from B757 - the largest single aisle western desig.
+    if num_tourist_class_pax > 200:
+        if num_seat_abreast_tourist <= 0:
+            num_seat_abreast_tourist = 8
+        if num_seat_abreast_first > 0 and num_seat_abreast_first <= 0:
+            num_seat_abreast_first = num_seat_abreast_tourist - 2
+
+    if num_seat_abreast_first <= 0 and num_first_class_pax > 0:
+        num_seat_abreast_first = 4
+    if num_seat_abreast_tourist <= 0 and num_tourist_class_pax > 0:
+        num_seat_abreast_tourist = 6
+
+    # Though these are not user definable, the values here are typical for most transport
+    aisle_width_first_class = 20.0  # inch
+    aisle_width_tourist_class = 18.0  # inch
+
+    # If there are less than 60 passengers on board, then the aisle should be slightly narrow.
+    # Also, if the number of passengers abreast was not specified, then set it to 5 as 6 is too much
+    # for a typical short range transport.
+    if num_tourist_class_pax < 60:
+        if num_seat_abreast_tourist <= 0:
+            num_seat_abreast_tourist = 5
+        aisle_width_tourist_class = 15.0
+
+    if num_seat_abreast_tourist > 6:
+        num_aisles = 2
+    else:
+        num_aisles = 1
+
+    # Even though the widebody gives you more room, the aisles in it are a little narrower.
+    # That is what is set here. It is assumed that if the number of abreast is greater than
+    # 4 or 6 as shown below that we are working with a widebody aircraft.
+    if num_seat_abreast_first > 4:
+        aisle_width_first_class = 18.0
+    if num_seat_abreast_tourist > 6:
+        aisle_width_tourist_class = 15.0
+
+    if seat_pitch_first <= 0 and num_first_class_pax > 0:
+        seat_pitch_first = 38.0  # inch
+    if seat_pitch_tourist <= 0 and num_tourist_class_pax > 0:
+        seat_pitch_tourist = 34.0  # inch
+
+    # set maximum number of galleys based on statistics (this block is not from FLOPS)
+    num_pax = num_first_class_pax + num_tourist_class_pax
+    if num_pax < 80:
+        max_galleys = 1
+        max_lav = 1
+        max_closets = 1
+    elif num_pax < 150:
+        max_galleys = 2
+        max_lav = 2
+        max_closets = 2
+    elif num_pax < 250:
+        max_galleys = 3
+        max_lav = 4
+        max_closets = 3
+    elif num_pax < 320:
+        max_galleys = 4
+        max_lav = 6
+        max_closets = 4
+    elif num_pax < 350:
+        max_galleys = 5
+        max_lav = 8
+        max_closets = 5
+    elif num_pax < 410:
+        max_galleys = 6
+        max_lav = 12
+        max_closets = 6
+    elif num_pax < 450:
+        max_galleys = 7
+        max_lav = 13
+        max_closets = 7
+    elif num_pax < 500:
+        max_galleys = 8
+        max_lav = 14
+        max_closets = 8
+    elif num_pax < 550:
+        max_galleys = 9
+        max_lav = 15
+        max_closets = 9
+    elif num_pax < 600:
+        max_galleys = 10
+        max_lav = 16
+        max_closets = 10
+    else:
+        max_galleys = 10
+        max_lav = 16
+        max_closets = 10
+    # The above settings are necessary because FLOPS didn't cover all the scenarios.
+    # They will be over written if FLOPS covered a particular scenario as we see below.
+
+    # Set constraints on the maximum number of galleys and other items so that we don't have
+    # a flying kitchen or closet or whatever.
+    # Note: Some of these may need relaxing for larger aircraft.
+    if num_first_class_pax == 0:
+        if short_range:
+            max_lav = 2
+        else:
+            max_lav = 3
+        if num_tourist_class_pax < 180:
+            fuselage_multiplier = 0.91
+        max_galleys = 2
+        max_closets = 2
+
+    if num_first_class_pax == 0 and num_tourist_class_pax < 110:
+        max_lav = 1
+        max_galleys = 1
+        max_closets = 1
+
+    if num_tourist_class_pax > 320:
+        max_lav = 4
+        max_galleys = 4
+        max_closets = 4
+    elif num_tourist_class_pax > 600:
+        max_lav = 8
+        max_galleys = 8
+        max_closets = 8
+
+    if num_first_class_pax > 0 and num_seat_abreast_tourist < 8:
+        fuselage_multiplier = 0.95
+
+    # Calculate the number of galleys, lavatories and closets
+    num_galleys = int(1 + ((num_first_class_pax + num_tourist_class_pax) / 100))
+    if num_galleys > max_galleys:
+        num_galleys = max_galleys
+    num_lavas = int(1 + (num_tourist_class_pax / 60)) + int(1 + (num_first_class_pax / 100))
+    if num_lavas > max_lav:
+        num_lavas = max_lav
+    num_closets = int(1 + (num_first_class_pax / 30)) + int(1 + (num_tourist_class_pax / 60))
+    if num_closets > max_closets:
+        num_closets = max_closets
+
+    # Calculate the passenger compartment length
+
+    eng_flag = num_engines - 2 * int(num_engines / 2)  # a center mounted engine if 1.
+    first_class_len = num_first_class_pax * seat_pitch_first / num_seat_abreast_first
+    tourist_class_len = num_tourist_class_pax * seat_pitch_tourist / num_seat_abreast_tourist
+    pax_compart_length = (
+        first_class_len + (num_galleys + num_lavas) * 36.0 + tourist_class_len + num_closets * 12.0
+    ) / 12.0
+
+    # Correct for doors that may be in the way
+    num_doors = 1 + int((pax_compart_length / 50.0) * num_seat_abreast_tourist / 6.0)
+
+    # Final passenger compartment length
+    pax_compart_length = (pax_compart_length + num_doors * 2.96) * fuselage_multiplier
+    fuselage_length = pax_compart_length + 25.0 * eng_flag + 40.0
+
+    # Calculate the number of rows of each class of passenger (not needed)
+    if num_first_class_pax > 0:
+        num_rows_first = int(np.ceil(num_first_class_pax / num_seat_abreast_first))
+    if num_tourist_class_pax > 0:
+        num_rows_tourist = int(np.ceil(num_tourist_class_pax / num_seat_abreast_tourist))
+
+    # Calculate the fuselage width of the passenger seats
+    width_first_class = (
+        num_aisles * aisle_width_first_class + num_seat_abreast_first * 20.0
+    ) / 12.0
+    width_tourist_class = (
+        num_aisles * aisle_width_tourist_class + num_seat_abreast_tourist * 25.0
+    ) / 12.0
+    width_fuselage = np.maximum(width_first_class, width_tourist_class) * 1.06
+
+    return pax_compart_length, fuselage_length, width_fuselage
+
+
 class BWBSimpleCabinLayout(om.ExplicitComponent):
     """Given fuselage length, compute passenger compartment length for BWB."""
 
@@ -536,6 +598,101 @@ class BWBSimpleCabinLayout(om.ExplicitComponent):
         J[Aircraft.Fuselage.MAX_HEIGHT, Aircraft.Fuselage.HEIGHT_TO_WIDTH_RATIO] = length
 
 
+# maximum width of a BWB cabin bay and minimum cabin root chord
+_BWB_BAY_WIDTH_MAX = 12.0  # ft
+_BWB_ROOT_CHORD_MIN = 38.5  # ft
+
+
+def _bwb_cabin_config(options):
+    """
+    Return the discrete cabin configuration of the BWB detailed cabin layouts, the key of
+    their cabin area table.
+    """
+    return (
+        int(options[Aircraft.CrewPayload.Design.NUM_BUSINESS_CLASS]),
+        int(options[Aircraft.CrewPayload.Design.NUM_FIRST_CLASS]),
+        int(options[Aircraft.CrewPayload.Design.NUM_TOURIST_CLASS]),
+        int(options[Aircraft.CrewPayload.Design.NUM_SEATS_ABREAST_BUSINESS]),
+        int(options[Aircraft.CrewPayload.Design.NUM_SEATS_ABREAST_FIRST]),
+        int(options[Aircraft.CrewPayload.Design.NUM_SEATS_ABREAST_TOURIST]),
+        float(options[Aircraft.CrewPayload.Design.SEAT_PITCH_BUSINESS][0]),
+        float(options[Aircraft.CrewPayload.Design.SEAT_PITCH_FIRST][0]),
+        float(options[Aircraft.CrewPayload.Design.SEAT_PITCH_TOURIST][0]),
+    )
+
+
+@functools.lru_cache(maxsize=256)
+def _bwb_cabin_areas(cabin_config):
+    """
+    Return the seat and service (lavatory, galley and closet) areas in ft**2 of a BWB cabin
+    configuration from _bwb_cabin_config.
+
+    Both depend only on the passenger and seating options, so they are cached; the aisle
+    and slanted side wall areas depend on the number of bays and are computed per call.
+    """
+    (
+        num_business_class_pax,
+        num_first_class_pax,
+        num_tourist_class_pax,
+        num_seat_abreast_business,
+        num_seat_abreast_first,
+        num_seat_abreast_tourist,
+        seat_pitch_business,
+        seat_pitch_first,
+        seat_pitch_tourist,
+    ) = cabin_config
+    bay_width_max = _BWB_BAY_WIDTH_MAX
+    width_lava = 36.0  # inch
+    width_galley = 36.0  # inch
+    width_closet = 12.0  # inch
+
+    # Establish defaults for Number of Passengers Abreast
+    # and Seat Pitch for First, Business and Tourist classes
+
+    if num_seat_abreast_business <= 0:
+        num_seat_abreast_business = 5
+    if num_seat_abreast_first <= 0:
+        num_seat_abreast_first = 4
+    if num_seat_abreast_tourist <= 0:
+        num_seat_abreast_tourist = 6
+
+    if seat_pitch_business <= 0:
+        seat_pitch_business = 39.0  # inch
+    if seat_pitch_first <= 0:
+        seat_pitch_first = 61.0  # inch
+    if seat_pitch_tourist <= 0:
+        seat_pitch_tourist = 32.0  # inch
+
+    # Determine unit seat areas for each type of passenger
+    area_seat_business = bay_width_max * seat_pitch_business / 12.0 / num_seat_abreast_business
+    area_seat_first = bay_width_max * seat_pitch_first / 12.0 / num_seat_abreast_first
+    area_seat_tourist = bay_width_max * seat_pitch_tourist / 12.0 / num_seat_abreast_tourist
+
+    # Find the number of lavatories, galleys and closets based on the
+    # number of passengers for each class and the area for each
+    num_lavas = (
+        int(0.99 + num_first_class_pax / 16.0)
+        + int(0.99 + num_business_class_pax / 24.0)
+        + int(0.99 + num_tourist_class_pax / 40.0)
+    )
+    num_galleys = int(0.99 + 0.6 * num_lavas)
+    num_closets = int(0.99 + 0.4 * num_lavas)
+
+    area_lava = (bay_width_max / 2.0) * (width_lava / 12.0)
+    area_galley = (bay_width_max / 2.0) * (width_galley / 12.0)
+    area_closet = (bay_width_max / 2.0) * (width_closet / 12.0)
+
+    # Calculate area required for passengers and services
+    area_seats = (
+        num_tourist_class_pax * area_seat_tourist
+        + num_business_class_pax * area_seat_business
+        + num_first_class_pax * area_seat_first
+    )
+    area_service = num_lavas * area_lava + num_galleys * area_galley + num_closets * area_closet
+
+    return area_seats, area_service
+
+
 class BWBDetailedCabinLayout(om.ExplicitComponent):
     """Compute BWB fuselage dimensions using cabin seat information."""
 
@@ -576,71 +733,13 @@ class BWBDetailedCabinLayout(om.ExplicitComponent):
         height_to_width = inputs[Aircraft.Fuselage.HEIGHT_TO_WIDTH_RATIO]
         tan_sweep = np.tan(sweep / 57.296)
 
-        bay_width_max = 12.0  # ft
+        bay_width_max = _BWB_BAY_WIDTH_MAX
         num_bays = 0
         num_bays_loc = num_bays
         num_bays_max = self.options[Aircraft.BWB.MAX_NUM_BAYS]
-        root_chord_min = 38.5  # ft
-        width_lava = 36.0  # inch
-        width_galley = 36.0  # inch
-        width_closet = 12.0  # inch
+        root_chord_min = _BWB_ROOT_CHORD_MIN
 
-        # Establish defaults for Number of Passengers Abreast
-        # and Seat Pitch for First, Business and Tourist classes
-
-        num_seat_abreast_business = self.options[
-            Aircraft.CrewPayload.Design.NUM_SEATS_ABREAST_BUSINESS
-        ]
-        if num_seat_abreast_business <= 0:
-            num_seat_abreast_business = 5
-        num_seat_abreast_first = self.options[Aircraft.CrewPayload.Design.NUM_SEATS_ABREAST_FIRST]
-        if num_seat_abreast_first <= 0:
-            num_seat_abreast_first = 4
-        num_seat_abreast_tourist = self.options[
-            Aircraft.CrewPayload.Design.NUM_SEATS_ABREAST_TOURIST
-        ]
-        if num_seat_abreast_tourist <= 0:
-            num_seat_abreast_tourist = 6
-
-        seat_pitch_business = self.options[Aircraft.CrewPayload.Design.SEAT_PITCH_BUSINESS][0]
-        if seat_pitch_business <= 0:
-            seat_pitch_business = 39.0  # inch
-        seat_pitch_first = self.options[Aircraft.CrewPayload.Design.SEAT_PITCH_FIRST][0]
-        if seat_pitch_first <= 0:
-            seat_pitch_first = 61.0  # inch
-        seat_pitch_tourist = self.options[Aircraft.CrewPayload.Design.SEAT_PITCH_TOURIST][0]
-        if seat_pitch_tourist <= 0:
-            seat_pitch_tourist = 32.0  # inch
-
-        # Determine unit seat areas for each type of passenger
-        area_seat_business = bay_width_max * seat_pitch_business / 12.0 / num_seat_abreast_business
-        area_seat_first = bay_width_max * seat_pitch_first / 12.0 / num_seat_abreast_first
-        area_seat_tourist = bay_width_max * seat_pitch_tourist / 12.0 / num_seat_abreast_tourist
-
-        # Find the number of lavatories, galleys and closets based on the
-        # number of passengers for each class and the area for each
-        num_business_class_pax = self.options[Aircraft.CrewPayload.Design.NUM_BUSINESS_CLASS]
-        num_first_class_pax = self.options[Aircraft.CrewPayload.Design.NUM_FIRST_CLASS]
-        num_tourist_class_pax = self.options[Aircraft.CrewPayload.Design.NUM_TOURIST_CLASS]
-        num_lavas = (
-            int(0.99 + num_first_class_pax / 16.0)
-            + int(0.99 + num_business_class_pax / 24.0)
-            + int(0.99 + num_tourist_class_pax / 40.0)
-        )
-        num_galleys = int(0.99 + 0.6 * num_lavas)
-        num_closets = int(0.99 + 0.4 * num_lavas)
-
-        area_lava = (bay_width_max / 2.0) * (width_lava / 12.0)
-        area_galley = (bay_width_max / 2.0) * (width_galley / 12.0)
-        area_closet = (bay_width_max / 2.0) * (width_closet / 12.0)
-
-        # Calculate area required for passengers and services
-        area_seats = (
-            num_tourist_class_pax * area_seat_tourist
-            + num_business_class_pax * area_seat_business
-            + num_first_class_pax * area_seat_first
-        )
-        area_service = num_lavas * area_lava + num_galleys * area_galley + num_closets * area_closet
+        area_seats, area_service = _bwb_cabin_areas(_bwb_cabin_config(self.options))
 
         # Estimate number of bays based on these areas
         num_bays = int(0.5 + (area_seats + area_service) / 550.0)
@@ -702,3 +801,272 @@ class BWBDetailedCabinLayout(om.ExplicitComponent):
         # a real-valued num_bays, then use a smoothed int afterwards. LOPS did something similar
         # with the skin friction calculation, except there were no ints. I rewrote the equations
         # in residual form and used a Newton solver on them. (Ken)
+        # BWBDetailedCabinLayoutImplicit is that formulation.
+
+
+class BWBDetailedCabinLayoutImplicit(om.ImplicitComponent):
+    """
+    Compute BWB fuselage dimensions using cabin seat information, with a real-valued number
+    of bays.
+
+    BWBDetailedCabinLayout iterates on the integer number of bays until it stops changing.
+    Here the number of bays is a real-valued state that fills the cabin width with bays of
+    the maximum bay width. It is converged with Newton's method together with the cabin
+    dimensions in residual form, so that the outputs have analytic partials.
+    Aircraft.BWB.NUM_BAYS is the smoothed integer of the real number of bays, rounded up so
+    that no bay is wider than the maximum bay width.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+
+        self.nonlinear_solver = om.NewtonSolver(solve_subsystems=False, atol=1e-12, rtol=1e-12)
+        self.linear_solver = om.DirectSolver()
+        self.nonlinear_solver.options['iprint'] = -1
+        self.linear_solver.options['iprint'] = -1
+
+    def initialize(self):
+        add_aviary_option(self, Settings.VERBOSITY)
+        add_aviary_option(self, Aircraft.Fuselage.NUM_FUSELAGES)
+        add_aviary_option(self, Aircraft.CrewPayload.Design.NUM_BUSINESS_CLASS)
+        add_aviary_option(self, Aircraft.CrewPayload.Design.NUM_FIRST_CLASS)
+        add_aviary_option(self, Aircraft.CrewPayload.Design.NUM_TOURIST_CLASS)
+        add_aviary_option(self, Aircraft.CrewPayload.Design.NUM_SEATS_ABREAST_BUSINESS)
+        add_aviary_option(self, Aircraft.CrewPayload.Design.NUM_SEATS_ABREAST_FIRST)
+        add_aviary_option(self, Aircraft.CrewPayload.Design.NUM_SEATS_ABREAST_TOURIST)
+        add_aviary_option(self, Aircraft.CrewPayload.Design.SEAT_PITCH_BUSINESS)
+        add_aviary_option(self, Aircraft.CrewPayload.Design.SEAT_PITCH_FIRST)
+        add_aviary_option(self, Aircraft.CrewPayload.Design.SEAT_PITCH_TOURIST)
+        add_aviary_option(self, Aircraft.BWB.MAX_NUM_BAYS)
+
+    def setup(self):
+        add_aviary_input(self, Aircraft.BWB.PASSENGER_LEADING_EDGE_SWEEP, units='deg')
+        add_aviary_input(self, Aircraft.Fuselage.HEIGHT_TO_WIDTH_RATIO, units='unitless')
+        self.add_input(
+            'Rear_spar_percent_chord', 0.7, units='unitless', desc='RSPCHD at fuselage centerline'
+        )
+
+        self.add_output(
+            'BWB_REAL_NUM_BAYS',
+            0.0,
+            units='unitless',
+            desc='real-valued number of cabin bays of the maximum bay width',
+        )
+        add_aviary_output(self, Aircraft.Fuselage.LENGTH, units='ft')
+        add_aviary_output(self, Aircraft.Fuselage.PASSENGER_COMPARTMENT_LENGTH, units='ft')
+        add_aviary_output(self, Aircraft.Fuselage.CABIN_AREA, units='ft**2')
+        add_aviary_output(self, Aircraft.Fuselage.MAX_WIDTH, units='ft')
+        add_aviary_output(self, Aircraft.Fuselage.MAX_HEIGHT, units='ft')
+        add_aviary_output(self, Aircraft.Wing.ROOT_CHORD, units='ft')
+        add_aviary_output(self, Aircraft.BWB.NUM_BAYS, units='unitless')
+
+        area_seats, area_service = _bwb_cabin_areas(_bwb_cabin_config(self.options))
+        self._area_seats_service = area_seats + area_service
+
+    def setup_partials(self):
+        cabin_outputs = [
+            Aircraft.Fuselage.PASSENGER_COMPARTMENT_LENGTH,
+            Aircraft.Fuselage.CABIN_AREA,
+            Aircraft.Fuselage.MAX_WIDTH,
+            Aircraft.Wing.ROOT_CHORD,
+        ]
+        self.declare_partials(
+            cabin_outputs + [Aircraft.Fuselage.LENGTH, Aircraft.Fuselage.MAX_HEIGHT],
+            ['BWB_REAL_NUM_BAYS', Aircraft.BWB.PASSENGER_LEADING_EDGE_SWEEP],
+        )
+        for name in cabin_outputs + [
+            Aircraft.Fuselage.LENGTH,
+            Aircraft.Fuselage.MAX_HEIGHT,
+            Aircraft.BWB.NUM_BAYS,
+        ]:
+            self.declare_partials(name, name, val=1.0)
+
+        self.declare_partials(
+            'BWB_REAL_NUM_BAYS',
+            ['BWB_REAL_NUM_BAYS', Aircraft.BWB.PASSENGER_LEADING_EDGE_SWEEP],
+        )
+        self.declare_partials(
+            [Aircraft.Fuselage.LENGTH, Aircraft.Fuselage.MAX_HEIGHT], 'Rear_spar_percent_chord'
+        )
+        self.declare_partials(Aircraft.Fuselage.MAX_HEIGHT, Aircraft.Fuselage.HEIGHT_TO_WIDTH_RATIO)
+        self.declare_partials(Aircraft.BWB.NUM_BAYS, 'BWB_REAL_NUM_BAYS')
+
+    def _cabin(self, tan_sweep, num_bays):
+        """
+        Return the number of bays that fills the cabin, the cabin dimensions, and their
+        partial derivatives with respect to num_bays and tan_sweep.
+        """
+        bay_width_max = _BWB_BAY_WIDTH_MAX
+        root_chord = _BWB_ROOT_CHORD_MIN
+        num_bays_max = self.options[Aircraft.BWB.MAX_NUM_BAYS]
+
+        # Cabin area wasted due to slanted side wall, and aisle area for horseshoe (5'),
+        # cross (2') and rear (3') aisles up to the center of the outboard bays
+        area_cabin = (
+            self._area_seats_service
+            + num_bays * tan_sweep * (bay_width_max / 2.0) ** 2
+            + 10.0 * (num_bays - 1) * bay_width_max
+        )
+        darea_dbays = tan_sweep * (bay_width_max / 2.0) ** 2 + 10.0 * bay_width_max
+        darea_dtan = num_bays * (bay_width_max / 2.0) ** 2
+
+        # Calculate cabin dimensions
+        root = np.sqrt(root_chord**2 + tan_sweep * area_cabin)
+        max_width = 2.0 * (-root_chord + root) / tan_sweep
+        dwidth_dbays = darea_dbays / root
+        dwidth_dtan = (area_cabin + tan_sweep * darea_dtan) / (root * tan_sweep) - (
+            max_width / tan_sweep
+        )
+
+        if num_bays_max > 0 and max_width.real[0] > num_bays_max * bay_width_max:
+            # Enforce maximum number of bays, the root chord grows instead
+            target = np.full_like(num_bays, num_bays_max)
+            dtarget_dbays = dtarget_dtan = np.zeros_like(num_bays)
+
+            max_width = bay_width_max * num_bays
+            dwidth_dbays = np.full_like(num_bays, bay_width_max)
+            dwidth_dtan = np.zeros_like(num_bays)
+
+            pax_compart_length = area_cabin / max_width + tan_sweep * max_width / 4.0
+            dlength_dbays = (
+                darea_dbays / max_width
+                - area_cabin * bay_width_max / max_width**2
+                + tan_sweep * bay_width_max / 4.0
+            )
+            dlength_dtan = darea_dtan / max_width + max_width / 4.0
+
+            root_chord = pax_compart_length - tan_sweep * max_width / 2.0
+            dchord_dbays = dlength_dbays - tan_sweep * bay_width_max / 2.0
+            dchord_dtan = dlength_dtan - max_width / 2.0
+        else:
+            target = max_width / bay_width_max
+            dtarget_dbays = dwidth_dbays / bay_width_max
+            dtarget_dtan = dwidth_dtan / bay_width_max
+
+            pax_compart_length = root_chord + tan_sweep * max_width / 2.0
+            dlength_dbays = tan_sweep * dwidth_dbays / 2.0
+            dlength_dtan = (max_width + tan_sweep * dwidth_dtan) / 2.0
+
+            root_chord = np.full_like(num_bays, root_chord)
+            dchord_dbays = dchord_dtan = np.zeros_like(num_bays)
+
+        values = {
+            'BWB_REAL_NUM_BAYS': target,
+            Aircraft.Fuselage.PASSENGER_COMPARTMENT_LENGTH: pax_compart_length,
+            Aircraft.Fuselage.CABIN_AREA: area_cabin,
+            Aircraft.Fuselage.MAX_WIDTH: max_width,
+            Aircraft.Wing.ROOT_CHORD: root_chord,
+        }
+        d_num_bays = {
+            'BWB_REAL_NUM_BAYS': dtarget_dbays,
+            Aircraft.Fuselage.PASSENGER_COMPARTMENT_LENGTH: dlength_dbays,
+            Aircraft.Fuselage.CABIN_AREA: darea_dbays,
+            Aircraft.Fuselage.MAX_WIDTH: dwidth_dbays,
+            Aircraft.Wing.ROOT_CHORD: dchord_dbays,
+        }
+        d_tan_sweep = {
+            'BWB_REAL_NUM_BAYS': dtarget_dtan,
+            Aircraft.Fuselage.PASSENGER_COMPARTMENT_LENGTH: dlength_dtan,
+            Aircraft.Fuselage.CABIN_AREA: darea_dtan,
+            Aircraft.Fuselage.MAX_WIDTH: dwidth_dtan,
+            Aircraft.Wing.ROOT_CHORD: dchord_dtan,
+        }
+
+        return values, d_num_bays, d_tan_sweep
+
+    def _rounded_num_bays(self, num_bays):
+        """
+        Return the value whose rounding is the integer number of bays.
+
+        The number of bays is rounded up, int(0.999 + x) == round(x + 0.499), except within
+        half a bay of the maximum number of bays, where rounding gives the maximum as well
+        and the real number of bays is exactly the maximum whenever it is enforced.
+        """
+        num_bays_max = self.options[Aircraft.BWB.MAX_NUM_BAYS]
+        if num_bays_max > 0 and num_bays.real[0] > num_bays_max - 0.5:
+            return num_bays
+
+        return num_bays + 0.499
+
+    def guess_nonlinear(self, inputs, outputs, resids):
+        # Start from the area estimate of BWBDetailedCabinLayout, unless a previous
+        # solution is available
+        if outputs['BWB_REAL_NUM_BAYS'].real[0] >= 1.0:
+            return
+
+        num_bays = self._area_seats_service / 550.0
+        num_bays_max = self.options[Aircraft.BWB.MAX_NUM_BAYS]
+        if num_bays > num_bays_max and num_bays_max > 0:
+            num_bays = num_bays_max
+
+        outputs['BWB_REAL_NUM_BAYS'] = max(num_bays, 1.0)
+
+    def apply_nonlinear(self, inputs, outputs, residuals):
+        rear_spar_percent_chord = inputs['Rear_spar_percent_chord']
+        height_to_width = inputs[Aircraft.Fuselage.HEIGHT_TO_WIDTH_RATIO]
+        tan_sweep = np.tan(inputs[Aircraft.BWB.PASSENGER_LEADING_EDGE_SWEEP] / 57.296)
+        num_bays = outputs['BWB_REAL_NUM_BAYS']
+
+        values, _, _ = self._cabin(tan_sweep, num_bays)
+
+        for name, value in values.items():
+            residuals[name] = outputs[name] - value
+
+        length = values[Aircraft.Fuselage.PASSENGER_COMPARTMENT_LENGTH] / rear_spar_percent_chord
+        residuals[Aircraft.Fuselage.LENGTH] = outputs[Aircraft.Fuselage.LENGTH] - length
+        residuals[Aircraft.Fuselage.MAX_HEIGHT] = (
+            outputs[Aircraft.Fuselage.MAX_HEIGHT] - height_to_width * length
+        )
+
+        residuals[Aircraft.BWB.NUM_BAYS] = outputs[Aircraft.BWB.NUM_BAYS] - smooth_int_tanh(
+            self._rounded_num_bays(num_bays), mu=20.0
+        )
+
+    def linearize(self, inputs, outputs, partials):
+        rear_spar_percent_chord = inputs['Rear_spar_percent_chord']
+        height_to_width = inputs[Aircraft.Fuselage.HEIGHT_TO_WIDTH_RATIO]
+        sweep = inputs[Aircraft.BWB.PASSENGER_LEADING_EDGE_SWEEP]
+        tan_sweep = np.tan(sweep / 57.296)
+        dtan_dsweep = (1.0 + tan_sweep**2) / 57.296
+        num_bays = outputs['BWB_REAL_NUM_BAYS']
+
+        values, d_num_bays, d_tan_sweep = self._cabin(tan_sweep, num_bays)
+
+        for name in values:
+            partials[name, 'BWB_REAL_NUM_BAYS'] = -d_num_bays[name]
+            partials[name, Aircraft.BWB.PASSENGER_LEADING_EDGE_SWEEP] = (
+                -d_tan_sweep[name] * dtan_dsweep
+            )
+
+        # the real number of bays is its own output
+        partials['BWB_REAL_NUM_BAYS', 'BWB_REAL_NUM_BAYS'] += 1.0
+
+        pax_compart_length = values[Aircraft.Fuselage.PASSENGER_COMPARTMENT_LENGTH]
+        dlength_dbays = d_num_bays[Aircraft.Fuselage.PASSENGER_COMPARTMENT_LENGTH]
+        dlength_dsweep = d_tan_sweep[Aircraft.Fuselage.PASSENGER_COMPARTMENT_LENGTH] * dtan_dsweep
+        length = pax_compart_length / rear_spar_percent_chord
+
+        partials[Aircraft.Fuselage.LENGTH, 'BWB_REAL_NUM_BAYS'] = (
+            -dlength_dbays / rear_spar_percent_chord
+        )
+        partials[Aircraft.Fuselage.LENGTH, Aircraft.BWB.PASSENGER_LEADING_EDGE_SWEEP] = (
+            -dlength_dsweep / rear_spar_percent_chord
+        )
+        partials[Aircraft.Fuselage.LENGTH, 'Rear_spar_percent_chord'] = (
+            length / rear_spar_percent_chord
+        )
+
+        partials[Aircraft.Fuselage.MAX_HEIGHT, 'BWB_REAL_NUM_BAYS'] = (
+            -height_to_width * dlength_dbays / rear_spar_percent_chord
+        )
+        partials[Aircraft.Fuselage.MAX_HEIGHT, Aircraft.BWB.PASSENGER_LEADING_EDGE_SWEEP] = (
+            -height_to_width * dlength_dsweep / rear_spar_percent_chord
+        )
+        partials[Aircraft.Fuselage.MAX_HEIGHT, 'Rear_spar_percent_chord'] = (
+            height_to_width * length / rear_spar_percent_chord
+        )
+        partials[Aircraft.Fuselage.MAX_HEIGHT, Aircraft.Fuselage.HEIGHT_TO_WIDTH_RATIO] = -length
+
+        partials[Aircraft.BWB.NUM_BAYS, 'BWB_REAL_NUM_BAYS'] = -d_smooth_int_tanh(
+            self._rounded_num_bays(num_bays), mu=20.0
+        )
@@ -1,7 +1,14 @@
 import numpy as np
 import openmdao.api as om
 
-from aviary.variable_info.functions import add_aviary_input, add_aviary_option, add_aviary_output
+from aviary.subsystems.geometry.flops_based.utils import (
+    add_design_input,
+    add_design_output,
+    declare_num_designs,
+    design_partials,
+    design_shape,
+)
+from aviary.variable_info.functions import add_aviary_option
 from aviary.variable_info.variables import Aircraft
 
 
@@ -13,22 +20,28 @@ class Nacelles(om.ExplicitComponent):
 
     def initialize(self):
         add_aviary_option(self, Aircraft.Engine.NUM_ENGINES)
+        declare_num_designs(self)
 
     def setup(self):
         num_engine_type = len(self.options[Aircraft.Engine.NUM_ENGINES])
-        add_aviary_input(self, Aircraft.Nacelle.AVG_DIAMETER, shape=num_engine_type, units='ft')
-        add_aviary_input(self, Aircraft.Nacelle.AVG_LENGTH, shape=num_engine_type, units='ft')
-        add_aviary_input(
-            self, Aircraft.Nacelle.WETTED_AREA_SCALER, shape=num_engine_type, units='unitless'
+        num_designs = self.options['num_designs']
+        shape = design_shape(num_designs)
+        engine_shape = design_shape(num_designs, num_engine_type)
+
+        add_design_input(self, Aircraft.Nacelle.AVG_DIAMETER, shape=engine_shape, units='ft')
+        add_design_input(self, Aircraft.Nacelle.AVG_LENGTH, shape=engine_shape, units='ft')
+        add_design_input(
+            self, Aircraft.Nacelle.WETTED_AREA_SCALER, shape=engine_shape, units='unitless'
         )
 
-        add_aviary_output(self, Aircraft.Nacelle.TOTAL_WETTED_AREA, units='ft**2')
-        add_aviary_output(self, Aircraft.Nacelle.WETTED_AREA, shape=num_engine_type, units='ft**2')
+        add_design_output(self, Aircraft.Nacelle.TOTAL_WETTED_AREA, shape=shape, units='ft**2')
+        add_design_output(self, Aircraft.Nacelle.WETTED_AREA, shape=engine_shape, units='ft**2')
 
     def setup_partials(self):
         # derivatives w.r.t vectorized engine inputs have known sparsity pattern
         num_engine_type = len(self.options[Aircraft.Engine.NUM_ENGINES])
-        shape = np.arange(num_engine_type)
+        num_designs = self.options['num_designs']
+        rows, cols = design_partials(num_designs, 1, num_engine_type)
 
         self.declare_partials(
             Aircraft.Nacelle.TOTAL_WETTED_AREA,
@@ -37,8 +50,12 @@ class Nacelles(om.ExplicitComponent):
                 Aircraft.Nacelle.AVG_LENGTH,
                 Aircraft.Nacelle.WETTED_AREA_SCALER,
             ],
+            rows=rows,
+            cols=cols,
         )
 
+        rows, cols = design_partials(num_designs, num_engine_type, num_engine_type)
+
         self.declare_partials(
             Aircraft.Nacelle.WETTED_AREA,
             [
@@ -46,8 +63,8 @@ class Nacelles(om.ExplicitComponent):
                 Aircraft.Nacelle.AVG_LENGTH,
                 Aircraft.Nacelle.WETTED_AREA_SCALER,
             ],
-            rows=shape,
-            cols=shape,
+            rows=rows,
+            cols=cols,
             val=1.0,
         )
 
@@ -55,21 +72,16 @@ class Nacelles(om.ExplicitComponent):
         # how many of each unique engine type are on the aircraft (array)
         num_engines = self.options[Aircraft.Engine.NUM_ENGINES]
 
-        # how many unique engine types are there (int)
-        num_engine_type = len(num_engines)
-
         avg_diam = inputs[Aircraft.Nacelle.AVG_DIAMETER]
         avg_length = inputs[Aircraft.Nacelle.AVG_LENGTH]
         scaler = inputs[Aircraft.Nacelle.WETTED_AREA_SCALER]
 
-        wetted_area = np.zeros(num_engine_type, dtype=avg_diam.dtype)
-
-        calc_idx = np.where(num_engines >= 1)
-        wetted_area[calc_idx] = scaler[calc_idx] * 2.8 * avg_diam[calc_idx] * avg_length[calc_idx]
+        # engine types are the last axis of batched inputs
+        wetted_area = (num_engines >= 1) * scaler * 2.8 * avg_diam * avg_length
 
         outputs[Aircraft.Nacelle.WETTED_AREA] = wetted_area
 
-        total_wetted_area = sum(num_engines * wetted_area)
+        total_wetted_area = np.sum(num_engines * wetted_area, axis=-1)
 
         outputs[Aircraft.Nacelle.TOTAL_WETTED_AREA] = total_wetted_area
 
@@ -80,39 +92,33 @@ class Nacelles(om.ExplicitComponent):
         avg_length = inputs[Aircraft.Nacelle.AVG_LENGTH]
         scaler = inputs[Aircraft.Nacelle.WETTED_AREA_SCALER]
 
-        deriv_area_len = np.zeros(len(num_engines), dtype=avg_diam.dtype)
-        deriv_area_diam = np.zeros(len(num_engines), dtype=avg_diam.dtype)
-        deriv_area_scaler = np.zeros(len(num_engines), dtype=avg_diam.dtype)
-        deriv_total_len = np.zeros(len(num_engines), dtype=avg_diam.dtype)
-        deriv_total_diam = np.zeros(len(num_engines), dtype=avg_diam.dtype)
-        deriv_total_scaler = np.zeros(len(num_engines), dtype=avg_diam.dtype)
+        calc = num_engines >= 1
 
         area_to_length = 2.8 * avg_diam
         area_to_diam = 2.8 * avg_length
         area_to_scaler = 2.8 * avg_diam * avg_length
 
-        calc_idx = np.where(num_engines >= 1)
-        deriv_area_len[calc_idx] = scaler[calc_idx] * area_to_length[calc_idx]
-        deriv_area_diam[calc_idx] = scaler[calc_idx] * area_to_diam[calc_idx]
-        deriv_area_scaler[calc_idx] = area_to_scaler[calc_idx]
-        deriv_total_len[calc_idx] = (
-            scaler[calc_idx] * num_engines[calc_idx] * area_to_length[calc_idx]
-        )
-        deriv_total_diam[calc_idx] = (
-            scaler[calc_idx] * num_engines[calc_idx] * area_to_diam[calc_idx]
-        )
-        deriv_total_scaler[calc_idx] = num_engines[calc_idx] * area_to_scaler[calc_idx]
+        deriv_area_len = calc * scaler * area_to_length
+        deriv_area_diam = calc * scaler * area_to_diam
+        deriv_area_scaler = calc * area_to_scaler
+        deriv_total_len = num_engines * deriv_area_len
+        deriv_total_diam = num_engines * deriv_area_diam
+        deriv_total_scaler = num_engines * deriv_area_scaler
 
-        J[Aircraft.Nacelle.WETTED_AREA, Aircraft.Nacelle.AVG_LENGTH] = deriv_area_len
+        J[Aircraft.Nacelle.WETTED_AREA, Aircraft.Nacelle.AVG_LENGTH] = deriv_area_len.ravel()
 
-        J[Aircraft.Nacelle.WETTED_AREA, Aircraft.Nacelle.AVG_DIAMETER] = deriv_area_diam
+        J[Aircraft.Nacelle.WETTED_AREA, Aircraft.Nacelle.AVG_DIAMETER] = deriv_area_diam.ravel()
 
-        J[Aircraft.Nacelle.WETTED_AREA, Aircraft.Nacelle.WETTED_AREA_SCALER] = deriv_area_scaler
+        J[Aircraft.Nacelle.WETTED_AREA, Aircraft.Nacelle.WETTED_AREA_SCALER] = (
+            deriv_area_scaler.ravel()
+        )
 
-        J[Aircraft.Nacelle.TOTAL_WETTED_AREA, Aircraft.Nacelle.AVG_LENGTH] = deriv_total_len
+        J[Aircraft.Nacelle.TOTAL_WETTED_AREA, Aircraft.Nacelle.AVG_LENGTH] = deriv_total_len.ravel()
 
-        J[Aircraft.Nacelle.TOTAL_WETTED_AREA, Aircraft.Nacelle.AVG_DIAMETER] = deriv_total_diam
+        J[Aircraft.Nacelle.TOTAL_WETTED_AREA, Aircraft.Nacelle.AVG_DIAMETER] = (
+            deriv_total_diam.ravel()
+        )
 
         J[Aircraft.Nacelle.TOTAL_WETTED_AREA, Aircraft.Nacelle.WETTED_AREA_SCALER] = (
-            deriv_total_scaler
+            deriv_total_scaler.ravel()
         )
@@ -6,17 +6,20 @@ TODO: blended-wing-body support
 TODO: multiple engine model support
 """
 
+import numpy as np
 import openmdao.api as om
 from numpy import pi
 
 from aviary.subsystems.geometry.flops_based.canard import Canard
 from aviary.subsystems.geometry.flops_based.characteristic_lengths import (
     BWBWingCharacteristicLength,
+    ComponentTable,
     OtherCharacteristicLengths,
     WingCharacteristicLength,
 )
 from aviary.subsystems.geometry.flops_based.fuselage import (
     BWBDetailedCabinLayout,
+    BWBDetailedCabinLayoutImplicit,
     BWBFuselagePrelim,
     BWBSimpleCabinLayout,
     DetailedCabinLayout,
@@ -26,9 +29,16 @@ from aviary.subsystems.geometry.flops_based.fuselage import (
 from aviary.subsystems.geometry.flops_based.nacelle import Nacelles
 from aviary.subsystems.geometry.flops_based.utils import (
     Names,
+    add_design_input,
+    add_design_output,
     calc_fuselage_adjustment,
     calc_lifting_surface_scaler,
+    calc_station_integral,
     d_calc_fuselage_adjustment,
+    d_calc_station_integral,
+    declare_num_designs,
+    design_partials,
+    design_shape,
     thickness_to_chord_scaler,
 )
 from aviary.subsystems.geometry.flops_based.wetted_area_total import TotalWettedArea
@@ -50,10 +60,33 @@ class PrepGeom(om.Group):
         add_aviary_option(self, Aircraft.Fuselage.SIMPLE_LAYOUT)
         add_aviary_option(self, Aircraft.Design.TYPE)
         add_aviary_option(self, Aircraft.BWB.DETAILED_WING_PROVIDED)
+        declare_num_designs(self)
+        self.options.declare(
+            'implicit_cabin_layout',
+            types=bool,
+            default=False,
+            desc='when True, the detailed BWB cabin layout solves for a real-valued number of '
+            "bays with Newton's method instead of iterating on the integer number of bays",
+        )
+        self.options.declare(
+            'component_table',
+            types=bool,
+            default=False,
+            desc='when True, also assemble the Aircraft.Design tables of component wetted '
+            'areas, lengths, fineness and laminar flow, which need the laminar flow inputs of '
+            'every component',
+        )
 
     def setup(self):
         is_simple_layout = self.options[Aircraft.Fuselage.SIMPLE_LAYOUT]
         design_type = self.options[Aircraft.Design.TYPE]
+        num_designs = self.options['num_designs']
+
+        if num_designs > 1 and (design_type is not AircraftTypes.TRANSPORT or not is_simple_layout):
+            raise ValueError(
+                'PrepGeom only supports num_designs > 1 for transports with the simple '
+                'cabin layout.'
+            )
 
         if design_type is AircraftTypes.BLENDED_WING_BODY:
             if is_simple_layout:
@@ -64,9 +97,14 @@ class PrepGeom(om.Group):
                     promotes_outputs=['*'],
                 )
             else:
+                if self.options['implicit_cabin_layout']:
+                    cabin_layout = BWBDetailedCabinLayoutImplicit()
+                else:
+                    cabin_layout = BWBDetailedCabinLayout()
+
                 self.add_subsystem(
                     'fuselage_layout',
-                    BWBDetailedCabinLayout(),
+                    cabin_layout,
                     promotes_inputs=['*'],
                     promotes_outputs=['*'],
                 )
@@ -88,7 +126,7 @@ class PrepGeom(om.Group):
             if is_simple_layout:
                 self.add_subsystem(
                     'fuselage_layout',
-                    SimpleCabinLayout(),
+                    SimpleCabinLayout(num_designs=num_designs),
                     promotes_inputs=['*'],
                     promotes_outputs=['*'],
                 )
@@ -109,7 +147,10 @@ class PrepGeom(om.Group):
             )
         elif design_type is AircraftTypes.TRANSPORT:
             self.add_subsystem(
-                'fuselage_prelim', FuselagePrelim(), promotes_inputs=['*'], promotes_outputs=['*']
+                'fuselage_prelim',
+                FuselagePrelim(num_designs=num_designs),
+                promotes_inputs=['*'],
+                promotes_outputs=['*'],
             )
 
         if design_type is AircraftTypes.BLENDED_WING_BODY:
@@ -118,12 +159,15 @@ class PrepGeom(om.Group):
             )
         elif design_type is AircraftTypes.TRANSPORT:
             self.add_subsystem(
-                'wing_prelim', WingPrelim(), promotes_inputs=['*'], promotes_outputs=['*']
+                'wing_prelim',
+                WingPrelim(num_designs=num_designs),
+                promotes_inputs=['*'],
+                promotes_outputs=['*'],
             )
 
         self.add_subsystem(
             'prelim',
-            _Prelim(),
+            _Prelim(num_designs=num_designs),
             promotes_inputs=['*'],
         )
 
@@ -131,7 +175,10 @@ class PrepGeom(om.Group):
             self.add_subsystem('wing', _BWBWing(), promotes_inputs=['*'], promotes_outputs=['*'])
         else:
             self.add_subsystem(
-                'wing', _Wing(), promotes_inputs=['aircraft*'], promotes_outputs=['*']
+                'wing',
+                _Wing(num_designs=num_designs),
+                promotes_inputs=['aircraft*'],
+                promotes_outputs=['*'],
             )
 
         if design_type is AircraftTypes.TRANSPORT:
@@ -140,19 +187,30 @@ class PrepGeom(om.Group):
             self.connect(f'prelim.{Names.XDX}', f'wing.{Names.XDX}')
             self.connect(f'prelim.{Names.XMULT}', f'wing.{Names.XMULT}')
 
-        self.add_subsystem('tail', _Tail(), promotes_inputs=['aircraft*'], promotes_outputs=['*'])
+        self.add_subsystem(
+            'tail',
+            _Tail(num_designs=num_designs),
+            promotes_inputs=['aircraft*'],
+            promotes_outputs=['*'],
+        )
 
         self.connect(f'prelim.{Names.XMULTH}', f'tail.{Names.XMULTH}')
         self.connect(f'prelim.{Names.XMULTV}', f'tail.{Names.XMULTV}')
 
         self.add_subsystem(
-            'fus_ratios', _FuselageRatios(), promotes_inputs=['aircraft*'], promotes_outputs=['*']
+            'fus_ratios',
+            _FuselageRatios(num_designs=num_designs),
+            promotes_inputs=['aircraft*'],
+            promotes_outputs=['*'],
         )
         if design_type is AircraftTypes.BLENDED_WING_BODY:
             self.add_subsystem('fuselage', _BWBFuselage(), promotes_outputs=['*'])
         elif design_type is AircraftTypes.TRANSPORT:
             self.add_subsystem(
-                'fuselage', _Fuselage(), promotes_inputs=['aircraft*'], promotes_outputs=['*']
+                'fuselage',
+                _Fuselage(num_designs=num_designs),
+                promotes_inputs=['aircraft*'],
+                promotes_outputs=['*'],
             )
 
         if design_type is AircraftTypes.TRANSPORT:
@@ -161,11 +219,17 @@ class PrepGeom(om.Group):
             self.connect(f'prelim.{Names.CRTHTB}', f'fuselage.{Names.CRTHTB}')
 
         self.add_subsystem(
-            'nacelles', Nacelles(), promotes_inputs=['aircraft*'], promotes_outputs=['*']
+            'nacelles',
+            Nacelles(num_designs=num_designs),
+            promotes_inputs=['aircraft*'],
+            promotes_outputs=['*'],
         )
 
         self.add_subsystem(
-            'canard', Canard(), promotes_inputs=['aircraft*'], promotes_outputs=['*']
+            'canard',
+            Canard(num_designs=num_designs),
+            promotes_inputs=['aircraft*'],
+            promotes_outputs=['*'],
         )
 
         if design_type is AircraftTypes.BLENDED_WING_BODY:
@@ -178,13 +242,13 @@ class PrepGeom(om.Group):
         elif design_type is AircraftTypes.TRANSPORT:
             self.add_subsystem(
                 'wing_characteristic_lengths',
-                WingCharacteristicLength(),
+                WingCharacteristicLength(num_designs=num_designs),
                 promotes_inputs=['aircraft*'],
                 promotes_outputs=['*'],
             )
         self.add_subsystem(
             'other_characteristic_lengths',
-            OtherCharacteristicLengths(),
+            OtherCharacteristicLengths(num_designs=num_designs),
             promotes_inputs=['aircraft*'],
             promotes_outputs=['*'],
         )
@@ -192,64 +256,95 @@ class PrepGeom(om.Group):
         self.connect(f'prelim.{Names.CROOT}', f'other_characteristic_lengths.{Names.CROOT}')
 
         self.add_subsystem(
-            'total_wetted_area', TotalWettedArea(), promotes_inputs=['*'], promotes_outputs=['*']
+            'total_wetted_area',
+            TotalWettedArea(num_designs=num_designs),
+            promotes_inputs=['*'],
+            promotes_outputs=['*'],
         )
 
+        if self.options['component_table']:
+            self.add_subsystem(
+                'component_table',
+                ComponentTable(num_designs=num_designs),
+                promotes_inputs=['aircraft*'],
+                promotes_outputs=['*'],
+            )
+
 
 class _Prelim(om.ExplicitComponent):
     """Calculate internal derived values of aircraft geometry for FLOPS-based aerodynamics analysis."""
 
     def initialize(self):
         add_aviary_option(self, Aircraft.Wing.SPAN_EFFICIENCY_REDUCTION)
+        declare_num_designs(self)
 
     def setup(self):
-        add_aviary_input(self, Aircraft.Fuselage.AVG_DIAMETER, units='ft')
-        add_aviary_input(self, Aircraft.Fuselage.MAX_WIDTH, units='ft')
+        shape = design_shape(self.options['num_designs'])
 
-        add_aviary_input(self, Aircraft.HorizontalTail.AREA, units='ft**2')
-        add_aviary_input(self, Aircraft.HorizontalTail.ASPECT_RATIO, units='unitless')
-        add_aviary_input(self, Aircraft.HorizontalTail.TAPER_RATIO, units='unitless')
-        add_aviary_input(self, Aircraft.HorizontalTail.THICKNESS_TO_CHORD, units='unitless')
+        add_design_input(self, Aircraft.Fuselage.AVG_DIAMETER, shape=shape, units='ft')
+        add_design_input(self, Aircraft.Fuselage.MAX_WIDTH, shape=shape, units='ft')
 
-        add_aviary_input(self, Aircraft.VerticalTail.AREA, units='ft**2')
-        add_aviary_input(self, Aircraft.VerticalTail.ASPECT_RATIO, units='unitless')
-        add_aviary_input(self, Aircraft.VerticalTail.TAPER_RATIO, units='unitless')
-        add_aviary_input(self, Aircraft.VerticalTail.THICKNESS_TO_CHORD, units='unitless')
+        add_design_input(self, Aircraft.HorizontalTail.AREA, shape=shape, units='ft**2')
+        add_design_input(self, Aircraft.HorizontalTail.ASPECT_RATIO, shape=shape, units='unitless')
+        add_design_input(self, Aircraft.HorizontalTail.TAPER_RATIO, shape=shape, units='unitless')
+        add_design_input(
+            self, Aircraft.HorizontalTail.THICKNESS_TO_CHORD, shape=shape, units='unitless'
+        )
 
-        add_aviary_input(self, Aircraft.Wing.AREA, units='ft**2')
-        add_aviary_input(self, Aircraft.Wing.GLOVE_AND_BAT, units='ft**2')
+        add_design_input(self, Aircraft.VerticalTail.AREA, shape=shape, units='ft**2')
+        add_design_input(self, Aircraft.VerticalTail.ASPECT_RATIO, shape=shape, units='unitless')
+        add_design_input(self, Aircraft.VerticalTail.TAPER_RATIO, shape=shape, units='unitless')
+        add_design_input(
+            self, Aircraft.VerticalTail.THICKNESS_TO_CHORD, shape=shape, units='unitless'
+        )
+
+        add_design_input(self, Aircraft.Wing.AREA, shape=shape, units='ft**2')
+        add_design_input(self, Aircraft.Wing.GLOVE_AND_BAT, shape=shape, units='ft**2')
         # NOTE: FLOPS/aviary1 calculate span locally
-        add_aviary_input(self, Aircraft.Wing.SPAN, units='ft')
-        add_aviary_input(self, Aircraft.Wing.TAPER_RATIO, units='unitless')
-        add_aviary_input(self, Aircraft.Wing.THICKNESS_TO_CHORD, units='unitless')
-
-        self.add_output(Names.CROOT, 1.0, units='unitless')
-        self.add_output(Names.CROOTB, 1.0, units='unitless')
-        self.add_output(Names.CROTM, 1.0, units='unitless')
-        self.add_output(Names.CROTVT, 1.0, units='unitless')
-        self.add_output(Names.CRTHTB, 1.0, units='unitless')
-        self.add_output(Names.SPANHT, 1.0, units='unitless')
-        self.add_output(Names.SPANVT, 1.0, units='unitless')
-        self.add_output(Names.XDX, 1.0, units='unitless')
-        self.add_output(Names.XMULT, 1.0, units='unitless')
-        self.add_output(Names.XMULTH, 1.0, units='unitless')
-        self.add_output(Names.XMULTV, 1.0, units='unitless')
+        add_design_input(self, Aircraft.Wing.SPAN, shape=shape, units='ft')
+        add_design_input(self, Aircraft.Wing.TAPER_RATIO, shape=shape, units='unitless')
+        add_design_input(self, Aircraft.Wing.THICKNESS_TO_CHORD, shape=shape, units='unitless')
+
+        self.add_output(Names.CROOT, 1.0, shape=shape, units='unitless')
+        self.add_output(Names.CROOTB, 1.0, shape=shape, units='unitless')
+        self.add_output(Names.CROTM, 1.0, shape=shape, units='unitless')
+        self.add_output(Names.CROTVT, 1.0, shape=shape, units='unitless')
+        self.add_output(Names.CRTHTB, 1.0, shape=shape, units='unitless')
+        self.add_output(Names.SPANHT, 1.0, shape=shape, units='unitless')
+        self.add_output(Names.SPANVT, 1.0, shape=shape, units='unitless')
+        self.add_output(Names.XDX, 1.0, shape=shape, units='unitless')
+        self.add_output(Names.XMULT, 1.0, shape=shape, units='unitless')
+        self.add_output(Names.XMULTH, 1.0, shape=shape, units='unitless')
+        self.add_output(Names.XMULTV, 1.0, shape=shape, units='unitless')
 
     def setup_partials(self):
         fuselage_var = self.fuselage_var
+        rows, cols = design_partials(self.options['num_designs'])
 
-        self.declare_partials(Names.XDX, fuselage_var, val=1.0)
+        self.declare_partials(Names.XDX, fuselage_var, val=1.0, rows=rows, cols=cols)
 
         self.declare_partials(
-            Names.XMULT, Aircraft.Wing.THICKNESS_TO_CHORD, val=thickness_to_chord_scaler
+            Names.XMULT,
+            Aircraft.Wing.THICKNESS_TO_CHORD,
+            val=thickness_to_chord_scaler,
+            rows=rows,
+            cols=cols,
         )
 
         self.declare_partials(
-            Names.XMULTH, Aircraft.HorizontalTail.THICKNESS_TO_CHORD, val=thickness_to_chord_scaler
+            Names.XMULTH,
+            Aircraft.HorizontalTail.THICKNESS_TO_CHORD,
+            val=thickness_to_chord_scaler,
+            rows=rows,
+            cols=cols,
         )
 
         self.declare_partials(
-            Names.XMULTV, Aircraft.VerticalTail.THICKNESS_TO_CHORD, val=thickness_to_chord_scaler
+            Names.XMULTV,
+            Aircraft.VerticalTail.THICKNESS_TO_CHORD,
+            val=thickness_to_chord_scaler,
+            rows=rows,
+            cols=cols,
         )
 
         self.declare_partials(
@@ -258,6 +353,8 @@ class _Prelim(om.ExplicitComponent):
                 Aircraft.HorizontalTail.AREA,
                 Aircraft.HorizontalTail.ASPECT_RATIO,
             ],
+            rows=rows,
+            cols=cols,
         )
 
         self.declare_partials(
@@ -268,6 +365,8 @@ class _Prelim(om.ExplicitComponent):
                 Aircraft.HorizontalTail.TAPER_RATIO,
                 fuselage_var,
             ],
+            rows=rows,
+            cols=cols,
         )
 
         self.declare_partials(
@@ -278,6 +377,8 @@ class _Prelim(om.ExplicitComponent):
                 Aircraft.Wing.SPAN,
                 Aircraft.Wing.TAPER_RATIO,
             ],
+            rows=rows,
+            cols=cols,
         )
 
         self.declare_partials(
@@ -287,6 +388,8 @@ class _Prelim(om.ExplicitComponent):
                 Aircraft.Wing.TAPER_RATIO,
                 fuselage_var,
             ],
+            rows=rows,
+            cols=cols,
         )
 
         self.declare_partials(
@@ -298,6 +401,8 @@ class _Prelim(om.ExplicitComponent):
                 Aircraft.Wing.TAPER_RATIO,
                 fuselage_var,
             ],
+            rows=rows,
+            cols=cols,
         )
 
         self.declare_partials(
@@ -306,6 +411,8 @@ class _Prelim(om.ExplicitComponent):
                 Aircraft.VerticalTail.AREA,
                 Aircraft.VerticalTail.ASPECT_RATIO,
             ],
+            rows=rows,
+            cols=cols,
         )
 
         self.declare_partials(
@@ -315,6 +422,8 @@ class _Prelim(om.ExplicitComponent):
                 Aircraft.VerticalTail.ASPECT_RATIO,
                 Aircraft.VerticalTail.TAPER_RATIO,
             ],
+            rows=rows,
+            cols=cols,
         )
 
     def compute(self, inputs, outputs, discrete_inputs=None, discrete_outputs=None):
@@ -334,18 +443,18 @@ class _Prelim(om.ExplicitComponent):
 
         span = outputs[Names.SPANHT] = (aspect_ratio * area) ** 0.5
 
-        CRTHTB = 0.0
-
-        if 0.0 < span:
-            taper_ratio = inputs[Aircraft.HorizontalTail.TAPER_RATIO]
+        # CRTHTB is zero for designs without horizontal tail span
+        positive = span.real > 0.0
+        span = np.where(positive, span, 1.0)
+        taper_ratio = inputs[Aircraft.HorizontalTail.TAPER_RATIO]
 
-            CRTHTB = (
-                2.0 * area / (span * (1.0 + taper_ratio))
-                + ((span / 2.0 - XDX / 4.0) / (span / 2.0)) * (1.0 - taper_ratio)
-                + taper_ratio
-            )
+        CRTHTB = (
+            2.0 * area / (span * (1.0 + taper_ratio))
+            + ((span / 2.0 - XDX / 4.0) / (span / 2.0)) * (1.0 - taper_ratio)
+            + taper_ratio
+        )
 
-        outputs[Names.CRTHTB] = CRTHTB
+        outputs[Names.CRTHTB] = np.where(positive, CRTHTB, 0.0)
 
         area = inputs[Aircraft.Wing.AREA]
         glove_and_bat = inputs[Aircraft.Wing.GLOVE_AND_BAT]
@@ -365,14 +474,13 @@ class _Prelim(om.ExplicitComponent):
 
         span = outputs[Names.SPANVT] = (area * aspect_ratio) ** 0.5
 
-        CROTVT = 0.0
+        positive = span.real > 0.0
+        span = np.where(positive, span, 1.0)
+        taper_ratio = inputs[Aircraft.VerticalTail.TAPER_RATIO]
 
-        if 0.0 < span:
-            taper_ratio = inputs[Aircraft.VerticalTail.TAPER_RATIO]
+        CROTVT = 2.0 * area / (span * (1.0 + taper_ratio))
 
-            CROTVT = 2.0 * area / (span * (1.0 + taper_ratio))
-
-        outputs[Names.CROTVT] = CROTVT
+        outputs[Names.CROTVT] = np.where(positive, CROTVT, 0.0)
 
     def compute_partials(self, inputs, J, discrete_inputs=None):
         fuselage_var = self.fuselage_var
@@ -388,55 +496,55 @@ class _Prelim(om.ExplicitComponent):
         J[Names.SPANHT, Aircraft.HorizontalTail.AREA] = f * aspect_ratio
         J[Names.SPANHT, Aircraft.HorizontalTail.ASPECT_RATIO] = f * area
 
-        da = dr = dt = dx = 0.0
-
-        if 0.0 < span:
-            # b = (a * ar)**0.5
-            #
-            #        2 * a       b / 2 - x / 4
-            # c = ____________ + _____________ * (1 - tr) + tr
-            #     b * (1 + tr)       b / 2
-            #
-            #              2 * a               x * (1 - tr)
-            #   = ________________________ - _________________ + 1
-            #     (a * ar)**0.5 * (1 + tr)   2 * (a * ar)**0.5
-            taper_ratio = inputs[Aircraft.HorizontalTail.TAPER_RATIO]
-
-            _1p_tr = 1.0 + taper_ratio
-            _1m_tr = 1.0 - taper_ratio
-
-            # da = d(f0 / g0) + d(f1 / g1) + 0
-            #      df0 * g0 - f0 * dg0   df1 * g1 - f1 * dg1
-            #    = ___________________ + ___________________
-            #             g0**2                 g1**2
-            dspan_darea = 0.5 * (aspect_ratio / area) ** 0.5
-
-            da = (
-                2.0 / _1p_tr * (1.0 - area * dspan_darea / span) / span
-                + _1m_tr * 0.5 * XDX * dspan_darea / span**2
-            )
+        positive = span.real > 0.0
+        span = np.where(positive, span, 1.0)
+
+        # b = (a * ar)**0.5
+        #
+        #        2 * a       b / 2 - x / 4
+        # c = ____________ + _____________ * (1 - tr) + tr
+        #     b * (1 + tr)       b / 2
+        #
+        #              2 * a               x * (1 - tr)
+        #   = ________________________ - _________________ + 1
+        #     (a * ar)**0.5 * (1 + tr)   2 * (a * ar)**0.5
+        taper_ratio = inputs[Aircraft.HorizontalTail.TAPER_RATIO]
 
-            # dr = d(k0 * a / (a * ar)**0.5) - d(k1 / (a * ar)**0.5) + 0
-            #    = d((k0 * a - k1) / (a * ar)**0.5)
-            #    = -0.5 * (k0 * a - k1) / (a * ar)**1.5 * a
-            k0 = 2.0 / _1p_tr
-            k1 = XDX * _1m_tr / 2.0
-            dr = -0.5 * area * (k0 * area - k1) / span**3.0
+        _1p_tr = 1.0 + taper_ratio
+        _1m_tr = 1.0 - taper_ratio
 
-            # dt = d(k0 / (1 + tr)) - d(k1 * (1 - tr)) + 0
-            #    = -k0 / (1 + tr)**2 + k1
-            k0 = 2.0 * area / span
-            k1 = XDX / (2.0 * span)
-            dt = k1 - k0 / _1p_tr**2.0
+        # da = d(f0 / g0) + d(f1 / g1) + 0
+        #      df0 * g0 - f0 * dg0   df1 * g1 - f1 * dg1
+        #    = ___________________ + ___________________
+        #             g0**2                 g1**2
+        dspan_darea = 0.5 * aspect_ratio / span
 
-            # dx = 0 - d(x * k) + 0
-            #    = -k
-            dx = -_1m_tr / (2.0 * span)
+        da = (
+            2.0 / _1p_tr * (1.0 - area * dspan_darea / span) / span
+            + _1m_tr * 0.5 * XDX * dspan_darea / span**2
+        )
 
-        J[Names.CRTHTB, Aircraft.HorizontalTail.AREA] = da
-        J[Names.CRTHTB, Aircraft.HorizontalTail.ASPECT_RATIO] = dr
-        J[Names.CRTHTB, Aircraft.HorizontalTail.TAPER_RATIO] = dt
-        J[Names.CRTHTB, fuselage_var] = dx
+        # dr = d(k0 * a / (a * ar)**0.5) - d(k1 / (a * ar)**0.5) + 0
+        #    = d((k0 * a - k1) / (a * ar)**0.5)
+        #    = -0.5 * (k0 * a - k1) / (a * ar)**1.5 * a
+        k0 = 2.0 / _1p_tr
+        k1 = XDX * _1m_tr / 2.0
+        dr = -0.5 * area * (k0 * area - k1) / span**3.0
+
+        # dt = d(k0 / (1 + tr)) - d(k1 * (1 - tr)) + 0
+        #    = -k0 / (1 + tr)**2 + k1
+        k0 = 2.0 * area / span
+        k1 = XDX / (2.0 * span)
+        dt = k1 - k0 / _1p_tr**2.0
+
+        # dx = 0 - d(x * k) + 0
+        #    = -k
+        dx = -_1m_tr / (2.0 * span)
+
+        J[Names.CRTHTB, Aircraft.HorizontalTail.AREA] = np.where(positive, da, 0.0)
+        J[Names.CRTHTB, Aircraft.HorizontalTail.ASPECT_RATIO] = np.where(positive, dr, 0.0)
+        J[Names.CRTHTB, Aircraft.HorizontalTail.TAPER_RATIO] = np.where(positive, dt, 0.0)
+        J[Names.CRTHTB, fuselage_var] = np.where(positive, dx, 0.0)
 
         area = inputs[Aircraft.Wing.AREA]
         glove_and_bat = inputs[Aircraft.Wing.GLOVE_AND_BAT]
@@ -511,29 +619,28 @@ class _Prelim(om.ExplicitComponent):
 
         J[Names.SPANVT, Aircraft.VerticalTail.ASPECT_RATIO] = 0.5 * area / span
 
-        da = dr = dt = 0.0
-
-        if 0.0 < span:
-            taper_ratio = inputs[Aircraft.VerticalTail.TAPER_RATIO]
+        positive = span.real > 0.0
+        span = np.where(positive, span, 1.0)
+        taper_ratio = inputs[Aircraft.VerticalTail.TAPER_RATIO]
 
-            _1p_tr = 1.0 + taper_ratio
+        _1p_tr = 1.0 + taper_ratio
 
-            f = 2.0 * area / _1p_tr
-            g = span
-            df = 2.0 / _1p_tr
-            dg = J[Names.SPANVT, Aircraft.VerticalTail.AREA]
-            da = (df * g - f * dg) / g**2
+        f = 2.0 * area / _1p_tr
+        g = span
+        df = 2.0 / _1p_tr
+        dg = 0.5 * aspect_ratio / span
+        da = (df * g - f * dg) / g**2
 
-            # dr = d(k / (a * ar)**0.5)
-            #    = -0.5 * k / (a * ar)**1.5 * a
-            dr = -(area**2.0) / (_1p_tr * span**3.0)
+        # dr = d(k / (a * ar)**0.5)
+        #    = -0.5 * k / (a * ar)**1.5 * a
+        dr = -(area**2.0) / (_1p_tr * span**3.0)
 
-            # dt = d(k / (1 + tr)) = -k / (1 + tr)**2
-            dt = -2.0 * area / (span * _1p_tr**2.0)
+        # dt = d(k / (1 + tr)) = -k / (1 + tr)**2
+        dt = -2.0 * area / (span * _1p_tr**2.0)
 
-        J[Names.CROTVT, Aircraft.VerticalTail.AREA] = da
-        J[Names.CROTVT, Aircraft.VerticalTail.ASPECT_RATIO] = dr
-        J[Names.CROTVT, Aircraft.VerticalTail.TAPER_RATIO] = dt
+        J[Names.CROTVT, Aircraft.VerticalTail.AREA] = np.where(positive, da, 0.0)
+        J[Names.CROTVT, Aircraft.VerticalTail.ASPECT_RATIO] = np.where(positive, dr, 0.0)
+        J[Names.CROTVT, Aircraft.VerticalTail.TAPER_RATIO] = np.where(positive, dt, 0.0)
 
     @property
     def fuselage_var(self):
@@ -551,19 +658,24 @@ class _Wing(om.ExplicitComponent):
 
     def initialize(self):
         add_aviary_option(self, Aircraft.Fuselage.NUM_FUSELAGES)
+        declare_num_designs(self)
 
     def setup(self):
-        self.add_input(Names.CROOT, 0.0, units='unitless')
-        self.add_input(Names.CROOTB, 0.0, units='unitless')
-        self.add_input(Names.XDX, 0.0, units='unitless')
-        self.add_input(Names.XMULT, 0.0, units='unitless')
+        shape = design_shape(self.options['num_designs'])
 
-        add_aviary_input(self, Aircraft.Wing.AREA, units='ft**2')
-        add_aviary_input(self, Aircraft.Wing.WETTED_AREA_SCALER, units='unitless')
+        self.add_input(Names.CROOT, 0.0, shape=shape, units='unitless')
+        self.add_input(Names.CROOTB, 0.0, shape=shape, units='unitless')
+        self.add_input(Names.XDX, 0.0, shape=shape, units='unitless')
+        self.add_input(Names.XMULT, 0.0, shape=shape, units='unitless')
 
-        add_aviary_output(self, Aircraft.Wing.WETTED_AREA, units='ft**2')
+        add_design_input(self, Aircraft.Wing.AREA, shape=shape, units='ft**2')
+        add_design_input(self, Aircraft.Wing.WETTED_AREA_SCALER, shape=shape, units='unitless')
+
+        add_design_output(self, Aircraft.Wing.WETTED_AREA, shape=shape, units='ft**2')
 
     def setup_partials(self):
+        rows, cols = design_partials(self.options['num_designs'])
+
         self.declare_partials(
             Aircraft.Wing.WETTED_AREA,
             [
@@ -574,6 +686,8 @@ class _Wing(om.ExplicitComponent):
                 Aircraft.Wing.AREA,
                 Aircraft.Wing.WETTED_AREA_SCALER,
             ],
+            rows=rows,
+            cols=cols,
         )
 
     def compute(self, inputs, outputs, discrete_inputs=None, discrete_outputs=None):
@@ -637,43 +751,52 @@ class _BWBWing(om.ExplicitComponent):
 
         add_aviary_output(self, Aircraft.Wing.WETTED_AREA, units='ft**2')
 
-        self.declare_partials('*', '*', method='cs')
+    def setup_partials(self):
+        self.declare_partials(
+            Aircraft.Wing.WETTED_AREA,
+            [
+                Aircraft.Wing.SPAN,
+                'BWB_INPUT_STATION_DIST',
+                'BWB_CHORD_PER_SEMISPAN_DIST',
+                'BWB_THICKNESS_TO_CHORD_DIST',
+            ],
+        )
 
     def compute(self, inputs, outputs):
         input_station_dist = inputs['BWB_INPUT_STATION_DIST']
-        num_stations = len(inputs['BWB_INPUT_STATION_DIST'])
-
+        bwb_chord_per_semispan_dist = inputs['BWB_CHORD_PER_SEMISPAN_DIST']
+        bwb_thickness_to_chord_dist = inputs['BWB_THICKNESS_TO_CHORD_DIST']
         span = inputs[Aircraft.Wing.SPAN]
 
-        ssmw = 0.0
+        avg_toc = 0.5 * (bwb_thickness_to_chord_dist[:-1] + bwb_thickness_to_chord_dist[1:])
+        ckt = calc_lifting_surface_scaler(avg_toc)
+
+        outputs[Aircraft.Wing.WETTED_AREA] = calc_station_integral(
+            input_station_dist, bwb_chord_per_semispan_dist, span, ckt
+        )
+
+    def compute_partials(self, inputs, J):
+        input_station_dist = inputs['BWB_INPUT_STATION_DIST']
         bwb_chord_per_semispan_dist = inputs['BWB_CHORD_PER_SEMISPAN_DIST']
         bwb_thickness_to_chord_dist = inputs['BWB_THICKNESS_TO_CHORD_DIST']
+        span = inputs[Aircraft.Wing.SPAN]
 
-        if bwb_chord_per_semispan_dist[0] <= 5.0:
-            C1 = bwb_chord_per_semispan_dist[0] * span / 2.0
-        else:
-            C1 = bwb_chord_per_semispan_dist[0]
-        if input_station_dist[0] <= 1.1:
-            Y1 = input_station_dist[0] * span / 2.0
-        else:
-            Y1 = input_station_dist[0]
-        for n in range(1, num_stations):
-            avg_toc = (bwb_thickness_to_chord_dist[n - 1] + bwb_thickness_to_chord_dist[n]) / 2.0
-            ckt = 2.0 + 0.387 * avg_toc
-            if bwb_chord_per_semispan_dist[n] <= 5.0:
-                C2 = bwb_chord_per_semispan_dist[n] * span / 2.0
-            else:
-                C2 = bwb_chord_per_semispan_dist[n]
-            if input_station_dist[n] <= 1.1:
-                Y2 = input_station_dist[n] * span / 2.0
-            else:
-                Y2 = input_station_dist[n]
-            axp = (Y2 - Y1) * (C1 + C2)
-            C1 = C2
-            Y1 = Y2
-            ssmw = ssmw + axp * ckt
+        avg_toc = 0.5 * (bwb_thickness_to_chord_dist[:-1] + bwb_thickness_to_chord_dist[1:])
+        ckt = calc_lifting_surface_scaler(avg_toc)
 
-        outputs[Aircraft.Wing.WETTED_AREA] = ssmw
+        d_station, d_chord, d_span, d_ckt = d_calc_station_integral(
+            input_station_dist, bwb_chord_per_semispan_dist, span, ckt
+        )
+
+        # every thickness to chord ratio is shared by the panels on both sides
+        d_toc = np.zeros_like(bwb_thickness_to_chord_dist)
+        d_toc[1:] += 0.5 * thickness_to_chord_scaler * d_ckt
+        d_toc[:-1] += 0.5 * thickness_to_chord_scaler * d_ckt
+
+        J[Aircraft.Wing.WETTED_AREA, Aircraft.Wing.SPAN] = d_span
+        J[Aircraft.Wing.WETTED_AREA, 'BWB_INPUT_STATION_DIST'] = d_station
+        J[Aircraft.Wing.WETTED_AREA, 'BWB_CHORD_PER_SEMISPAN_DIST'] = d_chord
+        J[Aircraft.Wing.WETTED_AREA, 'BWB_THICKNESS_TO_CHORD_DIST'] = d_toc
 
 
 class _Tail(om.ExplicitComponent):
@@ -685,24 +808,35 @@ class _Tail(om.ExplicitComponent):
     def initialize(self):
         add_aviary_option(self, Aircraft.Propulsion.TOTAL_NUM_FUSELAGE_ENGINES)
         add_aviary_option(self, Aircraft.Wing.SPAN_EFFICIENCY_REDUCTION)
+        declare_num_designs(self)
 
     def setup(self):
-        self.add_input(Names.XMULTH, 0.0, units='unitless')
-        self.add_input(Names.XMULTV, 0.0, units='unitless')
+        shape = design_shape(self.options['num_designs'])
+
+        self.add_input(Names.XMULTH, 0.0, shape=shape, units='unitless')
+        self.add_input(Names.XMULTV, 0.0, shape=shape, units='unitless')
 
-        add_aviary_input(self, Aircraft.HorizontalTail.AREA, units='ft**2')
+        add_design_input(self, Aircraft.HorizontalTail.AREA, shape=shape, units='ft**2')
 
-        add_aviary_input(self, Aircraft.HorizontalTail.VERTICAL_TAIL_FRACTION, units='unitless')
+        add_design_input(
+            self, Aircraft.HorizontalTail.VERTICAL_TAIL_FRACTION, shape=shape, units='unitless'
+        )
 
-        add_aviary_input(self, Aircraft.HorizontalTail.WETTED_AREA_SCALER, units='unitless')
+        add_design_input(
+            self, Aircraft.HorizontalTail.WETTED_AREA_SCALER, shape=shape, units='unitless'
+        )
 
-        add_aviary_input(self, Aircraft.VerticalTail.AREA, units='ft**2')
-        add_aviary_input(self, Aircraft.VerticalTail.WETTED_AREA_SCALER, units='unitless')
+        add_design_input(self, Aircraft.VerticalTail.AREA, shape=shape, units='ft**2')
+        add_design_input(
+            self, Aircraft.VerticalTail.WETTED_AREA_SCALER, shape=shape, units='unitless'
+        )
 
-        add_aviary_output(self, Aircraft.HorizontalTail.WETTED_AREA, units='ft**2')
-        add_aviary_output(self, Aircraft.VerticalTail.WETTED_AREA, units='ft**2')
+        add_design_output(self, Aircraft.HorizontalTail.WETTED_AREA, shape=shape, units='ft**2')
+        add_design_output(self, Aircraft.VerticalTail.WETTED_AREA, shape=shape, units='ft**2')
 
     def setup_partials(self):
+        rows, cols = design_partials(self.options['num_designs'])
+
         self.declare_partials(
             Aircraft.HorizontalTail.WETTED_AREA,
             [
@@ -710,11 +844,15 @@ class _Tail(om.ExplicitComponent):
                 Aircraft.HorizontalTail.AREA,
                 Aircraft.HorizontalTail.WETTED_AREA_SCALER,
             ],
+            rows=rows,
+            cols=cols,
         )
 
         self.declare_partials(
             Aircraft.VerticalTail.WETTED_AREA,
             [Names.XMULTV, Aircraft.VerticalTail.AREA, Aircraft.VerticalTail.WETTED_AREA_SCALER],
+            rows=rows,
+            cols=cols,
         )
 
         redux = self.options[Aircraft.Wing.SPAN_EFFICIENCY_REDUCTION]
@@ -723,6 +861,8 @@ class _Tail(om.ExplicitComponent):
             self.declare_partials(
                 Aircraft.HorizontalTail.WETTED_AREA,
                 [Aircraft.HorizontalTail.VERTICAL_TAIL_FRACTION],
+                rows=rows,
+                cols=cols,
             )
 
     def compute(self, inputs, outputs, discrete_inputs=None, discrete_outputs=None):
@@ -836,26 +976,39 @@ class _Fuselage(om.ExplicitComponent):
     def initialize(self):
         add_aviary_option(self, Aircraft.Fuselage.NUM_FUSELAGES)
         add_aviary_option(self, Settings.VERBOSITY)
+        declare_num_designs(self)
 
     def setup(self):
-        self.add_input(Names.CROOTB, 0.0, units='unitless')
-        self.add_input(Names.CROTVT, 0.0, units='unitless')
-        self.add_input(Names.CRTHTB, 0.0, units='unitless')
+        shape = design_shape(self.options['num_designs'])
 
-        add_aviary_input(self, Aircraft.Fuselage.AVG_DIAMETER, units='ft')
-        add_aviary_input(self, Aircraft.Fuselage.LENGTH, units='ft')
-        add_aviary_input(self, Aircraft.Fuselage.WETTED_AREA_SCALER, units='unitless')
+        self.add_input(Names.CROOTB, 0.0, shape=shape, units='unitless')
+        self.add_input(Names.CROTVT, 0.0, shape=shape, units='unitless')
+        self.add_input(Names.CRTHTB, 0.0, shape=shape, units='unitless')
 
-        add_aviary_input(self, Aircraft.HorizontalTail.THICKNESS_TO_CHORD, units='unitless')
-        add_aviary_input(self, Aircraft.HorizontalTail.VERTICAL_TAIL_FRACTION, units='unitless')
-        add_aviary_input(self, Aircraft.VerticalTail.THICKNESS_TO_CHORD, units='unitless')
-        add_aviary_input(self, Aircraft.Wing.THICKNESS_TO_CHORD, units='unitless')
+        add_design_input(self, Aircraft.Fuselage.AVG_DIAMETER, shape=shape, units='ft')
+        add_design_input(self, Aircraft.Fuselage.LENGTH, shape=shape, units='ft')
+        add_design_input(self, Aircraft.Fuselage.WETTED_AREA_SCALER, shape=shape, units='unitless')
 
-        add_aviary_output(self, Aircraft.Fuselage.CROSS_SECTION, units='ft**2')
-        add_aviary_output(self, Aircraft.Fuselage.WETTED_AREA, units='ft**2')
+        add_design_input(
+            self, Aircraft.HorizontalTail.THICKNESS_TO_CHORD, shape=shape, units='unitless'
+        )
+        add_design_input(
+            self, Aircraft.HorizontalTail.VERTICAL_TAIL_FRACTION, shape=shape, units='unitless'
+        )
+        add_design_input(
+            self, Aircraft.VerticalTail.THICKNESS_TO_CHORD, shape=shape, units='unitless'
+        )
+        add_design_input(self, Aircraft.Wing.THICKNESS_TO_CHORD, shape=shape, units='unitless')
+
+        add_design_output(self, Aircraft.Fuselage.CROSS_SECTION, shape=shape, units='ft**2')
+        add_design_output(self, Aircraft.Fuselage.WETTED_AREA, shape=shape, units='ft**2')
 
     def setup_partials(self):
-        self.declare_partials(Aircraft.Fuselage.CROSS_SECTION, Aircraft.Fuselage.AVG_DIAMETER)
+        rows, cols = design_partials(self.options['num_designs'])
+
+        self.declare_partials(
+            Aircraft.Fuselage.CROSS_SECTION, Aircraft.Fuselage.AVG_DIAMETER, rows=rows, cols=cols
+        )
 
         self.declare_partials(
             Aircraft.Fuselage.WETTED_AREA,
@@ -871,6 +1024,8 @@ class _Fuselage(om.ExplicitComponent):
                 Names.CROTVT,
                 Names.CRTHTB,
             ],
+            rows=rows,
+            cols=cols,
         )
 
     def compute(self, inputs, outputs, discrete_inputs=None, discrete_outputs=None):
@@ -881,43 +1036,43 @@ class _Fuselage(om.ExplicitComponent):
                 print('Aircraft.Fuselage.NUM_FUSELAGES must be positive.')
 
         avg_diam = inputs[Aircraft.Fuselage.AVG_DIAMETER]
-        if avg_diam <= 0.0:
+        if np.any(avg_diam.real <= 0.0):
             if verbosity > Verbosity.BRIEF:
                 print('Aircraft.Fuselage.AVG_DIAMETER must be positive.')
 
         cross_section = pi * (avg_diam / 2.0) ** 2.0
         outputs[Aircraft.Fuselage.CROSS_SECTION] = cross_section
 
-        if (0 < num_fuselages) and (0.0 < avg_diam):
-            CROOTB = inputs[Names.CROOTB]
-            thickness_chord = inputs[Aircraft.Wing.THICKNESS_TO_CHORD]
+        # the wetted area is zero for designs without a fuselage diameter
+        positive = (0 < num_fuselages) & (avg_diam.real > 0.0)
+        avg_diam = np.where(positive, avg_diam, 1.0)
 
-            CRTHTB = inputs[Names.CRTHTB]
+        CROOTB = inputs[Names.CROOTB]
+        thickness_chord = inputs[Aircraft.Wing.THICKNESS_TO_CHORD]
 
-            scaler = inputs[Aircraft.Fuselage.WETTED_AREA_SCALER]
-            ht_thickness_chord = inputs[Aircraft.HorizontalTail.THICKNESS_TO_CHORD]
+        CRTHTB = inputs[Names.CRTHTB]
 
-            vertical_tail_fraction = inputs[Aircraft.HorizontalTail.VERTICAL_TAIL_FRACTION]
+        scaler = inputs[Aircraft.Fuselage.WETTED_AREA_SCALER]
+        ht_thickness_chord = inputs[Aircraft.HorizontalTail.THICKNESS_TO_CHORD]
 
-            CROTVT = inputs[Names.CROTVT]
+        vertical_tail_fraction = inputs[Aircraft.HorizontalTail.VERTICAL_TAIL_FRACTION]
 
-            length = inputs[Aircraft.Fuselage.LENGTH]
-            vt_thickness_chord = inputs[Aircraft.VerticalTail.THICKNESS_TO_CHORD]
+        CROTVT = inputs[Names.CROTVT]
 
-            cfa = calc_fuselage_adjustment(CROOTB, thickness_chord)
-            cfah = calc_fuselage_adjustment(CRTHTB, ht_thickness_chord)
-            cfav = calc_fuselage_adjustment(CROTVT, vt_thickness_chord)
+        length = inputs[Aircraft.Fuselage.LENGTH]
+        vt_thickness_chord = inputs[Aircraft.VerticalTail.THICKNESS_TO_CHORD]
 
-            wetted_area = scaler * (
-                pi * avg_diam**2.0 * (length / avg_diam - 1.7)
-                - 2.0 * cfa
-                - 2.0 * cfah * (1.0 - vertical_tail_fraction)
-                - cfav
-            )
-        else:
-            wetted_area = 0.0
+        cfa = calc_fuselage_adjustment(CROOTB, thickness_chord)
+        cfah = calc_fuselage_adjustment(CRTHTB, ht_thickness_chord)
+        cfav = calc_fuselage_adjustment(CROTVT, vt_thickness_chord)
 
-        outputs[Aircraft.Fuselage.WETTED_AREA] = wetted_area
+        wetted_area = scaler * (
+            pi * avg_diam**2.0 * (length / avg_diam - 1.7)
+            - 2.0 * cfa
+            - 2.0 * cfah * (1.0 - vertical_tail_fraction)
+            - cfav
+        )
+        outputs[Aircraft.Fuselage.WETTED_AREA] = np.where(positive, wetted_area, 0.0)
 
     def compute_partials(self, inputs, J, discrete_inputs=None):
         num_fuselages = self.options[Aircraft.Fuselage.NUM_FUSELAGES]
@@ -926,78 +1081,67 @@ class _Fuselage(om.ExplicitComponent):
 
         J[Aircraft.Fuselage.CROSS_SECTION, Aircraft.Fuselage.AVG_DIAMETER] = 0.5 * pi * avg_diam
 
-        if (0 < num_fuselages) and (0.0 < avg_diam):
-            CROOTB = inputs[Names.CROOTB]
-            CRTHTB = inputs[Names.CRTHTB]
-            CROTVT = inputs[Names.CROTVT]
+        # the wetted area and its partials are zero for designs without a fuselage diameter
+        positive = (0 < num_fuselages) & (avg_diam.real > 0.0)
+        avg_diam = np.where(positive, avg_diam, 1.0)
 
-            scaler = inputs[Aircraft.Fuselage.WETTED_AREA_SCALER]
+        CROOTB = inputs[Names.CROOTB]
+        CRTHTB = inputs[Names.CRTHTB]
+        CROTVT = inputs[Names.CROTVT]
 
-            thickness_chord = inputs[Aircraft.Wing.THICKNESS_TO_CHORD]
+        scaler = positive * inputs[Aircraft.Fuselage.WETTED_AREA_SCALER]
 
-            ht_thickness_chord = inputs[Aircraft.HorizontalTail.THICKNESS_TO_CHORD]
+        thickness_chord = inputs[Aircraft.Wing.THICKNESS_TO_CHORD]
 
-            vt_thickness_chord = inputs[Aircraft.VerticalTail.THICKNESS_TO_CHORD]
+        ht_thickness_chord = inputs[Aircraft.HorizontalTail.THICKNESS_TO_CHORD]
 
-            length = inputs[Aircraft.Fuselage.LENGTH]
-            vertical_tail_fraction = inputs[Aircraft.HorizontalTail.VERTICAL_TAIL_FRACTION]
+        vt_thickness_chord = inputs[Aircraft.VerticalTail.THICKNESS_TO_CHORD]
 
-            cfa = calc_fuselage_adjustment(CROOTB, thickness_chord)
-            cfah = calc_fuselage_adjustment(CRTHTB, ht_thickness_chord)
-            cfav = calc_fuselage_adjustment(CROTVT, vt_thickness_chord)
+        length = inputs[Aircraft.Fuselage.LENGTH]
+        vertical_tail_fraction = inputs[Aircraft.HorizontalTail.VERTICAL_TAIL_FRACTION]
 
-            dcfa = d_calc_fuselage_adjustment(CROOTB, thickness_chord)
-            dcfah = d_calc_fuselage_adjustment(CRTHTB, ht_thickness_chord)
-            dcfav = d_calc_fuselage_adjustment(CROTVT, vt_thickness_chord)
+        cfa = calc_fuselage_adjustment(CROOTB, thickness_chord)
+        cfah = calc_fuselage_adjustment(CRTHTB, ht_thickness_chord)
+        cfav = calc_fuselage_adjustment(CROTVT, vt_thickness_chord)
 
-            J[Aircraft.Fuselage.WETTED_AREA, Aircraft.Fuselage.AVG_DIAMETER] = (
-                scaler * pi * (length - 3.4 * avg_diam)
-            )
+        dcfa = d_calc_fuselage_adjustment(CROOTB, thickness_chord)
+        dcfah = d_calc_fuselage_adjustment(CRTHTB, ht_thickness_chord)
+        dcfav = d_calc_fuselage_adjustment(CROTVT, vt_thickness_chord)
 
-            J[Aircraft.Fuselage.WETTED_AREA, Aircraft.Fuselage.LENGTH] = scaler * pi * avg_diam
+        J[Aircraft.Fuselage.WETTED_AREA, Aircraft.Fuselage.AVG_DIAMETER] = (
+            scaler * pi * (length - 3.4 * avg_diam)
+        )
 
-            J[Aircraft.Fuselage.WETTED_AREA, Aircraft.Fuselage.WETTED_AREA_SCALER] = (
-                pi * avg_diam**2.0 * (length / avg_diam - 1.7)
-                - 2.0 * cfa
-                - 2.0 * cfah * (1.0 - vertical_tail_fraction)
-                - cfav
-            )
+        J[Aircraft.Fuselage.WETTED_AREA, Aircraft.Fuselage.LENGTH] = scaler * pi * avg_diam
 
-            J[Aircraft.Fuselage.WETTED_AREA, Names.CROOTB] = scaler * -2.0 * dcfa[0]
+        J[Aircraft.Fuselage.WETTED_AREA, Aircraft.Fuselage.WETTED_AREA_SCALER] = positive * (
+            pi * avg_diam**2.0 * (length / avg_diam - 1.7)
+            - 2.0 * cfa
+            - 2.0 * cfah * (1.0 - vertical_tail_fraction)
+            - cfav
+        )
 
-            J[Aircraft.Fuselage.WETTED_AREA, Names.CRTHTB] = (
-                scaler * -2.0 * dcfah[0] * (1.0 - vertical_tail_fraction)
-            )
+        J[Aircraft.Fuselage.WETTED_AREA, Names.CROOTB] = scaler * -2.0 * dcfa[0]
 
-            J[Aircraft.Fuselage.WETTED_AREA, Names.CROTVT] = scaler * -dcfav[0]
+        J[Aircraft.Fuselage.WETTED_AREA, Names.CRTHTB] = (
+            scaler * -2.0 * dcfah[0] * (1.0 - vertical_tail_fraction)
+        )
 
-            J[Aircraft.Fuselage.WETTED_AREA, Aircraft.Wing.THICKNESS_TO_CHORD] = (
-                scaler * -2.0 * dcfa[1]
-            )
+        J[Aircraft.Fuselage.WETTED_AREA, Names.CROTVT] = scaler * -dcfav[0]
 
-            J[Aircraft.Fuselage.WETTED_AREA, Aircraft.HorizontalTail.THICKNESS_TO_CHORD] = (
-                scaler * -2.0 * dcfah[1] * (1.0 - vertical_tail_fraction)
-            )
+        J[Aircraft.Fuselage.WETTED_AREA, Aircraft.Wing.THICKNESS_TO_CHORD] = scaler * -2.0 * dcfa[1]
 
-            J[Aircraft.Fuselage.WETTED_AREA, Aircraft.VerticalTail.THICKNESS_TO_CHORD] = (
-                scaler * -dcfav[1]
-            )
+        J[Aircraft.Fuselage.WETTED_AREA, Aircraft.HorizontalTail.THICKNESS_TO_CHORD] = (
+            scaler * -2.0 * dcfah[1] * (1.0 - vertical_tail_fraction)
+        )
 
-            J[Aircraft.Fuselage.WETTED_AREA, Aircraft.HorizontalTail.VERTICAL_TAIL_FRACTION] = (
-                scaler * 2.0 * cfah
-            )
-        else:
-            J[Aircraft.Fuselage.WETTED_AREA, Names.CROOTB] = J[
-                Aircraft.Fuselage.WETTED_AREA, Names.CRTHTB
-            ] = J[Aircraft.Fuselage.WETTED_AREA, Names.CROTVT] = J[
-                Aircraft.Fuselage.WETTED_AREA, Aircraft.Fuselage.AVG_DIAMETER
-            ] = J[Aircraft.Fuselage.WETTED_AREA, Aircraft.Fuselage.LENGTH] = J[
-                Aircraft.Fuselage.WETTED_AREA, Aircraft.Fuselage.WETTED_AREA_SCALER
-            ] = J[Aircraft.Fuselage.WETTED_AREA, Aircraft.HorizontalTail.THICKNESS_TO_CHORD] = J[
-                Aircraft.Fuselage.WETTED_AREA, Aircraft.HorizontalTail.VERTICAL_TAIL_FRACTION
-            ] = J[Aircraft.Fuselage.WETTED_AREA, Aircraft.VerticalTail.THICKNESS_TO_CHORD] = J[
-                Aircraft.Fuselage.WETTED_AREA, Aircraft.Wing.THICKNESS_TO_CHORD
-            ] = 0.0
+        J[Aircraft.Fuselage.WETTED_AREA, Aircraft.VerticalTail.THICKNESS_TO_CHORD] = (
+            scaler * -dcfav[1]
+        )
+
+        J[Aircraft.Fuselage.WETTED_AREA, Aircraft.HorizontalTail.VERTICAL_TAIL_FRACTION] = (
+            scaler * 2.0 * cfah
+        )
 
 
 class _FuselageRatios(om.ExplicitComponent):
@@ -1006,18 +1150,27 @@ class _FuselageRatios(om.ExplicitComponent):
     of aircraft geometry for FLOPS-based aerodynamics analysis.
     """
 
+    def initialize(self):
+        declare_num_designs(self)
+
     def setup(self):
-        add_aviary_input(self, Aircraft.Fuselage.AVG_DIAMETER, units='ft')
-        add_aviary_input(self, Aircraft.Fuselage.LENGTH, units='ft')
+        shape = design_shape(self.options['num_designs'])
 
-        add_aviary_input(self, Aircraft.Wing.AREA, units='ft**2')
-        add_aviary_input(self, Aircraft.Wing.ASPECT_RATIO, units='unitless')
-        add_aviary_input(self, Aircraft.Wing.GLOVE_AND_BAT, units='ft**2')
+        add_design_input(self, Aircraft.Fuselage.AVG_DIAMETER, shape=shape, units='ft')
+        add_design_input(self, Aircraft.Fuselage.LENGTH, shape=shape, units='ft')
 
-        add_aviary_output(self, Aircraft.Fuselage.DIAMETER_TO_WING_SPAN, units='unitless')
-        add_aviary_output(self, Aircraft.Fuselage.LENGTH_TO_DIAMETER, units='unitless')
+        add_design_input(self, Aircraft.Wing.AREA, shape=shape, units='ft**2')
+        add_design_input(self, Aircraft.Wing.ASPECT_RATIO, shape=shape, units='unitless')
+        add_design_input(self, Aircraft.Wing.GLOVE_AND_BAT, shape=shape, units='ft**2')
+
+        add_design_output(
+            self, Aircraft.Fuselage.DIAMETER_TO_WING_SPAN, shape=shape, units='unitless'
+        )
+        add_design_output(self, Aircraft.Fuselage.LENGTH_TO_DIAMETER, shape=shape, units='unitless')
 
     def setup_partials(self):
+        rows, cols = design_partials(self.options['num_designs'])
+
         self.declare_partials(
             Aircraft.Fuselage.DIAMETER_TO_WING_SPAN,
             [
@@ -1026,6 +1179,8 @@ class _FuselageRatios(om.ExplicitComponent):
                 Aircraft.Fuselage.AVG_DIAMETER,
                 Aircraft.Wing.GLOVE_AND_BAT,
             ],
+            rows=rows,
+            cols=cols,
         )
 
         self.declare_partials(
@@ -1034,6 +1189,8 @@ class _FuselageRatios(om.ExplicitComponent):
                 Aircraft.Fuselage.LENGTH,
                 Aircraft.Fuselage.AVG_DIAMETER,
             ],
+            rows=rows,
+            cols=cols,
         )
 
     def compute(self, inputs, outputs, discrete_inputs=None, discrete_outputs=None):
@@ -1046,12 +1203,14 @@ class _FuselageRatios(om.ExplicitComponent):
 
         outputs[Aircraft.Fuselage.DIAMETER_TO_WING_SPAN] = diam_to_wing_span
 
-        if 0.0 < avg_diam:
-            length = inputs[Aircraft.Fuselage.LENGTH]
+        positive = avg_diam.real > 0.0
+        length = inputs[Aircraft.Fuselage.LENGTH]
 
-            length_to_diam = length / avg_diam
-        else:
-            length_to_diam = 100.0  # FLOPS default value
+        length_to_diam = np.where(
+            positive,
+            length / np.where(positive, avg_diam, 1.0),
+            100.0,  # FLOPS default value
+        )
 
         outputs[Aircraft.Fuselage.LENGTH_TO_DIAMETER] = length_to_diam
 
@@ -1078,16 +1237,12 @@ class _FuselageRatios(om.ExplicitComponent):
             0.5 * avg_diam * aspect_ratio * fact2
         )
 
-        if 0.0 < avg_diam:
-            length = inputs[Aircraft.Fuselage.LENGTH]
+        positive = avg_diam.real > 0.0
+        avg_diam = np.where(positive, avg_diam, 1.0)
+        length = inputs[Aircraft.Fuselage.LENGTH]
 
-            J[Aircraft.Fuselage.LENGTH_TO_DIAMETER, Aircraft.Fuselage.AVG_DIAMETER] = (
-                -length / avg_diam**2
-            )
-
-            J[Aircraft.Fuselage.LENGTH_TO_DIAMETER, Aircraft.Fuselage.LENGTH] = 1.0 / avg_diam
+        J[Aircraft.Fuselage.LENGTH_TO_DIAMETER, Aircraft.Fuselage.AVG_DIAMETER] = (
+            -length * positive / avg_diam**2
+        )
 
-        else:
-            J[Aircraft.Fuselage.LENGTH_TO_DIAMETER, Aircraft.Fuselage.AVG_DIAMETER] = J[
-                Aircraft.Fuselage.LENGTH_TO_DIAMETER, Aircraft.Fuselage.LENGTH
-            ] = 0.0
+        J[Aircraft.Fuselage.LENGTH_TO_DIAMETER, Aircraft.Fuselage.LENGTH] = positive / avg_diam
@@ -278,6 +278,9 @@ class BWBWingPrelimTest(unittest.TestCase):
             prob.get_val(Aircraft.Wing.LOAD_FRACTION), 0.531071664997850196, tolerance=1e-10
         )
 
+        partial_data = prob.check_partials(out_stream=None, method='cs')
+        assert_check_partials(partial_data, atol=1e-10, rtol=1e-10)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -7,6 +7,7 @@ from openmdao.utils.testing_utils import use_tempdirs
 
 from aviary.subsystems.geometry.flops_based.characteristic_lengths import (
     BWBWingCharacteristicLength,
+    ComponentTable,
     WingCharacteristicLength,
     OtherCharacteristicLengths,
 )
@@ -100,6 +101,158 @@ class CharacteristicLengthsTest(unittest.TestCase):
         assert_match_varnames(self.prob.model)
 
 
+class CharacteristicLengthsNumDesignsTest(unittest.TestCase):
+    """Test characteristic lengths of several designs evaluated at once."""
+
+    def test_case_num_designs(self):
+        prob = om.Problem()
+
+        prob.model.add_subsystem(
+            'other_char_lengths',
+            OtherCharacteristicLengths(
+                num_designs=3, **{Aircraft.Engine.NUM_ENGINES: np.array([2, 0, 3])}
+            ),
+            promotes_outputs=['*'],
+            promotes_inputs=['*'],
+        )
+
+        prob.setup(check=False, force_alloc_complex=True)
+
+        # the second design has no canard
+        prob.set_val(Aircraft.Canard.AREA, val=np.array([100.0, 0.0, 50.0]))
+        prob.set_val(Aircraft.Canard.ASPECT_RATIO, val=np.array([4.0, 4.0, 2.0]))
+        prob.set_val(Aircraft.Canard.THICKNESS_TO_CHORD, val=np.array([0.1, 0.1, 0.12]))
+        prob.set_val(Aircraft.Fuselage.AVG_DIAMETER, val=np.array([12.75, 13.0, 10.0]))
+        prob.set_val(Aircraft.Fuselage.LENGTH, val=np.array([128.0, 130.0, 100.0]))
+        prob.set_val(Aircraft.HorizontalTail.AREA, val=np.array([355.0, 300.0, 400.0]))
+        prob.set_val(Aircraft.HorizontalTail.ASPECT_RATIO, val=np.array([6.0, 3.0, 4.0]))
+        prob.set_val(Aircraft.VerticalTail.AREA, val=np.array([284.0, 250.0, 324.0]))
+        prob.set_val(Aircraft.VerticalTail.ASPECT_RATIO, val=np.array([1.75, 1.0, 4.0]))
+        prob.set_val(
+            Aircraft.Nacelle.AVG_DIAMETER,
+            val=np.array([[6.0, 4.25, 9.6], [5.0, 4.0, 8.0], [7.0, 5.0, 10.0]]),
+        )
+        prob.set_val(
+            Aircraft.Nacelle.AVG_LENGTH,
+            val=np.array([[8.4, 5.75, 10.0], [10.0, 6.0, 12.0], [7.0, 5.0, 15.0]]),
+        )
+
+        prob.run_model()
+
+        assert_near_equal(
+            prob.get_val(Aircraft.Canard.CHARACTERISTIC_LENGTH),
+            np.array([5.0, 0.0, 5.0]),
+            tolerance=1e-10,
+        )
+        assert_near_equal(
+            prob.get_val(Aircraft.Canard.FINENESS), np.array([0.1, 0.0, 0.12]), tolerance=1e-10
+        )
+        assert_near_equal(
+            prob.get_val(Aircraft.HorizontalTail.CHARACTERISTIC_LENGTH),
+            np.array([7.691987173, 10.0, 10.0]),
+            tolerance=1e-9,
+        )
+        assert_near_equal(
+            prob.get_val(Aircraft.VerticalTail.CHARACTERISTIC_LENGTH),
+            np.array([12.739141034, 15.811388301, 9.0]),
+            tolerance=1e-9,
+        )
+        assert_near_equal(
+            prob.get_val(Aircraft.Fuselage.FINENESS),
+            np.array([10.039215686, 10.0, 10.0]),
+            tolerance=1e-9,
+        )
+        assert_near_equal(
+            prob.get_val(Aircraft.Nacelle.CHARACTERISTIC_LENGTH),
+            np.array([[8.4, 0.0, 10.0], [10.0, 0.0, 12.0], [7.0, 0.0, 15.0]]),
+            tolerance=1e-10,
+        )
+        assert_near_equal(
+            prob.get_val(Aircraft.Nacelle.FINENESS),
+            np.array([[1.4, 0.0, 1.041666666667], [2.0, 0.0, 1.5], [1.0, 0.0, 1.5]]),
+            tolerance=1e-10,
+        )
+
+        partial_data = prob.check_partials(out_stream=None, method='cs')
+        assert_check_partials(partial_data, atol=1e-10, rtol=1e-10)
+
+
+class ComponentTableTest(unittest.TestCase):
+    """Test the table of component wetted areas, lengths, fineness and laminar flow."""
+
+    def test_case_multibody(self):
+        prob = om.Problem()
+
+        options = {
+            Aircraft.Engine.NUM_ENGINES: np.array([2, 0, 3]),
+            Aircraft.Fuselage.NUM_FUSELAGES: 2,
+            Aircraft.HorizontalTail.NUM_TAILS: 1,
+            Aircraft.VerticalTail.NUM_TAILS: 2,
+        }
+
+        prob.model.add_subsystem(
+            'component_table',
+            ComponentTable(num_canards=1, **options),
+            promotes_outputs=['*'],
+            promotes_inputs=['*'],
+        )
+
+        prob.setup(check=False, force_alloc_complex=True)
+
+        prob.set_val(Aircraft.Wing.WETTED_AREA, val=2400.0)
+        prob.set_val(Aircraft.Wing.CHARACTERISTIC_LENGTH, val=12.0)
+        prob.set_val(Aircraft.Wing.FINENESS, val=0.13)
+        prob.set_val(Aircraft.Wing.LAMINAR_FLOW_UPPER, val=0.1)
+        prob.set_val(Aircraft.HorizontalTail.WETTED_AREA, val=600.0)
+        prob.set_val(Aircraft.HorizontalTail.CHARACTERISTIC_LENGTH, val=7.5)
+        prob.set_val(Aircraft.VerticalTail.WETTED_AREA, val=450.0)
+        prob.set_val(Aircraft.VerticalTail.CHARACTERISTIC_LENGTH, val=12.5)
+        prob.set_val(Aircraft.Fuselage.WETTED_AREA, val=4000.0)
+        prob.set_val(Aircraft.Fuselage.CHARACTERISTIC_LENGTH, val=128.0)
+        prob.set_val(Aircraft.Fuselage.FINENESS, val=10.0)
+        prob.set_val(Aircraft.Fuselage.LAMINAR_FLOW_LOWER, val=0.05)
+        prob.set_val(Aircraft.Nacelle.WETTED_AREA, val=np.array([270.0, 0.0, 160.0]))
+        prob.set_val(Aircraft.Nacelle.CHARACTERISTIC_LENGTH, val=np.array([12.0, 0.0, 8.0]))
+        prob.set_val(Aircraft.Nacelle.FINENESS, val=np.array([1.5, 0.0, 1.2]))
+        prob.set_val(Aircraft.Canard.WETTED_AREA, val=150.0)
+        prob.set_val(Aircraft.Canard.CHARACTERISTIC_LENGTH, val=5.0)
+
+        prob.run_model()
+
+        # wing, 1 horizontal tail, 2 vertical tails, 2 fuselages, 5 nacelles and a canard
+        assert_near_equal(
+            prob.get_val(Aircraft.Design.WETTED_AREAS),
+            np.array(
+                [2400.0, 600.0, 450.0, 450.0, 4000.0, 4000.0]
+                + [270.0, 270.0, 160.0, 160.0, 160.0, 150.0]
+            ),
+            tolerance=1e-10,
+        )
+        assert_near_equal(
+            prob.get_val(Aircraft.Design.CHARACTERISTIC_LENGTHS),
+            np.array([12.0, 7.5, 12.5, 12.5, 128.0, 128.0, 12.0, 12.0, 8.0, 8.0, 8.0, 5.0]),
+            tolerance=1e-10,
+        )
+        assert_near_equal(
+            prob.get_val(Aircraft.Design.FINENESS),
+            np.array([0.13, 0.0, 0.0, 0.0, 10.0, 10.0, 1.5, 1.5, 1.2, 1.2, 1.2, 0.0]),
+            tolerance=1e-10,
+        )
+        assert_near_equal(
+            prob.get_val(Aircraft.Design.LAMINAR_FLOW_UPPER),
+            np.array([0.1] + [0.0] * 11),
+            tolerance=1e-10,
+        )
+        assert_near_equal(
+            prob.get_val(Aircraft.Design.LAMINAR_FLOW_LOWER),
+            np.array([0.0] * 4 + [0.05, 0.05] + [0.0] * 6),
+            tolerance=1e-10,
+        )
+
+        partial_data = prob.check_partials(out_stream=None, method='cs')
+        assert_check_partials(partial_data, atol=1e-10, rtol=1e-10)
+
+
 @use_tempdirs
 class BWBWingCharacteristicLengthsTest(unittest.TestCase):
     """Test characteristic length and fineness ratio calculations for BWB."""
@@ -5,14 +5,17 @@ from openmdao.utils.testing_utils import use_tempdirs
 
 from aviary.subsystems.geometry.flops_based.fuselage import (
     BWBDetailedCabinLayout,
+    BWBDetailedCabinLayoutImplicit,
     BWBSimpleCabinLayout,
     DetailedCabinLayout,
     SimpleCabinLayout,
     BWBFuselagePrelim,
+    _bwb_cabin_areas,
+    _detailed_cabin_layout,
 )
 from aviary.utils.aviary_values import AviaryValues
 from aviary.variable_info.functions import setup_model_options
-from aviary.variable_info.variables import Aircraft, Settings
+from aviary.variable_info.variables import Aircraft, Mission, Settings
 
 
 class SimpleCabinLayoutTest(unittest.TestCase):
@@ -168,6 +171,67 @@ class BWBDetailedCabinLayoutTest(unittest.TestCase):
         assert_near_equal(root_chord, 38.5, tolerance=1e-9)
 
 
+class BWBDetailedCabinLayoutImplicitTest(unittest.TestCase):
+    """Test cabin layout computation with a real-valued number of bays."""
+
+    def setUp(self):
+        self.prob = om.Problem()
+
+    def test_case1(self):
+        prob = self.prob
+        options = self.aviary_options = AviaryValues()
+        options.set_val(Settings.VERBOSITY, 1, units='unitless')
+
+        options.set_val(Aircraft.CrewPayload.Design.NUM_BUSINESS_CLASS, 100, units='unitless')
+        options.set_val(Aircraft.CrewPayload.Design.NUM_FIRST_CLASS, 28, units='unitless')
+        options.set_val(Aircraft.CrewPayload.Design.NUM_TOURIST_CLASS, 340, units='unitless')
+        options.set_val(Aircraft.CrewPayload.Design.NUM_SEATS_ABREAST_BUSINESS, 4, units='unitless')
+        options.set_val(Aircraft.CrewPayload.Design.NUM_SEATS_ABREAST_FIRST, 4, units='unitless')
+        options.set_val(Aircraft.CrewPayload.Design.NUM_SEATS_ABREAST_TOURIST, 6, units='unitless')
+        options.set_val(Aircraft.CrewPayload.Design.SEAT_PITCH_BUSINESS, 39.0, units='inch')
+        options.set_val(Aircraft.CrewPayload.Design.SEAT_PITCH_FIRST, 61.0, units='inch')
+        options.set_val(Aircraft.CrewPayload.Design.SEAT_PITCH_TOURIST, 32.0, units='inch')
+        options.set_val(Aircraft.BWB.MAX_NUM_BAYS, 0, units='unitless')
+
+        prob.model.add_subsystem(
+            'layout',
+            BWBDetailedCabinLayoutImplicit(),
+            promotes_outputs=['*'],
+            promotes_inputs=['*'],
+        )
+        setup_model_options(self.prob, options)
+        prob.setup(check=False, force_alloc_complex=True)
+        prob.set_val(Aircraft.BWB.PASSENGER_LEADING_EDGE_SWEEP, val=45.0, units='deg')
+        prob.set_val(Aircraft.Fuselage.HEIGHT_TO_WIDTH_RATIO, val=0.11, units='unitless')
+        prob.set_val('Rear_spar_percent_chord', val=0.7, units='unitless')
+        prob.run_model()
+
+        num_bays = prob.get_val(Aircraft.BWB.NUM_BAYS)
+        assert_near_equal(num_bays, [7], tolerance=1e-6)
+
+        fuselage_length = prob.get_val(Aircraft.Fuselage.LENGTH)
+        assert_near_equal(fuselage_length, 111.76379161, tolerance=1e-9)
+
+        pax_compart_length = prob.get_val(Aircraft.Fuselage.PASSENGER_COMPARTMENT_LENGTH)
+        assert_near_equal(pax_compart_length, 78.23465413, tolerance=1e-9)
+
+        fuselage_width = prob.get_val(Aircraft.Fuselage.MAX_WIDTH)
+        assert_near_equal(fuselage_width, 79.46978863, tolerance=1e-9)
+
+        fuselage_height = prob.get_val(Aircraft.Fuselage.MAX_HEIGHT)
+        assert_near_equal(fuselage_height, 12.29401708, tolerance=1e-9)
+
+        cabin_area = prob.get_val(Aircraft.Fuselage.CABIN_AREA)
+        assert_near_equal(cabin_area, 4638.43914435, tolerance=1e-9)
+
+        root_chord = prob.get_val(Aircraft.Wing.ROOT_CHORD)
+        assert_near_equal(root_chord, 38.5, tolerance=1e-9)
+
+        # smooth_int_tanh is not complex step safe
+        partial_data = prob.check_partials(out_stream=None, method='fd', form='central')
+        assert_check_partials(partial_data, atol=1e-6, rtol=1e-6)
+
+
 @use_tempdirs
 class BWBFuselagePrelimTest(unittest.TestCase):
     """Test simple cabin layout computation."""
@@ -200,5 +264,149 @@ class BWBFuselagePrelimTest(unittest.TestCase):
         assert_check_partials(partial_data, atol=1e-10, rtol=1e-10)
 
 
+class CabinLayoutCacheTest(unittest.TestCase):
+    """Test that the cached cabin layouts match a fresh layout and follow the inputs."""
+
+    def _run(self, layout, options, inputs):
+        prob = om.Problem()
+        prob.model.add_subsystem('layout', layout, promotes_outputs=['*'], promotes_inputs=['*'])
+        setup_model_options(prob, options)
+        prob.setup(check=False, force_alloc_complex=True)
+
+        for name, (val, units) in inputs.items():
+            prob.set_val(name, val=val, units=units)
+
+        prob.run_model()
+
+        return {
+            meta['prom_name']: meta['val']
+            for _, meta in prob.model.list_outputs(out_stream=None, prom_name=True)
+        }
+
+    def _assert_outputs_equal(self, actual, desired):
+        self.assertEqual(actual.keys(), desired.keys())
+        for name in desired:
+            assert_near_equal(actual[name], desired[name], tolerance=1e-15)
+
+    def _detailed_options(self, num_first_class=11, num_tourist_class=158):
+        options = AviaryValues()
+        options.set_val(Settings.VERBOSITY, 0, units='unitless')
+        options.set_val(
+            Aircraft.CrewPayload.Design.NUM_FIRST_CLASS, num_first_class, units='unitless'
+        )
+        options.set_val(
+            Aircraft.CrewPayload.Design.NUM_TOURIST_CLASS, num_tourist_class, units='unitless'
+        )
+        options.set_val(Aircraft.Engine.NUM_ENGINES, [2], units='unitless')
+
+        return options
+
+    def _bwb_options(self, num_tourist_class=340):
+        options = AviaryValues()
+        options.set_val(Settings.VERBOSITY, 0, units='unitless')
+        options.set_val(Aircraft.CrewPayload.Design.NUM_BUSINESS_CLASS, 100, units='unitless')
+        options.set_val(Aircraft.CrewPayload.Design.NUM_FIRST_CLASS, 28, units='unitless')
+        options.set_val(
+            Aircraft.CrewPayload.Design.NUM_TOURIST_CLASS, num_tourist_class, units='unitless'
+        )
+        options.set_val(Aircraft.CrewPayload.Design.NUM_SEATS_ABREAST_BUSINESS, 4, units='unitless')
+        options.set_val(Aircraft.CrewPayload.Design.NUM_SEATS_ABREAST_FIRST, 4, units='unitless')
+        options.set_val(Aircraft.CrewPayload.Design.NUM_SEATS_ABREAST_TOURIST, 6, units='unitless')
+        options.set_val(Aircraft.CrewPayload.Design.SEAT_PITCH_BUSINESS, 39.0, units='inch')
+        options.set_val(Aircraft.CrewPayload.Design.SEAT_PITCH_FIRST, 61.0, units='inch')
+        options.set_val(Aircraft.CrewPayload.Design.SEAT_PITCH_TOURIST, 32.0, units='inch')
+        options.set_val(Aircraft.BWB.MAX_NUM_BAYS, 0, units='unitless')
+
+        return options
+
+    def _bwb_inputs(self, sweep=45.0):
+        return {
+            Aircraft.BWB.PASSENGER_LEADING_EDGE_SWEEP: (sweep, 'deg'),
+            Aircraft.Fuselage.HEIGHT_TO_WIDTH_RATIO: (0.11, 'unitless'),
+            'Rear_spar_percent_chord': (0.7, 'unitless'),
+        }
+
+    def test_detailed_cabin_layout(self):
+        inputs = {Mission.Design.RANGE: (3000.0, 'NM')}
+
+        _detailed_cabin_layout.cache_clear()
+        fresh = self._run(DetailedCabinLayout(), self._detailed_options(), inputs)
+        self.assertEqual(_detailed_cabin_layout.cache_info().misses, 1)
+
+        # the same configuration is a hit with the outputs of the fresh layout
+        cached = self._run(DetailedCabinLayout(), self._detailed_options(), inputs)
+        self.assertEqual(_detailed_cabin_layout.cache_info().hits, 1)
+        self._assert_outputs_equal(cached, fresh)
+
+        # more passengers are a new configuration with a longer fuselage
+        changed = self._run(
+            DetailedCabinLayout(), self._detailed_options(num_tourist_class=190), inputs
+        )
+        self.assertEqual(_detailed_cabin_layout.cache_info().misses, 2)
+        self.assertGreater(changed[Aircraft.Fuselage.LENGTH][0], fresh[Aircraft.Fuselage.LENGTH][0])
+
+        _detailed_cabin_layout.cache_clear()
+        self._assert_outputs_equal(
+            changed,
+            self._run(DetailedCabinLayout(), self._detailed_options(num_tourist_class=190), inputs),
+        )
+
+    def test_detailed_cabin_layout_range(self):
+        # without a first class, a short design range removes a lavatory
+        options = self._detailed_options(num_first_class=0)
+        short_range = {Mission.Design.RANGE: (1000.0, 'NM')}
+
+        _detailed_cabin_layout.cache_clear()
+        long_range = self._run(
+            DetailedCabinLayout(), options, {Mission.Design.RANGE: (3000.0, 'NM')}
+        )
+        changed = self._run(DetailedCabinLayout(), options, short_range)
+        self.assertEqual(_detailed_cabin_layout.cache_info().misses, 2)
+        self.assertLess(
+            changed[Aircraft.Fuselage.LENGTH][0], long_range[Aircraft.Fuselage.LENGTH][0]
+        )
+
+        _detailed_cabin_layout.cache_clear()
+        self._assert_outputs_equal(changed, self._run(DetailedCabinLayout(), options, short_range))
+
+    def test_bwb_cabin_areas(self):
+        _bwb_cabin_areas.cache_clear()
+        fresh = self._run(BWBDetailedCabinLayoutImplicit(), self._bwb_options(), self._bwb_inputs())
+        self.assertEqual(_bwb_cabin_areas.cache_info().misses, 1)
+
+        cached = self._run(
+            BWBDetailedCabinLayoutImplicit(), self._bwb_options(), self._bwb_inputs()
+        )
+        self.assertEqual(_bwb_cabin_areas.cache_info().misses, 1)
+        self._assert_outputs_equal(cached, fresh)
+
+        # the sweep only changes the uncached aisle and side wall areas
+        swept = self._run(
+            BWBDetailedCabinLayoutImplicit(), self._bwb_options(), self._bwb_inputs(sweep=40.0)
+        )
+        self.assertEqual(_bwb_cabin_areas.cache_info().misses, 1)
+        self.assertNotEqual(swept[Aircraft.Fuselage.LENGTH][0], fresh[Aircraft.Fuselage.LENGTH][0])
+
+        # more passengers are a new configuration with a larger cabin
+        changed = self._run(
+            BWBDetailedCabinLayoutImplicit(),
+            self._bwb_options(num_tourist_class=400),
+            self._bwb_inputs(),
+        )
+        self.assertEqual(_bwb_cabin_areas.cache_info().misses, 2)
+        self.assertGreater(
+            changed[Aircraft.Fuselage.CABIN_AREA][0], fresh[Aircraft.Fuselage.CABIN_AREA][0]
+        )
+
+        _bwb_cabin_areas.cache_clear()
+        for options, inputs, outputs in (
+            (self._bwb_options(), self._bwb_inputs(sweep=40.0), swept),
+            (self._bwb_options(num_tourist_class=400), self._bwb_inputs(), changed),
+        ):
+            self._assert_outputs_equal(
+                outputs, self._run(BWBDetailedCabinLayoutImplicit(), options, inputs)
+            )
+
+
 if __name__ == '__main__':
     unittest.main()
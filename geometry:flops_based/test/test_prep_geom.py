@@ -218,6 +218,150 @@ class PrepGeomTest(unittest.TestCase):
         assert_check_partials(partial_data, atol=1e-12, rtol=1e-12)
 
 
+def _prep_geom_problem(num_designs=1, component_table=False):
+    """Return a problem of PrepGeom with the LargeSingleAisle1FLOPS options."""
+    prob = om.Problem()
+    model = prob.model
+
+    model.add_subsystem(
+        'prep_geom',
+        PrepGeom(num_designs=num_designs, component_table=component_table),
+        promotes=['*'],
+    )
+
+    # WingPrelim declares these inputs without the Aviary defaults
+    model.set_input_defaults(Aircraft.Wing.AREA, val=np.ones(num_designs), units='ft**2')
+    model.set_input_defaults(Aircraft.Wing.ASPECT_RATIO, val=np.ones(num_designs), units='unitless')
+
+    setup_model_options(prob, get_flops_data('LargeSingleAisle1FLOPS', preprocess=True))
+
+    prob.setup(check=False, force_alloc_complex=True)
+    prob.final_setup()
+
+    return prob
+
+
+def _prep_geom_inputs(prob):
+    """Return the units of the Aviary inputs of a PrepGeom problem by name."""
+    return {
+        name: meta['units']
+        for name, meta in prob.list_indep_vars(out_stream=None)
+        if name.startswith('aircraft:')
+    }
+
+
+def _prep_geom_data():
+    """Return the LargeSingleAisle1FLOPS inputs with the canard test data."""
+    # the flops data has no canard
+    data = get_flops_inputs('LargeSingleAisle1FLOPS')
+    data.update(Canard_test_data)
+
+    return data
+
+
+class PrepGeomNumDesignsTest(unittest.TestCase):
+    """Test several designs evaluated at once against one run of PrepGeom per design."""
+
+    num_designs = 3
+
+    def test_case_num_designs(self):
+        single = _prep_geom_problem(component_table=True)
+        batch = _prep_geom_problem(self.num_designs, component_table=True)
+
+        data = _prep_geom_data()
+        inputs = _prep_geom_inputs(single)
+
+        # perturb every input of every design on its own
+        rng = np.random.default_rng(0)
+        values = {}
+        for name, units in inputs.items():
+            val = data.get_val(name, units) if name in data else single.get_val(name, units)
+            val = np.asarray(val, dtype=float)
+            values[name] = val * rng.uniform(0.9, 1.1, (self.num_designs,) + val.shape)
+
+        outputs = [
+            meta['prom_name']
+            for _, meta in single.model.list_outputs(out_stream=None, prom_name=True)
+            if meta['prom_name'].startswith('aircraft:')
+        ]
+
+        expected = {name: [] for name in outputs}
+        for design in range(self.num_designs):
+            for name, units in inputs.items():
+                single.set_val(name, values[name][design], units=units)
+
+            single.run_model()
+
+            for name in outputs:
+                expected[name].append(single.get_val(name).copy())
+
+        for name, units in inputs.items():
+            batch.set_val(name, values[name], units=units)
+
+        batch.run_model()
+
+        for name in outputs:
+            with self.subTest(name):
+                val = batch.get_val(name)
+                self.assertEqual(val.shape[0], self.num_designs)
+
+                for design in range(self.num_designs):
+                    assert_near_equal(
+                        val[design],
+                        np.reshape(expected[name][design], val[design].shape),
+                        tolerance=1e-12,
+                    )
+
+        partial_data = batch.check_partials(out_stream=None, method='cs')
+        assert_check_partials(partial_data, atol=1e-10, rtol=1e-10)
+
+
+class PrepGeomComponentTableTest(unittest.TestCase):
+    """Test the optional component table of PrepGeom."""
+
+    def test_no_table(self):
+        prob = _prep_geom_problem()
+
+        # without the table, the laminar flow inputs are not needed
+        inputs = _prep_geom_inputs(prob)
+        for kind in (Aircraft.Wing, Aircraft.Fuselage, Aircraft.Canard):
+            self.assertNotIn(kind.LAMINAR_FLOW_UPPER, inputs)
+            self.assertNotIn(kind.LAMINAR_FLOW_LOWER, inputs)
+
+        outputs = [
+            meta['prom_name']
+            for _, meta in prob.model.list_outputs(out_stream=None, prom_name=True)
+        ]
+        self.assertNotIn(Aircraft.Design.WETTED_AREAS, outputs)
+
+    def test_canard(self):
+        prob = _prep_geom_problem(component_table=True)
+
+        data = _prep_geom_data()
+        for name, units in _prep_geom_inputs(prob).items():
+            if name in data:
+                prob.set_val(name, data.get_val(name, units), units=units)
+
+        prob.run_model()
+
+        # the canard is the last component, with the values of the canard geometry
+        canard = (
+            (Aircraft.Design.WETTED_AREAS, Aircraft.Canard.WETTED_AREA),
+            (Aircraft.Design.CHARACTERISTIC_LENGTHS, Aircraft.Canard.CHARACTERISTIC_LENGTH),
+            (Aircraft.Design.FINENESS, Aircraft.Canard.FINENESS),
+        )
+        for table_name, name in canard:
+            self.assertGreater(prob.get_val(name)[0], 0.0)
+            assert_near_equal(prob.get_val(table_name)[-1], prob.get_val(name)[0], 1e-12)
+
+        # without canard area, the canard entries are zero
+        prob.set_val(Aircraft.Canard.AREA, 0.0, units='ft**2')
+        prob.run_model()
+
+        for table_name, _ in canard:
+            assert_near_equal(prob.get_val(table_name)[-1], 0.0, 1e-12)
+
+
 class _PrelimTest(unittest.TestCase):
     def setUp(self):
         self.prob = om.Problem()
@@ -741,6 +885,9 @@ class BWBWingTest(unittest.TestCase):
         exp1 = 17683.7562096
         assert_near_equal(out1, exp1, tolerance=1e-8)
 
+        partial_data = prob.check_partials(out_stream=None, method='cs')
+        assert_check_partials(partial_data, atol=1e-10, rtol=1e-10)
+
 
 @use_tempdirs
 class BWBSimplePrepGeomTest(unittest.TestCase):
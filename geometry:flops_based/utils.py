@@ -1,3 +1,9 @@
+import numpy as np
+
+from aviary.utils.utils import wrapped_convert_units
+from aviary.variable_info.functions import add_aviary_input, add_aviary_output
+from aviary.variable_info.variable_meta_data import CoreMetaData
+
 thickness_to_chord_scaler = 0.387
 _fuselage_adjustment_scaler = 0.6730
 
@@ -24,6 +30,163 @@ def d_calc_fuselage_adjustment(chord, thickness_to_chord):
     return d1, d2
 
 
+def _station_dimensions(station_dist, chord_per_semispan_dist, span):
+    """
+    Return dimensional stations and chords of a detailed wing and their derivatives.
+
+    Stations up to 1.1 and chords up to 5.0 are fractions of the semispan, larger values
+    are already in ft.
+    """
+    half_span = 0.5 * span
+
+    station_scaled = station_dist.real <= 1.1
+    chord_scaled = chord_per_semispan_dist.real <= 5.0
+
+    y = np.where(station_scaled, station_dist * half_span, station_dist)
+    chord = np.where(chord_scaled, chord_per_semispan_dist * half_span, chord_per_semispan_dist)
+
+    dy_dstation = np.where(station_scaled, half_span, 1.0)
+    dchord_dchord = np.where(chord_scaled, half_span, 1.0)
+    dy_dspan = 0.5 * station_dist * station_scaled
+    dchord_dspan = 0.5 * chord_per_semispan_dist * chord_scaled
+
+    return y, chord, (dy_dstation, dchord_dchord, dy_dspan, dchord_dspan)
+
+
+def calc_station_integral(station_dist, chord_per_semispan_dist, span, weights=None):
+    """
+    Calculate the sum of (Y2 - Y1) * (C1 + C2) over the panels between detailed wing stations.
+
+    This is twice the planform area of the semispan, the area of the whole wing. The
+    stations are the last axis, and weights, if given, scale each of the panels.
+    """
+    y, chord, _ = _station_dimensions(station_dist, chord_per_semispan_dist, span)
+
+    panels = np.diff(y, axis=-1) * (chord[..., :-1] + chord[..., 1:])
+
+    if weights is not None:
+        panels = panels * weights
+
+    return np.sum(panels, axis=-1)
+
+
+def d_calc_station_integral(station_dist, chord_per_semispan_dist, span, weights=None):
+    """
+    Calculate partial derivatives of calc_station_integral with respect to the stations,
+    the chords, the span and the panel weights.
+    """
+    y, chord, derivs = _station_dimensions(station_dist, chord_per_semispan_dist, span)
+    dy_dstation, dchord_dchord, dy_dspan, dchord_dspan = derivs
+
+    dy = np.diff(y, axis=-1)
+    chord_sum = chord[..., :-1] + chord[..., 1:]
+
+    if weights is None:
+        weights = 1.0
+
+    # every station ends one panel and starts the next
+    width_terms = weights * chord_sum
+    chord_terms = weights * dy
+
+    d_y = np.zeros(np.broadcast(y, chord).shape, dtype=y.dtype)
+    d_y[..., 1:] += width_terms
+    d_y[..., :-1] -= width_terms
+
+    d_chord = np.zeros_like(d_y)
+    d_chord[..., 1:] += chord_terms
+    d_chord[..., :-1] += chord_terms
+
+    d_station = d_y * dy_dstation
+    d_chord_dist = d_chord * dchord_dchord
+    d_span = np.sum(d_y * dy_dspan + d_chord * dchord_dspan, axis=-1)
+    d_weights = dy * chord_sum
+
+    return d_station, d_chord_dist, d_span, d_weights
+
+
+def declare_num_designs(component):
+    """Declare the num_designs option of a geometry component."""
+    component.options.declare(
+        'num_designs',
+        types=int,
+        default=1,
+        lower=1,
+        desc='number of aircraft designs evaluated at once; when greater than one, every '
+        'input and output has a leading dimension of this size',
+    )
+
+
+def design_shape(num_designs, *shape):
+    """
+    Return the shape of a variable of num_designs designs with the given shape per design.
+
+    A single design keeps the unbatched shape, so that None is returned for scalars.
+    """
+    if num_designs == 1:
+        return shape[0] if shape else None
+
+    return (num_designs,) + shape
+
+
+def design_partials(num_designs, of_size=1, wrt_size=1):
+    """
+    Return the rows and cols of the block diagonal partials of a batched output.
+
+    Every design only depends on its own inputs. Either the output has the size of the
+    input per design and every entry depends on the same entry of the input, or the
+    output is a scalar per design that depends on every entry of the input.
+    """
+    cols = np.arange(num_designs * wrt_size)
+
+    if of_size == wrt_size:
+        return cols, cols
+
+    if of_size != 1:
+        raise ValueError(f'Unsupported batched partials of size {of_size} wrt size {wrt_size}')
+
+    return np.repeat(np.arange(num_designs), wrt_size), cols
+
+
+def _design_variable(varname, shape, units):
+    """Return the default value, units and description of a batched Aviary variable."""
+    meta = CoreMetaData[varname]
+    default_units = meta['units']
+
+    if units is None:
+        units = default_units
+
+    val = meta['default_value']
+    val = np.zeros(shape) if val is None else np.ones(shape) * val
+
+    if units != default_units:
+        val = wrapped_convert_units((val, default_units), units)
+
+    return val, units, meta['desc']
+
+
+def add_design_input(comp, varname, shape=None, units=None):
+    """
+    Add an Aviary input that may carry a leading dimension of designs.
+
+    Aviary type checks inputs against the variable metadata, which rejects arrays for
+    scalar variables, so batched scalar variables are added to the component directly.
+    """
+    if shape is None or CoreMetaData[varname]['multivalue']:
+        add_aviary_input(comp, varname, shape=shape, units=units)
+    else:
+        val, units, desc = _design_variable(varname, shape, units)
+        comp.add_input(varname, val=val, units=units, desc=desc)
+
+
+def add_design_output(comp, varname, shape=None, units=None):
+    """Add an Aviary output that may carry a leading dimension of designs."""
+    if shape is None or CoreMetaData[varname]['multivalue']:
+        add_aviary_output(comp, varname, shape=shape, units=units)
+    else:
+        val, units, desc = _design_variable(varname, shape, units)
+        comp.add_output(varname, val=val, units=units, desc=desc)
+
+
 class Names:
     """Define component I/O variable names that should not exported."""
 
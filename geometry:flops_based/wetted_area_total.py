@@ -1,6 +1,12 @@
 import openmdao.api as om
 
-from aviary.variable_info.functions import add_aviary_input, add_aviary_output
+from aviary.subsystems.geometry.flops_based.utils import (
+    add_design_input,
+    add_design_output,
+    declare_num_designs,
+    design_partials,
+    design_shape,
+)
 from aviary.variable_info.variables import Aircraft
 
 
@@ -10,18 +16,25 @@ class TotalWettedArea(om.ExplicitComponent):
     It is simple enough to skip unit test.
     """
 
+    def initialize(self):
+        declare_num_designs(self)
+
     def setup(self):
-        add_aviary_input(self, Aircraft.Canard.WETTED_AREA, units='ft**2')
-        add_aviary_input(self, Aircraft.Fuselage.WETTED_AREA, units='ft**2')
-        add_aviary_input(self, Aircraft.HorizontalTail.WETTED_AREA, units='ft**2')
-        add_aviary_input(self, Aircraft.Nacelle.TOTAL_WETTED_AREA, units='ft**2')
-        add_aviary_input(self, Aircraft.VerticalTail.WETTED_AREA, units='ft**2')
-        add_aviary_input(self, Aircraft.Wing.WETTED_AREA, units='ft**2')
+        shape = design_shape(self.options['num_designs'])
+
+        add_design_input(self, Aircraft.Canard.WETTED_AREA, shape=shape, units='ft**2')
+        add_design_input(self, Aircraft.Fuselage.WETTED_AREA, shape=shape, units='ft**2')
+        add_design_input(self, Aircraft.HorizontalTail.WETTED_AREA, shape=shape, units='ft**2')
+        add_design_input(self, Aircraft.Nacelle.TOTAL_WETTED_AREA, shape=shape, units='ft**2')
+        add_design_input(self, Aircraft.VerticalTail.WETTED_AREA, shape=shape, units='ft**2')
+        add_design_input(self, Aircraft.Wing.WETTED_AREA, shape=shape, units='ft**2')
 
-        add_aviary_output(self, Aircraft.Design.TOTAL_WETTED_AREA, units='ft**2')
+        add_design_output(self, Aircraft.Design.TOTAL_WETTED_AREA, shape=shape, units='ft**2')
 
     def setup_partials(self):
-        self.declare_partials('*', '*', val=1.0)
+        rows, cols = design_partials(self.options['num_designs'])
+
+        self.declare_partials('*', '*', rows=rows, cols=cols, val=1.0)
 
     def compute(self, inputs, outputs, discrete_inputs=None, discrete_outputs=None):
         outputs[Aircraft.Design.TOTAL_WETTED_AREA] = (
@@ -1,18 +1,30 @@
 import openmdao.api as om
 import numpy as np
 
+from aviary.subsystems.geometry.flops_based.utils import (
+    declare_num_designs,
+    design_partials,
+    design_shape,
+)
 from aviary.variable_info.functions import add_aviary_input, add_aviary_output
 from aviary.variable_info.variables import Aircraft
 
 class WingPrelim(om.ExplicitComponent):
+    def initialize(self):
+        declare_num_designs(self)
+
     def setup(self):
-        self.add_input(Aircraft.Wing.ASPECT_RATIO, units=None)
-        self.add_input(Aircraft.Wing.AREA, units="ft**2")
+        shape = design_shape(self.options["num_designs"])
+
+        self.add_input(Aircraft.Wing.ASPECT_RATIO, shape=shape, units=None)
+        self.add_input(Aircraft.Wing.AREA, shape=shape, units="ft**2")
 
-        self.add_output(Aircraft.Wing.SPAN, units="ft")
+        self.add_output(Aircraft.Wing.SPAN, shape=shape, units="ft")
 
+        rows, cols = design_partials(self.options["num_designs"])
         self.declare_partials(of=Aircraft.Wing.SPAN,
-                              wrt=[Aircraft.Wing.ASPECT_RATIO, Aircraft.Wing.AREA])
+                              wrt=[Aircraft.Wing.ASPECT_RATIO, Aircraft.Wing.AREA],
+                              rows=rows, cols=cols)
 
     def compute(self, inputs, outputs):
         AR = inputs[Aircraft.Wing.ASPECT_RATIO]
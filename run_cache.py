@@ -0,0 +1,360 @@
+# Content-addressed cache of Aviary mission runs
+"""
+Cache of Aviary mission optimization results, keyed on everything that goes into the run.
+
+Baseline_ASA.py, ASA_Optimized.py and Specified_baseleine_ASA.py are often rerun with
+identical inputs just to print the results again.  run_mission builds and runs the
+AviaryProblem the same way those scripts do, but first looks up a key made from
+
+    - the contents of the aircraft csv, with comments, blank lines and whitespace removed,
+    - the contents of the files the csv refers to, such as the engine deck,
+    - the phase_info, with tuples, arrays and numbers normalized,
+    - the optimizer, iteration limit and objective,
+    - the design variables added on top of the Aviary ones,
+    - the requested summary outputs and the Aviary version.
+
+On a hit the stored summary and final design vector are returned without building the
+model.  On a miss the problem is run and, if the driver converged, its results are
+written to <key>.json in the cache directory.
+
+Example
+-------
+    from run_cache import run_mission
+
+    summary = run_mission(
+        'aviary/models/aircraft/advanced_single_aisle/advanced_single_aisle_FLOPS.csv',
+        phase_info,
+        optimizer='IPOPT',
+        max_iter=100,
+    )
+    print('Mission fuel burn, kg:', summary['outputs'][av.Mission.Summary.FUEL_BURNED])
+"""
+
+import hashlib
+import json
+import os
+
+import aviary
+import aviary.api as av
+import numpy as np
+
+# summary outputs stored for every run, as (name, units)
+DEFAULT_OUTPUTS = (
+    (av.Mission.Summary.FUEL_BURNED, 'kg'),
+    (av.Aircraft.Wing.ASPECT_RATIO, 'unitless'),
+    (av.Mission.Summary.FINAL_TIME, 'min'),
+)
+
+
+def _normalize(value):
+    """Return value as plain JSON types, with tuples and arrays as lists and numbers as floats."""
+    if isinstance(value, dict):
+        return {str(key): _normalize(val) for key, val in value.items()}
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [_normalize(val) for val in value]
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, (int, float, np.number)):
+        return float(value)
+    if value is None or isinstance(value, str):
+        return value
+    return repr(value)
+
+
+def csv_digest(aircraft_csv):
+    """
+    Return the SHA-256 digest of the contents of an aircraft csv.
+
+    Comments, blank lines and whitespace around the fields are removed first, so edits
+    that do not change any value do not change the digest.
+
+    Parameters
+    ----------
+    aircraft_csv : str
+        aircraft csv file, as passed to AviaryProblem.load_inputs
+
+    Returns
+    -------
+    str
+        hex digest of the canonical csv contents
+    """
+    digest = hashlib.sha256()
+    with open(av.get_path(aircraft_csv), 'r') as f:
+        for line in f:
+            line = line.split('#', 1)[0].strip()
+            if line:
+                digest.update(','.join(field.strip() for field in line.split(',')).encode('utf-8'))
+                digest.update(b'\n')
+    return digest.hexdigest()
+
+
+def referenced_files(aircraft_csv):
+    """
+    Return the files an aircraft csv refers to, such as the engine deck.
+
+    Every value with a file extension that resolves to an existing file the way Aviary
+    resolves paths (absolute, working directory, then Aviary package) is returned.
+
+    Parameters
+    ----------
+    aircraft_csv : str
+        aircraft csv file, as passed to AviaryProblem.load_inputs
+
+    Returns
+    -------
+    dict
+        resolved file path for each referenced value, keyed by the value in the csv
+    """
+    files = {}
+    with open(av.get_path(aircraft_csv), 'r') as f:
+        for line in f:
+            line = line.split('#', 1)[0].strip()
+            for value in line.split(',')[1:]:
+                value = value.strip()
+                if not os.path.splitext(value)[1] or value in files:
+                    continue
+                try:
+                    float(value)
+                    continue
+                except ValueError:
+                    pass
+                try:
+                    path = av.get_path(value)
+                except FileNotFoundError:
+                    continue
+                if os.path.isfile(path):
+                    files[value] = str(path)
+    return files
+
+
+def file_digest(filename):
+    """Return the SHA-256 digest of the contents of a file."""
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 16), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def run_key(
+    aircraft_csv,
+    phase_info,
+    optimizer='IPOPT',
+    max_iter=100,
+    objective=None,
+    design_vars=None,
+    outputs=DEFAULT_OUTPUTS,
+):
+    """
+    Return the cache key of a mission run.
+
+    Parameters
+    ----------
+    aircraft_csv : str
+        aircraft csv file
+    phase_info : dict
+        mission phase_info
+    optimizer : str
+        Aviary driver name
+    max_iter : int
+        driver iteration limit
+    objective : str or None
+        Aviary objective type; None uses the Aviary default
+    design_vars : dict or None
+        design variables added to the Aviary ones, keyed by name with the keyword
+        arguments of add_design_var as values
+    outputs : sequence of (str, str)
+        summary outputs stored for the run, as (name, units)
+
+    Returns
+    -------
+    str
+        SHA-256 hex digest of the run inputs
+    """
+    inputs = {
+        'aircraft_csv': csv_digest(aircraft_csv),
+        'referenced_files': {
+            value: file_digest(path) for value, path in referenced_files(aircraft_csv).items()
+        },
+        'phase_info': _normalize(phase_info),
+        'optimizer': optimizer,
+        'max_iter': max_iter,
+        'objective': objective,
+        'design_vars': _normalize(design_vars or {}),
+        'outputs': _normalize(outputs),
+        'aviary_version': aviary.__version__,
+    }
+    text = json.dumps(inputs, sort_keys=True)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class RunCache(object):
+    """
+    Directory of run summaries stored as <key>.json files.
+
+    Attributes
+    ----------
+    directory : str
+        directory holding the cached summaries
+    """
+
+    def __init__(self, directory='run_cache'):
+        self.directory = directory
+
+    def filename(self, key):
+        """Return the file a run summary is stored in."""
+        return os.path.join(self.directory, key + '.json')
+
+    def get(self, key):
+        """Return the stored summary for key, or None if it has not been run."""
+        try:
+            with open(self.filename(key), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key, summary):
+        """
+        Store the summary for key, if its run converged.
+
+        A failed run is not stored, so that it is run again rather than returned from
+        the cache.
+
+        Parameters
+        ----------
+        key : str
+            cache key of the run
+        summary : dict
+            run summary with a converged flag
+
+        Returns
+        -------
+        bool
+            True if the summary was stored
+        """
+        if not summary.get('converged'):
+            return False
+
+        os.makedirs(self.directory, exist_ok=True)
+
+        # write to a temporary file first so an interrupted run cannot leave a partial entry
+        filename = self.filename(key)
+        with open(filename + '.tmp', 'w') as f:
+            json.dump(summary, f, indent=2)
+        os.replace(filename + '.tmp', filename)
+        return True
+
+
+def run_mission(
+    aircraft_csv,
+    phase_info,
+    optimizer='IPOPT',
+    max_iter=100,
+    objective=None,
+    design_vars=None,
+    outputs=DEFAULT_OUTPUTS,
+    cache_dir='run_cache',
+    make_plots=True,
+    runner=None,
+):
+    """
+    Run an Aviary mission optimization, or return its cached summary.
+
+    Parameters
+    ----------
+    aircraft_csv : str
+        aircraft csv file
+    phase_info : dict
+        mission phase_info
+    optimizer : str
+        Aviary driver name
+    max_iter : int
+        driver iteration limit
+    objective : str or None
+        Aviary objective type; None uses the Aviary default
+    design_vars : dict or None
+        design variables added to the Aviary ones, keyed by name with the keyword
+        arguments of add_design_var as values, for example
+        {av.Aircraft.Wing.ASPECT_RATIO: {'lower': 10, 'upper': 25, 'ref': 20}}
+    outputs : sequence of (str, str)
+        summary outputs to store, as (name, units)
+    cache_dir : str or None
+        cache directory; None always runs the problem and stores nothing
+    make_plots : bool
+        passed on to run_aviary_problem
+    runner : callable or None
+        function with the signature of run_problem that runs the mission on a miss;
+        None uses run_problem
+
+    Returns
+    -------
+    dict
+        summary with the key, converged flag, outputs (name to value), design_vars
+        (final design vector, name to list of values) and cached flag
+    """
+    cache = RunCache(cache_dir) if cache_dir is not None else None
+    key = run_key(aircraft_csv, phase_info, optimizer, max_iter, objective, design_vars, outputs)
+
+    if cache is not None:
+        summary = cache.get(key)
+        if summary is not None:
+            summary['cached'] = True
+            print('Run cache hit {}, model not built.'.format(key[:12]))
+            return summary
+
+    runner = runner or run_problem
+    summary = {'key': key}
+    args = (aircraft_csv, phase_info, optimizer, max_iter, objective, design_vars, outputs)
+    summary.update(runner(*args, make_plots=make_plots))
+
+    if cache is not None and not cache.put(key, summary):
+        print('Run {} did not converge, not cached.'.format(key[:12]))
+
+    summary['cached'] = False
+    return summary
+
+
+def run_problem(
+    aircraft_csv,
+    phase_info,
+    optimizer='IPOPT',
+    max_iter=100,
+    objective=None,
+    design_vars=None,
+    outputs=DEFAULT_OUTPUTS,
+    make_plots=True,
+):
+    """
+    Build and run an Aviary mission optimization the way the baseline scripts do.
+
+    The arguments are those of run_mission.
+
+    Returns
+    -------
+    dict
+        converged flag, outputs (name to value) and design_vars (final design vector,
+        name to list of values)
+    """
+    prob = av.AviaryProblem()
+    prob.load_inputs(aircraft_csv, phase_info)
+    prob.check_and_preprocess_inputs()
+    prob.build_model()
+    prob.add_driver(optimizer, max_iter=max_iter)
+    prob.add_design_variables()
+    for name, kwargs in (design_vars or {}).items():
+        prob.model.add_design_var(name, **kwargs)
+    if objective is None:
+        prob.add_objective()
+    else:
+        prob.add_objective(objective)
+    prob.setup()
+    prob.run_aviary_problem(make_plots=make_plots)
+
+    return {
+        'converged': bool(prob.driver.result.success),
+        'outputs': {name: float(prob.get_val(name, units=units)[0]) for name, units in outputs},
+        'design_vars': {
+            name: np.asarray(value).ravel().tolist()
+            for name, value in prob.driver.get_design_var_values(driver_scaling=False).items()
+        },
+    }
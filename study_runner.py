@@ -0,0 +1,401 @@
+# Declarative runner for Aviary mission studies
+"""
+Run Aviary mission studies described in a YAML or TOML study file.
+
+Baseline_ASA.py, ASA_Optimized.py, Specified_baseleine_ASA.py, SA_coupled_run.py,
+Optimized_M_A_run.py and the copies in Codes differ only in their phase_info, aircraft
+csv and output directory.  A study file describes those scenarios instead:
+
+    defaults:
+      aircraft_csv: aviary/models/aircraft/advanced_single_aisle/advanced_single_aisle_FLOPS.csv
+      phase_info: ../Baseline_ASA.py
+      optimizer: IPOPT
+      max_iter: 100
+      output_dir: study_output
+
+    studies:
+      - name: baseline
+      - name: baseline_mach_079
+        overrides:
+          cruise.user_options.mach_initial: [0.79, unitless]
+          cruise.user_options.mach_final: [0.79, unitless]
+      - name: ar_sweep_length
+        design_vars:
+          aircraft:wing:aspect_ratio: {lower: 10, upper: 25, ref: 20}
+        objective: fuel_burned
+
+Every study is the defaults updated with its own entries.  phase_info is either an
+inline mapping or a Python file; a file is not run, the phase_info assignment is read
+from it with load_phase_info.  overrides set single phase_info entries by dotted path.
+Lists in the file become tuples, as in the scripts.  Relative paths are relative to the
+study file, except aircraft csv paths that only exist in the Aviary package.
+
+run_studies sends the studies to a pool of worker processes that take them from a
+shared queue, so Aviary is imported once per worker rather than once per scenario.
+Every study runs in <output_dir>/<name> through run_cache.run_mission, so a study that
+was already run with the same inputs is read back from the run cache.  The results
+are written to study_results.csv in the output directory.
+
+    python study_runner.py studies/asa_studies.yaml --workers 4
+"""
+
+import argparse
+import ast
+import copy
+import csv
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+
+from run_cache import run_mission
+
+# keys a study may have; every other key is an error
+STUDY_KEYS = (
+    'name',
+    'aircraft_csv',
+    'phase_info',
+    'overrides',
+    'design_vars',
+    'objective',
+    'optimizer',
+    'max_iter',
+    'output_dir',
+    'make_plots',
+)
+
+# columns of the result table, before the summary outputs
+RESULT_FIELDS = ('name', 'converged', 'cached', 'wall_time', 'output_dir', 'error')
+
+
+def _tuples(value):
+    """Return value with every list turned into a tuple, as phase_info is written in the scripts."""
+    if isinstance(value, dict):
+        return {key: _tuples(val) for key, val in value.items()}
+    if isinstance(value, (list, tuple)):
+        return tuple(_tuples(val) for val in value)
+    return value
+
+
+def load_phase_info(filename, name='phase_info'):
+    """
+    Return the phase_info defined in a Python script without running the script.
+
+    The assignment to name must be a literal that only refers to module level constants
+    assigned before it, such as mission_distance in the ASA scripts.
+
+    Parameters
+    ----------
+    filename : str
+        Python file that assigns phase_info at module level
+    name : str
+        name of the variable to read
+
+    Returns
+    -------
+    dict
+        the phase_info
+    """
+    with open(filename, 'r') as f:
+        tree = ast.parse(f.read(), filename=filename)
+
+    constants = {}
+    for node in tree.body:
+        if not isinstance(node, ast.Assign) or len(node.targets) != 1:
+            continue
+        target = node.targets[0]
+        if not isinstance(target, ast.Name):
+            continue
+
+        # replace names of earlier constants by their values
+        value = ast.fix_missing_locations(_Constants(constants).visit(node.value))
+        if target.id == name:
+            return ast.literal_eval(value)
+        try:
+            constants[target.id] = ast.literal_eval(value)
+        except ValueError:
+            pass
+
+    raise ValueError('{} does not assign {} at module level'.format(filename, name))
+
+
+class _Constants(ast.NodeTransformer):
+    """Replace names of known constants by their literal values."""
+
+    def __init__(self, constants):
+        self.constants = constants
+
+    def visit_Name(self, node):
+        if node.id in self.constants:
+            return ast.copy_location(ast.Constant(self.constants[node.id]), node)
+        return node
+
+
+def apply_overrides(phase_info, overrides):
+    """
+    Return a copy of phase_info with entries set by dotted path.
+
+    Parameters
+    ----------
+    phase_info : dict
+        phase_info to start from; it is not modified
+    overrides : dict
+        values keyed by dotted path, such as 'cruise.user_options.mach_initial'
+
+    Returns
+    -------
+    dict
+        the updated phase_info
+    """
+    phase_info = copy.deepcopy(phase_info)
+    for path, value in (overrides or {}).items():
+        keys = path.split('.')
+        entry = phase_info
+        for key in keys[:-1]:
+            entry = entry.setdefault(key, {})
+        entry[keys[-1]] = _tuples(value)
+    return phase_info
+
+
+def _read_file(filename):
+    """Read a YAML or TOML study file."""
+    if filename.endswith('.toml'):
+        import tomllib
+
+        with open(filename, 'rb') as f:
+            return tomllib.load(f)
+
+    import yaml
+
+    with open(filename, 'r') as f:
+        return yaml.safe_load(f)
+
+
+def load_studies(filename):
+    """
+    Read a study file and return one fully resolved study dictionary per study.
+
+    Parameters
+    ----------
+    filename : str
+        YAML (.yaml, .yml) or TOML (.toml) study file
+
+    Returns
+    -------
+    list of dict
+        studies with name, aircraft_csv, phase_info, design_vars, objective, optimizer,
+        max_iter, output_dir and make_plots entries
+    """
+    data = _read_file(filename) or {}
+    directory = os.path.dirname(os.path.abspath(filename))
+    defaults = data.get('defaults', {})
+
+    def path(value):
+        value = os.path.expanduser(value)
+        full = os.path.join(directory, value)
+        return full if os.path.isabs(value) or os.path.exists(full) else value
+
+    studies = []
+    names = set()
+    for entry in data.get('studies', []):
+        study = {
+            'aircraft_csv': None,
+            'phase_info': None,
+            'overrides': {},
+            'design_vars': {},
+            'objective': None,
+            'optimizer': 'IPOPT',
+            'max_iter': 100,
+            'output_dir': 'study_output',
+            'make_plots': False,
+        }
+        study.update(defaults)
+        study.update(entry)
+
+        unknown = set(study) - set(STUDY_KEYS)
+        if unknown:
+            raise ValueError(
+                'Unknown study entries {} in {}'.format(sorted(unknown), study.get('name'))
+            )
+        if not study.get('name'):
+            raise ValueError('Every study in {} needs a name'.format(filename))
+        if study['name'] in names:
+            raise ValueError('Study name {} is used twice in {}'.format(study['name'], filename))
+        if study['aircraft_csv'] is None or study['phase_info'] is None:
+            raise ValueError('Study {} needs aircraft_csv and phase_info'.format(study['name']))
+        names.add(study['name'])
+
+        phase_info = study['phase_info']
+        if isinstance(phase_info, str):
+            phase_info = load_phase_info(path(phase_info))
+        phase_info = apply_overrides(_tuples(phase_info), study.pop('overrides'))
+
+        study.update(
+            phase_info=phase_info,
+            aircraft_csv=path(study['aircraft_csv']),
+            output_dir=os.path.normpath(
+                os.path.join(directory, os.path.expanduser(study['output_dir']), study['name'])
+            ),
+        )
+        studies.append(study)
+
+    return studies
+
+
+@contextmanager
+def working_directory(directory):
+    """
+    Create directory and run the body of the with statement in it.
+
+    The previous working directory is restored on the way out, also when the body
+    raises.
+
+    Parameters
+    ----------
+    directory : str
+        directory to work in
+    """
+    cwd = os.getcwd()
+    os.makedirs(directory, exist_ok=True)
+    os.chdir(directory)
+    try:
+        yield directory
+    finally:
+        os.chdir(cwd)
+
+
+def run_study(study):
+    """
+    Run one study in its output directory and return its result row.
+
+    Any exception is caught and reported in the error column so that one failed study
+    does not stop the others.
+
+    Parameters
+    ----------
+    study : dict
+        study dictionary from load_studies
+
+    Returns
+    -------
+    dict
+        result row with the RESULT_FIELDS and one column per summary output
+    """
+    start_time = time.time()
+    result = {'name': study['name'], 'converged': False, 'cached': False, 'error': ''}
+    result['output_dir'] = os.path.abspath(study['output_dir'])
+
+    try:
+        # Aviary writes its reports and outputs to the working directory
+        with working_directory(result['output_dir']):
+            summary = run_mission(
+                study['aircraft_csv'],
+                study['phase_info'],
+                optimizer=study['optimizer'],
+                max_iter=study['max_iter'],
+                objective=study['objective'],
+                design_vars=study['design_vars'],
+                make_plots=study['make_plots'],
+            )
+        result.update(summary['outputs'])
+        result.update(converged=summary['converged'], cached=summary['cached'])
+    except Exception:
+        result['error'] = traceback.format_exc(limit=3)
+
+    result['wall_time'] = time.time() - start_time
+    return result
+
+
+def run_studies(studies, max_workers=None, runner=run_study, callback=None):
+    """
+    Run studies in a pool of worker processes taking them from a shared queue.
+
+    Parameters
+    ----------
+    studies : list of dict
+        study dictionaries from load_studies
+    max_workers : int or None
+        number of worker processes; None uses one per CPU, 1 runs in this process
+    runner : callable
+        module level function that runs one study and returns its result row
+    callback : callable or None
+        called with each result row as soon as its study finishes
+
+    Returns
+    -------
+    list of dict
+        result rows, in the same order as studies
+    """
+    results = [None] * len(studies)
+
+    if max_workers == 1:
+        for i, study in enumerate(studies):
+            results[i] = runner(study)
+            if callback is not None:
+                callback(results[i])
+        return results
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(runner, study): i for i, study in enumerate(studies)}
+        for future in as_completed(futures):
+            i = futures[future]
+            results[i] = future.result()
+            if callback is not None:
+                callback(results[i])
+
+    return results
+
+
+def write_results(results, filename):
+    """Write result rows to a csv file, with one column per summary output."""
+    fields = list(RESULT_FIELDS)
+    for result in results:
+        fields += [name for name in result if name not in fields]
+
+    directory = os.path.dirname(filename)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    with open(filename, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the Aviary studies of a study file.')
+    parser.add_argument('study_file', help='YAML or TOML study file')
+    parser.add_argument('--workers', type=int, default=None, help='number of worker processes')
+    parser.add_argument('--only', nargs='+', default=None, help='names of the studies to run')
+    args = parser.parse_args(argv)
+
+    studies = load_studies(args.study_file)
+    if args.only:
+        studies = [study for study in studies if study['name'] in args.only]
+
+    def report(result):
+        status = 'converged' if result['converged'] else 'FAILED'
+        if result['cached']:
+            status += ' (cached)'
+        print('Study {} {} in {:.1f} s'.format(result['name'], status, result['wall_time']))
+        if result['error']:
+            print(result['error'])
+
+    results = run_studies(studies, max_workers=args.workers, callback=report)
+
+    for directory in sorted({os.path.dirname(study['output_dir']) for study in studies}):
+        write_results(
+            [
+                result
+                for study, result in zip(studies, results)
+                if os.path.dirname(study['output_dir']) == directory
+            ],
+            os.path.join(directory, 'study_results.csv'),
+        )
+
+    return results
+
+
+if __name__ == '__main__':
+    main()
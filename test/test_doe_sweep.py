@@ -0,0 +1,113 @@
+import os
+import sys
+import unittest
+
+import numpy as np
+from openmdao.utils.testing_utils import use_tempdirs
+
+# the study scripts are top level modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from doe_sweep import (  # noqa: E402
+    DOE_VARIABLES,
+    DOEDatabase,
+    case_name,
+    doe_cases,
+    doe_samples,
+    run_doe,
+)
+
+_ASPECT_RATIO = DOE_VARIABLES[0][0]
+
+
+def _stub_runner(case):
+    """Return the result row of a case without running Aviary, failing once above AR 20."""
+    os.makedirs(case['output_dir'], exist_ok=True)
+    marker = os.path.join(case['output_dir'], 'attempted')
+    converged = case['values'][_ASPECT_RATIO] <= 20.0 or os.path.exists(marker)
+    open(marker, 'w').close()
+
+    return {
+        'name': case['name'],
+        'values': case['values'],
+        'fuel_burn': sum(case['values'].values()) if converged else None,
+        'converged': converged,
+        'iterations': 10,
+        'wall_time': 0.0,
+        'output_dir': case['output_dir'],
+        'error': '' if converged else 'did not converge',
+    }
+
+
+def _run(cases, workers=2):
+    finished = []
+    db = run_doe(
+        cases, 'doe_cases.db', max_workers=workers, runner=_stub_runner, callback=finished.append
+    )
+    results = db.results()
+    db.close()
+    return sorted(result['name'] for result in finished), results
+
+
+@use_tempdirs
+class Test_DOE(unittest.TestCase):
+    """Test the resume and the case names of the DOE."""
+
+    def cases(self, method, **kwargs):
+        samples = doe_samples(method, **kwargs)
+        return doe_cases('aircraft.csv', {'cruise': {}}, samples, 'doe_output')
+
+    def test_case_name(self):
+        values = {_ASPECT_RATIO: 11.0, 'b': 2.0}
+        self.assertEqual(case_name(values), case_name({'b': 2, _ASPECT_RATIO: 11}))
+        self.assertNotEqual(case_name(values), case_name({_ASPECT_RATIO: 11.5, 'b': 2.0}))
+
+    def test_resume(self):
+        cases = self.cases('lhs', num_samples=8, seed=1)
+        failing = sorted(case['name'] for case in cases if case['values'][_ASPECT_RATIO] > 20.0)
+        self.assertTrue(0 < len(failing) < len(cases))
+
+        names, results = _run(cases)
+        self.assertEqual(names, sorted(case['name'] for case in cases))
+        self.assertEqual(sorted(row['name'] for row in results if not row['converged']), failing)
+
+        # only the failed cases are run again, and their rows are replaced
+        names, results = _run(cases)
+        self.assertEqual(names, failing)
+        self.assertEqual(len(results), len(cases))
+        self.assertTrue(all(row['converged'] for row in results))
+
+        # nothing is left to run
+        names, results = _run(cases)
+        self.assertEqual(names, [])
+
+    def test_designs_share_database(self):
+        lhs = self.cases('lhs', num_samples=8, seed=0)
+        other_seed = self.cases('lhs', num_samples=8, seed=1)
+        factorial = self.cases('full_factorial', levels=2)
+
+        _run(lhs)
+        _run(other_seed)
+        _run(factorial)
+        _run(factorial)
+
+        # every point of every design has its own row
+        db = DOEDatabase('doe_cases.db')
+        stored = db.inputs()
+        db.close()
+        self.assertEqual(len(stored), len(lhs) + len(other_seed) + len(factorial))
+        for case in lhs + other_seed + factorial:
+            self.assertEqual(stored[case['name']], case['values'])
+
+    def test_duplicate_samples(self):
+        samples = doe_samples('full_factorial', levels=2)
+        cases = doe_cases('aircraft.csv', {'cruise': {}}, np.vstack([samples, samples[:3]]), 'out')
+
+        # a repeated point is run once
+        names, results = _run(cases, workers=1)
+        self.assertEqual(names, sorted(case['name'] for case in cases[: len(samples)]))
+        self.assertEqual(len(results), len(samples))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+import os
+import sys
+import unittest
+
+import numpy as np
+import openmdao.api as om
+from openmdao.test_suite.components.paraboloid import Paraboloid
+from openmdao.utils.assert_utils import assert_near_equal, assert_warning
+from openmdao.utils.testing_utils import use_tempdirs
+
+# the study scripts are top level modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from driver_checkpoint import CheckpointRecorder, load_checkpoint, save_checkpoint  # noqa: E402
+
+
+class _FailingParaboloid(Paraboloid):
+    """Paraboloid that is interrupted on a given evaluation, like a job that is killed."""
+
+    def initialize(self):
+        self.options.declare('fail_at', default=None)
+        self.evaluations = 0
+
+    def compute(self, inputs, outputs):
+        self.evaluations += 1
+        if self.evaluations == self.options['fail_at']:
+            raise KeyboardInterrupt()
+        super().compute(inputs, outputs)
+
+
+def _paraboloid_problem(maxiter=500, fail_at=None):
+    prob = om.Problem()
+    prob.model.add_subsystem(
+        'parab', _FailingParaboloid(fail_at=fail_at), promotes_inputs=['x', 'y']
+    )
+    prob.model.add_design_var('x', lower=-50.0, upper=50.0)
+    prob.model.add_design_var('y', lower=-50.0, upper=50.0)
+    prob.model.add_objective('parab.f_xy')
+
+    prob.driver = om.ScipyOptimizeDriver(optimizer='COBYLA', maxiter=maxiter, tol=1e-9, disp=False)
+    prob.setup()
+    prob.set_val('x', 50.0)
+    prob.set_val('y', 50.0)
+    return prob
+
+
+@use_tempdirs
+class Test_DriverCheckpoint(unittest.TestCase):
+    """Test checkpointing and resuming an optimization of the paraboloid."""
+
+    def test_round_trip(self):
+        prob = _paraboloid_problem()
+        prob.set_val('x', 3.0)
+        prob.set_val('y', -4.0)
+        save_checkpoint(prob, 'checkpoint.npz', iteration=7)
+
+        resumed = _paraboloid_problem()
+        self.assertEqual(load_checkpoint(resumed, 'checkpoint.npz'), 7)
+        assert_near_equal(resumed.get_val('x'), 3.0, 1e-15)
+        assert_near_equal(resumed.get_val('y'), -4.0, 1e-15)
+
+    def test_resume(self):
+        # a run stopped early checkpoints its last point
+        prob = _paraboloid_problem(maxiter=10)
+        recorder = CheckpointRecorder('checkpoint.npz', every=3)
+        prob.driver.add_recorder(recorder)
+        prob.run_driver()
+        prob.cleanup()
+
+        x, y = prob.get_val('x'), prob.get_val('y')
+        self.assertGreater(abs(x[0] - 20.0 / 3.0), 1e-3)
+
+        # the resumed run starts from that point and finishes the optimization
+        resumed = _paraboloid_problem()
+        iteration = load_checkpoint(resumed, 'checkpoint.npz')
+        self.assertEqual(iteration, recorder._iteration)
+        assert_near_equal(resumed.get_val('x'), x, 1e-15)
+        assert_near_equal(resumed.get_val('y'), y, 1e-15)
+
+        resumed.driver.add_recorder(CheckpointRecorder('checkpoint.npz', iteration=iteration))
+        resumed.run_driver()
+        resumed.cleanup()
+
+        assert_near_equal(resumed.get_val('x'), 20.0 / 3.0, 1e-6)
+        assert_near_equal(resumed.get_val('y'), -22.0 / 3.0, 1e-6)
+        self.assertGreater(load_checkpoint(_paraboloid_problem(), 'checkpoint.npz'), iteration)
+
+    def test_failed_run(self):
+        prob = _paraboloid_problem(fail_at=16)
+        recorder = CheckpointRecorder('checkpoint.npz', every=10)
+        prob.driver.add_recorder(recorder)
+
+        with self.assertRaises(KeyboardInterrupt):
+            try:
+                prob.run_driver()
+            except BaseException:
+                recorder.save()
+                raise
+
+        # the checkpoint holds the last point evaluated before the failure, not the last
+        # one written every 10 evaluations
+        resumed = _paraboloid_problem()
+        self.assertGreater(recorder._iteration, 10)
+        self.assertEqual(load_checkpoint(resumed, 'checkpoint.npz'), recorder._iteration)
+        assert_near_equal(resumed.get_val('x'), recorder._values['x'], 1e-15)
+        assert_near_equal(resumed.get_val('y'), recorder._values['y'], 1e-15)
+
+    def test_mismatch(self):
+        np.savez('checkpoint.npz', x=np.array([1.0]), z=np.array([2.0]), __iteration__=3)
+
+        prob = _paraboloid_problem()
+        msg = 'Checkpoint value z does not match a design variable and was not loaded.'
+        with assert_warning(om.OpenMDAOWarning, msg):
+            self.assertEqual(load_checkpoint(prob, 'checkpoint.npz'), 3)
+
+        assert_near_equal(prob.get_val('x'), 1.0, 1e-15)
+        assert_near_equal(prob.get_val('y'), 50.0, 1e-15)
+
+
+if __name__ == '__main__':
+    unittest.main()
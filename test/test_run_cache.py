@@ -0,0 +1,169 @@
+import os
+import sys
+import unittest
+
+from openmdao.utils.testing_utils import use_tempdirs
+
+# the study scripts are top level modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from run_cache import RunCache, referenced_files, run_key, run_mission  # noqa: E402
+
+_PHASE_INFO = {
+    'cruise': {
+        'user_options': {
+            'num_segments': 5,
+            'mach_initial': (0.79, 'unitless'),
+            'altitude_initial': (35000.0, 'ft'),
+        },
+    },
+}
+
+_OUTPUTS = (('fuel_burned', 'kg'),)
+
+
+def _write_inputs(deck_values=(1.0, 2.0), aspect_ratio=11.0, comment=''):
+    """Write an aircraft csv that refers to an engine deck in the working directory."""
+    with open('engine.deck', 'w') as f:
+        f.write('# mach, altitude, thrust\n')
+        for value in deck_values:
+            f.write('0.5, 30000, {}\n'.format(value))
+
+    with open('aircraft.csv', 'w') as f:
+        f.write('# test aircraft{}\n'.format(comment))
+        f.write('aircraft:wing:aspect_ratio,{},unitless\n'.format(aspect_ratio))
+        f.write('aircraft:engine:data_file,engine.deck,unitless\n')
+        f.write('aircraft:wing:span,118.0,ft\n')
+
+
+class _StubRunner(object):
+    """Return a fixed mission summary without running Aviary, counting the calls."""
+
+    def __init__(self, converged=True):
+        self.converged = converged
+        self.calls = 0
+
+    def __call__(
+        self,
+        aircraft_csv,
+        phase_info,
+        optimizer='IPOPT',
+        max_iter=100,
+        objective=None,
+        design_vars=None,
+        outputs=_OUTPUTS,
+        make_plots=True,
+    ):
+        self.calls += 1
+        return {
+            'converged': self.converged,
+            'outputs': {name: 1234.5 for name, units in outputs},
+            'design_vars': {'aircraft:wing:aspect_ratio': [11.0]},
+        }
+
+
+def _run(runner):
+    return run_mission(
+        'aircraft.csv', _PHASE_INFO, outputs=_OUTPUTS, make_plots=False, runner=runner
+    )
+
+
+@use_tempdirs
+class Test_RunKey(unittest.TestCase):
+    """Test which changes to the run inputs change the cache key."""
+
+    def setUp(self):
+        _write_inputs()
+        self.key = run_key('aircraft.csv', _PHASE_INFO, outputs=_OUTPUTS)
+
+    def key_after(self, **kwargs):
+        _write_inputs(**kwargs)
+        return run_key('aircraft.csv', _PHASE_INFO, outputs=_OUTPUTS)
+
+    def test_referenced_files(self):
+        self.assertEqual(list(referenced_files('aircraft.csv')), ['engine.deck'])
+
+    def test_comment(self):
+        self.assertEqual(self.key_after(comment=', edited'), self.key)
+
+    def test_csv_value(self):
+        self.assertNotEqual(self.key_after(aspect_ratio=12.0), self.key)
+
+    def test_engine_deck(self):
+        self.assertNotEqual(self.key_after(deck_values=(1.0, 2.5)), self.key)
+
+    def test_phase_info(self):
+        # lists and tuples, ints and floats give the same key
+        phase_info = {
+            'cruise': {
+                'user_options': {
+                    'num_segments': 5.0,
+                    'mach_initial': [0.79, 'unitless'],
+                    'altitude_initial': [35000, 'ft'],
+                },
+            },
+        }
+        self.assertEqual(run_key('aircraft.csv', phase_info, outputs=_OUTPUTS), self.key)
+
+        phase_info['cruise']['user_options']['num_segments'] = 6
+        self.assertNotEqual(run_key('aircraft.csv', phase_info, outputs=_OUTPUTS), self.key)
+
+    def test_run_options(self):
+        keys = {
+            self.key,
+            run_key('aircraft.csv', _PHASE_INFO, optimizer='SNOPT', outputs=_OUTPUTS),
+            run_key('aircraft.csv', _PHASE_INFO, max_iter=50, outputs=_OUTPUTS),
+            run_key('aircraft.csv', _PHASE_INFO, objective='mass', outputs=_OUTPUTS),
+            run_key(
+                'aircraft.csv',
+                _PHASE_INFO,
+                design_vars={'aircraft:wing:sweep': {'lower': 20.0, 'upper': 30.0}},
+                outputs=_OUTPUTS,
+            ),
+        }
+        self.assertEqual(len(keys), 5)
+
+
+@use_tempdirs
+class Test_RunMission(unittest.TestCase):
+    """Test the cache hits and misses of run_mission."""
+
+    def setUp(self):
+        _write_inputs()
+
+    def test_hit(self):
+        runner = _StubRunner()
+
+        summary = _run(runner)
+        self.assertFalse(summary['cached'])
+        self.assertEqual(runner.calls, 1)
+
+        cached = _run(runner)
+        self.assertTrue(cached['cached'])
+        self.assertEqual(runner.calls, 1)
+        for field in ('key', 'converged', 'outputs', 'design_vars'):
+            self.assertEqual(cached[field], summary[field])
+
+    def test_miss(self):
+        runner = _StubRunner()
+        _run(runner)
+
+        # a new engine deck is a new run
+        _write_inputs(deck_values=(1.0, 2.5))
+        self.assertFalse(_run(runner)['cached'])
+        self.assertEqual(runner.calls, 2)
+
+    def test_failed_run(self):
+        runner = _StubRunner(converged=False)
+
+        summary = _run(runner)
+        self.assertFalse(summary['converged'])
+        self.assertIsNone(RunCache().get(summary['key']))
+
+        # the failed run is run again
+        self.assertFalse(_run(runner)['cached'])
+        self.assertEqual(runner.calls, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
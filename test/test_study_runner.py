@@ -0,0 +1,248 @@
+import os
+import sys
+import textwrap
+import unittest
+from unittest import mock
+
+from openmdao.utils.testing_utils import use_tempdirs
+
+# the study scripts are top level modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import study_runner  # noqa: E402
+from study_runner import apply_overrides, load_phase_info, load_studies, run_study  # noqa: E402
+
+_REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_MISSION_SCRIPT = """
+import aviary.api as av
+
+mission_distance = 1500
+cruise_mach = 0.78
+
+phase_info = {
+    'cruise': {
+        'user_options': {
+            'num_segments': 5,
+            'mach_initial': (cruise_mach, 'unitless'),
+            'distance': (mission_distance, 'nmi'),
+        },
+    },
+}
+
+prob = av.AviaryProblem()
+"""
+
+_STUDY_FILE = """
+defaults:
+  aircraft_csv: aircraft.csv
+  phase_info: mission.py
+  max_iter: 50
+  output_dir: study_output
+
+studies:
+  - name: baseline
+  - name: mach_079
+    overrides:
+      cruise.user_options.mach_initial: [0.79, unitless]
+      cruise.user_options.num_segments: 6
+  - name: inline
+    aircraft_csv: models/aircraft/advanced_single_aisle/advanced_single_aisle_FLOPS.csv
+    phase_info:
+      climb:
+        user_options:
+          altitude_final: [32000.0, ft]
+    optimizer: SNOPT
+    design_vars:
+      aircraft:wing:aspect_ratio: {lower: 10, upper: 25, ref: 20}
+    objective: fuel_burned
+"""
+
+_TOML_FILE = """
+[defaults]
+aircraft_csv = "aircraft.csv"
+phase_info = "mission.py"
+max_iter = 50
+output_dir = "study_output"
+
+[[studies]]
+name = "baseline"
+
+[[studies]]
+name = "mach_079"
+overrides = {"cruise.user_options.mach_initial" = [0.79, "unitless"], "cruise.user_options.num_segments" = 6}
+"""
+
+
+def _write(filename, text):
+    directory = os.path.dirname(filename)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(filename, 'w') as f:
+        f.write(textwrap.dedent(text))
+
+
+@use_tempdirs
+class Test_LoadStudies(unittest.TestCase):
+    """Test reading study files and expanding the studies."""
+
+    def setUp(self):
+        _write(os.path.join('studies', 'mission.py'), _MISSION_SCRIPT)
+        _write(os.path.join('studies', 'aircraft.csv'), 'aircraft:wing:span,118.0,ft\n')
+        _write(os.path.join('studies', 'studies.yaml'), _STUDY_FILE)
+        _write(os.path.join('studies', 'studies.toml'), _TOML_FILE)
+        self.directory = os.path.abspath('studies')
+
+    def test_load_phase_info(self):
+        phase_info = load_phase_info(os.path.join('studies', 'mission.py'))
+
+        # the constants are substituted and the script is not run
+        self.assertEqual(
+            phase_info,
+            {
+                'cruise': {
+                    'user_options': {
+                        'num_segments': 5,
+                        'mach_initial': (0.78, 'unitless'),
+                        'distance': (1500, 'nmi'),
+                    },
+                },
+            },
+        )
+
+    def test_apply_overrides(self):
+        phase_info = {'cruise': {'user_options': {'num_segments': 5}}}
+        updated = apply_overrides(
+            phase_info, {'cruise.user_options.mach_final': [0.8, 'unitless'], 'climb.x': 1}
+        )
+
+        self.assertEqual(
+            updated,
+            {
+                'cruise': {'user_options': {'num_segments': 5, 'mach_final': (0.8, 'unitless')}},
+                'climb': {'x': 1},
+            },
+        )
+        self.assertEqual(phase_info, {'cruise': {'user_options': {'num_segments': 5}}})
+
+    def test_expand(self):
+        baseline, mach_079, inline = load_studies(os.path.join('studies', 'studies.yaml'))
+
+        # defaults, with paths relative to the study file
+        self.assertEqual(baseline['name'], 'baseline')
+        self.assertEqual(baseline['aircraft_csv'], os.path.join(self.directory, 'aircraft.csv'))
+        self.assertEqual(
+            baseline['output_dir'], os.path.join(self.directory, 'study_output', 'baseline')
+        )
+        self.assertEqual(baseline['optimizer'], 'IPOPT')
+        self.assertEqual(baseline['max_iter'], 50)
+        self.assertEqual(baseline['design_vars'], {})
+        self.assertIsNone(baseline['objective'])
+        self.assertFalse(baseline['make_plots'])
+        self.assertNotIn('overrides', baseline)
+        self.assertEqual(baseline['phase_info']['cruise']['user_options']['num_segments'], 5)
+
+        # overrides are applied to the study only, with lists as tuples
+        options = mach_079['phase_info']['cruise']['user_options']
+        self.assertEqual(options['mach_initial'], (0.79, 'unitless'))
+        self.assertEqual(options['num_segments'], 6)
+        self.assertEqual(options['distance'], (1500, 'nmi'))
+        self.assertEqual(
+            baseline['phase_info']['cruise']['user_options']['mach_initial'], (0.78, 'unitless')
+        )
+
+        # an inline phase_info, and an Aviary package csv path kept as given
+        self.assertEqual(
+            inline['phase_info'], {'climb': {'user_options': {'altitude_final': (32000.0, 'ft')}}}
+        )
+        self.assertEqual(
+            inline['aircraft_csv'],
+            'models/aircraft/advanced_single_aisle/advanced_single_aisle_FLOPS.csv',
+        )
+        self.assertEqual(inline['optimizer'], 'SNOPT')
+        self.assertEqual(inline['objective'], 'fuel_burned')
+        self.assertEqual(
+            inline['design_vars'],
+            {'aircraft:wing:aspect_ratio': {'lower': 10, 'upper': 25, 'ref': 20}},
+        )
+
+    def test_toml(self):
+        yaml_studies = load_studies(os.path.join('studies', 'studies.yaml'))
+        toml_studies = load_studies(os.path.join('studies', 'studies.toml'))
+
+        self.assertEqual(toml_studies, yaml_studies[:2])
+
+    def test_errors(self):
+        cases = {
+            'unknown': ('studies:\n  - name: a\n    mach: 0.8\n', 'Unknown study entries'),
+            'unnamed': ('studies:\n  - aircraft_csv: aircraft.csv\n', 'needs a name'),
+            'twice': (
+                'studies:\n  - name: a\n    aircraft_csv: aircraft.csv\n  - name: a\n',
+                'used twice',
+            ),
+            'no_csv': ('studies:\n  - name: a\n', 'needs aircraft_csv and phase_info'),
+        }
+        for name, (text, msg) in cases.items():
+            with self.subTest(name):
+                filename = os.path.join('studies', name + '.yaml')
+                _write(filename, 'defaults:\n  phase_info: mission.py\n' + text)
+                with self.assertRaises(ValueError) as cm:
+                    load_studies(filename)
+                self.assertIn(msg, str(cm.exception))
+
+    def test_asa_studies(self):
+        studies = load_studies(os.path.join(_REPO_DIR, 'studies', 'asa_studies.yaml'))
+
+        names = [study['name'] for study in studies]
+        self.assertEqual(len(names), len(set(names)))
+        for study in studies:
+            self.assertIn('cruise', study['phase_info'])
+
+
+@use_tempdirs
+class Test_RunStudy(unittest.TestCase):
+    """Test that a study runs in its output directory."""
+
+    def setUp(self):
+        self.study = {
+            'name': 'baseline',
+            'aircraft_csv': 'aircraft.csv',
+            'phase_info': {'cruise': {}},
+            'design_vars': {},
+            'objective': None,
+            'optimizer': 'IPOPT',
+            'max_iter': 10,
+            'output_dir': os.path.join('study_output', 'baseline'),
+            'make_plots': False,
+        }
+
+    def test_run_study(self):
+        directories = []
+
+        def run_mission(*args, **kwargs):
+            directories.append(os.getcwd())
+            return {'converged': True, 'cached': False, 'outputs': {'fuel_burned': 1234.5}}
+
+        cwd = os.getcwd()
+        with mock.patch.object(study_runner, 'run_mission', side_effect=run_mission):
+            result = run_study(self.study)
+
+        self.assertEqual(directories, [os.path.abspath(self.study['output_dir'])])
+        self.assertEqual(os.getcwd(), cwd)
+        self.assertTrue(result['converged'])
+        self.assertEqual(result['fuel_burned'], 1234.5)
+        self.assertEqual(result['error'], '')
+
+    def test_failed_study(self):
+        cwd = os.getcwd()
+        with mock.patch.object(study_runner, 'run_mission', side_effect=RuntimeError('failed')):
+            result = run_study(self.study)
+
+        # the error is reported and the working directory restored
+        self.assertEqual(os.getcwd(), cwd)
+        self.assertFalse(result['converged'])
+        self.assertIn('RuntimeError: failed', result['error'])
+
+
+if __name__ == '__main__':
+    unittest.main()